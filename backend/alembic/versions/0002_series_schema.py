@@ -0,0 +1,103 @@
+"""content hashes, job input links, per-seller sends, qc findings and lookup indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 05:20:11.734906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table("job_run_files",
+    sa.Column("job_run_id", sa.Integer(), nullable=False),
+    sa.Column("uploaded_file_id", sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(["job_run_id"], ["job_runs.id"], ),
+    sa.ForeignKeyConstraint(["uploaded_file_id"], ["uploaded_files.id"], ),
+    sa.PrimaryKeyConstraint("job_run_id", "uploaded_file_id")
+    )
+    with op.batch_alter_table("uploaded_files", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("sha256", sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column("size_bytes", sa.BigInteger(), nullable=True))
+        batch_op.create_index("ix_uploaded_files_investor_type_uploaded", ["investor_id", "file_type", "uploaded_at"], unique=False)
+        batch_op.create_index(batch_op.f("ix_uploaded_files_sha256"), ["sha256"], unique=False)
+
+    with op.batch_alter_table("job_runs", schema=None) as batch_op:
+        batch_op.create_index("ix_job_runs_investor_started", ["investor_id", "started_at"], unique=False)
+
+    with op.batch_alter_table("rate_sheets", schema=None) as batch_op:
+        batch_op.create_index(batch_op.f("ix_rate_sheets_job_run_id"), ["job_run_id"], unique=False)
+
+    with op.batch_alter_table("email_distributions", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("seller_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("idempotency_key", sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column("attempts", sa.Integer(), nullable=True))
+        # Named as PostgreSQL names the constraints create_all makes for the models.
+        batch_op.create_foreign_key("email_distributions_seller_id_fkey", "sellers", ["seller_id"], ["id"])
+        batch_op.create_unique_constraint("email_distributions_idempotency_key_key", ["idempotency_key"])
+
+    with op.batch_alter_table("qc_reviews", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("summary", sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column("findings", sa.JSON(), nullable=True))
+
+    # Earlier builds looked tiers and product types up before inserting them and wrote no sellers, so no duplicates exist.
+    with op.batch_alter_table("sellers", schema=None) as batch_op:
+        batch_op.create_unique_constraint("uq_sellers_investor_org", ["investor_id", "org_id"])
+
+    with op.batch_alter_table("seller_tier_assignments", schema=None) as batch_op:
+        batch_op.create_unique_constraint("uq_seller_tier_assignments_seller_channel", ["seller_id", "channel"])
+
+    with op.batch_alter_table("tiers", schema=None) as batch_op:
+        batch_op.create_unique_constraint("uq_tiers_investor_code", ["investor_id", "code"])
+
+    with op.batch_alter_table("product_types", schema=None) as batch_op:
+        batch_op.create_unique_constraint("uq_product_types_investor_code", ["investor_id", "code"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("product_types", schema=None) as batch_op:
+        batch_op.drop_constraint("uq_product_types_investor_code", type_="unique")
+
+    with op.batch_alter_table("tiers", schema=None) as batch_op:
+        batch_op.drop_constraint("uq_tiers_investor_code", type_="unique")
+
+    with op.batch_alter_table("seller_tier_assignments", schema=None) as batch_op:
+        batch_op.drop_constraint("uq_seller_tier_assignments_seller_channel", type_="unique")
+
+    with op.batch_alter_table("sellers", schema=None) as batch_op:
+        batch_op.drop_constraint("uq_sellers_investor_org", type_="unique")
+
+    with op.batch_alter_table("qc_reviews", schema=None) as batch_op:
+        batch_op.drop_column("findings")
+        batch_op.drop_column("summary")
+
+    with op.batch_alter_table("email_distributions", schema=None) as batch_op:
+        batch_op.drop_constraint("email_distributions_idempotency_key_key", type_="unique")
+        batch_op.drop_constraint("email_distributions_seller_id_fkey", type_="foreignkey")
+        batch_op.drop_column("attempts")
+        batch_op.drop_column("idempotency_key")
+        batch_op.drop_column("seller_id")
+
+    with op.batch_alter_table("rate_sheets", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_rate_sheets_job_run_id"))
+
+    with op.batch_alter_table("job_runs", schema=None) as batch_op:
+        batch_op.drop_index("ix_job_runs_investor_started")
+
+    with op.batch_alter_table("uploaded_files", schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f("ix_uploaded_files_sha256"))
+        batch_op.drop_index("ix_uploaded_files_investor_type_uploaded")
+        batch_op.drop_column("size_bytes")
+        batch_op.drop_column("sha256")
+
+    op.drop_table("job_run_files")
@@ -0,0 +1,34 @@
+"""per-investor pricing config
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:12:40.512977
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("investors", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("config", sa.JSON(), nullable=True))
+
+    if op.get_bind().dialect.name == "postgresql":
+        # ADD VALUE cannot run inside a transaction block on older servers.
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobtype ADD VALUE IF NOT EXISTS 'DAILY_NONAGENCY'")
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop an enum value; DAILY_NONAGENCY stays on the jobtype type.
+    with op.batch_alter_table("investors", schema=None) as batch_op:
+        batch_op.drop_column("config")
@@ -0,0 +1,30 @@
+"""distributing job status
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 15:41:08.203114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite stores the status as a plain string; only PostgreSQL has an enum type to extend.
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE jobstatus ADD VALUE IF NOT EXISTS 'DISTRIBUTING'")
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop an enum value; release any claimed jobs so nothing is left in DISTRIBUTING.
+    op.execute("UPDATE job_runs SET status = 'COMPLETED' WHERE status = 'DISTRIBUTING'")
@@ -0,0 +1,30 @@
+"""sending email status
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 18:02:51.417730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # SQLite stores the status as a plain string; only PostgreSQL has an enum type to extend.
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE emailstatus ADD VALUE IF NOT EXISTS 'SENDING'")
+
+
+def downgrade() -> None:
+    # PostgreSQL cannot drop an enum value. Older builds resend anything not SENT, so unconfirmed rows count as sent.
+    op.execute("UPDATE email_distributions SET status = 'SENT' WHERE status = 'SENDING'")
@@ -0,0 +1,34 @@
+"""distribution claim lease
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 18:47:33.095182
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOB_STATUSES = ("PENDING", "RUNNING", "FAILED", "COMPLETED", "WAITING_FOR_QC", "APPROVED_FOR_DISTRIBUTION", "DISTRIBUTING", "DISTRIBUTED")
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("job_runs", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("claimed_at", sa.DateTime(), nullable=True))
+        # jobstatus already exists on PostgreSQL; creating it again would fail.
+        batch_op.add_column(sa.Column("claimed_from", postgresql.ENUM(*JOB_STATUSES, name="jobstatus", create_type=False), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("job_runs", schema=None) as batch_op:
+        batch_op.drop_column("claimed_from")
+        batch_op.drop_column("claimed_at")
@@ -0,0 +1,199 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.investor_config import investor_config, resolve_config
+from app.core.job_queue import JobQueue, get_job_queue
+from app.core.storage import store_stream
+from app.database import get_db
+from app.models import ChannelEnum, FileType, Investor, JobRun, JobStatus, JobType, UploadedFile
+from app.schemas.investors import InvestorResponse
+from app.schemas.phh import PriceBatchRequest, PriceBatchResponse, PriceBatchResult, PriceQuoteResponse
+
+router = APIRouter(prefix="/api/investors", tags=["investors"])
+
+
+def _investor_response(investor: Investor) -> InvestorResponse:
+    try:
+        config, error = investor_config(investor).to_dict(), None
+    except (TypeError, ValueError) as exc:
+        config, error = None, str(exc)
+    return InvestorResponse(id=investor.id, code=investor.code, name=investor.name, is_active=bool(investor.is_active), config=config, config_error=error)
+
+
+def _get_investor(db: Session, code: str) -> Investor:
+    investor = db.query(Investor).filter(Investor.code == code.upper()).first()
+    if not investor:
+        raise HTTPException(status_code=404, detail=f"Investor {code} not found")
+    return investor
+
+
+def queue_daily_job(
+    db: Session,
+    job_queue: JobQueue,
+    investor: Investor,
+    effective_date: str,
+    uploads: Dict[FileType, Optional[UploadFile]],
+    mode: str = "full",
+    profile: bool = False,
+    deadline: Optional[datetime] = None,
+) -> Dict:
+    """Stores the investor's input files and queues a daily pricing job for them."""
+    from app.core.pricing_engine import JOB_MODES
+
+    if mode not in JOB_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(JOB_MODES)}")
+    try:
+        config = investor_config(investor)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    required = list(dict.fromkeys([FileType.CUSTOMER_TIERS, *(config.base_file_type(channel) for channel in config.channels), FileType.ADJUSTORS]))
+    missing = [kind.value for kind in required if uploads.get(kind) is None]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing uploads for {investor.code}: {', '.join(missing)}")
+    eff_date = date.fromisoformat(effective_date)
+    storage_root = Path(settings.storage_root) / "uploads"
+    records = []
+    for kind in required:
+        upload = uploads[kind]
+        blob = store_stream(upload.file, storage_root, suffix=Path(upload.filename or "").suffix)
+        records.append(
+            UploadedFile(
+                investor_id=investor.id,
+                file_type=kind,
+                original_filename=upload.filename,
+                stored_path=str(blob.path),
+                sha256=blob.sha256,
+                size_bytes=blob.size_bytes,
+            )
+        )
+    job = JobRun(
+        investor_id=investor.id,
+        status=JobStatus.PENDING,
+        job_type=JobType(config.job_type),
+        effective_date=eff_date,
+        payload={"mode": mode, **({"profile": True} if profile else {}), **({"deadline": deadline.isoformat()} if deadline else {})},
+    )
+    job.uploaded_files = records
+    db.add(job)
+    db.commit()
+    job_queue.enqueue(job.id)
+    return {"job_id": job.id, "status": job.status}
+
+
+def _price_investor_id(db: Session, code: str) -> int:
+    from app.core.price_index import price_indexes
+
+    # Cached by the registry, so a warm quote makes no database round trip.
+    investor_id = price_indexes.investor_id(db, code)
+    if investor_id is None:
+        raise HTTPException(status_code=404, detail=f"Investor {code} not found")
+    return investor_id
+
+
+def quote_price(
+    db: Session,
+    code: str,
+    org_id: str,
+    channel: ChannelEnum,
+    product: str,
+    note_rate: float,
+    column: str,
+    effective_date: Optional[date] = None,
+    interpolate: bool = True,
+) -> PriceQuoteResponse:
+    """Prices one loan off the investor's index for the effective date (the latest priced date by default)."""
+    from app.core.price_index import PriceLookupError, price_indexes
+
+    try:
+        index = price_indexes.get(db, _price_investor_id(db, code), effective_date)
+        quote = index.quote(org_id, channel.value, product, note_rate, column, interpolate)
+    except PriceLookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return PriceQuoteResponse.model_validate(quote)
+
+
+def quote_prices(db: Session, code: str, payload: PriceBatchRequest) -> PriceBatchResponse:
+    from app.core.price_index import PriceLookupError, price_indexes, quote_many
+
+    try:
+        index = price_indexes.get(db, _price_investor_id(db, code), payload.effective_date)
+    except PriceLookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    loans = (
+        {"org_id": loan.org_id, "channel": loan.channel.value, "product": loan.product, "note_rate": loan.note_rate, "column": loan.column}
+        for loan in payload.loans
+    )
+    results = [
+        PriceBatchResult(quote=PriceQuoteResponse.model_validate(quote) if quote else None, error=error)
+        for quote, error in quote_many(index, loans, payload.interpolate)
+    ]
+    return PriceBatchResponse(effective_date=index.effective_date, job_id=index.job_id, results=results)
+
+
+@router.get("", response_model=List[InvestorResponse])
+def list_investors(db: Session = Depends(get_db)):
+    return [_investor_response(investor) for investor in db.query(Investor).order_by(Investor.code)]
+
+
+@router.get("/{code}", response_model=InvestorResponse)
+def get_investor(code: str, db: Session = Depends(get_db)):
+    return _investor_response(_get_investor(db, code))
+
+
+@router.put("/{code}/config", response_model=InvestorResponse)
+def update_config(code: str, config: Dict = Body(...), db: Session = Depends(get_db)):
+    investor = _get_investor(db, code)
+    stored = {key: value for key, value in config.items() if key != "code"}
+    try:
+        resolve_config(investor.code, investor.name, stored)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    investor.config = stored
+    db.commit()
+    return _investor_response(investor)
+
+
+@router.post("/{code}/ingest", status_code=202)
+def ingest(
+    code: str,
+    effective_date: str,
+    customer_tiers_csv: UploadFile = File(...),
+    adjustors_xlsx: UploadFile = File(...),
+    del_base_xlsx: Optional[UploadFile] = File(None),
+    nondel_base_xlsx: Optional[UploadFile] = File(None),
+    db: Session = Depends(get_db),
+    job_queue: JobQueue = Depends(get_job_queue),
+    mode: str = "full",
+    profile: bool = False,
+    deadline: Optional[datetime] = None,
+):
+    uploads = {
+        FileType.CUSTOMER_TIERS: customer_tiers_csv,
+        FileType.ADJUSTORS: adjustors_xlsx,
+        FileType.DEL_BASE: del_base_xlsx,
+        FileType.NONDEL_BASE: nondel_base_xlsx,
+    }
+    return queue_daily_job(db, job_queue, _get_investor(db, code), effective_date, uploads, mode, profile, deadline)
+
+
+@router.get("/{code}/price", response_model=PriceQuoteResponse)
+def get_price(
+    code: str,
+    org_id: str,
+    channel: ChannelEnum,
+    product: str,
+    note_rate: float,
+    column: str,
+    effective_date: Optional[date] = None,
+    interpolate: bool = True,
+    db: Session = Depends(get_db),
+):
+    return quote_price(db, code, org_id, channel, product, note_rate, column, effective_date, interpolate)
+
+
+@router.post("/{code}/price/batch", response_model=PriceBatchResponse)
+def get_prices(code: str, payload: PriceBatchRequest, db: Session = Depends(get_db)):
+    return quote_prices(db, code, payload)
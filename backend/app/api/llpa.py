@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import List, Optional
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from fastapi.responses import Response
+from app.config import settings
+from app.core.distribution import XLSX_CONTENT_TYPE
+from app.core.storage import store_stream
+from app.schemas.llpa import LLPAGrid, LLPAGridsResponse, LLPASheet
+
+# The grid engine pulls in NumPy and openpyxl, so it is imported inside the routes.
+router = APIRouter(prefix="/api/llpa", tags=["llpa"])
+
+
+def _scan(workbook: UploadFile, sheets: Optional[List[str]], grids: Optional[List[str]] = None):
+    from app.core.llpa_grids import detect_all_grids
+
+    blob = store_stream(workbook.file, Path(settings.storage_root) / "uploads" / "llpa", suffix=Path(workbook.filename or "").suffix)
+    try:
+        return detect_all_grids(blob.path, sheets=sheets, grid_ids=grids)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/grids", response_model=LLPAGridsResponse)
+def detect_grids(workbook: UploadFile = File(...), sheets: Optional[List[str]] = Query(None)):
+    """Every LLPA grid the browser tool would find in the workbook, with the output tab each one lands on."""
+    from app.core.llpa_grids import generate_tab_name, output_filename
+
+    results = _scan(workbook, sheets)
+    response_sheets = [
+        LLPASheet(
+            sheet_name=result.sheet_name,
+            rows=result.rows,
+            cols=result.cols,
+            grids=[LLPAGrid(**grid.as_dict(), tab_name=generate_tab_name(grid)) for grid in result.grids],
+            errors=result.errors,
+        )
+        for result in results
+    ]
+    return LLPAGridsResponse(
+        filename=workbook.filename or "",
+        output_filename=output_filename(workbook.filename or ""),
+        grid_count=sum(len(result.grids) for result in results),
+        tab_count=len({name for result in results for name in result.outputs}),
+        sheets=response_sheets,
+    )
+
+
+@router.post("/transpose")
+def transpose_grids(
+    workbook: UploadFile = File(...),
+    sheets: Optional[List[str]] = Query(None),
+    grids: Optional[List[str]] = Query(None, description="Grid ids to keep; all detected grids by default"),
+):
+    """The LoanNEX LLPA template workbook for the detected grids, one tab per grid."""
+    from app.core.llpa_grids import output_filename, output_workbook
+
+    results = _scan(workbook, sheets, grids)
+    tabs = {name for result in results for name in result.outputs}
+    if not tabs:
+        raise HTTPException(status_code=404, detail="No LLPA grids found")
+    return Response(
+        content=output_workbook(results),
+        media_type=XLSX_CONTENT_TYPE,
+        headers={
+            "Content-Disposition": f'attachment; filename="{output_filename(workbook.filename or "")}"',
+            "X-LLPA-Tabs": str(len(tabs)),
+        },
+    )
@@ -0,0 +1,28 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def decode_time_cursor(cursor: str) -> Tuple[datetime, int]:
+    values = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(values[0]), int(values[1])
+    except (IndexError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
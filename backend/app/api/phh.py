@@ -1,19 +1,55 @@
-from datetime import date
+import os
+from datetime import date, datetime
+from io import BytesIO
 from pathlib import Path
-from typing import List
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Header, UploadFile, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload, sessionmaker
+from app.database import get_async_db, get_db
 from app.config import settings
-from app.models import JobRun, Investor, JobStatus, JobType, UploadedFile, FileType, RateSheet, EmailDistribution, EmailDistributionRecipientList
-from app.schemas.phh import JobRunSummary, JobRunDetail, RateSheetResponse, UploadedFileInfo, EmailSendRequest
-from app.core.pricing_engine import PricingEngine
-from app.email import send_rate_sheet_email
+from app.models import ChannelEnum, JobRun, Investor, JobStatus, FileType, RateSheet, ProductType, Tier, EmailDistribution, EmailStatus, EmailDistributionRecipientList
+from app.schemas.phh import (
+    EmailSendRequest,
+    GridSliceResponse,
+    JobProgress,
+    JobRunDetail,
+    JobRunPage,
+    JobRunSummary,
+    PriceBatchRequest,
+    PriceBatchResponse,
+    PriceQuoteResponse,
+    QCApprovalRequest,
+    QCApprovalResponse,
+    RateSheetPage,
+    RateSheetResponse,
+    UploadedFileInfo,
+)
+from app.api.investors import queue_daily_job, quote_price, quote_prices
+from app.api.pagination import MAX_PAGE_SIZE, decode_cursor, decode_time_cursor, encode_cursor
+from app.core.bundle import BUNDLE_COMPRESSION, BundleFile, bundle_etag, file_token, iter_bundle
+from app.core.distribution import XLSX_CONTENT_TYPE, DistributionEngine, distributable_statuses, get_distribution_transport, run_distribution
+from app.core.job_queue import JobQueue, get_job_queue
+from app.core.email_packaging import GROUP_MODES, MessageTooLargeError, RateSheetAttachment
+from app.core.output_cache import output_cache
+from app.email import SENT_STATUSES, default_sink, send_rate_sheet_email
 
+# NumPy, pandas and openpyxl are imported inside the routes that need them (mostly via the pricing engine),
+# so API workers start without them.
 router = APIRouter(prefix="/api/phh", tags=["phh"])
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 
-@router.post("/ingest")
+def _phh_investor(db: Session) -> Investor:
+    investor = db.query(Investor).filter(Investor.code == "PHH").first()
+    if not investor:
+        raise HTTPException(status_code=400, detail="PHH investor not seeded")
+    return investor
+
+
+@router.post("/ingest", status_code=202)
 def ingest(
     effective_date: str,
     customer_tiers_csv: UploadFile = File(...),
@@ -21,93 +57,365 @@ def ingest(
     nondel_base_xlsx: UploadFile = File(...),
     adjustors_xlsx: UploadFile = File(...),
     db: Session = Depends(get_db),
+    job_queue: JobQueue = Depends(get_job_queue),
+    mode: str = "full",
+    profile: bool = False,
+    deadline: Optional[datetime] = None,
 ):
-    investor = db.query(Investor).filter(Investor.code == "PHH").first()
-    if not investor:
-        raise HTTPException(status_code=400, detail="PHH investor not seeded")
-    eff_date = date.fromisoformat(effective_date)
-    storage_root = Path(settings.storage_root) / "uploads"
-    storage_root.mkdir(parents=True, exist_ok=True)
-    files = [
-        (customer_tiers_csv, FileType.CUSTOMER_TIERS),
-        (del_base_xlsx, FileType.DEL_BASE),
-        (nondel_base_xlsx, FileType.NONDEL_BASE),
-        (adjustors_xlsx, FileType.ADJUSTORS),
-    ]
-    for upload, kind in files:
-        target_path = storage_root / upload.filename
-        with open(target_path, "wb") as f:
-            f.write(upload.file.read())
-        db.add(
-            UploadedFile(
-                investor_id=investor.id,
-                file_type=kind,
-                original_filename=upload.filename,
-                stored_path=str(target_path),
-            )
-        )
-    job = JobRun(
-        investor_id=investor.id,
-        status=JobStatus.PENDING,
-        job_type=JobType.DAILY_PHH_NONAGENCY,
-        effective_date=eff_date,
+    investor = _phh_investor(db)
+    uploads = {
+        FileType.CUSTOMER_TIERS: customer_tiers_csv,
+        FileType.DEL_BASE: del_base_xlsx,
+        FileType.NONDEL_BASE: nondel_base_xlsx,
+        FileType.ADJUSTORS: adjustors_xlsx,
+    }
+    return queue_daily_job(db, job_queue, investor, effective_date, uploads, mode, profile, deadline)
+
+
+def _ratesheet_rows(job_id: int):
+    product = aliased(ProductType)
+    tier = aliased(Tier)
+    return (
+        select(RateSheet, product.code, tier.code)
+        .outerjoin(product, RateSheet.product_type_id == product.id)
+        .outerjoin(tier, RateSheet.tier_id == tier.id)
+        .where(RateSheet.job_run_id == job_id)
+        .order_by(RateSheet.id)
     )
-    db.add(job)
-    db.commit()
-    PricingEngine(db).generate(job.id)
-    return {"job_id": job.id}
 
 
-@router.get("/jobs", response_model=List[JobRunSummary])
-def list_jobs(db: Session = Depends(get_db)):
-    jobs = db.query(JobRun).order_by(JobRun.started_at.desc()).all()
-    return jobs
+def _ratesheet_response(sheet: RateSheet, product_code: Optional[str], tier_code: Optional[str]) -> RateSheetResponse:
+    return RateSheetResponse(
+        id=sheet.id,
+        channel=sheet.channel,
+        product_type=product_code or str(sheet.product_type_id),
+        tier=tier_code or str(sheet.tier_id),
+        adjustment_applied=sheet.adjustment_applied,
+        generated_filename=sheet.generated_filename,
+        generated_path=sheet.generated_path,
+    )
+
+
+# The dashboard polls the read-only job routes below, so they run on the event loop with an async session
+# instead of each holding a threadpool worker and a pooled sync connection.
+@router.get("/jobs", response_model=JobRunPage)
+async def list_jobs(
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[JobStatus] = None,
+    effective_from: Optional[date] = None,
+    effective_to: Optional[date] = None,
+):
+    query = select(JobRun)
+    if status is not None:
+        query = query.where(JobRun.status == status)
+    if effective_from is not None:
+        query = query.where(JobRun.effective_date >= effective_from)
+    if effective_to is not None:
+        query = query.where(JobRun.effective_date <= effective_to)
+    if cursor:
+        started_at, last_id = decode_time_cursor(cursor)
+        query = query.where(or_(JobRun.started_at < started_at, and_(JobRun.started_at == started_at, JobRun.id < last_id)))
+    jobs = (await db.scalars(query.order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit + 1))).all()
+    next_cursor = encode_cursor(jobs[limit - 1].started_at, jobs[limit - 1].id) if len(jobs) > limit else None
+    return JobRunPage(items=[JobRunSummary.from_orm(j) for j in jobs[:limit]], next_cursor=next_cursor)
 
 
 @router.get("/jobs/{job_id}", response_model=JobRunDetail)
-def get_job(job_id: int, db: Session = Depends(get_db)):
-    job = db.query(JobRun).filter(JobRun.id == job_id).first()
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await db.scalar(select(JobRun).options(selectinload(JobRun.uploaded_files)).where(JobRun.id == job_id))
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    uploaded = db.query(UploadedFile).filter(UploadedFile.investor_id == job.investor_id).all()
-    ratesheets = db.query(RateSheet).filter(RateSheet.job_run_id == job.id).all()
+    rows = (await db.execute(_ratesheet_rows(job.id))).all()
     return JobRunDetail(
         id=job.id,
         status=job.status,
         effective_date=job.effective_date,
         job_type=job.job_type,
-        uploaded_files=[UploadedFileInfo.from_orm(u) for u in uploaded],
-        ratesheets=[RateSheetResponse(id=r.id, channel=r.channel, product_type=str(r.product_type_id), tier=str(r.tier_id), adjustment_applied=r.adjustment_applied, generated_filename=r.generated_filename, generated_path=r.generated_path) for r in ratesheets],
+        uploaded_files=[UploadedFileInfo.from_orm(u) for u in job.uploaded_files],
+        ratesheets=[_ratesheet_response(*row) for row in rows],
         payload=job.payload,
     )
 
 
-@router.get("/jobs/{job_id}/ratesheets", response_model=List[RateSheetResponse])
-def list_ratesheets(job_id: int, db: Session = Depends(get_db)):
-    ratesheets = db.query(RateSheet).filter(RateSheet.job_run_id == job_id).all()
-    return [
-        RateSheetResponse(
-            id=r.id,
-            channel=r.channel,
-            product_type=str(r.product_type_id),
-            tier=str(r.tier_id),
-            adjustment_applied=r.adjustment_applied,
-            generated_filename=r.generated_filename,
-            generated_path=r.generated_path,
-        )
-        for r in ratesheets
+@router.get("/jobs/{job_id}/progress", response_model=JobProgress)
+def get_job_progress(job_id: int, db: Session = Depends(get_db)):
+    job = db.query(JobRun).filter(JobRun.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    progress = (job.payload or {}).get("progress", {})
+    return JobProgress(
+        id=job.id,
+        status=job.status,
+        stage=progress.get("stage"),
+        done=progress.get("done", 0),
+        total=progress.get("total", 0),
+        error_message=job.error_message,
+    )
+
+
+@router.get("/jobs/{job_id}/ratesheets", response_model=RateSheetPage)
+async def list_ratesheets(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    query = _ratesheet_rows(job_id)
+    if cursor:
+        values = decode_cursor(cursor)
+        if not values or not isinstance(values[0], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(RateSheet.id > values[0])
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    next_cursor = encode_cursor(rows[limit - 1][0].id) if len(rows) > limit else None
+    return RateSheetPage(items=[_ratesheet_response(*row) for row in rows[:limit]], next_cursor=next_cursor)
+
+
+@router.get("/jobs/{job_id}/bundle.zip")
+def download_job_bundle(
+    job_id: int,
+    db: Session = Depends(get_db),
+    channel: Optional[List[ChannelEnum]] = Query(None),
+    product: Optional[List[str]] = Query(None),
+    tier: Optional[List[str]] = Query(None),
+    compression: str = Query("stored", pattern=f"^({'|'.join(BUNDLE_COMPRESSION)})$"),
+    if_none_match: Optional[str] = Header(None),
+):
+    job = db.query(JobRun).filter(JobRun.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    channels = set(channel or [])
+    products = {value.upper() for value in product or []}
+    tiers = {value.upper() for value in tier or []}
+    rows = [
+        (sheet, product_code, tier_code)
+        for sheet, product_code, tier_code in db.execute(_ratesheet_rows(job.id))
+        if (not channels or sheet.channel in channels)
+        and (not products or (product_code or "").upper() in products)
+        and (not tiers or (tier_code or "").upper() in tiers)
     ]
+    if not rows:
+        raise HTTPException(status_code=404, detail="No rate sheets match")
+    # Computed from stored fingerprints (or file stats for older rows) so a 304 never touches the workbooks.
+    etag = bundle_etag(
+        [job.id, job.status.value, compression]
+        + [[sheet.id, sheet.adjustment_applied, (sheet.metadata_ or {}).get("fingerprint") or file_token(sheet.generated_path)] for sheet, _, _ in rows]
+    )
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    from app.core.pricing_engine import PricingEngine
+
+    engine = PricingEngine(db)
+    # Held until the last file is streamed, which is after this returns.
+    pins = output_cache.pins()
+    try:
+        files = [
+            BundleFile(
+                path=str(engine.materialize(sheet, pins=pins)),
+                arcname=sheet.generated_filename,
+                details={
+                    "rate_sheet_id": sheet.id,
+                    "channel": sheet.channel.value,
+                    "product": product_code,
+                    "tier": tier_code,
+                    "adjustment": sheet.adjustment_applied,
+                },
+            )
+            for sheet, product_code, tier_code in rows
+        ]
+    except FileNotFoundError as exc:
+        pins.release()
+        raise HTTPException(status_code=404, detail=str(exc))
+    manifest = {
+        "job_id": job.id,
+        "effective_date": job.effective_date,
+        "status": job.status.value,
+        "compression": compression,
+        "filters": {"channel": sorted(c.value for c in channels), "product": sorted(products), "tier": sorted(tiers)},
+    }
+    return StreamingResponse(
+        _iter_pinned(pins, iter_bundle(files, manifest, compression, timestamp=job.finished_at)),
+        media_type="application/zip",
+        headers={"ETag": etag, "Content-Disposition": f'attachment; filename="{engine.config_for(job).code}_{job.effective_date:%Y%m%d}_job_{job.id}.zip"'},
+    )
+
+
+@router.get("/ratesheets/{rate_sheet_id}/grid", response_model=GridSliceResponse)
+def get_ratesheet_grid(
+    rate_sheet_id: int,
+    db: Session = Depends(get_db),
+    format: str = Query("json", pattern="^(json|npz)$"),
+    base: bool = False,
+    rate_min: Optional[float] = None,
+    rate_max: Optional[float] = None,
+    columns: Optional[List[str]] = Query(None),
+):
+    sheet = db.query(RateSheet).filter(RateSheet.id == rate_sheet_id).first()
+    if not sheet:
+        raise HTTPException(status_code=404, detail="Rate sheet not found")
+    metadata = sheet.metadata_ or {}
+    grid_path = metadata.get("grid_path")
+    if not grid_path or not Path(grid_path).exists():
+        raise HTTPException(status_code=404, detail="No stored grid for this rate sheet")
+    import numpy as np
+    from app.core.grid_store import open_grid_partition
+
+    stored = open_grid_partition(grid_path)
+    grid = stored.select(None if base else metadata.get("tier_code"), rate_min, rate_max, columns)
+    if format == "npz":
+        buffer = BytesIO()
+        np.savez(buffer, note_rates=grid.note_rates, prices=grid.prices, columns=np.array(grid.columns))
+        return Response(
+            content=buffer.getvalue(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="rate_sheet_{rate_sheet_id}_grid.npz"'},
+        )
+    return GridSliceResponse(
+        rate_sheet_id=sheet.id,
+        job_id=stored.meta["job_id"],
+        effective_date=stored.meta["effective_date"],
+        channel=stored.meta["channel"],
+        product=stored.meta["product"],
+        tier=grid.tier_code,
+        columns=grid.columns,
+        note_rates=grid.note_rates.tolist(),
+        prices=grid.price_rows(),
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored on both sides.
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def _iter_pinned(pins, chunks):
+    with pins:
+        yield from chunks
+
+
+def _iter_file(handle, chunk_size: int = DOWNLOAD_CHUNK_SIZE):
+    with handle:
+        yield from iter(lambda: handle.read(chunk_size), b"")
+
+
+@router.get("/ratesheets/{rate_sheet_id}/download")
+def download_ratesheet(rate_sheet_id: int, db: Session = Depends(get_db), if_none_match: Optional[str] = Header(None)):
+    sheet = db.query(RateSheet).filter(RateSheet.id == rate_sheet_id).first()
+    if not sheet:
+        raise HTTPException(status_code=404, detail="Rate sheet not found")
+    # The fingerprint covers every input that shapes the workbook, so it is a strong validator before anything is built.
+    fingerprint = (sheet.metadata_ or {}).get("fingerprint")
+    etag = f'"{fingerprint}"' if fingerprint else None
+    if etag and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    from app.core.pricing_engine import PricingEngine
+
+    # Opened under a pin and before responding, so a cache eviction cannot pull the file away.
+    with output_cache.pins() as pins:
+        try:
+            path = PricingEngine(db).materialize(sheet, pins=pins)
+        except FileNotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc))
+        handle = open(path, "rb")
+    stat = os.fstat(handle.fileno())
+    if etag is None:
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        if _etag_matches(if_none_match, etag):
+            handle.close()
+            return Response(status_code=304, headers={"ETag": etag})
+    return StreamingResponse(
+        _iter_file(handle),
+        media_type=XLSX_CONTENT_TYPE,
+        headers={
+            "ETag": etag,
+            "Content-Length": str(stat.st_size),
+            "Content-Disposition": f'attachment; filename="{sheet.generated_filename or path.name}"',
+        },
+    )
+
+
+@router.get("/price", response_model=PriceQuoteResponse)
+def get_price(
+    org_id: str,
+    channel: ChannelEnum,
+    product: str,
+    note_rate: float,
+    column: str,
+    effective_date: Optional[date] = None,
+    interpolate: bool = True,
+    db: Session = Depends(get_db),
+):
+    return quote_price(db, "PHH", org_id, channel, product, note_rate, column, effective_date, interpolate)
+
+
+@router.post("/price/batch", response_model=PriceBatchResponse)
+def get_prices(payload: PriceBatchRequest, db: Session = Depends(get_db)):
+    return quote_prices(db, "PHH", payload)
+
+
+def _check_released(job: JobRun) -> None:
+    if job.status == JobStatus.WAITING_FOR_QC and settings.qc_gate:
+        raise HTTPException(status_code=400, detail="Job is waiting for QC approval")
+
+
+@router.post("/jobs/{job_id}/qc/approve", response_model=QCApprovalResponse)
+def approve_qc(job_id: int, payload: QCApprovalRequest, db: Session = Depends(get_db)):
+    """Signs off a job held by QC_GATE, recording the decision on its QC review, so it can be distributed."""
+    from app.core.qc import approve
+
+    job = db.query(JobRun).filter(JobRun.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    try:
+        review = approve(db, job, reviewer_user_id=payload.reviewer_user_id, comments=payload.comments)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return QCApprovalResponse(job_id=job.id, status=job.status, review_id=review.id)
+
+
+@router.post("/jobs/{job_id}/distribute", status_code=202)
+def distribute(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    transport=Depends(get_distribution_transport),
+    sink=Depends(default_sink),
+):
+    job = db.query(JobRun).filter(JobRun.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    _check_released(job)
+    if job.status not in distributable_statuses() and job.status != JobStatus.DISTRIBUTING:
+        raise HTTPException(status_code=400, detail="Job not ready for distribution")
+    if sink is None:
+        raise HTTPException(status_code=400, detail="SENDGRID_API_KEY is not configured")
+    # The claim is a conditional update, so of two concurrent requests only one starts a run. A DISTRIBUTING job
+    # whose run stopped renewing its claim (the process died) is taken over and resumed.
+    if not DistributionEngine(db).claim(job):
+        raise HTTPException(status_code=409, detail="Job is already being distributed")
+    background_tasks.add_task(run_distribution, sessionmaker(bind=db.get_bind()), job.id, transport, True, sink)
+    return {"job_id": job.id, "status": "queued"}
 
 
 @router.post("/jobs/{job_id}/send_emails")
-def send_emails(job_id: int, payload: EmailSendRequest, db: Session = Depends(get_db)):
+def send_emails(job_id: int, payload: EmailSendRequest, db: Session = Depends(get_db), sink=Depends(default_sink)):
     job = db.query(JobRun).filter(JobRun.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    if job.status not in {JobStatus.COMPLETED, JobStatus.WAITING_FOR_QC, JobStatus.APPROVED_FOR_DISTRIBUTION}:
+    _check_released(job)
+    if job.status not in set(distributable_statuses()) - {JobStatus.DISTRIBUTED}:
         raise HTTPException(status_code=400, detail="Job not ready for distribution")
-    ratesheets = db.query(RateSheet).filter(RateSheet.job_run_id == job.id).all()
-    attachments = [r.generated_path for r in ratesheets]
+    if payload.group_by is not None and payload.group_by not in GROUP_MODES:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_MODES)}")
+    ratesheets = db.query(RateSheet).filter(RateSheet.job_run_id == job.id).order_by(RateSheet.id).all()
+    from app.core.pricing_engine import PricingEngine
+
+    engine = PricingEngine(db)
     recipients = payload.recipients or settings.default_admin_emails
     if not payload.recipients:
         default_list = (
@@ -120,21 +428,43 @@ def send_emails(job_id: int, payload: EmailSendRequest, db: Session = Depends(ge
         )
         if default_list:
             recipients = default_list.emails
-    response = send_rate_sheet_email(
-        subject=f"PHH Non-Agency Tiered Rate Sheets – {job.effective_date}",
-        recipients=recipients,
-        body=f"Attached rate sheets for {job.effective_date} ({len(attachments)} files).",
-        attachments=attachments,
-    )
-    record = EmailDistribution(
-        investor_id=job.investor_id,
-        job_run_id=job.id,
-        subject=f"PHH Non-Agency Tiered Rate Sheets – {job.effective_date}",
-        recipient_list=recipients,
-        attachments=[{"path": a} for a in attachments],
-        status="SENT" if response.get("status") in {200, 202, "skipped"} else "FAILED",
-        response_payload=response,
-    )
-    db.add(record)
+    config = engine.config_for(job)
+    date_stamp = job.effective_date.strftime("%Y%m%d")
+    # Packaging reads the workbooks after they are all built, so cached ones stay pinned until the send returns.
+    with output_cache.pins() as pins:
+        attachments = [
+            RateSheetAttachment(
+                path=str(engine.materialize(r, pins=pins)),
+                channel=r.channel.value,
+                product=(r.metadata_ or {}).get("product_code") or str(r.product_type_id),
+            )
+            for r in ratesheets
+        ]
+        try:
+            response = send_rate_sheet_email(
+                subject=config.email_subject.format(name=config.name, code=config.code, date=job.effective_date),
+                recipients=recipients,
+                body=f"Attached rate sheets for {job.effective_date} ({len(attachments)} files).",
+                attachments=attachments,
+                output_dir=str(Path(settings.storage_root) / config.directory / date_stamp / f"job_{job.id}" / "email"),
+                group_by=payload.group_by,
+                prefix=f"{config.code}_{date_stamp}",
+                sink=sink,
+            )
+        except MessageTooLargeError as exc:
+            # Raised while planning, so no message has gone out.
+            raise HTTPException(status_code=413, detail=str(exc))
+    for message in response["messages"]:
+        db.add(
+            EmailDistribution(
+                investor_id=job.investor_id,
+                job_run_id=job.id,
+                subject=message["subject"],
+                recipient_list=recipients,
+                attachments=message["attachments"],
+                status=EmailStatus.SENT if message["status"] in SENT_STATUSES else EmailStatus.FAILED,
+                response_payload={key: value for key, value in message.items() if key not in {"subject", "attachments"}},
+            )
+        )
     db.commit()
     return response
@@ -6,12 +6,53 @@ import json
 
 class Settings(BaseSettings):
     database_url: str = Field("postgresql+psycopg2://postgres:postgres@db:5432/investors", alias="DATABASE_URL")
+    # Derived from DATABASE_URL (asyncpg / aiosqlite) when unset.
+    async_database_url: str = Field("", alias="ASYNC_DATABASE_URL")
+    db_pool_size: int = Field(10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(10.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    worker_db_pool_size: int = Field(4, alias="WORKER_DB_POOL_SIZE")
+    worker_db_max_overflow: int = Field(2, alias="WORKER_DB_MAX_OVERFLOW")
     redis_url: str = Field("redis://redis:6379/0", alias="REDIS_URL")
     sendgrid_api_key: str = Field("", alias="SENDGRID_API_KEY")
+    sendgrid_api_url: str = Field("https://api.sendgrid.com/v3/mail/send", alias="SENDGRID_API_URL")
+    email_group_by: str = Field("channel", alias="EMAIL_GROUP_BY")
+    email_max_message_bytes: int = Field(20 * 1024 * 1024, alias="EMAIL_MAX_MESSAGE_BYTES")
+    distribution_concurrency: int = Field(8, alias="DISTRIBUTION_CONCURRENCY")
+    distribution_rate_per_second: float = Field(10.0, alias="DISTRIBUTION_RATE_PER_SECOND")
+    distribution_burst: int = Field(20, alias="DISTRIBUTION_BURST")
+    distribution_max_attempts: int = Field(5, alias="DISTRIBUTION_MAX_ATTEMPTS")
+    distribution_backoff_seconds: float = Field(0.5, alias="DISTRIBUTION_BACKOFF_SECONDS")
+    distribution_status_batch: int = Field(100, alias="DISTRIBUTION_STATUS_BATCH")
+    distribution_claim_timeout_seconds: int = Field(900, alias="DISTRIBUTION_CLAIM_TIMEOUT_SECONDS")
     email_from_address: str = Field("noreply@example.com", alias="EMAIL_FROM_ADDRESS")
     default_admin_emails: List[str] = Field(default_factory=lambda: ["admin@example.com"], alias="DEFAULT_ADMIN_EMAILS")
     app_secret_key: str = Field("change-me", alias="APP_SECRET_KEY")
     storage_root: str = Field("/workspace/Investor-Support-Tools/data", alias="STORAGE_ROOT")
+    workbook_cache_max_bytes: int = Field(256 * 1024 * 1024, alias="WORKBOOK_CACHE_MAX_BYTES")
+    output_cache_max_bytes: int = Field(512 * 1024 * 1024, alias="OUTPUT_CACHE_MAX_BYTES")
+    pricing_workers: int = Field(1, alias="PRICING_WORKERS")
+    pricing_start_method: str = Field("spawn", alias="PRICING_START_METHOD")
+    # Processes scanning LLPA guide sheets; 0 uses one per CPU.
+    llpa_workers: int = Field(0, alias="LLPA_WORKERS")
+    job_queue_backend: str = Field("redis", alias="JOB_QUEUE_BACKEND")
+    job_queue_name: str = Field("pricing-jobs", alias="JOB_QUEUE_NAME")
+    job_worker_concurrency: int = Field(2, alias="JOB_WORKER_CONCURRENCY")
+    job_scheduler_lookahead: int = Field(16, alias="JOB_SCHEDULER_LOOKAHEAD")
+    # A worker that has not renewed its heartbeat for this long is presumed dead and its jobs are requeued.
+    job_worker_timeout_seconds: int = Field(60, alias="JOB_WORKER_TIMEOUT_SECONDS")
+    job_progress_interval: float = Field(0.5, alias="JOB_PROGRESS_INTERVAL")
+    price_index_refresh_seconds: float = Field(30.0, alias="PRICE_INDEX_REFRESH_SECONDS")
+    price_index_max_dates: int = Field(7, alias="PRICE_INDEX_MAX_DATES")
+    telemetry_enabled: bool = Field(True, alias="TELEMETRY_ENABLED")
+    job_profile: bool = Field(False, alias="JOB_PROFILE")
+    qc_max_price_change: float = Field(1.0, alias="QC_MAX_PRICE_CHANGE")
+    qc_ladder_tolerance: float = Field(1e-9, alias="QC_LADDER_TOLERANCE")
+    qc_tier_tolerance: float = Field(1e-9, alias="QC_TIER_TOLERANCE")
+    qc_max_findings: int = Field(2000, alias="QC_MAX_FINDINGS")
+    qc_gate: bool = Field(False, alias="QC_GATE")
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,86 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Sequence
+
+BUNDLE_COMPRESSION = {"stored": zipfile.ZIP_STORED, "deflate": zipfile.ZIP_DEFLATED}
+MANIFEST_NAME = "manifest.json"
+BUNDLE_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class BundleFile:
+    path: str
+    arcname: str
+    # Copied into the manifest entry alongside the size and checksum.
+    details: Dict = field(default_factory=dict)
+
+
+class _ChunkSink:
+    """Write-only file object for ZipFile. Without tell/seek, ZipFile streams entries with data descriptors."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def file_token(path: str | None) -> List | None:
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def bundle_etag(parts: Sequence) -> str:
+    # Weak: lazily built sheets can differ byte-wise across rebuilds while carrying the same prices.
+    digest = hashlib.sha256(json.dumps(list(parts), default=str).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def iter_bundle(
+    files: Sequence[BundleFile],
+    manifest: Dict,
+    compression: str = "stored",
+    timestamp: datetime | None = None,
+    chunk_size: int = BUNDLE_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yields a zip of `files` followed by a manifest, holding at most one chunk of one file in memory."""
+    compress_type = BUNDLE_COMPRESSION[compression]
+    sink = _ChunkSink()
+    entries: List[Dict] = []
+    with zipfile.ZipFile(sink, "w", compression=compress_type) as archive:
+        for file in files:
+            info = zipfile.ZipInfo.from_file(file.path, file.arcname)
+            info.compress_type = compress_type
+            digest = hashlib.sha256()
+            with open(file.path, "rb") as source, archive.open(info, "w") as target:
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    digest.update(chunk)
+                    target.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            entries.append({"name": file.arcname, **file.details, "size_bytes": info.file_size, "sha256": digest.hexdigest()})
+            data = sink.drain()
+            if data:
+                yield data
+        stamp = (timestamp or datetime(1980, 1, 1)).timetuple()[:6]
+        manifest_info = zipfile.ZipInfo(MANIFEST_NAME, date_time=stamp)
+        manifest_info.compress_type = compress_type
+        archive.writestr(manifest_info, json.dumps({**manifest, "files": entries}, indent=2, default=str))
+    yield sink.drain()
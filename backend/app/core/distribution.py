@@ -0,0 +1,415 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import and_, case, insert, or_, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.output_cache import CachePins, output_cache
+from app.email import SendGridSink, default_sink
+from app.models import EmailDistribution, EmailStatus, JobRun, JobStatus, RateSheet, Seller, SellerTierAssignment
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+DISTRIBUTABLE_STATUSES = (JobStatus.COMPLETED, JobStatus.WAITING_FOR_QC, JobStatus.APPROVED_FOR_DISTRIBUTION, JobStatus.DISTRIBUTED)
+
+
+def distributable_statuses() -> Tuple[JobStatus, ...]:
+    # With QC_GATE on, a flagged job waits for approval instead of going out to sellers.
+    if settings.qc_gate:
+        return tuple(status for status in DISTRIBUTABLE_STATUSES if status != JobStatus.WAITING_FOR_QC)
+    return DISTRIBUTABLE_STATUSES
+
+
+class DistributionClaimError(RuntimeError):
+    pass
+
+
+def idempotency_key(investor_code: str, job_run_id: int, seller_id: int) -> str:
+    # PHH's keys read "phh-distribution:...", as they did before other investors were distributed.
+    return hashlib.sha256(f"{investor_code.lower()}-distribution:{job_run_id}:{seller_id}".encode()).hexdigest()
+
+
+def is_retryable(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._updated = clock()
+
+    async def acquire(self) -> None:
+        while True:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await self.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class PlannedMessage:
+    distribution_id: int
+    seller_id: int
+    key: str
+    recipients: List[str]
+    subject: str
+    attachments: List[str]
+
+
+@dataclass
+class DistributionPlan:
+    messages: List[PlannedMessage] = field(default_factory=list)
+    already_sent: int = 0
+    skipped_sellers: int = 0
+    unconfirmed: int = 0
+
+
+class DistributionEngine:
+    """Sends each active seller the rate sheets for their own tiers, one message per seller."""
+
+    def __init__(
+        self,
+        db: Session,
+        transport: httpx.AsyncBaseTransport | None = None,
+        sink: SendGridSink | None = None,
+        concurrency: int | None = None,
+        rate_per_second: float | None = None,
+        burst: int | None = None,
+        max_attempts: int | None = None,
+        backoff_seconds: float | None = None,
+        status_batch: int | None = None,
+        sleep: Callable[[float], Awaitable] = asyncio.sleep,
+    ):
+        self.db = db
+        self.transport = transport
+        # None when no SENDGRID_API_KEY is configured; run() then sends nothing.
+        self.sink = sink if sink is not None else default_sink()
+        self.concurrency = max(concurrency or settings.distribution_concurrency, 1)
+        self.rate_per_second = rate_per_second or settings.distribution_rate_per_second
+        self.burst = burst or settings.distribution_burst
+        self.max_attempts = max(max_attempts or settings.distribution_max_attempts, 1)
+        self.backoff_seconds = settings.distribution_backoff_seconds if backoff_seconds is None else backoff_seconds
+        self.status_batch = max(status_batch or settings.distribution_status_batch, 1)
+        self.sleep = sleep
+        # (job id, claimed_at) of the claim this engine is sending under.
+        self._lease: Tuple[int, datetime] | None = None
+
+    def claim(self, job_run: JobRun) -> bool:
+        """Moves the job to DISTRIBUTING if it is still in the status it was read with, or takes over a claim whose
+        run stopped renewing it. False if another run holds the job."""
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=settings.distribution_claim_timeout_seconds)
+        result = self.db.execute(
+            update(JobRun)
+            .where(
+                JobRun.id == job_run.id,
+                or_(
+                    and_(JobRun.status == job_run.status, JobRun.status.in_(distributable_statuses())),
+                    and_(JobRun.status == JobStatus.DISTRIBUTING, or_(JobRun.claimed_at.is_(None), JobRun.claimed_at < stale)),
+                ),
+            )
+            # A takeover keeps the status the first claim replaced, so the job is released back to it.
+            .values(
+                status=JobStatus.DISTRIBUTING,
+                claimed_at=now,
+                claimed_from=case((JobRun.status == JobStatus.DISTRIBUTING, JobRun.claimed_from), else_=JobRun.status),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        if result.rowcount != 1:
+            return False
+        self.db.refresh(job_run)
+        return True
+
+    def _renew(self, job_run_id: int, claimed_at: datetime) -> datetime:
+        renewed = datetime.utcnow()
+        result = self.db.execute(
+            update(JobRun)
+            .where(JobRun.id == job_run_id, JobRun.claimed_at == claimed_at)
+            .values(claimed_at=renewed)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            self.db.rollback()
+            raise DistributionClaimError(f"Job {job_run_id} was taken over by another distribution run")
+        return renewed
+
+    def _release(self, job_run: JobRun, claimed_at: datetime, status: JobStatus, payload: Dict | None = None) -> None:
+        values = {"status": status, "claimed_at": None}
+        if payload is not None:
+            values["payload"] = payload
+        # Conditional, so a run whose claim was taken over cannot overwrite the run that holds it now.
+        self.db.execute(
+            update(JobRun).where(JobRun.id == job_run.id, JobRun.claimed_at == claimed_at).values(**values).execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+
+    def plan(self, job_run: JobRun, pins: CachePins | None = None) -> DistributionPlan:
+        """Records a row per seller still to be sent. Cached workbooks are pinned in `pins` until the sends read them."""
+        sheets: Dict[Tuple[str, str], List[RateSheet]] = {}
+        for sheet in self.db.query(RateSheet).filter(RateSheet.job_run_id == job_run.id).order_by(RateSheet.id):
+            tier_code = (sheet.metadata_ or {}).get("tier_code")
+            sheets.setdefault((sheet.channel.value, tier_code), []).append(sheet)
+
+        sellers: Dict[int, Dict] = {}
+        rows = (
+            self.db.query(Seller.id, Seller.org_name, Seller.primary_email, Seller.secondary_emails, SellerTierAssignment.channel, SellerTierAssignment.non_agency_tier_code)
+            .join(SellerTierAssignment, SellerTierAssignment.seller_id == Seller.id)
+            .filter(Seller.investor_id == job_run.investor_id, Seller.is_active == True)
+            .order_by(Seller.id, SellerTierAssignment.channel)
+        )
+        for seller_id, org_name, primary, secondary, channel, tier_code in rows:
+            entry = sellers.setdefault(seller_id, {"org_name": org_name, "recipients": [primary, *(secondary or [])], "attachments": []})
+            entry["attachments"].extend(sheets.get((channel.value, tier_code), []))
+
+        existing = {
+            key: (distribution_id, status)
+            for distribution_id, key, status in self.db.query(EmailDistribution.id, EmailDistribution.idempotency_key, EmailDistribution.status).filter(
+                EmailDistribution.job_run_id == job_run.id, EmailDistribution.idempotency_key.isnot(None)
+            )
+        }
+        # Sheets from lazy jobs are built here, and only for the tiers some seller still needs.
+        from app.core.pricing_engine import PricingEngine
+
+        engine = PricingEngine(self.db)
+        config = engine.config_for(job_run)
+        paths: Dict[int, str] = {}
+
+        def attachment_paths(entry: Dict) -> List[str]:
+            for sheet in entry["attachments"]:
+                if sheet.id not in paths:
+                    paths[sheet.id] = str(engine.materialize(sheet, pins=pins))
+            return [paths[sheet.id] for sheet in entry["attachments"]]
+
+        plan = DistributionPlan()
+        subject = config.email_subject.format(name=config.name, code=config.code, date=job_run.effective_date)
+        planned: List[Tuple[int, str, Dict]] = []
+        for seller_id, entry in sellers.items():
+            recipients = list(dict.fromkeys(email for email in entry["recipients"] if email))
+            if not recipients or not entry["attachments"]:
+                plan.skipped_sellers += 1
+                continue
+            entry["recipients"] = recipients
+            planned.append((seller_id, idempotency_key(config.code, job_run.id, seller_id), entry))
+
+        new_rows = [
+            {
+                "investor_id": job_run.investor_id,
+                "job_run_id": job_run.id,
+                "seller_id": seller_id,
+                "idempotency_key": key,
+                "subject": subject,
+                "recipient_list": entry["recipients"],
+                # Cache paths change as entries are evicted and rebuilt, so the record names the sheets instead.
+                "attachments": [{"rate_sheet_id": sheet.id, "filename": sheet.generated_filename} for sheet in entry["attachments"]],
+                "status": EmailStatus.PENDING,
+                "attempts": 0,
+            }
+            for seller_id, key, entry in planned
+            if key not in existing
+        ]
+        if new_rows:
+            self.db.execute(insert(EmailDistribution), new_rows)
+            self.db.commit()
+            existing.update(
+                {
+                    key: (distribution_id, EmailStatus.PENDING)
+                    for distribution_id, key in self.db.query(EmailDistribution.id, EmailDistribution.idempotency_key).filter(
+                        EmailDistribution.idempotency_key.in_([row["idempotency_key"] for row in new_rows])
+                    )
+                }
+            )
+        for seller_id, key, entry in planned:
+            distribution_id, status = existing[key]
+            if status == EmailStatus.SENT:
+                plan.already_sent += 1
+                continue
+            if status == EmailStatus.SENDING:
+                # An earlier run crashed while this message was with the provider. Sending it again could deliver
+                # it twice, so it is left for an operator to confirm.
+                plan.unconfirmed += 1
+                continue
+            plan.messages.append(
+                PlannedMessage(
+                    distribution_id=distribution_id,
+                    seller_id=seller_id,
+                    key=key,
+                    recipients=entry["recipients"],
+                    subject=subject,
+                    attachments=attachment_paths(entry),
+                )
+            )
+        return plan
+
+    def _retry_delay(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return random.uniform(0, self.backoff_seconds * 2 ** (attempt - 1))
+
+    async def _deliver(self, client: httpx.AsyncClient, bucket: TokenBucket, message: PlannedMessage) -> Dict:
+        import httpx
+
+        files = [(path, Path(path).name, XLSX_CONTENT_TYPE) for path in message.attachments]
+        body = f"Attached are your rate sheets ({len(files)} files)."
+
+        async def content() -> AsyncIterator[bytes]:
+            # The sink's body reads and encodes one chunk at a time; each read runs off the event loop.
+            chunks = self.sink.body(message.subject, message.recipients, body, files, custom_args={"idempotency_key": message.key})
+            while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                yield chunk
+
+        outcome: Dict = {}
+        for attempt in range(1, self.max_attempts + 1):
+            await bucket.acquire()
+            response = None
+            try:
+                response = await client.post(self.sink.url, content=content(), headers=self.sink.headers)
+            except httpx.TransportError as exc:
+                outcome = {"status": "error", "error": f"{type(exc).__name__}: {exc}"}
+            else:
+                outcome = {"status": response.status_code, "body": response.text[:500]}
+                if response.status_code < 300:
+                    return {"id": message.distribution_id, "status": EmailStatus.SENT, "attempts": attempt, "response_payload": outcome}
+                if not is_retryable(response.status_code):
+                    break
+            if attempt < self.max_attempts:
+                await self.sleep(self._retry_delay(attempt, response))
+        return {"id": message.distribution_id, "status": EmailStatus.FAILED, "attempts": attempt, "response_payload": outcome}
+
+    def _mark_sending(self, distribution_id: int) -> bool:
+        # Conditional, so if two runs ever overlap only one of them sends each message.
+        result = self.db.execute(
+            update(EmailDistribution)
+            .where(EmailDistribution.id == distribution_id, EmailDistribution.status.in_([EmailStatus.PENDING, EmailStatus.FAILED]))
+            .values(status=EmailStatus.SENDING)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def _flush(self, outcomes: List[Dict]) -> None:
+        if outcomes:
+            self.db.execute(update(EmailDistribution), outcomes)
+        if self._lease is not None:
+            self._lease = (self._lease[0], self._renew(*self._lease))
+        self.db.commit()
+
+    async def send(self, messages: List[PlannedMessage]) -> Dict[str, int]:
+        # httpx (like the pricing engine above) is imported on first use to keep API startup light.
+        import httpx
+
+        counts = {"sent": 0, "failed": 0}
+        pending: List[Dict] = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        bucket = TokenBucket(self.rate_per_second, self.burst, sleep=self.sleep)
+        # The session is not thread-safe, so one write runs at a time.
+        writing = asyncio.Lock()
+
+        async def write(fn: Callable, *args) -> None:
+            async with writing:
+                # Commits block, so they run off the event loop while other sends carry on.
+                await asyncio.to_thread(fn, *args)
+
+        async def flush() -> None:
+            batch = pending[:]
+            pending.clear()
+            await write(self._flush, batch)
+
+        async def deliver(client: httpx.AsyncClient, message: PlannedMessage) -> None:
+            async with semaphore:
+                # Outcomes are written in batches, so without this a crash would leave delivered messages PENDING
+                # and a resumed run would send them again.
+                async with writing:
+                    marked = await asyncio.to_thread(self._mark_sending, message.distribution_id)
+                if not marked:
+                    return
+                outcome = await self._deliver(client, bucket, message)
+            counts["sent" if outcome["status"] == EmailStatus.SENT else "failed"] += 1
+            pending.append(outcome)
+            if len(pending) >= self.status_batch:
+                await flush()
+
+        async with httpx.AsyncClient(transport=self.transport, timeout=60.0) as client:
+            await asyncio.gather(*(deliver(client, message) for message in messages))
+        await flush()
+        return counts
+
+    def run(self, job_run_id: int, claimed: bool = False) -> Dict:
+        """Sends the job's rate sheets. Pass `claimed` when the caller already holds the claim; otherwise the run claims the job itself."""
+        job_run = self.db.query(JobRun).filter(JobRun.id == job_run_id).one()
+        if self.sink is None:
+            # Every post would be rejected, so nothing is claimed or recorded and the job can be sent once a key is set.
+            logger.warning("SENDGRID_API_KEY is not configured; job %s was not distributed", job_run_id)
+            if claimed:
+                self._release(job_run, job_run.claimed_at, job_run.claimed_from)
+            return {"status": "skipped", "reason": "SENDGRID_API_KEY not configured"}
+        if not claimed and not self.claim(job_run):
+            raise DistributionClaimError(f"Job {job_run_id} is not ready for distribution or is already being distributed")
+        claimed_from = job_run.claimed_from
+        self._lease = (job_run.id, job_run.claimed_at)
+        try:
+            with output_cache.pins() as pins:
+                plan = self.plan(job_run, pins)
+                counts = asyncio.run(self.send(plan.messages)) if plan.messages else {"sent": 0, "failed": 0}
+        except Exception:
+            self.db.rollback()
+            # Release the claim so the job can be distributed again.
+            self._release(job_run, self._lease[1], claimed_from)
+            raise
+        finally:
+            lease, self._lease = self._lease, None
+        summary = {
+            "planned": len(plan.messages) + plan.already_sent + plan.unconfirmed,
+            "already_sent": plan.already_sent,
+            "skipped_sellers": plan.skipped_sellers,
+            "unconfirmed": plan.unconfirmed,
+            **counts,
+        }
+        if plan.unconfirmed:
+            logger.warning("Job %s has %s messages from an interrupted run that may not have been delivered", job_run_id, plan.unconfirmed)
+        self._release(
+            job_run, lease[1], claimed_from if counts["failed"] else JobStatus.DISTRIBUTED, {**(job_run.payload or {}), "distribution": summary}
+        )
+        return summary
+
+
+def get_distribution_transport() -> Optional[httpx.AsyncBaseTransport]:
+    return None
+
+
+def run_distribution(
+    session_factory: Callable[[], Session],
+    job_run_id: int,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    claimed: bool = False,
+    sink: Optional[SendGridSink] = None,
+) -> None:
+    db = session_factory()
+    try:
+        DistributionEngine(db, transport=transport, sink=sink).run(job_run_id, claimed=claimed)
+    except Exception:
+        logger.exception("Distribution for job %s failed", job_run_id)
+    finally:
+        db.close()
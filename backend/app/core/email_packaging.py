@@ -0,0 +1,182 @@
+from __future__ import annotations
+import base64
+import json
+import os
+import re
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence
+
+GROUP_MODES = ("channel", "product", "none")
+# 3-byte aligned so each chunk encodes to base64 without padding.
+ENCODE_CHUNK_SIZE = 3 * 64 * 1024
+# Fixed zip record sizes: local file header, central directory header, the largest (zip64) data descriptor and the
+# end-of-central-directory record written once per archive.
+ZIP_LOCAL_HEADER = 30
+ZIP_CENTRAL_HEADER = 46
+ZIP_DATA_DESCRIPTOR = 24
+ZIP_END_RECORD = 22
+ZIP_CONTENT_TYPE = "application/zip"
+# JSON around each attachment's base64 content in a SendGrid v3 body; the separator counts for every part.
+ATTACHMENT_HEAD = b'{"content": "'
+ATTACHMENT_SEPARATOR = b", "
+# Filenames are sanitised to ASCII and no longer than this, which bounds the JSON around any one part.
+MAX_FILENAME_LENGTH = 255
+
+
+class MessageTooLargeError(ValueError):
+    pass
+
+
+def attachment_tail(filename: str, content_type: str) -> bytes:
+    """The JSON that closes an attachment's content string and carries its filename and type."""
+    return b'", ' + json.dumps({"filename": filename, "type": content_type, "disposition": "attachment"})[1:].encode()
+
+
+def attachment_overhead(filename: str, content_type: str = ZIP_CONTENT_TYPE) -> int:
+    return len(ATTACHMENT_SEPARATOR) + len(ATTACHMENT_HEAD) + len(attachment_tail(filename, content_type))
+
+
+ATTACHMENT_OVERHEAD_BOUND = attachment_overhead("x" * MAX_FILENAME_LENGTH)
+
+
+@dataclass
+class RateSheetAttachment:
+    path: str
+    channel: str
+    product: str
+
+    def group(self, mode: str) -> str:
+        if mode == "channel":
+            return self.channel
+        if mode == "product":
+            return self.product
+        return "all"
+
+
+@dataclass
+class Package:
+    name: str
+    path: str
+    group: str
+    files: List[str] = field(default_factory=list)
+    size_bytes: int = 0
+
+    @property
+    def encoded_size(self) -> int:
+        return 4 * ((self.size_bytes + 2) // 3)
+
+    @property
+    def message_size(self) -> int:
+        """Bytes the package adds to a message body: its base64 content and the JSON around it."""
+        return self.encoded_size + attachment_overhead(self.name)
+
+    def as_dict(self) -> Dict:
+        return {"name": self.name, "path": self.path, "group": self.group, "files": self.files, "size_bytes": self.size_bytes}
+
+
+@dataclass
+class PackagedMessage:
+    index: int
+    count: int
+    packages: List[Package]
+    envelope_bytes: int = 0
+
+    @property
+    def encoded_size(self) -> int:
+        return sum(package.encoded_size for package in self.packages)
+
+    @property
+    def size(self) -> int:
+        return self.envelope_bytes + sum(package.message_size for package in self.packages)
+
+
+def encoded_budget(max_message_bytes: int, envelope_bytes: int = 0) -> int:
+    # Raw bytes that still fit in the message, beside its envelope and one part's JSON, once base64 inflates them by 4/3.
+    return max((max_message_bytes - envelope_bytes - ATTACHMENT_OVERHEAD_BOUND) * 3 // 4, 1)
+
+
+def zipped_entry_bound(path: str | os.PathLike) -> int:
+    """Most bytes a file can take in a deflated archive, counting both headers that repeat its name."""
+    name = len(Path(path).name.encode("utf-8"))
+    size = os.path.getsize(path)
+    # zlib's deflateBound: already-compressed data (xlsx files are zips) falls back to stored blocks with this overhead.
+    deflated = size + (size >> 12) + (size >> 14) + (size >> 25) + 7
+    return ZIP_LOCAL_HEADER + ZIP_CENTRAL_HEADER + 2 * name + ZIP_DATA_DESCRIPTOR + deflated
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", value).strip("_") or "rate_sheets"
+
+
+def package_attachments(
+    attachments: Sequence[RateSheetAttachment],
+    output_dir: str | os.PathLike,
+    group_by: str = "channel",
+    max_package_bytes: int | None = None,
+    prefix: str = "rate_sheets",
+) -> List[Package]:
+    if group_by not in GROUP_MODES:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_MODES)}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    grouped: Dict[str, List[RateSheetAttachment]] = {}
+    for attachment in attachments:
+        grouped.setdefault(attachment.group(group_by), []).append(attachment)
+
+    packages: List[Package] = []
+    for group, members in grouped.items():
+        parts: List[List[RateSheetAttachment]] = [[]]
+        planned = ZIP_END_RECORD
+        for attachment in members:
+            # Planning against the worst case keeps every finished part within the budget.
+            size = zipped_entry_bound(attachment.path)
+            if max_package_bytes and parts[-1] and planned + size > max_package_bytes:
+                parts.append([])
+                planned = ZIP_END_RECORD
+            parts[-1].append(attachment)
+            planned += size
+        for number, part in enumerate(parts, start=1):
+            suffix = f"_part{number}" if len(parts) > 1 else ""
+            name = f"{_safe_name(prefix)}_{_safe_name(group)}{suffix}.zip"
+            package = Package(name=name, path=str(output_dir / name), group=group)
+            with zipfile.ZipFile(package.path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for attachment in part:
+                    arcname = Path(attachment.path).name
+                    # ZipFile.write streams the source in blocks rather than reading it whole.
+                    archive.write(attachment.path, arcname)
+                    package.files.append(arcname)
+            package.size_bytes = os.path.getsize(package.path)
+            packages.append(package)
+    return packages
+
+
+def plan_messages(packages: Sequence[Package], max_message_bytes: int, envelope_bytes: int = 0) -> List[PackagedMessage]:
+    """Packs packages into as few messages as fit, counting each message's `envelope_bytes` of JSON besides its parts.
+
+    Raises MessageTooLargeError if a package cannot fit in a message on its own, before anything is sent.
+    """
+    batches: List[List[Package]] = []
+    used = 0
+    for package in packages:
+        size = package.message_size
+        if envelope_bytes + size > max_message_bytes:
+            raise MessageTooLargeError(
+                f"{package.name} needs a {envelope_bytes + size}-byte message, over the {max_message_bytes}-byte limit"
+            )
+        if batches and used + size <= max_message_bytes:
+            batches[-1].append(package)
+            used += size
+        else:
+            batches.append([package])
+            used = envelope_bytes + size
+    return [
+        PackagedMessage(index=i, count=len(batches), packages=batch, envelope_bytes=envelope_bytes) for i, batch in enumerate(batches, start=1)
+    ]
+
+
+def iter_base64(path: str | os.PathLike, chunk_size: int = ENCODE_CHUNK_SIZE) -> Iterator[bytes]:
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            yield base64.b64encode(chunk)
@@ -1,9 +1,16 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from io import BytesIO
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import zipfile
 import pandas as pd
 import numpy as np
+from app.core.xlsx_template import XlsxTemplate
 
 
 @dataclass
@@ -24,78 +31,287 @@ class ParsedCustomer:
     nondel_tier: str | None
 
 
+@dataclass
+class CustomerRoster:
+    frame: pd.DataFrame
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __getitem__(self, index: int) -> ParsedCustomer:
+        return ParsedCustomer(**self.frame.iloc[index].to_dict())
+
+    def __iter__(self) -> Iterator[ParsedCustomer]:
+        for row in self.frame.itertuples(index=False, name=None):
+            yield ParsedCustomer(*row)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.frame[name].to_numpy()
+
+
 @dataclass
 class ParsedAdjustors:
     mapping: Dict[str, Dict]
 
 
 NA_TIER_COLUMNS = [f"Unnamed:{i}" for i in range(3, 15)]
+CUSTOMER_COLUMNS = {
+    "Org Name": "org_name",
+    "Org ID": "org_id",
+    "NMLSID": "nmlsid",
+    "Primary Email": "primary_email",
+    "DEL NonAgency": "del_tier",
+    "ND NonAgency": "nondel_tier",
+}
+ANNOTATION_COLUMN = "Generated Info"
+# pandas reads the first worksheet row as the header, so frame index i is worksheet row i + 2.
+HEADER_ROW = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_WORKBOOK_CACHE_BYTES = 256 * 1024 * 1024
 
 
-def parse_customer_tiers(csv_path: str) -> List[ParsedCustomer]:
-    df = pd.read_csv(csv_path)
-    results: List[ParsedCustomer] = []
-    for _, row in df.iterrows():
-        results.append(
-            ParsedCustomer(
-                org_name=str(row.get("Org Name", "")),
-                org_id=str(row.get("Org ID", "")),
-                nmlsid=row.get("NMLSID") if not pd.isna(row.get("NMLSID")) else None,
-                primary_email=row.get("Primary Email") if not pd.isna(row.get("Primary Email")) else None,
-                del_tier=row.get("DEL NonAgency") if not pd.isna(row.get("DEL NonAgency")) else None,
-                nondel_tier=row.get("ND NonAgency") if not pd.isna(row.get("ND NonAgency")) else None,
-            )
-        )
-    return results
+def file_sha256(path: str | os.PathLike) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class CachedWorkbook:
+    digest: str
+    raw: bytes
+    _sheets: Optional[Dict[str, pd.DataFrame]] = field(default=None, repr=False)
+    _template: Optional[XlsxTemplate] = field(default=None, repr=False)
+    _derived: Dict[Tuple, object] = field(default_factory=dict, repr=False)
+
+    @property
+    def parsed(self) -> bool:
+        return self._sheets is not None
+
+    @property
+    def sheets(self) -> Dict[str, pd.DataFrame]:
+        if self._sheets is None:
+            self._sheets = pd.read_excel(BytesIO(self.raw), sheet_name=None)
+        return self._sheets
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self.sheets.keys())
+
+    @property
+    def template(self) -> XlsxTemplate:
+        if self._template is None:
+            self._template = XlsxTemplate(self.raw)
+        return self._template
+
+    @property
+    def nbytes(self) -> int:
+        size = len(self.raw)
+        if self._template is not None:
+            size += sum(len(data) for data in self._template.parts.values())
+        if self._sheets is not None:
+            size += sum(int(df.memory_usage(deep=True).sum()) for df in self._sheets.values())
+        size += sum(getattr(value, "nbytes", 0) for value in self._derived.values())
+        return size
+
+    def derive(self, key: Tuple, build: Callable[[], object]) -> object:
+        # Memoises values computed from the raw bytes, such as streamed grids, for the life of the entry.
+        if key not in self._derived:
+            self._derived[key] = build()
+        return self._derived[key]
+
+    def sheet(self, name: str) -> pd.DataFrame:
+        if name not in self.sheets:
+            raise ValueError(f"Worksheet named '{name}' not found")
+        return self.sheets[name]
+
+
+class WorkbookCache:
+    # Entries are shared between callers: copy a sheet before mutating it.
+
+    def __init__(self, max_bytes: int = DEFAULT_WORKBOOK_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedWorkbook]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def current_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._entries
+
+    def _stat_key(self, path: str) -> Tuple[str, int, int]:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    def prime(self, path: str | os.PathLike, digest: str) -> None:
+        # Record a known content hash so the next load skips hashing the file.
+        with self._lock:
+            self._digests[self._stat_key(os.fspath(path))] = digest
+
+    def load(self, path: str | os.PathLike, digest: Optional[str] = None, sheets: bool = True, template: bool = False) -> CachedWorkbook:
+        path = os.fspath(path)
+        with self._lock:
+            stat_key = self._stat_key(path)
+            digest = digest or self._digests.get(stat_key)
+            if digest and digest in self._entries:
+                entry = self._entries[digest]
+                self._entries.move_to_end(digest)
+                self.hits += 1
+            else:
+                self.misses += 1
+                with open(path, "rb") as f:
+                    raw = f.read()
+                digest = digest or hashlib.sha256(raw).hexdigest()
+                entry = CachedWorkbook(digest=digest, raw=raw)
+                self._entries[digest] = entry
+            self._digests[stat_key] = digest
+            if sheets and not entry.parsed:
+                entry.sheets
+            if template:
+                entry.template
+            self._sizes[digest] = entry.nbytes
+            self._evict()
+            return entry
+
+    def _evict(self) -> None:
+        while len(self._entries) > 1 and self.current_bytes > self.max_bytes:
+            evicted, _ = self._entries.popitem(last=False)
+            self._sizes.pop(evicted, None)
+            self._digests = {k: v for k, v in self._digests.items() if v != evicted}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._digests.clear()
+
 
+def _customer_column(name: str) -> bool:
+    return name in CUSTOMER_COLUMNS
 
-def _extract_tier_mapping(sheet_df: pd.DataFrame) -> Tuple[dict, dict]:
-    filled_rows = [i for i, row in sheet_df.iterrows() if row[NA_TIER_COLUMNS].notna().all()]
+
+def parse_customer_tiers(csv_path: str) -> CustomerRoster:
+    df = pd.read_csv(csv_path, usecols=_customer_column, dtype=str)
+    frame = pd.DataFrame(index=df.index)
+    for source, target in CUSTOMER_COLUMNS.items():
+        column = df[source] if source in df.columns else pd.Series(np.nan, index=df.index, dtype=object)
+        if target in ("org_name", "org_id"):
+            frame[target] = column.fillna("").astype(object)
+        else:
+            frame[target] = column.astype(object).where(column.notna(), None)
+    return CustomerRoster(frame=frame)
+
+
+def _tier_block(sheet_df: pd.DataFrame) -> np.ndarray:
+    return sheet_df[NA_TIER_COLUMNS].to_numpy(dtype=object)
+
+
+def _extract_tier_mapping(sheet_df: pd.DataFrame, block: np.ndarray | None = None) -> Tuple[dict, dict]:
+    block = _tier_block(sheet_df) if block is None else block
+    filled_rows = np.flatnonzero(pd.notna(block).all(axis=1))
     if len(filled_rows) < 2:
         raise ValueError("Unable to find mapping rows in adjustor sheet")
-    numeric_row = filled_rows[-2]
-    code_row = filled_rows[-1]
-    numeric_values = sheet_df.loc[numeric_row, NA_TIER_COLUMNS].tolist()
-    tier_codes = sheet_df.loc[code_row, NA_TIER_COLUMNS].tolist()
+    numeric_values = block[filled_rows[-2]]
+    tier_codes = block[filled_rows[-1]]
     num_to_code = {int(num): code for num, code in zip(numeric_values, tier_codes)}
     code_to_num = {v: k for k, v in num_to_code.items()}
     return num_to_code, code_to_num
 
 
-def parse_adjustors(adjustors_path: str) -> ParsedAdjustors:
-    workbook = pd.ExcelFile(adjustors_path)
+def _read_sheets(path: str, cache: WorkbookCache | None) -> Dict[str, pd.DataFrame]:
+    if cache is not None:
+        return cache.load(path).sheets
+    return pd.read_excel(path, sheet_name=None)
+
+
+def _sheet_channel(sheet_name: str) -> str:
+    compact = sheet_name.upper().replace(" ", "").replace("-", "").replace("_", "")
+    return "DEL" if "DEL" in compact and "NONDEL" not in compact else "NONDEL"
+
+
+def _object_column(df: pd.DataFrame, name: str) -> pd.Series:
+    if name in df.columns:
+        return df[name].astype(object)
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def _present_mask(values: pd.Series) -> np.ndarray:
+    return (values.notna() & (values != "")).to_numpy()
+
+
+def _adjustor_groups(labels: pd.Series) -> Tuple[pd.Series, np.ndarray]:
+    is_grid = (labels == "GRID").to_numpy()
+    try:
+        stripped = labels.str.strip()
+    except AttributeError:
+        stripped = pd.Series(np.nan, index=labels.index, dtype=object)
+    is_label = (stripped.notna() & (stripped != "")).to_numpy() & ~is_grid
+    # "" marks a GRID row, which closes the current group until the next label.
+    markers = pd.Series(np.nan, index=labels.index, dtype=object)
+    markers[is_label] = stripped[is_label].str.upper()
+    markers[is_grid] = ""
+    groups = markers.ffill().fillna("")
+    return groups, is_grid | is_label
+
+
+def _tier_adjustments(block: np.ndarray) -> np.ndarray:
+    # Mirrors float(value or 0): blanks become 0 while NaN cells stay NaN.
+    values = block.copy()
+    values[np.equal(values, None) | np.equal(values, "")] = 0
+    return values.astype(float)
+
+
+def parse_adjustors(adjustors_path: str, cache: WorkbookCache | None = None) -> ParsedAdjustors:
+    sheets = _read_sheets(adjustors_path, cache)
     mapping: Dict[str, Dict] = {}
-    for sheet in workbook.sheet_names:
-        channel = "DEL" if "DEL" in sheet.upper() else "NONDEL"
-        df = workbook.parse(sheet)
-        num_to_code, _ = _extract_tier_mapping(df)
+    for sheet, df in sheets.items():
+        channel = _sheet_channel(sheet)
+        block = _tier_block(df)
+        num_to_code, _ = _extract_tier_mapping(df, block)
+        tier_codes = [num_to_code.get(num_index) for num_index in range(1, 13)]
+        groups, header_rows = _adjustor_groups(_object_column(df, "Unnamed:0"))
+        product_ids = _object_column(df, "Unnamed:1")
+        product_names = _object_column(df, "Unnamed:2")
+        rows = np.flatnonzero(
+            ~header_rows & (groups != "").to_numpy() & _present_mask(product_ids) & _present_mask(product_names)
+        )
+        # The last product row of a group wins, keyed in order of first appearance.
+        selected = groups.iloc[rows]
+        last_rows = dict(zip(selected, rows))
+        adjustments = _tier_adjustments(block[list(last_rows.values())])
+        base = _tier_adjustments(_object_column(df, "Unnamed:3").to_numpy()[list(last_rows.values())])
         channel_data: Dict[str, Dict] = {}
-        current_group = None
-        for idx, row in df.iterrows():
-            label = row.get("Unnamed:0")
-            if label == "GRID":
-                current_group = None
-                continue
-            if isinstance(label, str) and label.strip():
-                current_group = label.strip().upper()
-                continue
-            if current_group and row.get("Unnamed:1") and row.get("Unnamed:2"):
-                adjustments = {}
-                for col, num_index in zip(NA_TIER_COLUMNS, range(1, 13)):
-                    tier_code = num_to_code.get(num_index)
-                    adjustments[tier_code] = float(row.get(col) or 0)
-                channel_data[current_group] = {
-                    "BASE": float(row.get("Unnamed:3") or 0),
-                    "tiers": adjustments,
-                    "product_id": row.get("Unnamed:1"),
-                    "product_name": row.get("Unnamed:2"),
-                }
+        for position, (group, row) in enumerate(last_rows.items()):
+            channel_data[group] = {
+                "BASE": float(base[position]),
+                "tiers": dict(zip(tier_codes, adjustments[position].tolist())),
+                "product_id": product_ids.iloc[row],
+                "product_name": product_names.iloc[row],
+            }
         mapping[channel] = channel_data
     return ParsedAdjustors(mapping=mapping)
 
 
-def parse_base_grid(base_xlsx_path: str, sheet_name: str) -> Tuple[pd.DataFrame, GridMeta]:
-    df = pd.read_excel(base_xlsx_path, sheet_name=sheet_name)
+def _present(value) -> bool:
+    return value is not None and not (isinstance(value, float) and np.isnan(value)) and value != ""
+
+
+def parse_base_grid(base_xlsx_path: str, sheet_name: str, cache: WorkbookCache | None = None) -> Tuple[pd.DataFrame, GridMeta]:
+    if cache is not None:
+        df = cache.load(base_xlsx_path).sheet(sheet_name)
+    else:
+        df = pd.read_excel(base_xlsx_path, sheet_name=sheet_name)
     note_rate_row = None
     note_rate_col = None
     for col in df.columns:
@@ -113,6 +329,8 @@ def parse_base_grid(base_xlsx_path: str, sheet_name: str) -> Tuple[pd.DataFrame,
         if col == note_rate_col:
             continue
         sample_value = df.loc[start_row, col]
+        if pd.isna(sample_value):
+            continue
         if isinstance(sample_value, (int, float, np.number)) or pd.api.types.is_numeric_dtype(df[col]):
             price_cols.append(col)
     data_rows = []
@@ -127,19 +345,97 @@ def parse_base_grid(base_xlsx_path: str, sheet_name: str) -> Tuple[pd.DataFrame,
     return grid_df, meta
 
 
-def write_tier_grid_to_workbook(base_xlsx_path: str, sheet_name: str, grid_meta: GridMeta, adjusted_grid_df: pd.DataFrame, output_path: str, annotation: str | None = None) -> None:
-    wb = pd.ExcelFile(base_xlsx_path)
-    sheet_df = wb.parse(sheet_name)
-    for i, (_, row) in enumerate(adjusted_grid_df.iterrows()):
+def write_tier_grid_to_workbook(
+    base_xlsx_path: str,
+    sheet_name: str,
+    grid_meta: GridMeta,
+    adjusted_grid_df: pd.DataFrame,
+    output_path: str,
+    annotation: str | None = None,
+    cache: WorkbookCache | None = None,
+    engine: str = "template",
+) -> None:
+    rate_key = grid_meta.note_rate_col if grid_meta.note_rate_col in adjusted_grid_df.columns else "note_rate"
+    write_tier_matrix_to_workbook(
+        base_xlsx_path,
+        sheet_name,
+        grid_meta,
+        adjusted_grid_df[rate_key].to_numpy(dtype=object),
+        adjusted_grid_df[grid_meta.price_columns].to_numpy(dtype=object),
+        output_path,
+        annotation=annotation,
+        cache=cache,
+        engine=engine,
+    )
+
+
+def write_tier_matrix_to_workbook(
+    base_xlsx_path: str,
+    sheet_name: str,
+    grid_meta: GridMeta,
+    note_rates: np.ndarray,
+    prices: np.ndarray,
+    output_path: str,
+    annotation: str | None = None,
+    cache: WorkbookCache | None = None,
+    engine: str = "template",
+    columns: List[str] | None = None,
+) -> None:
+    if engine == "template" and zipfile.is_zipfile(base_xlsx_path):
+        _write_with_template(base_xlsx_path, sheet_name, grid_meta, note_rates, prices, output_path, annotation, cache, columns)
+    elif engine in ("template", "pandas"):
+        _write_with_pandas(base_xlsx_path, sheet_name, grid_meta, note_rates, prices, output_path, annotation, cache)
+    else:
+        raise ValueError(f"Unknown workbook writer engine: {engine}")
+
+
+def _grid_cell_updates(columns: List[str], grid_meta: GridMeta, note_rates: np.ndarray, prices: np.ndarray, annotation: str | None) -> Dict[Tuple[int, int], object]:
+    positions = {name: i + 1 for i, name in enumerate(columns)}
+    first_row = grid_meta.start_row + HEADER_ROW + 1
+    updates: Dict[Tuple[int, int], object] = {}
+    rate_column = positions[grid_meta.note_rate_col]
+    for offset, value in enumerate(note_rates.tolist()):
+        updates[(first_row + offset, rate_column)] = value
+    for name, values in zip(grid_meta.price_columns, prices.T.tolist()):
+        column = positions[name]
+        for offset, value in enumerate(values):
+            updates[(first_row + offset, column)] = value
+    if annotation:
+        column = positions.get(ANNOTATION_COLUMN, len(columns) + 1)
+        updates[(HEADER_ROW, column)] = ANNOTATION_COLUMN
+        updates[(HEADER_ROW + 1, column)] = annotation
+    return updates
+
+
+def _write_with_template(base_xlsx_path, sheet_name, grid_meta, note_rates, prices, output_path, annotation, cache, columns=None) -> None:
+    if cache is not None:
+        workbook = cache.load(base_xlsx_path, sheets=columns is None, template=True)
+        template = workbook.template
+        columns = columns if columns is not None else list(workbook.sheet(sheet_name).columns)
+    else:
+        template = XlsxTemplate.from_path(base_xlsx_path)
+        if columns is None:
+            columns = list(pd.read_excel(base_xlsx_path, sheet_name=sheet_name).columns)
+    updates = _grid_cell_updates(columns, grid_meta, note_rates, prices, annotation)
+    template.render(sheet_name, updates, output_path)
+
+
+def _write_with_pandas(base_xlsx_path, sheet_name, grid_meta, note_rates, prices, output_path, annotation, cache) -> None:
+    if cache is not None:
+        sheets = cache.load(base_xlsx_path).sheets
+    else:
+        sheets = pd.read_excel(base_xlsx_path, sheet_name=None)
+    sheet_df = sheets[sheet_name].copy()
+    for i, (rate, row) in enumerate(zip(note_rates.tolist(), prices.tolist())):
         target_index = grid_meta.start_row + i
-        sheet_df.loc[target_index, grid_meta.note_rate_col] = row["note_rate"]
-        for col in grid_meta.price_columns:
-            sheet_df.loc[target_index, col] = row[col]
+        sheet_df.loc[target_index, grid_meta.note_rate_col] = rate
+        for col, value in zip(grid_meta.price_columns, row):
+            sheet_df.loc[target_index, col] = value
     if annotation:
-        sheet_df.loc[0, "Generated Info"] = annotation
+        sheet_df.loc[0, ANNOTATION_COLUMN] = annotation
     with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        for name in wb.sheet_names:
+        for name, df in sheets.items():
             if name == sheet_name:
                 sheet_df.to_excel(writer, sheet_name=name, index=False)
             else:
-                wb.parse(name).to_excel(writer, sheet_name=name, index=False)
+                df.to_excel(writer, sheet_name=name, index=False)
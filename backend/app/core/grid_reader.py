@@ -0,0 +1,143 @@
+"""Streaming base-grid reader.
+
+`parse_base_grid` parses every cell of the workbook through pandas before it looks for the grid. This reader
+streams the one sheet with openpyxl's read-only mode, stops at the first blank grid row, and returns the prices
+as a float matrix. Cells are normalised the way `pd.read_excel` does (integral floats become ints and pandas'
+default NA strings become blanks), so the grid, `GridMeta` and column names match the pandas path.
+"""
+from __future__ import annotations
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from itertools import chain, islice
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import openpyxl
+from openpyxl.cell.cell import ERROR_CODES
+from pandas._libs.parsers import STR_NA_VALUES
+from app.core.excel_utils import GridMeta, WorkbookCache
+from app.core.price_tensor import GridMatrix, cells_to_matrix
+
+NOTE_RATE_HEADER = "Note Rate"
+SEARCH_BLOCK_ROWS = 64
+_BLANK_STRINGS = frozenset(STR_NA_VALUES) | frozenset(ERROR_CODES)
+
+
+@dataclass
+class StreamedGrid:
+    matrix: GridMatrix
+    # Worksheet columns named as pandas would name them, for the template writer.
+    columns: List
+    # The "Note Rate" row's labels over each price column, e.g. "30 Yr".
+    column_labels: List
+
+    @property
+    def meta(self) -> GridMeta:
+        return self.matrix.meta
+
+    @property
+    def nbytes(self) -> int:
+        matrix = self.matrix
+        return int(matrix.prices.nbytes + matrix.ineligible.nbytes + 8 * (matrix.note_rates.size + matrix.labels.size))
+
+
+def _cell(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return None if value in _BLANK_STRINGS else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.number))
+
+
+def _column_names(header: Sequence, width: int) -> List:
+    # Same naming and de-duplication as pandas' header handling: blanks become "Unnamed: i", repeats get ".1", ".2".
+    names: List = []
+    counts: dict = {}
+    for index in range(width):
+        value = _cell(header[index]) if index < len(header) else None
+        name = f"Unnamed: {index}" if value is None else value
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts.get(name, 0)
+        names.append(name)
+        counts[name] = count + 1
+    return names
+
+
+def _block(rows: Iterator[tuple], size: int, width: int) -> np.ndarray:
+    chunk = [[_cell(value) for value in row] for row in islice(rows, size)]
+    block = np.full((len(chunk), max([width, *map(len, chunk)]) if chunk else width), None, dtype=object)
+    for position, row in enumerate(chunk):
+        block[position, : len(row)] = row
+    return block
+
+
+def _locate_header(rows: Iterator[tuple], width: int) -> Tuple[int, int, np.ndarray]:
+    consumed = 0
+    while True:
+        block = _block(rows, SEARCH_BLOCK_ROWS, width)
+        if not len(block):
+            raise ValueError("Could not find 'Note Rate' header row")
+        hits = np.argwhere(block == NOTE_RATE_HEADER)
+        if len(hits):
+            # pandas scans column by column, so the leftmost match wins, then the topmost within it.
+            row, column = min(hits.tolist(), key=lambda hit: (hit[1], hit[0]))
+            return consumed + row, column, block[row:]
+        consumed += len(block)
+
+
+def _stream_grid(source: str | os.PathLike | BinaryIO, sheet_name: str) -> StreamedGrid:
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        worksheet = workbook[sheet_name]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        width = max(worksheet.max_column or 0, len(header))
+        note_index, note_column, rest = _locate_header(rows, width)
+        grid_rows = chain(rest[1:].tolist(), ([_cell(value) for value in row] for row in rows))
+        sample = next(grid_rows, None)
+        if sample is None:
+            raise ValueError("No grid rows below the 'Note Rate' header")
+        price_positions = [i for i, value in enumerate(sample) if i != note_column and value is not None and _is_number(value)]
+        selected = [note_column, *price_positions]
+        data: List[List] = []
+        row: Optional[Sequence] = sample
+        while row is not None:
+            values = [row[i] if i < len(row) else None for i in selected]
+            if all(value is None for value in values[1:]):
+                break
+            data.append(values)
+            row = next(grid_rows, None)
+        width = max(width, rest.shape[1], len(sample))
+    finally:
+        workbook.close()
+
+    columns = _column_names(header, width)
+    start_row = note_index + 1
+    meta = GridMeta(
+        start_row=start_row,
+        end_row=start_row + len(data) - 1,
+        note_rate_col=columns[note_column],
+        price_columns=[columns[i] for i in price_positions],
+    )
+    raw = np.array(data, dtype=object).reshape(len(data), len(selected))
+    header_row = rest[0]
+    matrix = cells_to_matrix(raw[:, 0], raw[:, 1:], meta)
+    return StreamedGrid(matrix=matrix, columns=columns, column_labels=[header_row[i] if i < len(header_row) else None for i in price_positions])
+
+
+def read_base_grid(base_xlsx_path: str | os.PathLike, sheet_name: str, cache: WorkbookCache | None = None) -> StreamedGrid:
+    if cache is None:
+        return _stream_grid(base_xlsx_path, sheet_name)
+    workbook = cache.load(base_xlsx_path, sheets=False)
+    return workbook.derive(("base_grid", sheet_name), lambda: _stream_grid(BytesIO(workbook.raw), sheet_name))
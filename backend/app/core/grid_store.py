@@ -0,0 +1,150 @@
+from __future__ import annotations
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+import numpy as np
+
+GRID_STORE_VERSION = 1
+META_FILENAME = "meta.json"
+# Arrays are stored one .npy per field so readers can memory-map exactly what they touch.
+ARRAY_FILES = ("note_rates", "base", "tiers")
+
+
+def grid_store_root(storage_root: str | os.PathLike, investor_dir: str) -> Path:
+    return Path(storage_root) / investor_dir / "grids"
+
+
+def partition_path(root: Path, effective_date: date, channel: str, product: str, job_id: int) -> Path:
+    # Hive-style partitions so a date range for one channel/product is a directory listing.
+    return root / f"date={effective_date.isoformat()}" / f"channel={channel}" / f"product={product}" / f"job={job_id}"
+
+
+def _json_label(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value if isinstance(value, (int, float, str)) else str(value)
+
+
+def write_grid_partition(
+    root: Path,
+    job_id: int,
+    effective_date: date,
+    channel: str,
+    product: str,
+    note_rates: Sequence,
+    base: np.ndarray,
+    tiers: np.ndarray,
+    tier_codes: Sequence[str],
+    adjustments: Sequence[float],
+    column_keys: Sequence,
+    column_labels: Sequence,
+) -> Path:
+    target = partition_path(root, effective_date, channel, product, job_id)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Written to a sibling directory and renamed, so readers never see a half-written partition.
+    staging = Path(tempfile.mkdtemp(dir=target.parent, prefix=".staging-"))
+    try:
+        np.save(staging / "note_rates.npy", np.asarray(note_rates, dtype=np.float64))
+        np.save(staging / "base.npy", np.ascontiguousarray(base, dtype=np.float64))
+        np.save(staging / "tiers.npy", np.ascontiguousarray(tiers, dtype=np.float64))
+        meta = {
+            "version": GRID_STORE_VERSION,
+            "job_id": job_id,
+            "effective_date": effective_date.isoformat(),
+            "channel": channel,
+            "product": product,
+            "tier_codes": list(tier_codes),
+            "adjustments": [float(value) for value in adjustments],
+            "column_keys": [_json_label(key) for key in column_keys],
+            "column_labels": [_json_label(label) for label in column_labels],
+        }
+        (staging / META_FILENAME).write_text(json.dumps(meta))
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return target
+
+
+@dataclass
+class StoredGrid:
+    path: Path
+    meta: Dict
+    note_rates: np.ndarray
+    base: np.ndarray
+    tiers: np.ndarray
+
+    @property
+    def columns(self) -> List[str]:
+        return [str(label if label is not None else key) for key, label in zip(self.meta["column_keys"], self.meta["column_labels"])]
+
+    def tier_index(self, tier_code: str) -> int:
+        try:
+            return self.meta["tier_codes"].index(tier_code)
+        except ValueError:
+            raise KeyError(f"Tier {tier_code} is not in {self.path}") from None
+
+    def select(
+        self,
+        tier_code: Optional[str] = None,
+        rate_min: Optional[float] = None,
+        rate_max: Optional[float] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "GridSlice":
+        rows = np.ones(len(self.note_rates), dtype=bool)
+        if rate_min is not None:
+            rows &= self.note_rates >= rate_min
+        if rate_max is not None:
+            rows &= self.note_rates <= rate_max
+        labels = self.columns
+        if columns:
+            wanted = {str(column).strip().upper() for column in columns}
+            positions = [i for i, (key, label) in enumerate(zip(self.meta["column_keys"], labels)) if str(key).upper() in wanted or label.upper() in wanted]
+        else:
+            positions = list(range(len(labels)))
+        source = self.base if tier_code is None else self.tiers[self.tier_index(tier_code)]
+        return GridSlice(
+            note_rates=self.note_rates[rows],
+            prices=source[np.ix_(np.flatnonzero(rows), positions)],
+            columns=[labels[i] for i in positions],
+            tier_code=tier_code,
+        )
+
+
+@dataclass
+class GridSlice:
+    note_rates: np.ndarray
+    prices: np.ndarray
+    columns: List[str]
+    tier_code: Optional[str]
+
+    def price_rows(self) -> List[List[Optional[float]]]:
+        return [[None if np.isnan(value) else float(value) for value in row] for row in self.prices.tolist()]
+
+
+def open_grid_partition(path: str | os.PathLike, mmap: bool = True) -> StoredGrid:
+    path = Path(path)
+    meta = json.loads((path / META_FILENAME).read_text())
+    mode = "r" if mmap else None
+    arrays = {name: np.load(path / f"{name}.npy", mmap_mode=mode) for name in ARRAY_FILES}
+    return StoredGrid(path=path, meta=meta, **arrays)
+
+
+def iter_partitions(root: Path, channel: str, product: str, date_from: Optional[date] = None, date_to: Optional[date] = None) -> Iterator[Path]:
+    """Partitions for one channel/product in date order, newest job last within a date."""
+    if not root.exists():
+        return
+    for date_dir in sorted(root.glob("date=*")):
+        effective = date.fromisoformat(date_dir.name.split("=", 1)[1])
+        if (date_from and effective < date_from) or (date_to and effective > date_to):
+            continue
+        product_dir = date_dir / f"channel={channel}" / f"product={product}"
+        jobs = sorted(product_dir.glob("job=*"), key=lambda job_dir: int(job_dir.name.split("=", 1)[1]))
+        yield from jobs
@@ -0,0 +1,110 @@
+from __future__ import annotations
+from dataclasses import asdict, dataclass, field, fields
+from datetime import date, datetime, time, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from app.models import ChannelEnum, FileType, Investor, JobType
+
+DEFAULT_TIER_CODES = tuple(f"NA{i}" for i in range(1, 13))
+DEFAULT_BASE_FILES = {ChannelEnum.DEL.value: FileType.DEL_BASE.value, ChannelEnum.NONDEL.value: FileType.NONDEL_BASE.value}
+
+
+@dataclass(frozen=True)
+class InvestorConfig:
+    """How one investor's daily job is laid out: which sheets to price, where outputs go and when they are due."""
+
+    code: str
+    name: str
+    # Product code -> sheet name in the investor's base workbooks, in output order.
+    products: Dict[str, str]
+    # Used when the adjustor file carries no tier columns for a product.
+    tier_codes: Tuple[str, ...] = DEFAULT_TIER_CODES
+    # Channel -> uploaded file type holding that channel's base grids.
+    base_files: Dict[str, str] = field(default_factory=lambda: dict(DEFAULT_BASE_FILES))
+    # Directory under STORAGE_ROOT; defaults to the investor code.
+    output_dir: str = ""
+    filename_template: str = "{code}_{channel}_{product}_{tier}_{date}.xlsx"
+    job_type: str = JobType.DAILY_NONAGENCY.value
+    # Jobs of this investor the scheduler runs at once; None leaves it to the worker pool size.
+    max_concurrent_jobs: Optional[int] = None
+    # Time of day ("HH:MM", in `timezone`) the effective date's sheets are due.
+    deadline: Optional[str] = None
+    timezone: str = "America/New_York"
+    email_subject: str = "{name} Non-Agency Tiered Rate Sheets – {date}"
+
+    def __post_init__(self):
+        if not self.products:
+            raise ValueError(f"Investor {self.code} config lists no products")
+        for channel, file_type in self.base_files.items():
+            ChannelEnum(channel)
+            FileType(file_type)
+        JobType(self.job_type)
+        if self.max_concurrent_jobs is not None and self.max_concurrent_jobs < 1:
+            raise ValueError("max_concurrent_jobs must be at least 1")
+        if self.deadline is not None:
+            time.fromisoformat(self.deadline)
+        try:
+            ZoneInfo(self.timezone)
+        except Exception:
+            raise ValueError(f"Unknown timezone {self.timezone}")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "InvestorConfig":
+        known = {f.name for f in fields(cls)}
+        unknown = sorted(set(data) - known)
+        if unknown:
+            raise ValueError(f"Unknown investor config keys: {', '.join(unknown)}")
+        values = dict(data)
+        if "tier_codes" in values:
+            values["tier_codes"] = tuple(values["tier_codes"])
+        return cls(**values)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data["tier_codes"] = list(self.tier_codes)
+        return data
+
+    @property
+    def directory(self) -> str:
+        return self.output_dir or self.code
+
+    @property
+    def channels(self) -> List[ChannelEnum]:
+        return [ChannelEnum(channel) for channel in self.base_files]
+
+    def base_file_type(self, channel: ChannelEnum) -> FileType:
+        return FileType(self.base_files[channel.value])
+
+    def filename(self, channel: str, product: str, tier: str, effective_date: date) -> str:
+        return self.filename_template.format(code=self.code, channel=channel, product=product, tier=tier, date=effective_date.strftime("%Y%m%d"))
+
+    def deadline_for(self, effective_date: date) -> Optional[datetime]:
+        """The effective date's cutoff as a naive UTC datetime, comparable with JobRun.started_at."""
+        if self.deadline is None:
+            return None
+        local = datetime.combine(effective_date, time.fromisoformat(self.deadline), tzinfo=ZoneInfo(self.timezone))
+        return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+PHH_CONFIG = InvestorConfig(
+    code="PHH",
+    name="PHH",
+    products={"FULLDOC": "PHH - FullDoc", "ALTDOC": "PHH - AltDoc", "DSCR": "PHH - DSCR"},
+    job_type=JobType.DAILY_PHH_NONAGENCY.value,
+    deadline="09:00",
+)
+# Investors whose layout predates per-investor config; stored config is applied on top.
+BUILTIN_CONFIGS = {PHH_CONFIG.code: PHH_CONFIG}
+
+
+def resolve_config(code: str, name: str, stored: Dict | None) -> InvestorConfig:
+    stored = dict(stored or {})
+    builtin = BUILTIN_CONFIGS.get(code)
+    if builtin is None and not stored:
+        raise ValueError(f"Investor {code} has no pricing config")
+    base = builtin.to_dict() if builtin is not None else {"code": code, "name": name}
+    return InvestorConfig.from_dict({**base, **stored, "code": code})
+
+
+def investor_config(investor: Investor) -> InvestorConfig:
+    return resolve_config(investor.code, investor.name, investor.config)
@@ -0,0 +1,320 @@
+from __future__ import annotations
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Deque, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.scheduler import FairScheduler, ScheduledJob, session_describer
+from app.models import JobRun, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryQueueBackend:
+    """Lists and expiring keys in this process, with the same semantics as the Redis backend."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._lists: Dict[str, Deque[str]] = {}
+        self._expires: Dict[str, float] = {}
+        self._changed = threading.Condition()
+
+    def push(self, name: str, value: str) -> None:
+        with self._changed:
+            self._lists.setdefault(name, deque()).appendleft(value)
+            self._changed.notify_all()
+
+    def pop(self, name: str, timeout: float, processing: str) -> Optional[str]:
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._lists.get(name), timeout=timeout or 0):
+                return None
+            value = self._lists[name].pop()
+            self._lists.setdefault(processing, deque()).appendleft(value)
+            return value
+
+    def ack(self, processing: str, value: str) -> None:
+        with self._changed:
+            try:
+                self._lists.get(processing, deque()).remove(value)
+            except ValueError:
+                pass
+
+    def size(self, name: str) -> int:
+        return len(self._lists.get(name, ()))
+
+    def heartbeat(self, key: str, ttl: int) -> None:
+        self._expires[key] = self.clock() + ttl
+
+    def forget(self, key: str) -> None:
+        self._expires.pop(key, None)
+
+    def requeue(self, processing: str, name: str) -> List[str]:
+        with self._changed:
+            moved = list(self._lists.pop(processing, ()))
+            # Newest first onto the pop end, so the oldest is popped first again.
+            self._lists.setdefault(name, deque()).extend(moved)
+            self._changed.notify_all()
+        return moved
+
+    def orphans(self, processing_prefix: str, alive_prefix: str) -> List[str]:
+        now = self.clock()
+        return [
+            key
+            for key, values in list(self._lists.items())
+            if key.startswith(processing_prefix) and values and self._expires.get(alive_prefix + key[len(processing_prefix):], 0) <= now
+        ]
+
+
+class RedisQueueBackend:
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisQueueBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url, decode_responses=True))
+
+    def push(self, name: str, value: str) -> None:
+        self.client.lpush(name, value)
+
+    def pop(self, name: str, timeout: float, processing: str) -> Optional[str]:
+        # The move is atomic, so a job is always in the queue or in exactly one worker's processing list.
+        if not timeout:
+            return self.client.lmove(name, processing, "RIGHT", "LEFT")
+        return self.client.blmove(name, processing, max(int(timeout), 1), "RIGHT", "LEFT")
+
+    def ack(self, processing: str, value: str) -> None:
+        self.client.lrem(processing, 1, value)
+
+    def size(self, name: str) -> int:
+        return int(self.client.llen(name))
+
+    def heartbeat(self, key: str, ttl: int) -> None:
+        self.client.set(key, "1", ex=ttl)
+
+    def forget(self, key: str) -> None:
+        self.client.delete(key)
+
+    def requeue(self, processing: str, name: str) -> List[str]:
+        moved = []
+        # Newest first onto the pop end, so the oldest is popped first again.
+        while (value := self.client.lmove(processing, name, "LEFT", "RIGHT")) is not None:
+            moved.append(value)
+        return moved
+
+    def orphans(self, processing_prefix: str, alive_prefix: str) -> List[str]:
+        return [
+            key
+            for key in self.client.scan_iter(match=f"{processing_prefix}*")
+            if not self.client.exists(alive_prefix + key[len(processing_prefix):])
+        ]
+
+
+class JobQueue:
+    """Job ids in a list; each consumer moves what it takes into its own processing list until the job is acked.
+
+    A job taken by a worker that dies stays in that worker's processing list. Once its heartbeat has lapsed,
+    `recover` in any other consumer puts those jobs back on the queue.
+    """
+
+    def __init__(self, backend, name: str = "pricing-jobs", consumer: str | None = None):
+        self.backend = backend
+        self.name = name
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    @property
+    def processing(self) -> str:
+        return f"{self.name}:processing:{self.consumer}"
+
+    def enqueue(self, job_id: int) -> None:
+        self.backend.push(self.name, str(job_id))
+
+    def dequeue(self, timeout: float = 0) -> Optional[int]:
+        value = self.backend.pop(self.name, timeout, self.processing)
+        return int(value) if value is not None else None
+
+    def ack(self, job_id: int) -> None:
+        self.backend.ack(self.processing, str(job_id))
+
+    def heartbeat(self, ttl: int | None = None) -> None:
+        self.backend.heartbeat(f"{self.name}:consumer:{self.consumer}", ttl or settings.job_worker_timeout_seconds)
+
+    def release(self) -> List[int]:
+        """Puts this consumer's unacked jobs back on the queue, for a worker that is shutting down."""
+        moved = self.backend.requeue(self.processing, self.name)
+        self.backend.forget(f"{self.name}:consumer:{self.consumer}")
+        return [int(value) for value in moved]
+
+    def recover(self) -> List[int]:
+        """Requeues the jobs of consumers whose heartbeat has lapsed."""
+        recovered = []
+        for processing in self.backend.orphans(f"{self.name}:processing:", f"{self.name}:consumer:"):
+            if processing != self.processing:
+                recovered.extend(int(value) for value in self.backend.requeue(processing, self.name))
+        return recovered
+
+    def __len__(self) -> int:
+        return self.backend.size(self.name)
+
+
+def build_job_queue(backend: str | None = None) -> JobQueue:
+    backend = backend or settings.job_queue_backend
+    if backend == "memory":
+        return JobQueue(MemoryQueueBackend(), settings.job_queue_name)
+    if backend == "redis":
+        return JobQueue(RedisQueueBackend.from_url(settings.redis_url), settings.job_queue_name)
+    raise ValueError(f"Unknown job queue backend: {backend}")
+
+
+_job_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    with _queue_lock:
+        if _job_queue is None:
+            _job_queue = build_job_queue()
+        return _job_queue
+
+
+def run_pricing_job(session_factory: Callable[[], Session], job_id: int) -> None:
+    from app.core.pricing_engine import PricingEngine
+
+    db = session_factory()
+    try:
+        status = db.query(JobRun.status).filter(JobRun.id == job_id).scalar()
+        # A job requeued from a dead worker may have finished before it died, just not been acked.
+        if status not in (JobStatus.PENDING, JobStatus.RUNNING):
+            logger.info("Skipping pricing job %s, already %s", job_id, status.value if status else "gone")
+            return
+        PricingEngine(db).generate(job_id)
+    except Exception:
+        logger.exception("Pricing job %s failed", job_id)
+    finally:
+        db.close()
+
+
+class JobWorker:
+    """Runs queued pricing jobs for every investor on one pool of `concurrency` slots.
+
+    Up to `lookahead` jobs are pulled off the queue into a FairScheduler, which hands out the most urgent job
+    whose investor is under its cap. Buffered jobs are invisible to other workers, so keep the lookahead small
+    when several worker processes share a queue. Jobs stay in the queue's processing list until they finish; on
+    a clean stop the buffered ones go back to the queue, and after a crash the next worker to start requeues them.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        session_factory: Callable[[], Session],
+        concurrency: int | None = None,
+        runner=run_pricing_job,
+        scheduler: FairScheduler | None = None,
+        describe: Callable[[int], ScheduledJob] | None = None,
+        lookahead: int | None = None,
+    ):
+        self.queue = job_queue
+        self.session_factory = session_factory
+        self.concurrency = max(concurrency or settings.job_worker_concurrency, 1)
+        self.runner = runner
+        self.scheduler = scheduler if scheduler is not None else FairScheduler()
+        self.describe = describe or session_describer(session_factory)
+        self.lookahead = max(lookahead or settings.job_scheduler_lookahead, 1)
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._finished = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _run(self, job: ScheduledJob) -> None:
+        try:
+            self.runner(self.session_factory, job.job_id)
+            if job.deadline is not None and datetime.utcnow() > job.deadline:
+                logger.warning("Pricing job %s for %s finished after its %s UTC deadline", job.job_id, job.investor, job.deadline)
+        finally:
+            self.queue.ack(job.job_id)
+            self.scheduler.done(job)
+            self._slots.release()
+            self._finished.set()
+
+    def _pull(self, timeout: float = 0) -> None:
+        # Block only when nothing is buffered; otherwise top the buffer up with whatever is already queued.
+        while len(self.scheduler) < self.lookahead:
+            job_id = self.queue.dequeue(timeout=0 if len(self.scheduler) else timeout)
+            if job_id is None:
+                return
+            self.scheduler.add(self.describe(job_id))
+
+    def _next_job(self, timeout: float) -> Optional[ScheduledJob]:
+        self._pull(timeout)
+        job = self.scheduler.pop()
+        if job is None and len(self.scheduler):
+            # Everything buffered belongs to investors at their cap; wait for one of their jobs to finish.
+            self._finished.wait(timeout)
+            self._finished.clear()
+        return job
+
+    def _recover(self) -> None:
+        self.queue.heartbeat()
+        recovered = self.queue.recover()
+        if recovered:
+            logger.warning("Requeued pricing jobs %s left unfinished by a worker that stopped responding", recovered)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(max(settings.job_worker_timeout_seconds / 3, 0.1)):
+            self.queue.heartbeat()
+
+    def run_pending(self) -> int:
+        self._recover()
+        processed = 0
+        while True:
+            self._pull()
+            job = self.scheduler.pop()
+            if job is None:
+                return processed
+            self._slots.acquire()
+            self._run(job)
+            processed += 1
+
+    def serve(self, poll_timeout: float = 1.0) -> None:
+        self._recover()
+        # Beats on its own thread, so a slow describe or database call in this loop cannot let the lease lapse.
+        heartbeat = threading.Thread(target=self._beat, name="pricing-job-heartbeat", daemon=True)
+        heartbeat.start()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="pricing-job")
+        try:
+            while not self._stop.is_set():
+                # Claim a slot before pulling so queued jobs stay visible to other workers while this one is busy.
+                if not self._slots.acquire(timeout=poll_timeout):
+                    continue
+                job = self._next_job(poll_timeout)
+                if job is None:
+                    self._slots.release()
+                    continue
+                self._executor.submit(self._run, job)
+        finally:
+            self._executor.shutdown(wait=True)
+            self._stop.set()
+            # Every started job has been acked, so what is left in the processing list is the unstarted buffer.
+            self.scheduler.clear()
+            self.queue.release()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.serve, name="pricing-job-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,739 @@
+"""LLPA grid detection and transposition, ported from the browser tool in LLPAPower.html.
+
+The functions keep the tool's names and rules (detectGridsInSheet -> detect_grids_in_sheet, isCLTVHeader ->
+is_cltv_header, ...) so the detected grids and the output workbook match what the page downloads. Each sheet is
+streamed with openpyxl into a cell matrix laid out like SheetJS's `sheet_to_json(header: 1)`. The per-cell tests
+run once per distinct cell text and become NumPy masks. The tool re-scans every cell from every start position,
+but here only rows with at least three CLTV-like cells are tried, and the label walk below a header is a mask
+search. Sheets are scanned in parallel processes.
+"""
+from __future__ import annotations
+import math
+import multiprocessing
+import os
+import re
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from zipfile import BadZipFile
+import numpy as np
+import openpyxl
+from openpyxl.utils.datetime import to_excel
+from openpyxl.utils.exceptions import InvalidFileException
+from app.config import settings
+
+# Output template columns (llpa_template_copy_paster.xlsx); dimensions are (min, max) column pairs.
+TEMPLATE_COLUMNS = {
+    "amount": (0, 1),
+    "secondLien": (2, 3),
+    "helocLine": (4, 5),
+    "helocDraw": (6, 7),
+    "combinedLoan": (8, 9),
+    "dscr": (10, 11),
+    "qDscr": (12, 13),
+    "frontDti": (14, 15),
+    "backDti": (16, 17),
+    "fico": (18, 19),
+    "hcltv": (20, 21),
+    "cltv": (22, 23),
+    "ltv": (24, 25),
+    "ltl": (26, 27),
+    "cashOut": (28, 29),
+    "cashInHand": (30, 31),
+    "monthsRes": (32, 33),
+    "qMonthsRes": (34, 35),
+    "resIncome": (36, 37),
+    "qResIncome": (38, 39),
+    "houseNum": (40, 41),
+    "ppp": (42, 43),
+}
+LLPA_RATE_COLUMN, LLPA_PRICE_COLUMN, CAP_PRICE_COLUMN = 44, 45, 46
+TEMPLATE_WIDTH = 47
+HEADER_ROW = [
+    "Amount", None, "Second Lien Loan Amount", None, "HELOC Line Amount", None,
+    "HELOC Draw Amount", None, "Combined Loan Amount", None, "DCSR", None,
+    "Q. DSCR", None, "Front-End DTI", None, "Back-End DTI", None,
+    "FICO", None, "HCLTV", None, "CLTV", None, "LTV", None, "LTL", None,
+    "Cash Out", None, "Cash-in-Hand", None, "Months Res.", None,
+    "Q Months Res.", None, "Res. Income", None, "Q Res. Income", None,
+    "House / Fin. #", None, "PPP", None, "LLPA", None, "Cap",
+]  # fmt: skip
+MIN_MAX_ROW = ["Min", "Max"] * 22 + ["Rate", "Price", "Price"]
+PPP_PLACEHOLDER = [["OUT OF SCOPE - PPP grid handling not implemented"]]
+# Compared after trim + lower-case, so only the lower-case spellings can match.
+INELIGIBLE_MARKERS = frozenset({"-", "--", "---", "na", "n/a", "n\\a", "x", "ineligible", "not eligible", "", "9", "9.0", "9.00"})
+SKIPPABLE_LABELS = (
+    "credit score", "fico", "cltv", "ltv", "adjustment", "llpa", "price adjustment", "rate adjustment", "other", "notes",
+    "documentation", "product", "loan amount", "max price", "min price", "lock", "term", "program", "base", "pricing", "coupon",
+)  # fmt: skip
+OUTPUT_SUFFIX = "_LoanNEX_LLPAs.xlsx"
+
+_CLTV_PATTERNS = [
+    re.compile(pattern)
+    for pattern in (
+        r"^[0-9]+\.?[0-9]*\s*[-–]\s*[0-9]+",
+        r"^[≤<=]+\s*[0-9]+",
+        r"^[0-9]+\.?[0-9]*\s*%\s*\*{0,2}$",
+        r"^[45678][05]$",
+        r"^90$",
+        r"^0+\.?[0-9]*\s*[-–]",
+        r"^0\.[456789][0-9]*$",
+        r"^[0-9]+\.?[0-9]*\s*%?\s*\*{1,2}$",
+    )
+]
+_FICO_PATTERNS = [
+    re.compile(pattern)
+    for pattern in (r"^[0-9]{3}\s*[-–—]\s*[0-9]{3}", r"^[0-9]{3}\+", r"^[≥>=]+\s*[0-9]{3}", r"^[<≤]+\s*[0-9]{3}")
+]
+_FICO_PREFIX = re.compile(r"^fico\s*", re.IGNORECASE)
+_FLOAT_PREFIX = re.compile(r"[+-]?(?:Infinity|(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?)")
+_SINGLE_VALUE = re.compile(r"^([0-9]+(?:\.[0-9]+)?)\s*%?\s*\*{0,2}$")
+_SHEET_NAME_CHARS = re.compile(r"[\\/?*\[\]:]")
+
+
+class Bound(NamedTuple):
+    min: Optional[float]
+    max: Optional[float]
+
+
+@dataclass
+class DetectedGrid:
+    id: str
+    sheet_name: str
+    type: str
+    type_badge: str
+    row_dimension: str
+    col_dimension: str
+    name: str
+    trigger: Optional[str]
+    cell_ref: str
+    start_row: int
+    start_col: int
+    end_row: int
+    end_col: int
+    header_row: int
+    data_start_row: int
+    label_col: int
+    # (column, header text) and (row, label text), 0-based in the sheet's cell matrix.
+    cltv_headers: List[Tuple[int, str]]
+    row_labels: List[Tuple[int, str]]
+    is_single_value_max: bool
+    is_decimal_cltv: bool
+    is_single_value_fico: bool
+    # "price" (the tool's default), "rate" or "cap": which LLPA template column the values go to.
+    value_type: str = "price"
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class SheetGrids:
+    sheet_name: str
+    rows: int
+    cols: int
+    grids: List[DetectedGrid] = field(default_factory=list)
+    # Output tab name -> transposed rows, in the order the tool would write them.
+    outputs: Dict[str, List[List]] = field(default_factory=dict)
+    errors: List[Dict] = field(default_factory=list)
+
+
+# --- JavaScript value semantics -------------------------------------------------------------------------------
+
+
+def js_str(value) -> str:
+    """String(value) for the raw cell values SheetJS produces (numbers, strings, booleans)."""
+    if value is None:
+        return "null"
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        number = float(value)
+        if math.isnan(number):
+            return "NaN"
+        if math.isinf(number):
+            return "Infinity" if number > 0 else "-Infinity"
+        if number.is_integer() and abs(number) < 1e21:
+            return str(int(number))
+        if abs(number) >= 1e21 or abs(number) < 1e-6:
+            mantissa, exponent = repr(number).split("e") if "e" in repr(number) else (repr(number), "0")
+            return f"{mantissa}e{'+' if int(exponent) > 0 else '-'}{abs(int(exponent))}"
+        return np.format_float_positional(number)
+    return str(value)
+
+
+def js_parse_float(value) -> float:
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+        return float(value)
+    match = _FLOAT_PREFIX.match(js_str(value).lstrip())
+    return float(match.group(0).replace("Infinity", "inf")) if match else math.nan
+
+
+def js_truthy(value) -> bool:
+    if value is None:
+        return False
+    if isinstance(value, (float, np.floating)):
+        return not math.isnan(value) and value != 0
+    if isinstance(value, (bool, np.bool_, int, np.integer)):
+        return bool(value)
+    return value != ""
+
+
+def _js_round(value: float) -> float:
+    # Math.round rounds halves up, where Python's round() rounds them to even.
+    return math.floor(value + 0.5)
+
+
+def _number(value: float) -> Optional[float]:
+    return None if value is None or (isinstance(value, float) and math.isnan(value)) else value
+
+
+# --- Cell tests (isCLTVHeader, isFicoRange, ...) --------------------------------------------------------------
+
+
+def is_ineligible(value) -> bool:
+    return value is None or js_str(value).strip().lower() in INELIGIBLE_MARKERS
+
+
+@lru_cache(maxsize=65536, typed=True)
+def normalize_value(value):
+    """An LLPA cell as a number (whole numbers >= 10 read as hundredths), or "N/A" for ineligible cells."""
+    if is_ineligible(value):
+        return "N/A"
+    number = js_parse_float(value)
+    if math.isnan(number):
+        return "N/A"
+    if abs(number) >= 10 and number.is_integer():
+        number = number / 100
+    return number
+
+
+@lru_cache(maxsize=65536)
+def is_cltv_header(text: str) -> bool:
+    if not text:
+        return False
+    lowered = text.strip().lower()
+    if any(word in lowered for word in ("fico", "credit", "score", "rate", "day", "lock")):
+        return False
+    if any(pattern.search(lowered) for pattern in _CLTV_PATTERNS):
+        return True
+    number = js_parse_float(lowered.replace("%", "").replace("*", ""))
+    return 0.45 <= number <= 0.95 or 45 <= number <= 95
+
+
+@lru_cache(maxsize=65536)
+def is_fico_range(text: str) -> bool:
+    if not text:
+        return False
+    cleaned = _FICO_PREFIX.sub("", text.strip(), count=1)
+    return any(pattern.search(cleaned) for pattern in _FICO_PATTERNS)
+
+
+@lru_cache(maxsize=65536)
+def is_skippable_label(label: str) -> bool:
+    lowered = label.lower()
+    return any(word in lowered for word in SKIPPABLE_LABELS) and not is_fico_range(label)
+
+
+def parse_range(range_str, is_single_value_max: bool = False, is_decimal_cltv: bool = False) -> Bound:
+    if not isinstance(range_str, str) or not range_str:
+        number = js_parse_float(range_str) if range_str is not None else math.nan
+        if not math.isnan(number):
+            if is_decimal_cltv and 0 < number < 1:
+                number = number * 100
+            return Bound(None, number) if is_single_value_max else Bound(number, number)
+        return Bound(None, None)
+
+    text = _FICO_PREFIX.sub("", range_str.strip(), count=1)
+    # Open-ended minimum: "780+", ">=780", "≥800". A bare number also lands here, as it does in the tool.
+    if re.search(r"^[≥>=]*\s*([0-9]+(?:\.[0-9]+)?)\s*\+?$", text) or "+" in text or re.search(r"^[≥>]\s*=?\s*[0-9]", text):
+        return Bound(js_parse_float(re.sub(r"[≥>=+\s]", "", text)), None)
+    # Open-ended maximum: "<=50", "≤50%".
+    match = re.search(r"^[≤<=<]+\s*([0-9]+(?:\.[0-9]+)?)\s*%?\s*\*{0,2}$", text)
+    if match:
+        upper = js_parse_float(match.group(1))
+        if is_decimal_cltv and 0 < upper < 1:
+            upper = upper * 100
+        return Bound(None, upper)
+    match = re.search(r"([0-9]+(?:\.[0-9]+)?)\s*[-–—]\s*([0-9]+(?:\.[0-9]+)?)", text)
+    if match:
+        lower, upper = js_parse_float(match.group(1)), js_parse_float(match.group(2))
+        if is_decimal_cltv:
+            lower = lower * 100 if 0 < lower < 1 else lower
+            upper = upper * 100 if 0 < upper < 1 else upper
+        return Bound(lower, upper)
+    match = re.search(r"([0-9]{3})\s*[-–—]\s*([0-9]{3})", text)
+    if match:
+        return Bound(js_parse_float(match.group(1)), js_parse_float(match.group(2)))
+    number = js_parse_float(re.sub(r"[%≤≥<>=*\s]", "", text))
+    if not math.isnan(number):
+        if is_decimal_cltv and 0 < number < 1:
+            number = number * 100
+        return Bound(None, number) if is_single_value_max else Bound(number, number)
+    return Bound(None, None)
+
+
+def detect_decimal_cltv_pattern(headers: Sequence[Tuple[int, str]]) -> bool:
+    values = [number for number in (js_parse_float(value.strip()) for _, value in headers) if not math.isnan(number)]
+    return sum(0.45 <= value <= 0.95 for value in values) >= len(values) * 0.5
+
+
+def detect_single_value_max_pattern(headers: Sequence[Tuple[int, str]]) -> bool:
+    if len(headers) < 3:
+        return False
+    values = []
+    for _, value in headers:
+        match = _SINGLE_VALUE.search(value.strip())
+        if match:
+            number = js_parse_float(match.group(1))
+            values.append(number * 100 if 0 < number < 1 else number)
+    if len(values) < len(headers) * 0.7:
+        return False
+    ascending = all(later > earlier for earlier, later in zip(values, values[1:]))
+    has_range = any(re.search(r"[-–—]", value) for _, value in headers)
+    has_lte = any(re.search(r"[≤<=]", value) for _, value in headers)
+    return ascending and not has_range and not has_lte
+
+
+def process_cltv_headers_with_inferred_min(
+    headers: Sequence[Tuple[int, str]], is_single_value_max: bool, is_decimal_cltv: bool = False
+) -> List[Tuple[int, str, Bound]]:
+    """Column bounds for each CLTV header. Single-value-max headers (55%, 60%, ...) take min = previous max + 0.01."""
+    if not is_single_value_max:
+        return [(col, value, parse_range(value, False, is_decimal_cltv)) for col, value in headers]
+    processed = []
+    previous_max = None
+    for col, value in headers:
+        parsed = parse_range(value, True, is_decimal_cltv)
+        inferred_min = _js_round((previous_max + 0.01) * 100) / 100 if previous_max is not None else None
+        processed.append((col, value, Bound(inferred_min, parsed.max)))
+        previous_max = parsed.max
+    return processed
+
+
+def detect_single_value_fico_pattern(row_labels: Sequence[Tuple[int, str]]) -> bool:
+    if len(row_labels) < 3:
+        return False
+    values = []
+    for _, label in row_labels:
+        match = re.search(r"^([0-9]{3})$", _FICO_PREFIX.sub("", label, count=1).strip())
+        if match:
+            values.append(int(match.group(1)))
+    if len(values) < len(row_labels) * 0.7:
+        return False
+    return all(later < earlier for earlier, later in zip(values, values[1:]))
+
+
+def determine_grid_type(row_labels: Sequence[Tuple[int, str]]) -> Tuple[str, str, str, str]:
+    """(type, badge, name, row dimension) for a grid from its row labels."""
+    labels = [label.lower() for _, label in row_labels]
+    if any(is_fico_range(label) for _, label in row_labels) or detect_single_value_fico_pattern(row_labels):
+        return "fico-cltv", "fico-cltv", "FICO_CLTV", "fico"
+    if all(re.search(r"^[A-Z]{2}$", label.strip()) for _, label in row_labels):
+        return "state", "state", "State", "state"
+
+    def any_label(*words) -> bool:
+        return any(word in label for label in labels for word in words)
+
+    if any_label("$", "mm", "000", "upb", "loan amount", "balance"):
+        return "cltv-only", "amount", "LoanAmt_CLTV", "amount"
+    if any_label("condo", "unit", "sfr", "pud", "property", "non-warrantable", "condotel", "co-op", "coop"):
+        return "cltv-only", "property", "PropType_CLTV", "other"
+    if any_label("dti", "43%") or any(re.search(r"[0-9]+%?\s*[-–]\s*[0-9]+%", label) for label in labels):
+        return "cltv-only", "dti", "DTI_CLTV", "dti"
+    if any_label("dscr", "no ratio") or any(re.search(r"[0-9]\.[0-9]{1,2}\s*[-–]", label) for label in labels):
+        return "cltv-only", "dscr", "DSCR_CLTV", "dscr"
+    if any_label("prepay", "ppp") or any("year" in label and any(digit in label for digit in "12345") for label in labels):
+        return "ppp", "ppp", "PPP", "ppp"
+    if any_label("purchase", "rate/term", "cash out", "refi", "refinance"):
+        return "cltv-only", "purpose", "LoanPurpose_CLTV", "other"
+    if any_label("investor", "second home", "primary", "owner"):
+        return "cltv-only", "occupancy", "Occupancy_CLTV", "other"
+    if any_label("bank statement", "full doc", "alt doc", "1099", "p&l"):
+        return "cltv-only", "doctype", "DocType_CLTV", "other"
+    return "cltv-only", "adjustment", "Adjustment_CLTV", "other"
+
+
+def _cell_triggers(text: str) -> List[str]:
+    found = []
+    if "primary" in text and "nco" not in text:
+        found.append("Primary")
+    elif "second home" in text:
+        found.append("Second Home")
+    elif "noo" in text or "investor" in text or "investment" in text:
+        found.append("Investment")
+
+    if "purchase" in text and "noo" not in text:
+        found.append("Purchase")
+    elif "nco" in text or "rate/term" in text or "r/t" in text or "rate term" in text:
+        found.append("NCO Refi")
+    elif ("cash" in text and "out" in text) or "co refi" in text or "cashout" in text:
+        found.append("CO Refi")
+
+    doc_rules = (
+        (lambda t: "full doc" in t or t == "full documentation", "FullDoc"),
+        (lambda t: "2 year" in t and ("full" in t or "doc" in t), "2YrFullDoc"),
+        (lambda t: "bank statement" in t or "bank stmt" in t or t == "bs", "BankStmt"),
+        (lambda t: "12 month" in t or "12 mo" in t or "12mo" in t, "12Mo"),
+        (lambda t: "24 month" in t or "24 mo" in t or "24mo" in t, "24Mo"),
+        (lambda t: "1099" in t, "1099"),
+        (lambda t: "p&l" in t or "profit" in t or "cpa" in t, "P&L"),
+        (lambda t: "dscr" in t, "DSCR"),
+        (lambda t: "asset" in t and ("qual" in t or "depl" in t or "util" in t), "Asset"),
+        (lambda t: "alt doc" in t or "alternative" in t, "AltDoc"),
+        (lambda t: "standard doc" in t, "StdDoc"),
+        (lambda t: "enhanced doc" in t, "EnhancedDoc"),
+        (lambda t: "wvoe" in t, "WVOE"),
+        (lambda t: "foreign national" in t or "fn" in t, "FN"),
+        (lambda t: "itin" in t, "ITIN"),
+    )
+    found.extend(next(([label] for rule, label in doc_rules if rule(text)), []))
+
+    if "fixed" in text and "arm" not in text:
+        found.append("Fixed")
+    elif "arm" in text:
+        found.append("ARM")
+    elif "40 year" in text or "40yr" in text or "40-year" in text:
+        found.append("40Yr")
+    elif "interest only" in text or "io" in text:
+        found.append("IO")
+
+    tier = re.search(r"tier\s*([123])", text, re.IGNORECASE)
+    if tier:
+        found.append("Tier" + tier.group(1))
+    return found
+
+
+def find_grid_trigger(data: np.ndarray, header_row: int) -> Optional[str]:
+    """Occupancy, purpose, documentation, product and tier keywords from the five rows above a grid."""
+    triggers: List[str] = []
+    for row in data[max(0, header_row - 5) : header_row]:
+        for cell in row:
+            if js_truthy(cell):
+                triggers.extend(_cell_triggers(js_str(cell).strip().lower()))
+    return "_".join(list(dict.fromkeys(triggers))[:4]) or None
+
+
+def clean_sheet_name(name: str) -> str:
+    return _SHEET_NAME_CHARS.sub("_", name)[:31]
+
+
+def get_cell_ref(row: int, col: int) -> str:
+    letters = ""
+    col_index = col
+    while col_index >= 0:
+        letters = chr(col_index % 26 + 65) + letters
+        col_index = col_index // 26 - 1
+    return f"{letters}{row + 1}"
+
+
+# --- Sheet scanning --------------------------------------------------------------------------------------------
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _cell_text(value) -> str:
+    return js_str(value).strip()
+
+
+_texts = np.frompyfunc(lambda value: "" if value is None else _cell_text(value), 1, 1)
+_cltv_mask = np.frompyfunc(is_cltv_header, 1, 1)
+_skippable_mask = np.frompyfunc(is_skippable_label, 1, 1)
+_truthy_mask = np.frompyfunc(js_truthy, 1, 1)
+
+# Row classes for the label walk below a header row.
+_ROW_GOOD, _ROW_EMPTY, _ROW_CONTINUE, _ROW_SKIPPABLE, _ROW_FEW = range(5)
+
+
+class SheetScan:
+    """A sheet's cell matrix with the masks grid detection needs, each computed once per sheet."""
+
+    def __init__(self, data: np.ndarray):
+        self.data = data
+        self.present = np.not_equal(data, None)
+        if not data.size:
+            self.text = np.empty(data.shape, dtype=object)
+            self.nonblank = self.cltv = self.truthy = np.zeros(data.shape, dtype=bool)
+            return
+        # NaN from parseFloat is an expected "not a number" here, not a floating point error.
+        with np.errstate(invalid="ignore"):
+            self.text = _texts(data)
+            self.cltv = _cltv_mask(self.text).astype(bool)
+            self.truthy = _truthy_mask(data).astype(bool)
+        self.nonblank = self.present & (self.text != "")
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.data.shape
+
+    def header_run(self, row: int, first: int) -> List[int]:
+        # From the first CLTV cell, blanks are skipped and the first other cell ends the run.
+        stops = np.flatnonzero(self.present[row, first + 1 :] & ~self.cltv[row, first + 1 :])
+        end = first + 1 + stops[0] if len(stops) else self.shape[1]
+        return [first + int(offset) for offset in np.flatnonzero(self.cltv[row, first:end])]
+
+    def label_rows(self, data_start: int, label_col: int, header_cols: List[int]) -> List[int]:
+        """Rows tryDetectGrid accepts as grid rows, found with masks instead of walking row by row."""
+        if data_start >= self.shape[0]:
+            return []
+        present = self.present[data_start:, header_cols]
+        has_data = self.nonblank[data_start:, header_cols].any(axis=1)
+        labelled = self.truthy[data_start:, label_col]
+        skippable = np.zeros(len(labelled), dtype=bool)
+        if labelled.any():
+            skippable[labelled] = _skippable_mask(self.text[data_start:, label_col][labelled]).astype(bool)
+        codes = np.full(len(labelled), _ROW_GOOD)
+        codes[present.sum(axis=1) < 2] = _ROW_FEW
+        codes[skippable] = _ROW_SKIPPABLE
+        codes[~labelled] = np.where(has_data[~labelled], _ROW_CONTINUE, _ROW_EMPTY)
+
+        good = codes == _ROW_GOOD
+        if not good.any():
+            return []
+        first = int(np.argmax(good))
+        # Before the first grid row only an empty row stops the walk; after it, any non-grid row with a label does.
+        if (codes[:first] == _ROW_EMPTY).any():
+            return []
+        stops = np.flatnonzero(np.isin(codes[first + 1 :], (_ROW_EMPTY, _ROW_SKIPPABLE, _ROW_FEW)))
+        end = first + 1 + int(stops[0]) if len(stops) else len(codes)
+        return [data_start + first + int(offset) for offset in np.flatnonzero(good[first:end])]
+
+
+def try_detect_grid(scan: SheetScan, start_row: int, start_col: int, sheet_name: str) -> Optional[DetectedGrid]:
+    row_cltv = np.flatnonzero(scan.cltv[start_row, start_col:])
+    if not len(row_cltv):
+        return None
+    header_cols = scan.header_run(start_row, start_col + int(row_cltv[0]))
+    if len(header_cols) < 3:
+        return None
+    cltv_headers = [(col, scan.text[start_row, col]) for col in header_cols]
+    header_start = header_cols[0]
+    label_col = max(header_start - 1, 0)
+    data_start = start_row + 1
+    if data_start < scan.shape[0]:
+        first_cell = scan.data[data_start, header_start]
+        lowered = js_str(first_cell).lower()
+        if (js_truthy(first_cell) and "credit" in lowered) or "fico" in lowered:
+            label_col = header_start
+            data_start += 1
+    rows = scan.label_rows(data_start, label_col, header_cols)
+    if len(rows) < 2:
+        return None
+
+    row_labels = [(row, scan.text[row, label_col]) for row in rows]
+    grid_type, badge, type_name, row_dimension = determine_grid_type(row_labels)
+    cell_ref = get_cell_ref(start_row, label_col)
+    return DetectedGrid(
+        id=f"{sheet_name}-{start_row}-{start_col}",
+        sheet_name=sheet_name,
+        type=grid_type,
+        type_badge=badge,
+        row_dimension=row_dimension,
+        col_dimension="cltv",
+        name=f"{clean_sheet_name(sheet_name)}-{type_name}@{cell_ref}",
+        trigger=find_grid_trigger(scan.data, start_row),
+        cell_ref=cell_ref,
+        start_row=start_row,
+        start_col=label_col,
+        end_row=row_labels[-1][0],
+        end_col=cltv_headers[-1][0],
+        header_row=start_row,
+        data_start_row=row_labels[0][0],
+        label_col=label_col,
+        cltv_headers=cltv_headers,
+        row_labels=row_labels,
+        is_single_value_max=detect_single_value_max_pattern(cltv_headers),
+        is_decimal_cltv=detect_decimal_cltv_pattern(cltv_headers),
+        is_single_value_fico=detect_single_value_fico_pattern(row_labels),
+    )
+
+
+def detect_grids_in_sheet(sheet_name: str, data: np.ndarray, scan: SheetScan | None = None) -> List[DetectedGrid]:
+    """Every grid in a sheet, in the order the tool finds them (row by row, left to right, skipping found cells)."""
+    scan = scan if scan is not None else SheetScan(data)
+    rows, cols = scan.shape
+    used = np.zeros((rows, cols), dtype=bool)
+    grids: List[DetectedGrid] = []
+    # A grid needs three CLTV headers in its header row, so other rows can never start one.
+    for start_row in np.flatnonzero(scan.cltv[: max(rows - 2, 0)].sum(axis=1) >= 3):
+        start_row = int(start_row)
+        cltv_cols = np.flatnonzero(scan.cltv[start_row])
+        # Start columns sharing their first CLTV header detect the same grid, so each is tried once.
+        found: Dict[int, Optional[DetectedGrid]] = {}
+        for start_col in range(cols - 2):
+            if used[start_row, start_col]:
+                continue
+            position = np.searchsorted(cltv_cols, start_col)
+            if position == len(cltv_cols):
+                break
+            first = int(cltv_cols[position])
+            if first not in found:
+                found[first] = try_detect_grid(scan, start_row, start_col, sheet_name)
+            grid = found[first]
+            if grid is None:
+                continue
+            grid = replace(grid, id=f"{sheet_name}-{start_row}-{start_col}")
+            grids.append(grid)
+            used[grid.start_row : grid.end_row + 1, grid.start_col : grid.end_col + 1] = True
+    return grids
+
+
+# --- Transposition ---------------------------------------------------------------------------------------------
+
+
+def _set_dimension(row: List, dimension: str, bound: Bound) -> None:
+    low, high = TEMPLATE_COLUMNS[dimension]
+    row[low], row[high] = _number(bound.min), _number(bound.max)
+
+
+def transpose_grid(grid: DetectedGrid, data: np.ndarray) -> List[List]:
+    """The grid as LLPA template rows: header, Min/Max row, then one row per eligible cell."""
+    if grid.type == "ppp":
+        return [list(row) for row in PPP_PLACEHOLDER]
+    headers = process_cltv_headers_with_inferred_min(grid.cltv_headers, grid.is_single_value_max, grid.is_decimal_cltv)
+    rows = [list(HEADER_ROW), list(MIN_MAX_ROW)]
+    value_column = {"rate": LLPA_RATE_COLUMN, "cap": CAP_PRICE_COLUMN}.get(grid.value_type, LLPA_PRICE_COLUMN)
+    row_dimension = {"fico": "fico", "amount": "amount", "dti": "backDti", "ltv": "ltv"}.get(grid.row_dimension)
+    col_dimension = grid.col_dimension if grid.col_dimension in ("ltv", "amount") else "cltv"
+    for row_index, label in grid.row_labels:
+        row_bound = parse_range(label)
+        for col, _, col_bound in headers:
+            value = normalize_value(data[row_index, col] if row_index < data.shape[0] and col < data.shape[1] else None)
+            if value == "N/A":
+                continue
+            output = [None] * TEMPLATE_WIDTH
+            if row_dimension:
+                _set_dimension(output, row_dimension, row_bound)
+            _set_dimension(output, col_dimension, col_bound)
+            output[value_column] = _number(value)
+            rows.append(output)
+    return rows
+
+
+def generate_tab_name(grid: DetectedGrid) -> str:
+    name = grid.name
+    if grid.trigger:
+        suffix = "FICO_CLTV" if grid.type == "fico-cltv" else f"{grid.row_dimension}_CLTV"
+        name = f"{clean_sheet_name(grid.sheet_name)}-{grid.trigger}-{suffix}@{grid.cell_ref or ''}"
+    return clean_sheet_name(name)
+
+
+# --- Workbooks -------------------------------------------------------------------------------------------------
+
+
+def _raw_value(value):
+    # SheetJS hands dates to the tool as their Excel serial numbers.
+    if isinstance(value, (datetime, date, time, timedelta)):
+        return to_excel(value)
+    return value
+
+
+def read_sheet_matrix(worksheet) -> np.ndarray:
+    """The worksheet's used range as an object matrix (None for blanks), like sheet_to_json(header: 1, defval: null)."""
+    kwargs = {}
+    if getattr(worksheet, "min_row", None) and getattr(worksheet, "min_column", None):
+        kwargs = {"min_row": worksheet.min_row, "min_col": worksheet.min_column}
+    rows = [[_raw_value(value) for value in row] for row in worksheet.iter_rows(values_only=True, **kwargs)]
+    width = max((len(row) for row in rows), default=0)
+    data = np.full((len(rows), width), None, dtype=object)
+    for index, row in enumerate(rows):
+        data[index, : len(row)] = row
+    return data
+
+
+def scan_sheet(sheet_name: str, data: np.ndarray, grid_ids: Optional[Iterable[str]] = None) -> SheetGrids:
+    result = SheetGrids(sheet_name=sheet_name, rows=data.shape[0], cols=data.shape[1] if data.ndim == 2 else 0)
+    if data.shape[0] < 3:
+        return result
+    result.grids = detect_grids_in_sheet(sheet_name, data)
+    wanted = set(grid_ids) if grid_ids is not None else None
+    for grid in result.grids:
+        if wanted is not None and grid.id not in wanted:
+            continue
+        try:
+            # Later grids with the same tab name replace earlier ones but keep their position, as in the tool.
+            result.outputs[generate_tab_name(grid)] = transpose_grid(grid, data)
+        except Exception:
+            result.errors.append({"grid": grid.id, "error": traceback.format_exc(limit=3)})
+    return result
+
+
+_open_workbooks: Dict[Tuple[str, int], object] = {}
+
+
+def _workbook(path: str):
+    # Each pool process opens the workbook once and streams the sheets it is handed.
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _open_workbooks:
+        _close_workbooks()
+        _open_workbooks[key] = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    return _open_workbooks[key]
+
+
+def _close_workbooks() -> None:
+    for workbook in _open_workbooks.values():
+        workbook.close()
+    _open_workbooks.clear()
+
+
+def _scan_workbook_sheet(path: str, sheet_name: str, grid_ids: Optional[List[str]] = None) -> SheetGrids:
+    return scan_sheet(sheet_name, read_sheet_matrix(_workbook(path)[sheet_name]), grid_ids)
+
+
+def detect_all_grids(
+    path: str | os.PathLike,
+    sheets: Optional[Sequence[str]] = None,
+    grid_ids: Optional[Iterable[str]] = None,
+    workers: int | None = None,
+) -> List[SheetGrids]:
+    """Scans the selected sheets (all by default) in workbook order, in parallel processes when `workers` > 1.
+
+    `workers` defaults to LLPA_WORKERS, and 0 means one process per CPU.
+    """
+    path = str(path)
+    try:
+        names = _workbook(path).sheetnames
+    except (InvalidFileException, BadZipFile, KeyError, OSError) as exc:
+        raise ValueError(f"Not a readable Excel workbook: {exc}")
+    try:
+        if sheets is not None:
+            unknown = [name for name in sheets if name not in names]
+            if unknown:
+                raise ValueError(f"Unknown sheets: {', '.join(unknown)}")
+            names = [name for name in names if name in set(sheets)]
+        ids = list(grid_ids) if grid_ids is not None else None
+        workers = settings.llpa_workers if workers is None else workers
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(names) <= 1:
+            return [_scan_workbook_sheet(path, name, ids) for name in names]
+    finally:
+        _close_workbooks()
+    context = multiprocessing.get_context(settings.pricing_start_method)
+    with ProcessPoolExecutor(max_workers=min(workers, len(names)), mp_context=context) as pool:
+        return list(pool.map(_scan_workbook_sheet, [path] * len(names), names, [ids] * len(names)))
+
+
+def output_workbook(results: Sequence[SheetGrids]) -> bytes:
+    """The transposed grids as one workbook, one tab per grid, like the tool's download."""
+    tabs: Dict[str, List[List]] = {}
+    for result in results:
+        for name, rows in result.outputs.items():
+            tabs[name] = rows
+    workbook = openpyxl.Workbook(write_only=True)
+    for name, rows in tabs.items():
+        worksheet = workbook.create_sheet(title=name)
+        for row in rows:
+            worksheet.append(row)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def output_filename(source_name: str) -> str:
+    base = re.sub(r"\.[^/.]+$", "", source_name or "llpa")
+    return f"{base}{OUTPUT_SUFFIX}"
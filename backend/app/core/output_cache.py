@@ -0,0 +1,167 @@
+from __future__ import annotations
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so pins are a no-op there.
+    fcntl = None
+
+OUTPUT_SUFFIX = ".xlsx"
+# Per-key lock file: readers hold it shared while they use the entry, eviction needs it exclusively.
+LOCK_NAME = ".lock"
+
+
+class CachePins:
+    """Keys one reader is using; eviction in any process skips them until `release`.
+
+    Pin a key before looking it up, so a file that `get_or_build` returns stays on disk until the caller is done
+    attaching, zipping or streaming it. The locks are released when the pins are, or when the process exits.
+    """
+
+    def __init__(self, cache: OutputCache):
+        self.cache = cache
+        self._fds: Dict[str, int] = {}
+
+    def hold(self, key: str) -> None:
+        if key not in self._fds and fcntl is not None:
+            self._fds[key] = self.cache._flock(self.cache.path_for(key, LOCK_NAME).parent, fcntl.LOCK_SH)
+
+    def release(self) -> None:
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+    def __enter__(self) -> CachePins:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class OutputCache:
+    """Size-bounded directory of built rate sheets keyed by input fingerprint, evicting least recently used files.
+
+    Files keep their rate sheet filename, under a directory per key, so they can be attached to emails as they are.
+    Recency is the file's mtime, which every hit bumps, so the cache survives restarts and is shared by every
+    process that points at the same storage root.
+    """
+
+    def __init__(self, root: str | os.PathLike | None = None, max_bytes: int | None = None):
+        self._root = Path(root) if root is not None else None
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        # Resolved per call so a changed STORAGE_ROOT takes effect without rebuilding the singleton. Keys are input
+        # fingerprints, so every investor shares the one directory and the one OUTPUT_CACHE_MAX_BYTES budget.
+        return self._root if self._root is not None else Path(settings.storage_root) / "cache"
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes if self._max_bytes is not None else settings.output_cache_max_bytes
+
+    def path_for(self, key: str, name: str) -> Path:
+        return self.root / key[:2] / key / name
+
+    def pins(self) -> CachePins:
+        return CachePins(self)
+
+    def _flock(self, directory: Path, operation: int) -> Optional[int]:
+        """Descriptor holding `directory`'s lock file flocked with `operation`; None if a non-blocking lock is taken."""
+        while True:
+            if not operation & fcntl.LOCK_NB:
+                directory.mkdir(parents=True, exist_ok=True)
+            try:
+                fd = os.open(directory / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o644)
+            except FileNotFoundError:
+                return None
+            try:
+                fcntl.flock(fd, operation)
+            except BlockingIOError:
+                os.close(fd)
+                return None
+            # Eviction deletes the lock file with the entry, so a lock won on a file that is gone protects nothing.
+            try:
+                if os.path.samestat(os.fstat(fd), os.stat(directory / LOCK_NAME)):
+                    return fd
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+            if operation & fcntl.LOCK_NB:
+                return None
+
+    def get(self, key: str, name: str) -> Optional[Path]:
+        path = self.path_for(key, name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def get_or_build(self, key: str, name: str, build: Callable[[Path], None]) -> Path:
+        path = self.get(key, name)
+        if path is not None:
+            return path
+        path = self.path_for(key, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{key}.", suffix=OUTPUT_SUFFIX)
+        os.close(fd)
+        try:
+            build(Path(temp_name))
+            # Concurrent builds of one key race harmlessly: both write the same inputs and the last rename wins.
+            os.replace(temp_name, path)
+        except BaseException:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+            raise
+        self.evict(keep=path)
+        return path
+
+    def _entries(self):
+        # In-progress builds are dot-prefixed temp files and never count towards the cache.
+        return (entry for entry in self.root.glob(f"*/*/*{OUTPUT_SUFFIX}") if not entry.name.startswith("."))
+
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def evict(self, keep: Path | None = None) -> int:
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            for _, size, entry in sorted(entries, key=lambda row: row[0]):
+                if total - freed <= self.max_bytes:
+                    break
+                if entry == keep:
+                    continue
+                fd = self._flock(entry.parent, fcntl.LOCK_EX | fcntl.LOCK_NB) if fcntl is not None else None
+                if fcntl is not None and fd is None:
+                    # Pinned by a reader; it becomes evictable again once released.
+                    continue
+                try:
+                    entry.unlink()
+                    if fd is not None:
+                        os.unlink(entry.parent / LOCK_NAME)
+                    entry.parent.rmdir()
+                except OSError:
+                    pass
+                finally:
+                    if fd is not None:
+                        os.close(fd)
+                freed += size
+            return freed
+
+
+output_cache = OutputCache()
@@ -0,0 +1,256 @@
+from __future__ import annotations
+import bisect
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import settings
+from app.models import Investor, JobRun, JobStatus
+
+logger = logging.getLogger(__name__)
+
+PRICED_STATUSES = (JobStatus.COMPLETED, JobStatus.WAITING_FOR_QC, JobStatus.APPROVED_FOR_DISTRIBUTION, JobStatus.DISTRIBUTING, JobStatus.DISTRIBUTED)
+# Note rates closer than this are treated as the same grid row.
+RATE_TOLERANCE = 1e-9
+
+
+class PriceLookupError(LookupError):
+    pass
+
+
+def column_key(label) -> str:
+    return str(label).strip().upper()
+
+
+@dataclass
+class PriceQuote:
+    org_id: str
+    channel: str
+    product: str
+    tier: str
+    column: str
+    note_rate: float
+    base_price: float
+    adjustment: float
+    price: float
+    interpolated: bool
+    effective_date: date
+    job_id: int
+
+
+@dataclass
+class CompiledGrid:
+    note_rates: List[float]
+    prices: np.ndarray
+    columns: Dict[str, int]
+    column_labels: List[str]
+    adjustments: Dict[str, float]
+
+    def base_price(self, note_rate: float, column: str, interpolate: bool = True) -> Tuple[float, bool]:
+        position = self.columns.get(column_key(column))
+        if position is None:
+            raise PriceLookupError(f"Unknown column {column!r}")
+        rates = self.note_rates
+        index = bisect.bisect_left(rates, note_rate - RATE_TOLERANCE)
+        if index < len(rates) and abs(rates[index] - note_rate) <= RATE_TOLERANCE:
+            price, interpolated = self.prices[index, position], False
+        elif 0 < index < len(rates) and interpolate:
+            low, high = rates[index - 1], rates[index]
+            weight = (note_rate - low) / (high - low)
+            below, above = self.prices[index - 1, position], self.prices[index, position]
+            price, interpolated = below + weight * (above - below), True
+        else:
+            raise PriceLookupError(f"Note rate {note_rate} is not on the grid")
+        if np.isnan(price):
+            raise PriceLookupError(f"No eligible price at {note_rate} for {column!r}")
+        return float(price), interpolated
+
+
+def compile_grid(note_rates: Sequence, prices: np.ndarray, columns: Sequence[str], labels: Sequence, adjustments: Dict[str, float]) -> CompiledGrid:
+    rates = pd.to_numeric(pd.Series(note_rates, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+    keep = np.flatnonzero(np.isfinite(rates))
+    order = keep[np.argsort(rates[keep], kind="stable")]
+    lookup: Dict[str, int] = {}
+    for position, (name, label) in enumerate(zip(columns, labels)):
+        lookup[column_key(name)] = position
+        if label is not None and not (isinstance(label, float) and np.isnan(label)):
+            lookup.setdefault(column_key(label), position)
+    return CompiledGrid(
+        note_rates=rates[order].tolist(),
+        prices=np.ascontiguousarray(np.asarray(prices, dtype=np.float64)[order]),
+        columns=lookup,
+        column_labels=[str(label) for label in labels],
+        adjustments=dict(adjustments),
+    )
+
+
+@dataclass
+class PriceIndex:
+    job_id: int
+    investor_id: int
+    effective_date: date
+    grids: Dict[Tuple[str, str], CompiledGrid]
+    seller_tiers: Dict[Tuple[str, str], str]
+    built_at: float = field(default_factory=time.time)
+
+    def quote(self, org_id: str, channel: str, product: str, note_rate: float, column: str, interpolate: bool = True) -> PriceQuote:
+        channel, product = channel.upper(), product.upper()
+        tier = self.seller_tiers.get((org_id, channel))
+        if tier is None:
+            raise PriceLookupError(f"Seller {org_id} has no {channel} tier")
+        grid = self.grids.get((channel, product))
+        if grid is None:
+            raise PriceLookupError(f"No {channel} {product} grid for {self.effective_date}")
+        adjustment = grid.adjustments.get(tier)
+        if adjustment is None:
+            raise PriceLookupError(f"Tier {tier} is not priced for {channel} {product}")
+        base, interpolated = grid.base_price(note_rate, column, interpolate)
+        return PriceQuote(
+            org_id=org_id,
+            channel=channel,
+            product=product,
+            tier=tier,
+            column=column,
+            note_rate=note_rate,
+            base_price=base,
+            adjustment=adjustment,
+            price=base + adjustment,
+            interpolated=interpolated,
+            effective_date=self.effective_date,
+            job_id=self.job_id,
+        )
+
+
+def _load_from_job(db: Session, job_run: JobRun) -> PriceIndex:
+    from app.core.pricing_engine import PricingEngine
+
+    return PricingEngine(db).build_price_index(job_run)
+
+
+class PriceIndexRegistry:
+    """Compiled indexes by investor and effective date, swapped wholesale so readers never see a partial build.
+
+    Once an index is loaded, refreshes run in a background thread and requests keep getting the index they have
+    until the new one is published.
+    """
+
+    def __init__(self, loader: Callable[[Session, JobRun], PriceIndex] = _load_from_job, refresh_seconds: float | None = None, max_dates: int | None = None):
+        self.loader = loader
+        self.refresh_seconds = settings.price_index_refresh_seconds if refresh_seconds is None else refresh_seconds
+        self.max_dates = max_dates or settings.price_index_max_dates
+        self._indexes: Dict[Tuple[int, date], PriceIndex] = {}
+        self._latest: Dict[int, date] = {}
+        self._checked: Dict[Tuple[int, Optional[date]], float] = {}
+        self._investor_ids: Dict[str, int] = {}
+        self._build_lock = threading.Lock()
+        # Background refreshes by (investor id, requested date); at most one runs per key.
+        self._refreshing: Dict[Tuple[int, Optional[date]], threading.Thread] = {}
+        self._refreshing_lock = threading.Lock()
+
+    def publish(self, index: PriceIndex) -> None:
+        with self._build_lock:
+            self._publish(index)
+
+    def _publish(self, index: PriceIndex) -> None:
+        investor_id = index.investor_id
+        indexes = dict(self._indexes)
+        indexes[(investor_id, index.effective_date)] = index
+        dates = sorted(day for owner, day in indexes if owner == investor_id)
+        for stale in dates[: max(len(dates) - self.max_dates, 0)]:
+            del indexes[(investor_id, stale)]
+        self._indexes = indexes
+        if investor_id not in self._latest or index.effective_date >= self._latest[investor_id]:
+            self._latest[investor_id] = index.effective_date
+
+    def investor_id(self, db: Session, code: str) -> Optional[int]:
+        """The investor's id, looked up once per code; None if there is no such investor."""
+        code = code.upper()
+        if code not in self._investor_ids:
+            investor_id = db.query(Investor.id).filter(Investor.code == code).scalar()
+            if investor_id is None:
+                return None
+            self._investor_ids[code] = investor_id
+        return self._investor_ids[code]
+
+    def get(self, db: Session, investor_id: int, effective_date: date | None = None) -> PriceIndex:
+        index = self._indexes.get((investor_id, effective_date or self._latest.get(investor_id)))
+        if time.monotonic() - self._checked.get((investor_id, effective_date), float("-inf")) >= self.refresh_seconds:
+            if index is None:
+                # Nothing to serve yet, so this request waits for the build.
+                self.refresh(db, investor_id, effective_date)
+                index = self._indexes.get((investor_id, effective_date or self._latest.get(investor_id)))
+            else:
+                self._refresh_in_background(sessionmaker(bind=db.get_bind()), investor_id, effective_date)
+        if index is None:
+            raise PriceLookupError(f"No completed pricing job for {effective_date or 'any date'}")
+        return index
+
+    def _refresh_in_background(self, session_factory: Callable[[], Session], investor_id: int, effective_date: date | None) -> None:
+        key = (investor_id, effective_date)
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            # The request's session closes when it returns, so the thread opens its own.
+            thread = threading.Thread(target=self._refresh_with_session, args=(session_factory, investor_id, effective_date), daemon=True)
+            self._refreshing[key] = thread
+        thread.start()
+
+    def _refresh_with_session(self, session_factory: Callable[[], Session], investor_id: int, effective_date: date | None) -> None:
+        db = session_factory()
+        try:
+            self.refresh(db, investor_id, effective_date)
+        except Exception:
+            logger.exception("Refreshing the price index for investor %s failed", investor_id)
+        finally:
+            db.close()
+            with self._refreshing_lock:
+                self._refreshing.pop((investor_id, effective_date), None)
+
+    def wait(self) -> None:
+        """Blocks until the background refreshes started so far have finished."""
+        with self._refreshing_lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join()
+
+    def refresh(self, db: Session, investor_id: int, effective_date: date | None = None) -> None:
+        query = db.query(JobRun.id, JobRun.effective_date).filter(JobRun.investor_id == investor_id, JobRun.status.in_(PRICED_STATUSES))
+        if effective_date is not None:
+            query = query.filter(JobRun.effective_date == effective_date)
+        latest = query.order_by(JobRun.effective_date.desc(), JobRun.finished_at.desc(), JobRun.id.desc()).first()
+        with self._build_lock:
+            self._checked[(investor_id, effective_date)] = time.monotonic()
+            if latest is None:
+                return
+            current = self._indexes.get((investor_id, latest.effective_date))
+            if current is None or current.job_id != latest.id:
+                job_run = db.query(JobRun).filter(JobRun.id == latest.id).one()
+                self._publish(self.loader(db, job_run))
+            if effective_date is None:
+                self._latest[investor_id] = latest.effective_date
+
+    def clear(self) -> None:
+        self.wait()
+        with self._build_lock:
+            self._indexes = {}
+            self._latest = {}
+            self._checked = {}
+            self._investor_ids = {}
+
+
+price_indexes = PriceIndexRegistry()
+
+
+def quote_many(index: PriceIndex, loans: Iterable[dict], interpolate: bool = True) -> List[Tuple[Optional[PriceQuote], Optional[str]]]:
+    results: List[Tuple[Optional[PriceQuote], Optional[str]]] = []
+    for loan in loans:
+        try:
+            results.append((index.quote(interpolate=interpolate, **loan), None))
+        except PriceLookupError as exc:
+            results.append((None, str(exc)))
+    return results
@@ -0,0 +1,50 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Sequence
+import numpy as np
+import pandas as pd
+from app.core.excel_utils import GridMeta
+
+
+@dataclass
+class GridMatrix:
+    note_rates: np.ndarray
+    prices: np.ndarray
+    ineligible: np.ndarray
+    labels: np.ndarray
+    meta: GridMeta
+
+    @property
+    def shape(self):
+        return self.prices.shape
+
+    def tier_prices(self, tensor: np.ndarray, index: int) -> np.ndarray:
+        prices = tensor[index]
+        if not self.ineligible.any():
+            return prices
+        values = prices.astype(object)
+        values[self.ineligible] = self.labels[self.ineligible]
+        return values
+
+
+def grid_to_matrix(grid_df: pd.DataFrame, meta: GridMeta) -> GridMatrix:
+    return cells_to_matrix(grid_df["note_rate"].to_numpy(dtype=object), grid_df[meta.price_columns].to_numpy(dtype=object), meta)
+
+
+def cells_to_matrix(note_rates: np.ndarray, raw: np.ndarray, meta: GridMeta) -> GridMatrix:
+    prices = pd.DataFrame(raw).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    blank = pd.isna(raw)
+    ineligible = np.isnan(prices) & ~blank
+    labels = np.where(ineligible, raw, None)
+    return GridMatrix(
+        note_rates=note_rates,
+        prices=np.ascontiguousarray(prices),
+        ineligible=ineligible,
+        labels=labels,
+        meta=meta,
+    )
+
+
+def apply_tier_adjustments(matrix: GridMatrix, adjustments: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(adjustments, dtype=np.float64)
+    return matrix.prices[np.newaxis, :, :] + vector[:, np.newaxis, np.newaxis]
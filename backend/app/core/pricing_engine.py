@@ -1,136 +1,517 @@
 from __future__ import annotations
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-from sqlalchemy.orm import Session
-from app.core.excel_utils import parse_customer_tiers, parse_adjustors, parse_base_grid, write_tier_grid_to_workbook
+from sqlalchemy.orm import Session, joinedload
+from app.core.excel_utils import GridMeta, WorkbookCache, parse_customer_tiers, parse_adjustors, write_tier_matrix_to_workbook
+from app.core.grid_reader import read_base_grid
+from app.core.grid_store import grid_store_root, write_grid_partition
+from app.core.investor_config import InvestorConfig, investor_config
+from app.core.output_cache import CachePins, output_cache
+from app.core.qc import QC_FLAGGED, run_qc
+from app.core.price_index import CompiledGrid, PriceIndex, compile_grid, price_indexes
+from app.core.price_tensor import apply_tier_adjustments
+from app.core.roster_sync import sync_roster
+from app.core.telemetry import JobProfiler, JobTrace
+from app.core.reference_data import ReferenceData, bulk_insert_rate_sheets
 from app.models import (
     ChannelEnum,
-    Investor,
     JobRun,
     JobStatus,
     JobType,
     UploadedFile,
     FileType,
-    Tier,
-    ProductType,
     RateSheet,
+    Seller,
+    SellerTierAssignment,
 )
 from app.config import settings
 
+logger = logging.getLogger(__name__)
 
-DEFAULT_TIER_CODES = [f"NA{i}" for i in range(1, 13)]
-PRODUCT_GROUPS = {
-    "FULLDOC": "PHH - FullDoc",
-    "ALTDOC": "PHH - AltDoc",
-    "DSCR": "PHH - DSCR",
-}
+# Bump whenever a change alters generated workbooks, so incremental jobs rebuild everything.
+ENGINE_VERSION = "2"
+JOB_MODES = ("full", "incremental", "lazy")
+
+workbook_cache = WorkbookCache(max_bytes=settings.workbook_cache_max_bytes)
+
+
+@dataclass
+class WorkItem:
+    channel: ChannelEnum
+    product_code: str
+    tier_code: str
+    adjustment: float
+    base_path: str
+    sheet_name: str
+    meta: GridMeta
+    columns: List[str]
+    note_rates: np.ndarray
+    prices: np.ndarray
+    output_path: str
+    annotation: str
+    fingerprint: str = ""
+    grid_path: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.channel.value}/{self.product_code}/{self.tier_code}"
+
+
+@dataclass
+class WorkResult:
+    item: WorkItem
+    error: Optional[str] = None
+    reused_from: Optional[str] = None
+    seconds: float = 0.0
+    bytes_written: int = 0
+    # Lazy jobs only record the sheet; the workbook is built on first download.
+    deferred: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def input_fingerprint(base_digest: str, sheet_name: str, channel: str, product_code: str, tier_code: str, adjustor_row: Dict) -> str:
+    payload = json.dumps(
+        [ENGINE_VERSION, base_digest, sheet_name, channel, product_code, tier_code, adjustor_row],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def link_or_copy(source: str, target: str) -> None:
+    Path(target).parent.mkdir(parents=True, exist_ok=True)
+    if os.path.exists(target):
+        os.unlink(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def render_work_item(item: WorkItem, cache: WorkbookCache | None = None) -> WorkResult:
+    started = time.perf_counter()
+    try:
+        Path(item.output_path).parent.mkdir(parents=True, exist_ok=True)
+        write_tier_matrix_to_workbook(
+            item.base_path,
+            item.sheet_name,
+            item.meta,
+            item.note_rates,
+            item.prices,
+            output_path=item.output_path,
+            annotation=item.annotation,
+            cache=cache if cache is not None else workbook_cache,
+            columns=item.columns,
+        )
+    except Exception:
+        return WorkResult(item=item, error=traceback.format_exc(limit=5), seconds=time.perf_counter() - started)
+    return WorkResult(item=item, seconds=time.perf_counter() - started, bytes_written=os.path.getsize(item.output_path))
 
 
 class PricingEngine:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache: WorkbookCache | None = None):
         self.db = db
+        self.cache = cache if cache is not None else workbook_cache
+        self._configs: Dict[int, InvestorConfig] = {}
+
+    def config_for(self, job_run: JobRun) -> InvestorConfig:
+        # Kept per investor so later stages do not reload the investor after each commit expires it.
+        if job_run.investor_id not in self._configs:
+            self._configs[job_run.investor_id] = investor_config(job_run.investor)
+        return self._configs[job_run.investor_id]
+
+    def _grid_root(self, job_run: JobRun) -> Path:
+        return grid_store_root(settings.storage_root, self.config_for(job_run).directory)
 
     def _fetch_uploaded_path(self, job_run: JobRun, file_type: FileType) -> str:
-        record = (
-            self.db.query(UploadedFile)
-            .filter(UploadedFile.investor_id == job_run.investor_id, UploadedFile.file_type == file_type)
-            .order_by(UploadedFile.uploaded_at.desc())
-            .first()
-        )
+        record = next((f for f in job_run.uploaded_files if f.file_type == file_type), None)
+        if record is None:
+            # Jobs created before uploads were linked fall back to the investor's latest file.
+            record = (
+                self.db.query(UploadedFile)
+                .filter(UploadedFile.investor_id == job_run.investor_id, UploadedFile.file_type == file_type)
+                .order_by(UploadedFile.uploaded_at.desc(), UploadedFile.id.desc())
+                .first()
+            )
         if not record:
             raise ValueError(f"Missing uploaded file for {file_type}")
+        if record.sha256 and file_type != FileType.CUSTOMER_TIERS:
+            self.cache.prime(record.stored_path, record.sha256)
         return record.stored_path
 
-    def _ensure_tiers(self, investor_id: int, adjustor_mapping: Dict[str, Dict]):
-        tier_codes = set()
-        for channel_data in adjustor_mapping.values():
-            for product_data in channel_data.values():
-                tier_codes.update(product_data.get("tiers", {}).keys())
-        for code in tier_codes:
-            numeric = int(code.replace("NA", "")) if code and code.startswith("NA") else None
-            tier = self.db.query(Tier).filter(Tier.investor_id == investor_id, Tier.code == code).first()
-            if not tier:
-                tier = Tier(investor_id=investor_id, code=code, numeric_index=numeric)
-                self.db.add(tier)
+    def _build_work_items(self, job_run: JobRun, adjustors, base_paths: Dict[ChannelEnum, str]) -> List[WorkItem]:
+        items: List[WorkItem] = []
+        config = self.config_for(job_run)
+        for channel in config.channels:
+            base_path = base_paths[channel]
+            channel_adjustors = adjustors.mapping.get(channel.value, {})
+            for product_code, sheet_name in config.products.items():
+                if product_code not in channel_adjustors:
+                    continue
+                grid = read_base_grid(base_path, sheet_name, cache=self.cache)
+                workbook = self.cache.load(base_path, sheets=False)
+                meta, columns, matrix = grid.meta, grid.columns, grid.matrix
+                product_adjustors = channel_adjustors[product_code]
+                adjustments = product_adjustors.get("tiers", {})
+                tier_codes = list(adjustments.keys()) or list(config.tier_codes)
+                adjustment_values = [adjustments.get(tier_code, 0) for tier_code in tier_codes]
+                tensor = apply_tier_adjustments(matrix, adjustment_values)
+                grid_path = write_grid_partition(
+                    self._grid_root(job_run),
+                    job_run.id,
+                    job_run.effective_date,
+                    channel.value,
+                    product_code,
+                    pd.to_numeric(pd.Series(matrix.note_rates, dtype=object), errors="coerce"),
+                    matrix.prices,
+                    tensor,
+                    tier_codes,
+                    adjustment_values,
+                    meta.price_columns,
+                    grid.column_labels,
+                )
+                output_dir = self._output_root(job_run) / channel.value / product_code
+                for tier_index, tier_code in enumerate(tier_codes):
+                    adjustor_row = {"BASE": product_adjustors.get("BASE"), "adjustment": adjustment_values[tier_index]}
+                    filename = config.filename(channel.value, product_code, tier_code, job_run.effective_date)
+                    items.append(
+                        WorkItem(
+                            channel=channel,
+                            product_code=product_code,
+                            tier_code=tier_code,
+                            adjustment=adjustment_values[tier_index],
+                            base_path=base_path,
+                            sheet_name=sheet_name,
+                            meta=meta,
+                            columns=columns,
+                            note_rates=matrix.note_rates,
+                            prices=matrix.tier_prices(tensor, tier_index),
+                            output_path=str(output_dir / filename),
+                            annotation=f"Channel: {channel.value} Tier: {tier_code}",
+                            fingerprint=input_fingerprint(workbook.digest, sheet_name, channel.value, product_code, tier_code, adjustor_row),
+                            grid_path=str(grid_path),
+                        )
+                    )
+        return items
+
+    def _previous_outputs(self, job_run: JobRun) -> Tuple[Optional[int], Dict[str, RateSheet]]:
+        previous = (
+            self.db.query(JobRun)
+            .filter(
+                JobRun.investor_id == job_run.investor_id,
+                JobRun.effective_date == job_run.effective_date,
+                JobRun.id != job_run.id,
+                JobRun.status.in_([JobStatus.COMPLETED, JobStatus.WAITING_FOR_QC, JobStatus.APPROVED_FOR_DISTRIBUTION, JobStatus.DISTRIBUTING, JobStatus.DISTRIBUTED]),
+            )
+            .order_by(JobRun.started_at.desc(), JobRun.id.desc())
+            .first()
+        )
+        if not previous:
+            return None, {}
+        outputs: Dict[str, RateSheet] = {}
+        for sheet in self.db.query(RateSheet).filter(RateSheet.job_run_id == previous.id):
+            meta = sheet.metadata_ or {}
+            if meta.get("fingerprint") and meta.get("tier_code"):
+                outputs[f"{sheet.channel.value}/{meta.get('product_code')}/{meta['tier_code']}"] = sheet
+        return previous.id, outputs
+
+    def _reuse_unchanged(self, items: List[WorkItem], previous: Dict[str, RateSheet]) -> Tuple[List[WorkResult], List[WorkItem]]:
+        reused: List[WorkResult] = []
+        pending: List[WorkItem] = []
+        for item in items:
+            prior = previous.get(item.key)
+            if prior is None or prior.metadata_.get("fingerprint") != item.fingerprint or not prior.generated_path or not os.path.exists(prior.generated_path):
+                pending.append(item)
+                continue
+            try:
+                link_or_copy(prior.generated_path, item.output_path)
+            except OSError:
+                pending.append(item)
+                continue
+            reused.append(WorkResult(item=item, reused_from=prior.generated_path))
+        return reused, pending
+
+    def _execute(self, items: List[WorkItem], workers: int, on_done: Callable[[int], None] | None = None) -> List[WorkResult]:
+        on_done = on_done or (lambda done: None)
+        if workers <= 1 or len(items) <= 1:
+            results = []
+            for item in items:
+                results.append(render_work_item(item, self.cache))
+                on_done(len(results))
+            return results
+        results_by_key: Dict[str, WorkResult] = {}
+        context = multiprocessing.get_context(settings.pricing_start_method)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = {pool.submit(render_work_item, item): item for item in items}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = WorkResult(item=item, error=f"{type(exc).__name__}: {exc}")
+                results_by_key[item.key] = result
+                on_done(len(results_by_key))
+        return [results_by_key[item.key] for item in items]
+
+    def _report_progress(self, job_run: JobRun, stage: str, done: int = 0, total: int = 0, force: bool = False) -> None:
+        now = time.monotonic()
+        previous = (job_run.payload or {}).get("progress", {})
+        if not force and previous.get("stage") == stage and done < total and now - self._last_progress < settings.job_progress_interval:
+            return
+        self._last_progress = now
+        job_run.payload = {**(job_run.payload or {}), "progress": {"stage": stage, "done": done, "total": total}}
         self.db.commit()
 
-    def generate(self, job_run_id: int) -> Dict:
-        job_run = self.db.query(JobRun).filter(JobRun.id == job_run_id).first()
+    def generate(self, job_run_id: int, workers: int | None = None) -> Dict:
+        job_run = self.db.query(JobRun).options(joinedload(JobRun.investor)).filter(JobRun.id == job_run_id).first()
         if not job_run:
             raise ValueError("JobRun not found")
+        self.config_for(job_run)
         job_run.status = JobStatus.RUNNING
+        job_run.error_message = None
         self.db.commit()
+        self._last_progress = 0.0
+        trace = JobTrace()
+        if job_run.started_at:
+            trace.observe_queue_wait((datetime.utcnow() - job_run.started_at).total_seconds())
+        profiler = JobProfiler(self._output_root(job_run), settings.job_profile or bool((job_run.payload or {}).get("profile")))
+        try:
+            with profiler:
+                result = self._generate(job_run, settings.pricing_workers if workers is None else workers, trace)
+        except Exception as exc:
+            self.db.rollback()
+            job_run.status = JobStatus.FAILED
+            job_run.finished_at = datetime.utcnow()
+            job_run.error_message = f"{type(exc).__name__}: {exc}"
+            progress = (job_run.payload or {}).get("progress", {})
+            job_run.payload = {**(job_run.payload or {}), "progress": {**progress, "stage": "failed"}}
+            timings = trace.finish(JobStatus.FAILED.value)
+            if timings:
+                job_run.payload["timings"] = timings
+            self.db.commit()
+            raise
+        if profiler.saved_path:
+            job_run.payload = {**job_run.payload, "profile_path": profiler.saved_path}
+            self.db.commit()
+        return result
 
-        customer_csv = self._fetch_uploaded_path(job_run, FileType.CUSTOMER_TIERS)
-        adjustor_path = self._fetch_uploaded_path(job_run, FileType.ADJUSTORS)
-        del_base_path = self._fetch_uploaded_path(job_run, FileType.DEL_BASE)
-        nondel_base_path = self._fetch_uploaded_path(job_run, FileType.NONDEL_BASE)
+    def _output_root(self, job_run: JobRun) -> Path:
+        return Path(settings.storage_root) / self.config_for(job_run).directory / job_run.effective_date.strftime("%Y%m%d") / f"job_{job_run.id}"
 
-        parse_customer_tiers(customer_csv)
-        adjustors = parse_adjustors(adjustor_path)
-        self._ensure_tiers(job_run.investor_id, adjustors.mapping)
+    def _generate(self, job_run: JobRun, workers: int, trace: JobTrace | None = None) -> Dict:
+        trace = trace or JobTrace(enabled=False)
+        self._report_progress(job_run, "parsing", force=True)
+        with trace.span("parsing") as span:
+            customer_csv = self._fetch_uploaded_path(job_run, FileType.CUSTOMER_TIERS)
+            adjustor_path = self._fetch_uploaded_path(job_run, FileType.ADJUSTORS)
+            config = self.config_for(job_run)
+            base_paths = {channel: self._fetch_uploaded_path(job_run, config.base_file_type(channel)) for channel in config.channels}
+            customers = parse_customer_tiers(customer_csv)
+            adjustors = parse_adjustors(adjustor_path, cache=self.cache)
+            span.add("customers", len(customers))
+            span.add("adjustor_products", sum(len(channel_data) for channel_data in adjustors.mapping.values()))
 
-        output_records: List[RateSheet] = []
-        for channel in [ChannelEnum.DEL, ChannelEnum.NONDEL]:
-            base_path = del_base_path if channel == ChannelEnum.DEL else nondel_base_path
-            channel_adjustors = adjustors.mapping.get(channel.value, {})
-            for product_code, sheet_name in PRODUCT_GROUPS.items():
-                if product_code not in channel_adjustors:
+        self._report_progress(job_run, "roster", force=True)
+        with trace.span("roster") as span:
+            roster = sync_roster(self.db, job_run.investor_id, customers)
+            span.add("rows", len(customers))
+            reference = ReferenceData(self.db, job_run.investor_id)
+            reference.ensure_tiers(
+                code
+                for channel_data in adjustors.mapping.values()
+                for product_data in channel_data.values()
+                for code in product_data.get("tiers", {})
+            )
+
+        self._report_progress(job_run, "pricing", force=True)
+        with trace.span("pricing") as span:
+            items = self._build_work_items(job_run, adjustors, base_paths)
+            mode = (job_run.payload or {}).get("mode", "full")
+            base_job_id = None
+            reused: List[WorkResult] = []
+            deferred: List[WorkResult] = []
+            pending = items
+            if mode == "incremental":
+                base_job_id, previous = self._previous_outputs(job_run)
+                reused, pending = self._reuse_unchanged(items, previous)
+            elif mode == "lazy":
+                deferred, pending = [WorkResult(item=item, deferred=True) for item in items], []
+            span.add("items", len(items))
+            span.add("reused", len(reused))
+            span.add("deferred", len(deferred))
+        self._report_progress(job_run, "writing", len(reused), len(items), force=True)
+        with trace.span("writing") as span:
+            rendered = self._execute(pending, workers, lambda done: self._report_progress(job_run, "writing", len(reused) + done, len(items)))
+            for result in rendered:
+                trace.observe_write(result.seconds)
+                span.add("files", 1 if result.ok else 0)
+                span.add("bytes", result.bytes_written)
+        results_by_key = {result.item.key: result for result in reused + deferred + rendered}
+        results = [results_by_key[item.key] for item in items]
+
+        self._report_progress(job_run, "saving", len(items), len(items), force=True)
+        with trace.span("saving") as span:
+            reference.ensure_tiers(item.tier_code for item in items)
+            reference.ensure_product_types({item.product_code: item.sheet_name for item in items})
+            rows: List[Dict] = []
+            failures: List[Dict] = []
+            for result in results:
+                item = result.item
+                if not result.ok:
+                    failures.append({"channel": item.channel.value, "product_code": item.product_code, "tier_code": item.tier_code, "error": result.error})
                     continue
-                grid_df, meta = parse_base_grid(base_path, sheet_name)
-                product_type = (
-                    self.db.query(ProductType)
-                    .filter(ProductType.investor_id == job_run.investor_id, ProductType.code == product_code)
-                    .first()
+                rows.append(
+                    {
+                        "investor_id": job_run.investor_id,
+                        "job_run_id": job_run.id,
+                        "channel": item.channel,
+                        "product_type_id": reference.product_type_id(item.product_code),
+                        "tier_id": reference.tier_id(item.tier_code),
+                        "effective_date": job_run.effective_date,
+                        "generated_filename": Path(item.output_path).name,
+                        "generated_path": None if result.deferred else item.output_path,
+                        "adjustment_applied": item.adjustment,
+                        "metadata_": {
+                            "product_code": item.product_code,
+                            "tier_code": item.tier_code,
+                            "fingerprint": item.fingerprint,
+                            "engine_version": ENGINE_VERSION,
+                            "grid_path": item.grid_path,
+                            **({"reused_from": result.reused_from} if result.reused_from else {}),
+                            **({"lazy": True} if result.deferred else {}),
+                        },
+                    }
                 )
-                if not product_type:
-                    product_type = ProductType(
-                        investor_id=job_run.investor_id,
-                        code=product_code,
-                        display_name=product_code.title(),
-                        sheet_name=sheet_name,
-                    )
-                    self.db.add(product_type)
-                    self.db.commit()
-                adjustments = channel_adjustors[product_code].get("tiers", {})
-                tier_codes = list(adjustments.keys()) or DEFAULT_TIER_CODES
-                for tier_code in tier_codes:
-                    adjustment_value = adjustments.get(tier_code, 0)
-                    adjusted_df = grid_df.copy()
-                    price_cols = meta.price_columns
-                    for col in price_cols:
-                        adjusted_df[col] = adjusted_df[col].astype(float) + adjustment_value
-                    output_dir = Path(settings.storage_root) / "PHH" / job_run.effective_date.strftime("%Y%m%d") / channel.value / product_code
-                    output_dir.mkdir(parents=True, exist_ok=True)
-                    filename = f"PHH_{channel.value}_{product_code}_{tier_code}_{job_run.effective_date.strftime('%Y%m%d')}.xlsx"
-                    output_path = output_dir / filename
-                    write_tier_grid_to_workbook(
-                        base_path,
-                        sheet_name,
-                        meta,
-                        adjusted_df.rename(columns={"note_rate": meta.note_rate_col}),
-                        output_path=str(output_path),
-                        annotation=f"Channel: {channel.value} Tier: {tier_code}",
-                    )
-                    tier = self.db.query(Tier).filter(Tier.investor_id == job_run.investor_id, Tier.code == tier_code).first()
-                    rate_sheet = RateSheet(
-                        investor_id=job_run.investor_id,
-                        job_run_id=job_run.id,
-                        channel=channel,
-                        product_type_id=product_type.id,
-                        tier_id=tier.id if tier else None,
-                        effective_date=job_run.effective_date,
-                        generated_filename=filename,
-                        generated_path=str(output_path),
-                        adjustment_applied=adjustment_value,
-                        metadata={"product_code": product_code},
-                    )
-                    self.db.add(rate_sheet)
-                    output_records.append(rate_sheet)
-        job_run.status = JobStatus.COMPLETED
+            generated = bulk_insert_rate_sheets(self.db, rows)
+            span.add("rows", generated)
+        qc = None
+        if not failures:
+            with trace.span("qc") as span:
+                qc = self._run_qc(job_run)
+                span.add("cells", qc.get("checked_cells", 0))
+        job_run.status = JobStatus.FAILED if failures else JobStatus.COMPLETED
+        if qc and qc.get("status") == QC_FLAGGED and settings.qc_gate:
+            job_run.status = JobStatus.WAITING_FOR_QC
         job_run.finished_at = datetime.utcnow()
-        job_run.payload = {"generated": len(output_records)}
+        job_run.payload = {
+            "mode": mode,
+            "generated": generated,
+            "regenerated": len(rendered),
+            "skipped": len(reused),
+            "deferred": len(deferred),
+            "base_job_id": base_job_id,
+            "failed": failures,
+            "roster": roster.as_dict(),
+            **({"qc": qc} if qc else {}),
+            "workers": max(workers, 1),
+            "progress": {"stage": "failed" if failures else "completed", "done": len(items), "total": len(items)},
+        }
+        timings = trace.finish(job_run.status.value)
+        if timings:
+            job_run.payload["timings"] = timings
+        if failures:
+            job_run.error_message = f"{len(failures)} of {len(items)} rate sheets failed"
         self.db.commit()
-        return {"count": len(output_records)}
+        if not failures:
+            self._publish_price_index(job_run)
+        return {"count": generated, "failed": len(failures)}
+
+    def _run_qc(self, job_run: JobRun) -> Dict:
+        try:
+            return run_qc(self.db, job_run, root=self._grid_root(job_run))
+        except Exception as exc:
+            # QC evidence is advisory; a broken check must not discard a finished job.
+            logger.exception("QC for job %s failed", job_run.id)
+            return {"status": "ERROR", "error": f"{type(exc).__name__}: {exc}"}
+
+    def materialize(self, sheet: RateSheet, pins: CachePins | None = None) -> Path:
+        """Path to the sheet's workbook, building it into the output cache if the job deferred it or the file is gone.
+
+        A cached file can be evicted as soon as this returns; callers that read it later pass `pins` to keep it.
+        """
+        if sheet.generated_path and os.path.exists(sheet.generated_path):
+            return Path(sheet.generated_path)
+        fingerprint = (sheet.metadata_ or {}).get("fingerprint")
+        if not fingerprint:
+            raise FileNotFoundError(f"Rate sheet {sheet.id} has no workbook and no inputs to rebuild it from")
+        cache = pins.cache if pins is not None else output_cache
+        if pins is not None:
+            pins.hold(fingerprint)
+        name = sheet.generated_filename or f"rate_sheet_{sheet.id}.xlsx"
+        return cache.get_or_build(fingerprint, name, lambda path: self._render_sheet(sheet, path))
+
+    def _render_sheet(self, sheet: RateSheet, output_path: Path) -> None:
+        job_run = self.db.query(JobRun).filter(JobRun.id == sheet.job_run_id).one()
+        config = self.config_for(job_run)
+        metadata = sheet.metadata_
+        product_code, tier_code = metadata["product_code"], metadata["tier_code"]
+        base_path = self._fetch_uploaded_path(job_run, config.base_file_type(sheet.channel))
+        sheet_name = config.products[product_code]
+        grid = read_base_grid(base_path, sheet_name, cache=self.cache)
+        tensor = apply_tier_adjustments(grid.matrix, [sheet.adjustment_applied])
+        item = WorkItem(
+            channel=sheet.channel,
+            product_code=product_code,
+            tier_code=tier_code,
+            adjustment=sheet.adjustment_applied,
+            base_path=base_path,
+            sheet_name=sheet_name,
+            meta=grid.meta,
+            columns=grid.columns,
+            note_rates=grid.matrix.note_rates,
+            prices=grid.matrix.tier_prices(tensor, 0),
+            output_path=str(output_path),
+            annotation=f"Channel: {sheet.channel.value} Tier: {tier_code}",
+        )
+        result = render_work_item(item, self.cache)
+        if not result.ok:
+            raise RuntimeError(f"Could not build rate sheet {sheet.id}: {result.error}")
+
+    def _publish_price_index(self, job_run: JobRun) -> None:
+        try:
+            price_indexes.publish(self.build_price_index(job_run))
+        except Exception:
+            # The price API rebuilds lazily, so a failed publish must not fail the job.
+            logger.exception("Could not build price index for job %s", job_run.id)
+
+    def build_price_index(self, job_run: JobRun) -> PriceIndex:
+        adjustments: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for sheet in self.db.query(RateSheet).filter(RateSheet.job_run_id == job_run.id):
+            metadata = sheet.metadata_ or {}
+            key = (sheet.channel.value, metadata.get("product_code"))
+            adjustments.setdefault(key, {})[metadata.get("tier_code")] = sheet.adjustment_applied
+        config = self.config_for(job_run)
+        grids: Dict[Tuple[str, str], CompiledGrid] = {}
+        for channel in config.channels:
+            products = [(code, sheet) for code, sheet in config.products.items() if (channel.value, code) in adjustments]
+            if not products:
+                continue
+            base_path = self._fetch_uploaded_path(job_run, config.base_file_type(channel))
+            for product_code, sheet_name in products:
+                grid = read_base_grid(base_path, sheet_name, cache=self.cache)
+                grids[(channel.value, product_code)] = compile_grid(
+                    grid.matrix.note_rates, grid.matrix.prices, grid.meta.price_columns, grid.column_labels, adjustments[(channel.value, product_code)]
+                )
+        seller_tiers = {
+            (org_id, channel.value): tier
+            for org_id, channel, tier in self.db.query(Seller.org_id, SellerTierAssignment.channel, SellerTierAssignment.non_agency_tier_code)
+            .join(Seller, SellerTierAssignment.seller_id == Seller.id)
+            .filter(Seller.investor_id == job_run.investor_id, Seller.is_active == True)
+        }
+        return PriceIndex(job_id=job_run.id, investor_id=job_run.investor_id, effective_date=job_run.effective_date, grids=grids, seller_tiers=seller_tiers)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import re
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.grid_store import StoredGrid, grid_store_root, open_grid_partition, partition_path
+from app.core.investor_config import investor_config
+from app.models import JobRun, JobStatus, QCReview
+
+QC_CHECKS = ("price_change", "missing_cell", "missing_rate", "ladder", "tier_order")
+QC_PASSED = "PASSED"
+QC_FLAGGED = "FLAGGED"
+QC_APPROVED = "APPROVED"
+PRIOR_STATUSES = (JobStatus.COMPLETED, JobStatus.WAITING_FOR_QC, JobStatus.APPROVED_FOR_DISTRIBUTION, JobStatus.DISTRIBUTING, JobStatus.DISTRIBUTED)
+# Rates are matched across days after rounding, since both sides come from floats read out of Excel.
+RATE_DECIMALS = 6
+
+
+@dataclass
+class QCThresholds:
+    max_price_change: float = 1.0
+    ladder_tolerance: float = 1e-9
+    tier_tolerance: float = 1e-9
+    max_findings: int = 2000
+
+    @classmethod
+    def from_settings(cls) -> "QCThresholds":
+        return cls(
+            max_price_change=settings.qc_max_price_change,
+            ladder_tolerance=settings.qc_ladder_tolerance,
+            tier_tolerance=settings.qc_tier_tolerance,
+            max_findings=settings.qc_max_findings,
+        )
+
+
+@dataclass
+class QCResult:
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(QC_CHECKS, 0))
+    findings: List[Dict] = field(default_factory=list)
+    checked_cells: int = 0
+    partitions: int = 0
+    truncated: bool = False
+
+    @property
+    def status(self) -> str:
+        return QC_FLAGGED if any(self.counts.values()) else QC_PASSED
+
+    def add(self, check: str, count: int, rows: List[Dict], limit: int) -> None:
+        self.counts[check] += count
+        room = max(limit - len(self.findings), 0)
+        if len(rows) > room:
+            self.truncated = True
+        self.findings.extend(rows[:room])
+
+
+def tier_rank(code: str) -> Tuple[float, str]:
+    digits = re.search(r"\d+", code or "")
+    return (int(digits.group()) if digits else float("inf"), code or "")
+
+
+def _value(value) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 6)
+
+
+def check_partition(current: StoredGrid, previous: Optional[StoredGrid], thresholds: QCThresholds, result: QCResult) -> None:
+    channel, product = current.meta["channel"], current.meta["product"]
+    columns = current.columns
+    rates = np.asarray(current.note_rates)
+    base = np.asarray(current.base)
+    tiers = np.asarray(current.tiers)
+    codes = current.meta["tier_codes"]
+    result.partitions += 1
+    result.checked_cells += tiers.size
+    limit = thresholds.max_findings
+
+    # Ladders: within each column, price must not fall as the note rate rises. Tier adjustments are
+    # uniform across a grid, so the base grid carries every ladder break.
+    order = np.argsort(rates, kind="stable")
+    steps = np.diff(base[order], axis=0)
+    broken = np.argwhere(steps < -thresholds.ladder_tolerance)
+    result.add(
+        "ladder",
+        len(broken),
+        [
+            {"check": "ladder", "channel": channel, "product": product, "tier": None, "note_rate": float(rates[order[r + 1]]), "column": columns[c],
+             "value": _value(base[order[r + 1], c]), "previous": _value(base[order[r], c]), "delta": _value(steps[r, c])}
+            for r, c in broken[:limit].tolist()
+        ],
+        limit,
+    )
+
+    # Tier ordering: each tier must price at or below the tier before it (NA1 best, NA12 worst).
+    ranked = sorted(range(len(codes)), key=lambda i: tier_rank(codes[i]))
+    gaps = np.diff(tiers[ranked], axis=0)
+    inverted = gaps > thresholds.tier_tolerance
+    cells_per_pair = inverted.reshape(len(ranked) - 1, -1).sum(axis=1) if len(ranked) > 1 else np.zeros(0, dtype=int)
+    pairs = np.flatnonzero(cells_per_pair)
+    result.add(
+        "tier_order",
+        int(cells_per_pair.sum()),
+        [
+            {"check": "tier_order", "channel": channel, "product": product, "tier": codes[ranked[p + 1]], "better_tier": codes[ranked[p]],
+             "cells": int(cells_per_pair[p]), "delta": _value(float(np.nanmax(gaps[p])))}
+            for p in pairs.tolist()
+        ],
+        limit,
+    )
+
+    if previous is None:
+        return
+    current_rates = np.round(rates, RATE_DECIMALS)
+    previous_rates = np.round(np.asarray(previous.note_rates), RATE_DECIMALS)
+    common_rates, current_rows, previous_rows = np.intersect1d(current_rates, previous_rates, return_indices=True)
+    dropped = np.setdiff1d(previous_rates, current_rates)
+    result.add(
+        "missing_rate",
+        len(dropped),
+        [{"check": "missing_rate", "channel": channel, "product": product, "tier": None, "note_rate": float(rate)} for rate in dropped[:limit].tolist()],
+        limit,
+    )
+
+    previous_columns = {label: i for i, label in enumerate(previous.columns)}
+    column_pairs = [(i, previous_columns[label]) for i, label in enumerate(columns) if label in previous_columns]
+    previous_tiers = {code: i for i, code in enumerate(previous.meta["tier_codes"])}
+    tier_pairs = [(i, previous_tiers[code]) for i, code in enumerate(codes) if code in previous_tiers]
+    if not (len(common_rates) and column_pairs and tier_pairs):
+        return
+    tier_now, tier_before = map(list, zip(*tier_pairs))
+    column_now, column_before = map(list, zip(*column_pairs))
+    now = tiers[np.ix_(tier_now, current_rows, column_now)]
+    before = np.asarray(previous.tiers)[np.ix_(tier_before, previous_rows, column_before)]
+    delta = now - before
+
+    for check, mask in (
+        ("price_change", np.abs(delta) > thresholds.max_price_change),
+        ("missing_cell", np.isnan(now) & ~np.isnan(before)),
+    ):
+        hits = np.argwhere(mask)
+        result.add(
+            check,
+            len(hits),
+            [
+                {"check": check, "channel": channel, "product": product, "tier": codes[tier_now[t]], "note_rate": float(common_rates[r]),
+                 "column": columns[column_now[c]], "value": _value(now[t, r, c]), "previous": _value(before[t, r, c]), "delta": _value(delta[t, r, c])}
+                for t, r, c in hits[: max(limit - len(result.findings), 0)].tolist()
+            ],
+            limit,
+        )
+
+
+def _partitions(root: Path, job_run: JobRun) -> Dict[Tuple[str, str], Path]:
+    pattern = f"date={job_run.effective_date.isoformat()}/channel=*/product=*/job={job_run.id}"
+    found: Dict[Tuple[str, str], Path] = {}
+    for path in sorted(root.glob(pattern)):
+        channel = path.parent.parent.name.split("=", 1)[1]
+        product = path.parent.name.split("=", 1)[1]
+        found[(channel, product)] = path
+    return found
+
+
+def previous_job(db: Session, job_run: JobRun) -> Optional[JobRun]:
+    return (
+        db.query(JobRun)
+        .filter(
+            JobRun.investor_id == job_run.investor_id,
+            JobRun.effective_date < job_run.effective_date,
+            JobRun.status.in_(PRIOR_STATUSES),
+        )
+        .order_by(JobRun.effective_date.desc(), JobRun.started_at.desc(), JobRun.id.desc())
+        .first()
+    )
+
+
+def run_qc(db: Session, job_run: JobRun, thresholds: QCThresholds | None = None, root: Path | None = None) -> Dict:
+    """Diffs the job's stored grids against the previous effective date and records the findings as a QCReview."""
+    started = time.perf_counter()
+    thresholds = thresholds or QCThresholds.from_settings()
+    root = root or grid_store_root(settings.storage_root, investor_config(job_run.investor).directory)
+    prior = previous_job(db, job_run)
+    result = QCResult()
+    for (channel, product), path in _partitions(root, job_run).items():
+        previous = None
+        if prior is not None:
+            previous_path = partition_path(root, prior.effective_date, channel, product, prior.id)
+            if previous_path.exists():
+                previous = open_grid_partition(previous_path)
+        check_partition(open_grid_partition(path), previous, thresholds, result)
+
+    summary = {
+        "status": result.status,
+        "previous_job_id": prior.id if prior else None,
+        "previous_effective_date": prior.effective_date.isoformat() if prior else None,
+        "partitions": result.partitions,
+        "checked_cells": result.checked_cells,
+        "counts": result.counts,
+        "truncated": result.truncated,
+        "thresholds": {"max_price_change": thresholds.max_price_change},
+    }
+    review = QCReview(job_run_id=job_run.id, status=result.status, summary=summary, findings=result.findings)
+    db.add(review)
+    db.flush()
+    return {**summary, "review_id": review.id, "seconds": round(time.perf_counter() - started, 6)}
+
+
+def approve(db: Session, job_run: JobRun, reviewer_user_id: Optional[int] = None, comments: Optional[str] = None) -> QCReview:
+    """Records a reviewer's sign-off on the job's latest QC review and releases a held job for distribution."""
+    if job_run.status != JobStatus.WAITING_FOR_QC:
+        raise ValueError(f"Job {job_run.id} is not waiting for QC")
+    review = db.query(QCReview).filter(QCReview.job_run_id == job_run.id).order_by(QCReview.id.desc()).first()
+    if review is None:
+        review = QCReview(job_run_id=job_run.id)
+        db.add(review)
+    # The findings and the summary's own status stay as QC recorded them; the row's status is the decision.
+    review.status = QC_APPROVED
+    review.reviewer_user_id = reviewer_user_id
+    review.comments = comments
+    job_run.status = JobStatus.APPROVED_FOR_DISTRIBUTION
+    db.commit()
+    return review
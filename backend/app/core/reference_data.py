@@ -0,0 +1,78 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Mapping
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import ProductType, RateSheet, Tier
+
+
+def _upsert_ignore(db: Session, model, rows: List[Dict], conflict_columns: List[str]) -> None:
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        for row in rows:
+            db.add(model(**row))
+        db.flush()
+        return
+    stmt = dialect_insert(model).values(rows).on_conflict_do_nothing(index_elements=conflict_columns)
+    db.execute(stmt)
+
+
+def tier_numeric_index(code: str) -> int | None:
+    return int(code.replace("NA", "")) if code and code.startswith("NA") and code[2:].isdigit() else None
+
+
+class ReferenceData:
+    def __init__(self, db: Session, investor_id: int):
+        self.db = db
+        self.investor_id = investor_id
+        self.tiers: Dict[str, Tier] = {}
+        self.product_types: Dict[str, ProductType] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        self.tiers = {tier.code: tier for tier in self.db.query(Tier).filter(Tier.investor_id == self.investor_id)}
+        self.product_types = {
+            product.code: product for product in self.db.query(ProductType).filter(ProductType.investor_id == self.investor_id)
+        }
+
+    def ensure_tiers(self, codes: Iterable[str]) -> Dict[str, Tier]:
+        missing = sorted({code for code in codes if code and code not in self.tiers})
+        if missing:
+            rows = [{"investor_id": self.investor_id, "code": code, "numeric_index": tier_numeric_index(code), "is_active": True} for code in missing]
+            _upsert_ignore(self.db, Tier, rows, ["investor_id", "code"])
+            self.db.commit()
+            self.tiers = {tier.code: tier for tier in self.db.query(Tier).filter(Tier.investor_id == self.investor_id)}
+        return self.tiers
+
+    def ensure_product_types(self, sheets_by_code: Mapping[str, str]) -> Dict[str, ProductType]:
+        missing = [code for code in sheets_by_code if code not in self.product_types]
+        if missing:
+            rows = [
+                {"investor_id": self.investor_id, "code": code, "display_name": code.title(), "sheet_name": sheets_by_code[code]}
+                for code in missing
+            ]
+            _upsert_ignore(self.db, ProductType, rows, ["investor_id", "code"])
+            self.db.commit()
+            self.product_types = {
+                product.code: product for product in self.db.query(ProductType).filter(ProductType.investor_id == self.investor_id)
+            }
+        return self.product_types
+
+    def tier_id(self, code: str) -> int | None:
+        tier = self.tiers.get(code)
+        return tier.id if tier else None
+
+    def product_type_id(self, code: str) -> int | None:
+        product = self.product_types.get(code)
+        return product.id if product else None
+
+
+def bulk_insert_rate_sheets(db: Session, rows: List[Dict]) -> int:
+    if rows:
+        db.execute(insert(RateSheet), rows)
+    return len(rows)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+import io
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Sequence
+import pandas as pd
+from sqlalchemy import String, cast, delete, insert, select, text, update
+from sqlalchemy.orm import Session
+from app.core.excel_utils import CustomerRoster
+from app.models import ChannelEnum, Seller, SellerTierAssignment
+
+SELLER_FIELDS = ["org_name", "nmlsid", "primary_email"]
+CHANNEL_TIER_COLUMNS = {ChannelEnum.DEL: "del_tier", ChannelEnum.NONDEL: "nondel_tier"}
+SYNC_BATCH_SIZE = 5000
+# Unquoted in the COPY input for NULL; every other value is quoted.
+COPY_NULL = "\\N"
+
+
+@dataclass
+class RosterSyncResult:
+    sellers_inserted: int = 0
+    sellers_updated: int = 0
+    sellers_deactivated: int = 0
+    tiers_assigned: int = 0
+    tiers_changed: int = 0
+    tiers_removed: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _batches(rows: Sequence, size: int = SYNC_BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _records(frame: pd.DataFrame) -> List[Dict]:
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+def _csv_field(value) -> str:
+    if value is None:
+        return COPY_NULL
+    # Quoted values are never read as NULL, so '' and a literal \N both load as the strings they are.
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _staging_csv(columns: Dict[str, str], rows: List[Dict]) -> str:
+    """COPY input for `rows`, with None written as COPY_NULL so it stays distinct from ''."""
+    return "".join(",".join(_csv_field(row[column]) for column in columns) + "\n" for row in rows)
+
+
+def _copy_into_staging(db: Session, name: str, columns: Dict[str, str], rows: List[Dict]) -> None:
+    buffer = io.StringIO(_staging_csv(columns, rows))
+    cursor = db.connection().connection.cursor()
+    try:
+        definition = ", ".join(f"{column} {kind}" for column, kind in columns.items())
+        cursor.execute(f"DROP TABLE IF EXISTS {name}")
+        cursor.execute(f"CREATE TEMP TABLE {name} ({definition}) ON COMMIT DROP")
+        cursor.copy_expert(f"COPY {name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+    finally:
+        cursor.close()
+
+
+class RosterSync:
+    """Applies a parsed customer-tier roster to sellers and their tier assignments for one investor."""
+
+    def __init__(self, db: Session, investor_id: int):
+        self.db = db
+        self.investor_id = investor_id
+        self.postgres = db.get_bind().dialect.name == "postgresql"
+
+    def _fetch(self, statement) -> list:
+        # Core rows off the session's connection skip ORM row processing on large rosters.
+        return self.db.connection().execute(statement).all()
+
+    def _current_sellers(self) -> pd.DataFrame:
+        sellers = Seller.__table__.c
+        rows = self._fetch(
+            select(sellers.id, sellers.org_id, sellers.org_name, sellers.nmlsid, sellers.primary_email, sellers.is_active).where(
+                sellers.investor_id == self.investor_id
+            )
+        )
+        frame = pd.DataFrame(rows, columns=["id", "org_id", *SELLER_FIELDS, "is_active"])
+        return frame.astype({"id": "int64", "org_id": object})
+
+    def _seller_ids(self) -> pd.Series:
+        sellers = Seller.__table__.c
+        rows = self._fetch(select(sellers.org_id, sellers.id).where(sellers.investor_id == self.investor_id))
+        return pd.DataFrame(rows, columns=["org_id", "id"]).set_index("org_id")["id"]
+
+    def _current_assignments(self) -> pd.DataFrame:
+        assignments = SellerTierAssignment.__table__.c
+        rows = self._fetch(
+            select(
+                assignments.id,
+                assignments.seller_id,
+                cast(assignments.channel, String),
+                assignments.non_agency_tier_code,
+            ).where(assignments.investor_id == self.investor_id)
+        )
+        frame = pd.DataFrame(rows, columns=["id", "seller_id", "channel", "tier"])
+        return frame.astype({"id": "int64", "seller_id": "int64", "channel": object})
+
+    def sync(self, roster: CustomerRoster) -> RosterSyncResult:
+        result = RosterSyncResult()
+        incoming = roster.frame[roster.frame["org_id"] != ""].drop_duplicates("org_id", keep="last")
+        seller_ids = self._sync_sellers(incoming, result)
+        self._sync_assignments(incoming, seller_ids, result)
+        self.db.flush()
+        return result
+
+    def _sync_sellers(self, incoming: pd.DataFrame, result: RosterSyncResult) -> pd.Series:
+        current = self._current_sellers()
+        merged = incoming[["org_id", *SELLER_FIELDS]].merge(current, on="org_id", how="outer", suffixes=("", "_current"), indicator=True)
+
+        new = merged[merged["_merge"] == "left_only"]
+        matched = merged[merged["_merge"] == "both"]
+        changed = ~matched["is_active"].astype(bool)
+        for field in SELLER_FIELDS:
+            changed |= matched[field].fillna("") != matched[f"{field}_current"].fillna("")
+        updates = matched[changed]
+        gone = merged[(merged["_merge"] == "right_only") & merged["is_active"].astype(bool)]
+
+        inserts = [{**row, "investor_id": self.investor_id, "is_active": True} for row in _records(new[["org_id", *SELLER_FIELDS]])]
+        changes = [{**row, "id": int(row["id"]), "is_active": True} for row in _records(updates[["id", *SELLER_FIELDS]])]
+        deactivations = [int(seller_id) for seller_id in gone["id"]]
+
+        if self.postgres:
+            self._apply_sellers_postgres(inserts, changes, deactivations)
+        else:
+            for batch in _batches(inserts):
+                self.db.execute(insert(Seller), batch)
+            for batch in _batches(changes):
+                self.db.execute(update(Seller), batch)
+            for batch in _batches(deactivations):
+                self.db.execute(update(Seller).where(Seller.id.in_(batch)).values(is_active=False))
+        result.sellers_inserted = len(inserts)
+        result.sellers_updated = len(changes)
+        result.sellers_deactivated = len(deactivations)
+        if inserts:
+            return self._seller_ids()
+        return current.set_index("org_id")["id"]
+
+    def _apply_sellers_postgres(self, inserts: List[Dict], changes: List[Dict], deactivations: List[int]) -> None:
+        columns = {"id": "integer", "org_id": "text", "org_name": "text", "nmlsid": "text", "primary_email": "text"}
+        staged = [{"id": None, **row} for row in inserts] + changes
+        if not staged and not deactivations:
+            return
+        _copy_into_staging(self.db, "seller_roster_stage", columns, staged)
+        self.db.execute(
+            text(
+                "INSERT INTO sellers (investor_id, org_id, org_name, nmlsid, primary_email, secondary_emails, is_active) "
+                "SELECT :investor_id, org_id, org_name, nmlsid, primary_email, '[]', true FROM seller_roster_stage WHERE id IS NULL"
+            ),
+            {"investor_id": self.investor_id},
+        )
+        self.db.execute(
+            text(
+                "UPDATE sellers SET org_name = s.org_name, nmlsid = s.nmlsid, primary_email = s.primary_email, is_active = true "
+                "FROM seller_roster_stage s WHERE sellers.id = s.id"
+            )
+        )
+        if deactivations:
+            self.db.execute(text("UPDATE sellers SET is_active = false WHERE id = ANY(:ids)"), {"ids": deactivations})
+
+    def _sync_assignments(self, incoming: pd.DataFrame, seller_ids: pd.Series, result: RosterSyncResult) -> None:
+        desired = pd.concat(
+            [
+                pd.DataFrame({"org_id": incoming["org_id"], "channel": channel.value, "tier": incoming[column]})
+                for channel, column in CHANNEL_TIER_COLUMNS.items()
+            ],
+            ignore_index=True,
+        )
+        desired = desired[desired["tier"].notna()]
+        desired["seller_id"] = desired["org_id"].map(seller_ids).astype("int64")
+        merged = desired[["seller_id", "channel", "tier"]].merge(
+            self._current_assignments(), on=["seller_id", "channel"], how="outer", suffixes=("", "_current"), indicator=True
+        )
+
+        new = merged[merged["_merge"] == "left_only"]
+        matched = merged[merged["_merge"] == "both"]
+        changed = matched[matched["tier"] != matched["tier_current"]]
+        removed = merged[merged["_merge"] == "right_only"]
+
+        now = datetime.utcnow()
+        inserts = [
+            {
+                "investor_id": self.investor_id,
+                "seller_id": int(row.seller_id),
+                "channel": ChannelEnum(row.channel),
+                "non_agency_tier_code": row.tier,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for row in new.itertuples(index=False)
+        ]
+        changes = [{"id": int(row.id), "non_agency_tier_code": row.tier, "updated_at": now} for row in changed.itertuples(index=False)]
+        removals = [int(assignment_id) for assignment_id in removed["id"]]
+
+        if self.postgres:
+            self._apply_assignments_postgres(inserts, changes, removals, now)
+        else:
+            for batch in _batches(inserts):
+                self.db.execute(insert(SellerTierAssignment), batch)
+            for batch in _batches(changes):
+                self.db.execute(update(SellerTierAssignment), batch)
+            for batch in _batches(removals):
+                self.db.execute(delete(SellerTierAssignment).where(SellerTierAssignment.id.in_(batch)))
+        result.tiers_assigned = len(inserts)
+        result.tiers_changed = len(changes)
+        result.tiers_removed = len(removals)
+
+    def _apply_assignments_postgres(self, inserts: List[Dict], changes: List[Dict], removals: List[int], now: datetime) -> None:
+        columns = {"id": "integer", "seller_id": "integer", "channel": "text", "tier": "text"}
+        staged = [
+            {"id": None, "seller_id": row["seller_id"], "channel": row["channel"].name, "tier": row["non_agency_tier_code"]} for row in inserts
+        ] + [{"id": row["id"], "seller_id": None, "channel": None, "tier": row["non_agency_tier_code"]} for row in changes]
+        if staged:
+            _copy_into_staging(self.db, "tier_assignment_stage", columns, staged)
+            self.db.execute(
+                text(
+                    "INSERT INTO seller_tier_assignments (investor_id, seller_id, channel, non_agency_tier_code, created_at, updated_at) "
+                    "SELECT :investor_id, seller_id, CAST(channel AS channelenum), tier, :now, :now FROM tier_assignment_stage WHERE id IS NULL"
+                ),
+                {"investor_id": self.investor_id, "now": now},
+            )
+            self.db.execute(
+                text(
+                    "UPDATE seller_tier_assignments SET non_agency_tier_code = s.tier, updated_at = :now "
+                    "FROM tier_assignment_stage s WHERE seller_tier_assignments.id = s.id"
+                ),
+                {"now": now},
+            )
+        if removals:
+            self.db.execute(text("DELETE FROM seller_tier_assignments WHERE id = ANY(:ids)"), {"ids": removals})
+
+
+def sync_roster(db: Session, investor_id: int, roster: CustomerRoster) -> RosterSyncResult:
+    return RosterSync(db, investor_id).sync(roster)
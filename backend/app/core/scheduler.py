@@ -0,0 +1,136 @@
+from __future__ import annotations
+import heapq
+import itertools
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from sqlalchemy.orm import Session, joinedload
+from app.core.investor_config import investor_config
+from app.models import JobRun
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ScheduledJob:
+    job_id: int
+    # None for jobs whose investor could not be resolved; they share one unnamed lane.
+    investor: Optional[str] = None
+    deadline: Optional[datetime] = None
+    max_concurrent: Optional[int] = None
+
+
+def _parse_deadline(value) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def describe_job(db: Session, job_id: int) -> ScheduledJob:
+    """Scheduling facts for a queued job: its investor, cap and deadline (payload["deadline"] overrides the config)."""
+    job = db.query(JobRun).options(joinedload(JobRun.investor)).filter(JobRun.id == job_id).first()
+    if job is None or job.investor is None:
+        return ScheduledJob(job_id=job_id)
+    try:
+        config = investor_config(job.investor)
+    except ValueError:
+        # The engine reports the bad config when the job runs; schedule it without a cap or deadline.
+        return ScheduledJob(job_id=job_id, investor=job.investor.code)
+    deadline = _parse_deadline((job.payload or {}).get("deadline"))
+    if deadline is None and job.effective_date is not None:
+        deadline = config.deadline_for(job.effective_date)
+    return ScheduledJob(job_id=job_id, investor=config.code, deadline=deadline, max_concurrent=config.max_concurrent_jobs)
+
+
+class FairScheduler:
+    """Orders buffered jobs earliest deadline first while keeping each investor under its concurrency cap.
+
+    Jobs without a deadline run after every job that has one. Equal deadlines go to the investor with fewer
+    jobs running, then in arrival order, so one investor's backlog cannot hold every worker.
+    """
+
+    def __init__(self):
+        self._lanes: Dict[Optional[str], List] = {}
+        self._running: Dict[Optional[str], int] = {}
+        self._caps: Dict[Optional[str], Optional[int]] = {}
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(lane) for lane in self._lanes.values())
+
+    def running(self, investor: Optional[str]) -> int:
+        with self._lock:
+            return self._running.get(investor, 0)
+
+    def add(self, job: ScheduledJob) -> None:
+        key = (job.deadline is None, job.deadline or datetime.min)
+        with self._lock:
+            # The most recently described job carries the investor's current cap.
+            self._caps[job.investor] = job.max_concurrent
+            heapq.heappush(self._lanes.setdefault(job.investor, []), (key, next(self._order), job))
+
+    def pop(self) -> Optional[ScheduledJob]:
+        """Claims the most urgent job whose investor is under its cap, or None if every buffered job is capped."""
+        with self._lock:
+            best = None
+            for investor, lane in self._lanes.items():
+                if not lane:
+                    continue
+                running = self._running.get(investor, 0)
+                cap = self._caps.get(investor)
+                if cap is not None and running >= cap:
+                    continue
+                key, order, _ = lane[0]
+                rank = (key, running, order)
+                if best is None or rank < best[0]:
+                    best = (rank, investor)
+            if best is None:
+                return None
+            investor = best[1]
+            job = heapq.heappop(self._lanes[investor])[2]
+            self._running[investor] = self._running.get(investor, 0) + 1
+            return job
+
+    def clear(self) -> List[ScheduledJob]:
+        """Drops and returns every buffered job; running counts are kept."""
+        with self._lock:
+            jobs = [entry[2] for lane in self._lanes.values() for entry in sorted(lane)]
+            self._lanes = {}
+            return jobs
+
+    def done(self, job: ScheduledJob) -> None:
+        with self._lock:
+            self._running[job.investor] = max(self._running.get(job.investor, 0) - 1, 0)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            investors = set(self._lanes) | set(self._running)
+            return {
+                str(investor): {
+                    "queued": len(self._lanes.get(investor, [])),
+                    "running": self._running.get(investor, 0),
+                    "max_concurrent": self._caps.get(investor),
+                }
+                for investor in investors
+            }
+
+
+def session_describer(session_factory: Callable[[], Session]) -> Callable[[int], ScheduledJob]:
+    def describe(job_id: int) -> ScheduledJob:
+        db = session_factory()
+        try:
+            return describe_job(db, job_id)
+        except Exception:
+            logger.exception("Could not load scheduling details for job %s", job_id)
+            return ScheduledJob(job_id=job_id)
+        finally:
+            db.close()
+
+    return describe
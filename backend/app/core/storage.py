@@ -0,0 +1,48 @@
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    size_bytes: int
+    path: Path
+    reused: bool
+
+
+def blob_path(root: Path, sha256: str, suffix: str = "") -> Path:
+    return root / sha256[:2] / sha256[2:4] / f"{sha256}{suffix}"
+
+
+def store_stream(stream: BinaryIO, root: str | os.PathLike, suffix: str = "", chunk_size: int = UPLOAD_CHUNK_SIZE) -> StoredBlob:
+    root = Path(root)
+    staging = root / "tmp"
+    staging.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_name = tempfile.mkstemp(dir=staging, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        target = blob_path(root, sha256, suffix.lower())
+        if target.exists():
+            os.unlink(temp_name)
+            return StoredBlob(sha256=sha256, size_bytes=size, path=target, reused=True)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_name, target)
+        return StoredBlob(sha256=sha256, size_bytes=size, path=target, reused=False)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.unlink(temp_name)
+        raise
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import cProfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest
+from app.config import settings
+
+JOB_DURATION_SECONDS = Histogram(
+    "phh_job_duration_seconds",
+    "Wall time of a pricing job from start to finish",
+    ["status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+JOB_STAGE_SECONDS = Histogram(
+    "phh_job_stage_seconds",
+    "Wall time of each pricing job stage",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600),
+)
+FILE_WRITE_SECONDS = Histogram(
+    "phh_rate_sheet_write_seconds",
+    "Time to render and write one rate sheet workbook",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "phh_job_queue_wait_seconds",
+    "Time a pricing job waited between ingest and a worker picking it up",
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 1800, 3600),
+)
+REQUEST_SECONDS = Histogram(
+    "phh_http_request_seconds",
+    "Latency of /api/phh requests",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+PROFILE_FILENAME = "profile.pstats"
+
+
+class Span:
+    __slots__ = ("counts",)
+
+    def __init__(self):
+        self.counts: Dict[str, float] = {}
+
+    def add(self, name: str, amount: float = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+
+class _NullSpan(Span):
+    def add(self, name: str, amount: float = 1) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class JobTrace:
+    """Per-stage wall time and counts for one job, stored in its payload under "timings"."""
+
+    def __init__(self, enabled: bool | None = None):
+        self.enabled = settings.telemetry_enabled if enabled is None else enabled
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[Span]:
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        span = Span()
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            elapsed = time.perf_counter() - started
+            entry = self.stages.setdefault(stage, {"seconds": 0.0})
+            entry["seconds"] = round(entry["seconds"] + elapsed, 6)
+            for name, amount in span.counts.items():
+                entry[name] = entry.get(name, 0) + amount
+            JOB_STAGE_SECONDS.labels(stage).observe(elapsed)
+
+    def observe_write(self, seconds: float) -> None:
+        if self.enabled:
+            FILE_WRITE_SECONDS.observe(seconds)
+
+    def observe_queue_wait(self, seconds: float) -> None:
+        if self.enabled and seconds >= 0:
+            QUEUE_WAIT_SECONDS.observe(seconds)
+
+    def finish(self, status: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        total = time.perf_counter() - self._started
+        JOB_DURATION_SECONDS.labels(status).observe(total)
+        return {"total_seconds": round(total, 6), "stages": self.stages}
+
+
+class JobProfiler:
+    def __init__(self, output_dir: Path, enabled: bool):
+        self.path = output_dir / PROFILE_FILENAME
+        self._profile = cProfile.Profile() if enabled else None
+
+    def __enter__(self) -> "JobProfiler":
+        if self._profile is not None:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._profile is not None:
+            self._profile.disable()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._profile.dump_stats(str(self.path))
+
+    @property
+    def saved_path(self) -> Optional[str]:
+        return str(self.path) if self._profile is not None and self.path.exists() else None
+
+
+class RequestMetricsMiddleware:
+    """Times requests under `prefix`, labelled by route template so path parameters don't explode cardinality."""
+
+    def __init__(self, app, prefix: str = "/api/phh"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.labels(scope["method"], template, str(status["code"])).observe(time.perf_counter() - started)
+
+
+def metrics_payload() -> tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
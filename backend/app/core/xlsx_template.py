@@ -0,0 +1,291 @@
+from __future__ import annotations
+import math
+import os
+import posixpath
+import re
+import struct
+import zipfile
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from numbers import Number
+from typing import BinaryIO, Dict, List, Mapping, Optional, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+OFFICE_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+OFFICE_DOCUMENT_REL = f"{OFFICE_REL_NS}/officeDocument"
+CALC_CHAIN_REL = f"{OFFICE_REL_NS}/calcChain"
+
+CellValue = Optional[object]
+CellUpdates = Mapping[Tuple[int, int], CellValue]
+
+_ATTR_RE = re.compile(r'([\w:]+)\s*=\s*"([^"]*)"')
+_STYLE_RE = re.compile(r'\ss="(\d+)"')
+_CELL_PATTERNS: Dict[str, re.Pattern] = {}
+
+
+def _cell_pattern(prefix: str) -> re.Pattern:
+    if prefix not in _CELL_PATTERNS:
+        _CELL_PATTERNS[prefix] = re.compile(rf'<{prefix}c\b(?=[^>]*?\sr="([A-Z]+)\d+"|)([^>]*?)(?:/>|>(.*?)</{prefix}c>)', re.S)
+    return _CELL_PATTERNS[prefix]
+
+
+@lru_cache(maxsize=4096)
+def column_letter(index: int) -> str:
+    letters = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+@lru_cache(maxsize=4096)
+def column_index(letters: str) -> int:
+    index = 0
+    for char in letters:
+        index = index * 26 + (ord(char) - 64)
+    return index
+
+
+def _parse_attrs(text: str) -> Dict[str, str]:
+    return dict(_ATTR_RE.findall(text))
+
+
+def _format_attrs(attrs: Mapping[str, str]) -> str:
+    return "".join(f' {key}="{value}"' for key, value in attrs.items())
+
+
+def _is_blank(value: CellValue) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _render_cell(prefix: str, ref: str, value: CellValue, style: Optional[str]) -> str:
+    style_attr = f' s="{style}"' if style is not None else ""
+    if _is_blank(value):
+        return f'<{prefix}c r="{ref}"{style_attr}/>' if style is not None else ""
+    if isinstance(value, bool):
+        return f'<{prefix}c r="{ref}"{style_attr} t="b"><{prefix}v>{int(value)}</{prefix}v></{prefix}c>'
+    if not isinstance(value, str) and isinstance(value, Number):
+        return f'<{prefix}c r="{ref}"{style_attr}><{prefix}v>{float(value)!r}</{prefix}v></{prefix}c>'
+    text = escape(str(value))
+    return f'<{prefix}c r="{ref}"{style_attr} t="inlineStr"><{prefix}is><{prefix}t xml:space="preserve">{text}</{prefix}t></{prefix}is></{prefix}c>'
+
+
+def _patch_row(prefix: str, row_number: int, body: str, updates: Dict[int, CellValue]) -> Tuple[str, bool]:
+    cells: List[Tuple[int, str]] = []
+    removed_formula = False
+    pending = dict(updates)
+    last_col = 0
+    for match in _cell_pattern(prefix).finditer(body):
+        letters = match.group(1)
+        col = column_index(letters) if letters else last_col + 1
+        last_col = col
+        if col not in pending:
+            cells.append((col, match.group(0)))
+            continue
+        style = _STYLE_RE.search(match.group(2))
+        removed_formula = removed_formula or f"<{prefix}f" in (match.group(3) or "")
+        cells.append((col, _render_cell(prefix, f"{column_letter(col)}{row_number}", pending.pop(col), style.group(1) if style else None)))
+    for col, value in pending.items():
+        cells.append((col, _render_cell(prefix, f"{column_letter(col)}{row_number}", value, None)))
+    cells.sort(key=lambda item: item[0])
+    return "".join(xml for _, xml in cells), removed_formula
+
+
+def patch_sheet_xml(xml: bytes, updates: CellUpdates) -> Tuple[bytes, bool]:
+    text = xml.decode("utf-8")
+    opening = re.search(r"<((?:\w+:)?)sheetData\b[^>]*?(/?)>", text)
+    if not opening:
+        raise ValueError("Worksheet has no sheetData element")
+    prefix = opening.group(1)
+    if opening.group(2):
+        data_start = data_end = opening.end()
+        head = text[: opening.start()] + f"<{prefix}sheetData>"
+        tail = f"</{prefix}sheetData>" + text[opening.end():]
+    else:
+        data_start = opening.end()
+        data_end = text.index(f"</{prefix}sheetData>", data_start)
+        head = text[:data_start]
+        tail = text[data_end:]
+
+    by_row: Dict[int, Dict[int, CellValue]] = {}
+    for (row, col), value in updates.items():
+        by_row.setdefault(row, {})[col] = value
+
+    row_re = re.compile(rf"<{prefix}row\b([^>]*?)(?:/>|>(.*?)</{prefix}row>)", re.S)
+    rows: List[Tuple[int, str]] = []
+    removed_formula = False
+    last_row = 0
+    for match in row_re.finditer(text, data_start, data_end):
+        attrs = _parse_attrs(match.group(1))
+        row_number = int(attrs["r"]) if "r" in attrs else last_row + 1
+        last_row = row_number
+        if row_number not in by_row:
+            rows.append((row_number, match.group(0)))
+            continue
+        body, had_formula = _patch_row(prefix, row_number, match.group(2) or "", by_row.pop(row_number))
+        removed_formula = removed_formula or had_formula
+        attrs["r"] = str(row_number)
+        attrs.pop("spans", None)
+        rows.append((row_number, f"<{prefix}row{_format_attrs(attrs)}>{body}</{prefix}row>"))
+    for row_number, row_updates in by_row.items():
+        body, _ = _patch_row(prefix, row_number, "", row_updates)
+        rows.append((row_number, f'<{prefix}row r="{row_number}">{body}</{prefix}row>'))
+    rows.sort(key=lambda item: item[0])
+
+    head = _expand_dimension(head, prefix, updates)
+    patched = head + "".join(xml for _, xml in rows) + tail
+    return patched.encode("utf-8"), removed_formula
+
+
+def _expand_dimension(head: str, prefix: str, updates: CellUpdates) -> str:
+    match = re.search(rf'<{prefix}dimension\s+ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"', head)
+    if not match or not updates:
+        return head
+    min_col, min_row = column_index(match.group(1)), int(match.group(2))
+    max_col = column_index(match.group(3)) if match.group(3) else min_col
+    max_row = int(match.group(4)) if match.group(4) else min_row
+    rows = [row for row, _ in updates]
+    cols = [col for _, col in updates]
+    min_row, max_row = min(min_row, *rows), max(max_row, *rows)
+    min_col, max_col = min(min_col, *cols), max(max_col, *cols)
+    ref = f"{column_letter(min_col)}{min_row}:{column_letter(max_col)}{max_row}"
+    return head[: match.start(1)] + ref + head[match.end(match.lastindex):]
+
+
+def _resolve_target(base_part: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _rels_part(part: str) -> str:
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_HEADER = struct.Struct("<4s4B4HL2L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+@dataclass
+class _Member:
+    info: zipfile.ZipInfo
+    crc: int
+    compressed: bytes
+    size: int
+
+
+def _dos_datetime(date_time: Tuple[int, ...]) -> Tuple[int, int]:
+    year, month, day, hour, minute, second = date_time
+    return (hour << 11) | (minute << 5) | (second // 2), ((year - 1980) << 9) | (month << 5) | day
+
+
+def _write_zip(output: BinaryIO, members: List[_Member]) -> None:
+    offset = 0
+    central: List[bytes] = []
+    for member in members:
+        info = member.info
+        name = info.filename.encode("utf-8")
+        flags = info.flag_bits & ~_DATA_DESCRIPTOR_FLAG
+        dos_time, dos_date = _dos_datetime(info.date_time)
+        local = _LOCAL_HEADER.pack(
+            b"PK\x03\x04", info.extract_version, 0, flags, info.compress_type, dos_time, dos_date,
+            member.crc, len(member.compressed), member.size, len(name), 0,
+        )
+        central.append(
+            _CENTRAL_HEADER.pack(
+                b"PK\x01\x02", info.create_version, info.create_system, info.extract_version, 0, flags,
+                info.compress_type, dos_time, dos_date, member.crc, len(member.compressed), member.size,
+                len(name), 0, 0, 0, info.internal_attr, info.external_attr, offset,
+            )
+            + name
+        )
+        output.write(local)
+        output.write(name)
+        output.write(member.compressed)
+        offset += len(local) + len(name) + len(member.compressed)
+    directory = b"".join(central)
+    output.write(directory)
+    output.write(_END_RECORD.pack(b"PK\x05\x06", 0, 0, len(members), len(members), len(directory), offset, 0))
+
+
+def _compress(data: bytes, compress_type: int) -> bytes:
+    if compress_type == zipfile.ZIP_STORED:
+        return data
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+class XlsxTemplate:
+    def __init__(self, raw: bytes):
+        self.members: List[_Member] = []
+        self.parts: Dict[str, bytes] = {}
+        with zipfile.ZipFile(BytesIO(raw)) as archive:
+            for info in archive.infolist():
+                if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                    raise ValueError(f"Unsupported compression for {info.filename}")
+                header = _LOCAL_HEADER.unpack_from(raw, info.header_offset)
+                start = info.header_offset + _LOCAL_HEADER.size + header[10] + header[11]
+                compressed = raw[start:start + info.compress_size]
+                self.members.append(_Member(info=info, crc=info.CRC, compressed=compressed, size=info.file_size))
+                self.parts[info.filename] = archive.read(info.filename)
+        parts = self.parts
+        self.workbook_part = self._office_document(parts)
+        self.workbook_rels_part = _rels_part(self.workbook_part)
+        rels = ElementTree.fromstring(parts[self.workbook_rels_part])
+        targets = {rel.get("Id"): _resolve_target(self.workbook_part, rel.get("Target")) for rel in rels}
+        self.calc_chain_part = next(
+            (_resolve_target(self.workbook_part, rel.get("Target")) for rel in rels if rel.get("Type") == CALC_CHAIN_REL),
+            None,
+        )
+        workbook = ElementTree.fromstring(parts[self.workbook_part])
+        self.sheet_parts: Dict[str, str] = {}
+        for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet"):
+            self.sheet_parts[sheet.get("name")] = targets[sheet.get(f"{{{OFFICE_REL_NS}}}id")]
+
+    @classmethod
+    def from_path(cls, path: str) -> "XlsxTemplate":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    @staticmethod
+    def _office_document(parts: Dict[str, bytes]) -> str:
+        rels = ElementTree.fromstring(parts["_rels/.rels"])
+        for rel in rels:
+            if rel.get("Type") == OFFICE_DOCUMENT_REL:
+                return rel.get("Target").lstrip("/")
+        raise ValueError("Package has no officeDocument relationship")
+
+    def render(self, sheet_name: str, updates: CellUpdates, output: str | os.PathLike | BinaryIO) -> None:
+        if sheet_name not in self.sheet_parts:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        target_part = self.sheet_parts[sheet_name]
+        patched, removed_formula = patch_sheet_xml(self.parts[target_part], updates)
+        drop_calc_chain = removed_formula and self.calc_chain_part is not None
+        members: List[_Member] = []
+        for member in self.members:
+            name = member.info.filename
+            if name == target_part:
+                data = patched
+            elif drop_calc_chain and name == self.calc_chain_part:
+                continue
+            elif drop_calc_chain and name == self.workbook_rels_part:
+                data = re.sub(rb"<Relationship\b[^>]*calcChain[^>]*/>", b"", self.parts[name])
+            elif drop_calc_chain and name == "[Content_Types].xml":
+                data = re.sub(rb"<Override\b[^>]*calcChain[^>]*/>", b"", self.parts[name])
+            else:
+                members.append(member)
+                continue
+            compressed = _compress(data, member.info.compress_type)
+            members.append(_Member(info=member.info, crc=zlib.crc32(data), compressed=compressed, size=len(data)))
+        if hasattr(output, "write"):
+            _write_zip(output, members)
+        else:
+            with open(output, "wb") as f:
+                _write_zip(f, members)
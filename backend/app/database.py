@@ -1,11 +1,46 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
 
-engine = create_engine(settings.database_url, future=True)
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def engine_options(url: str, pool_size: int, max_overflow: int) -> dict:
+    options = {"pool_pre_ping": settings.db_pool_pre_ping, "pool_recycle": settings.db_pool_recycle}
+    # SQLite pools are per-file or per-thread and reject sizing arguments.
+    if not _is_sqlite(url):
+        options.update(pool_size=pool_size, max_overflow=max_overflow, pool_timeout=settings.db_pool_timeout)
+    return options
+
+
+def async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+engine = create_engine(settings.database_url, future=True, **engine_options(settings.database_url, settings.db_pool_size, settings.db_max_overflow))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+# Pricing jobs get their own pool, so a long job holding connections cannot starve API requests. SQLite has no
+# connection limit to protect (and an in-memory database would not be shared), so it keeps the one engine.
+if _is_sqlite(settings.database_url):
+    worker_engine = engine
+else:
+    worker_engine = create_engine(
+        settings.database_url, future=True, **engine_options(settings.database_url, settings.worker_db_pool_size, settings.worker_db_max_overflow)
+    )
+WorkerSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=worker_engine, future=True)
+
 Base = declarative_base()
+_async_sessions = None
 
 
 def get_db():
@@ -14,3 +49,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_async_sessionmaker():
+    # Built on first use so processes that never serve the async routes (queue workers, scripts) skip the driver.
+    global _async_sessions
+    if _async_sessions is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = settings.async_database_url or async_database_url(settings.database_url)
+        async_engine = create_async_engine(url, **engine_options(url, settings.db_pool_size, settings.db_max_overflow))
+        _async_sessions = async_sessionmaker(async_engine, expire_on_commit=False)
+    return _async_sessions
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,30 +1,125 @@
-from typing import List
-import base64
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition
+from __future__ import annotations
+import json
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from app.config import settings
+from app.core.email_packaging import (
+    ATTACHMENT_HEAD,
+    ATTACHMENT_SEPARATOR,
+    ZIP_CONTENT_TYPE,
+    Package,
+    RateSheetAttachment,
+    attachment_tail,
+    encoded_budget,
+    iter_base64,
+    package_attachments,
+    plan_messages,
+)
 
+SENT_STATUSES = {200, 202, "skipped"}
+MESSAGE_END = b"]}"
+# Room for the "(n/count)" suffix split messages add to the subject.
+SUBJECT_SUFFIX_ALLOWANCE = " (999/999)"
 
-def send_rate_sheet_email(subject: str, recipients: List[str], body: str, attachments: List[str]) -> dict:
-    message = Mail(
-        from_email=settings.email_from_address,
-        to_emails=recipients,
-        subject=subject,
-        plain_text_content=body,
+
+def message_envelope(from_address: str, subject: str, recipients: List[str], body: str, custom_args: Dict[str, str] | None = None) -> bytes:
+    """The start of a v3 body: everything up to the opening of the attachments list."""
+    envelope = {
+        "personalizations": [{"to": [{"email": email} for email in recipients]}],
+        "from": {"email": from_address},
+        "subject": subject,
+        "content": [{"type": "text/plain", "value": body}],
+    }
+    if custom_args:
+        envelope["custom_args"] = custom_args
+    return json.dumps(envelope)[:-1].encode() + b', "attachments": ['
+
+
+class SendGridSink:
+    """Posts to the SendGrid v3 API, streaming the JSON body so attachments are encoded chunk by chunk.
+
+    The rate sheet distribution posts the same body through its async client, so only one encoded chunk of one
+    file is in memory per message either way.
+    """
+
+    def __init__(self, api_key: str, from_address: str, url: str | None = None, timeout: float = 120.0):
+        self.api_key = api_key
+        self.from_address = from_address
+        self.url = url or settings.sendgrid_api_url
+        self.timeout = timeout
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+
+    def body(
+        self,
+        subject: str,
+        recipients: List[str],
+        body: str,
+        files: Sequence[Tuple[str, str, str]],
+        custom_args: Dict[str, str] | None = None,
+    ) -> Iterator[bytes]:
+        """The request body for `files`, given as (path, filename, content type), yielded a base64 chunk at a time."""
+        yield message_envelope(self.from_address, subject, recipients, body, custom_args)
+        for position, (path, filename, content_type) in enumerate(files):
+            yield (ATTACHMENT_SEPARATOR if position else b"") + ATTACHMENT_HEAD
+            yield from iter_base64(path)
+            yield attachment_tail(filename, content_type)
+        yield MESSAGE_END
+
+    def send(self, subject: str, recipients: List[str], body: str, packages: Sequence[Package]) -> Dict:
+        import httpx
+
+        files = [(package.path, package.name, ZIP_CONTENT_TYPE) for package in packages]
+        response = httpx.post(self.url, content=self.body(subject, recipients, body, files), headers=self.headers, timeout=self.timeout)
+        return {"status": response.status_code, "body": response.text}
+
+
+def default_sink() -> Optional[SendGridSink]:
+    if not settings.sendgrid_api_key:
+        return None
+    return SendGridSink(settings.sendgrid_api_key, settings.email_from_address)
+
+
+def send_rate_sheet_email(
+    subject: str,
+    recipients: List[str],
+    body: str,
+    attachments: Sequence[RateSheetAttachment],
+    output_dir: str,
+    group_by: str | None = None,
+    max_message_bytes: int | None = None,
+    prefix: str = "rate_sheets",
+    sink=None,
+) -> dict:
+    max_message_bytes = max_message_bytes or settings.email_max_message_bytes
+    sink = sink if sink is not None else default_sink()
+    from_address = sink.from_address if isinstance(sink, SendGridSink) else settings.email_from_address
+    envelope_bytes = len(message_envelope(from_address, subject + SUBJECT_SUFFIX_ALLOWANCE, recipients, body)) + len(MESSAGE_END)
+    packages = package_attachments(
+        attachments,
+        output_dir,
+        group_by=group_by or settings.email_group_by,
+        max_package_bytes=encoded_budget(max_message_bytes, envelope_bytes),
+        prefix=prefix,
     )
-    for file_path in attachments:
-        with open(file_path, "rb") as f:
-            data = f.read()
-        encoded = base64.b64encode(data).decode()
-        attachment = Attachment(
-            FileContent(encoded),
-            FileName(file_path.split("/")[-1]),
-            FileType("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
-            Disposition("attachment"),
+    messages = plan_messages(packages, max_message_bytes, envelope_bytes)
+    results = []
+    for message in messages:
+        message_subject = f"{subject} ({message.index}/{message.count})" if message.count > 1 else subject
+        if sink is None:
+            response = {"status": "skipped", "reason": "SENDGRID_API_KEY not configured"}
+        else:
+            response = sink.send(message_subject, recipients, body, message.packages)
+        results.append(
+            {
+                "index": message.index,
+                "count": message.count,
+                "subject": message_subject,
+                "attachments": [package.as_dict() for package in message.packages],
+                **response,
+            }
         )
-        message.add_attachment(attachment)
-    if not settings.sendgrid_api_key:
-        return {"status": "skipped", "reason": "SENDGRID_API_KEY not configured"}
-    sg = SendGridAPIClient(settings.sendgrid_api_key)
-    response = sg.send(message)
-    return {"status": response.status_code, "body": str(response.body)}
+    statuses = [result["status"] for result in results]
+    status = next((s for s in statuses if s not in SENT_STATUSES), statuses[-1] if statuses else "skipped")
+    return {"status": status, "messages": results}
@@ -1,14 +1,41 @@
-from fastapi import FastAPI
-from app.api import auth, phh
-from app.database import Base, engine
-
-Base.metadata.create_all(bind=engine)
+from fastapi import FastAPI, Response
+from app.api import auth, investors, llpa, phh
+from app.config import settings
+from app.core.job_queue import JobWorker, get_job_queue
+from app.core.telemetry import RequestMetricsMiddleware, metrics_payload
+from app.database import WorkerSessionLocal
 
 app = FastAPI(title="Investor Support Tools")
+if settings.telemetry_enabled:
+    app.add_middleware(RequestMetricsMiddleware, prefix=phh.router.prefix)
 app.include_router(auth.router)
 app.include_router(phh.router)
+app.include_router(investors.router)
+app.include_router(llpa.router)
+_inline_worker: JobWorker | None = None
+
+
+@app.on_event("startup")
+def start_inline_worker():
+    # The in-memory queue is only visible to this process, so it has to be drained here.
+    global _inline_worker
+    if settings.job_queue_backend == "memory":
+        _inline_worker = JobWorker(get_job_queue(), WorkerSessionLocal)
+        _inline_worker.start()
+
+
+@app.on_event("shutdown")
+def stop_inline_worker():
+    if _inline_worker is not None:
+        _inline_worker.stop()
 
 
 @app.get("/")
 def root():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = metrics_payload()
+    return Response(content=body, media_type=content_type)
@@ -1,6 +1,6 @@
 from datetime import datetime, date
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Enum, JSON, Float
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, DateTime, Date, ForeignKey, Enum, JSON, Float, Index, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 import enum
 from app.database import Base
@@ -23,11 +23,14 @@ class JobStatus(str, enum.Enum):
     COMPLETED = "COMPLETED"
     WAITING_FOR_QC = "WAITING_FOR_QC"
     APPROVED_FOR_DISTRIBUTION = "APPROVED_FOR_DISTRIBUTION"
+    # Held by the distribution run that claimed the job; it ends DISTRIBUTED or back in the status it was claimed from.
+    DISTRIBUTING = "DISTRIBUTING"
     DISTRIBUTED = "DISTRIBUTED"
 
 
 class JobType(str, enum.Enum):
     DAILY_PHH_NONAGENCY = "DAILY_PHH_NONAGENCY"
+    DAILY_NONAGENCY = "DAILY_NONAGENCY"
 
 
 class FileType(str, enum.Enum):
@@ -39,6 +42,8 @@ class FileType(str, enum.Enum):
 
 class EmailStatus(str, enum.Enum):
     PENDING = "PENDING"
+    # Committed before the provider is called; a row still SENDING after a crash may or may not have gone out.
+    SENDING = "SENDING"
     SENT = "SENT"
     FAILED = "FAILED"
 
@@ -61,12 +66,15 @@ class Investor(Base):
     name = Column(String, nullable=False)
     code = Column(String, nullable=False, unique=True)
     is_active = Column(Boolean, default=True)
+    # Products, tier codes, file layout and scheduling; see app.core.investor_config.InvestorConfig.
+    config = Column(JSON, default=dict)
 
     tiers = relationship("Tier", back_populates="investor")
 
 
 class Seller(Base):
     __tablename__ = "sellers"
+    __table_args__ = (UniqueConstraint("investor_id", "org_id", name="uq_sellers_investor_org"),)
 
     id = Column(Integer, primary_key=True)
     investor_id = Column(Integer, ForeignKey("investors.id"))
@@ -82,6 +90,7 @@ class Seller(Base):
 
 class SellerTierAssignment(Base):
     __tablename__ = "seller_tier_assignments"
+    __table_args__ = (UniqueConstraint("seller_id", "channel", name="uq_seller_tier_assignments_seller_channel"),)
 
     id = Column(Integer, primary_key=True)
     investor_id = Column(Integer, ForeignKey("investors.id"))
@@ -97,6 +106,7 @@ class SellerTierAssignment(Base):
 
 class Tier(Base):
     __tablename__ = "tiers"
+    __table_args__ = (UniqueConstraint("investor_id", "code", name="uq_tiers_investor_code"),)
 
     id = Column(Integer, primary_key=True)
     investor_id = Column(Integer, ForeignKey("investors.id"))
@@ -110,6 +120,7 @@ class Tier(Base):
 
 class ProductType(Base):
     __tablename__ = "product_types"
+    __table_args__ = (UniqueConstraint("investor_id", "code", name="uq_product_types_investor_code"),)
 
     id = Column(Integer, primary_key=True)
     investor_id = Column(Integer, ForeignKey("investors.id"))
@@ -120,14 +131,25 @@ class ProductType(Base):
     investor = relationship("Investor")
 
 
+job_run_files = Table(
+    "job_run_files",
+    Base.metadata,
+    Column("job_run_id", Integer, ForeignKey("job_runs.id"), primary_key=True),
+    Column("uploaded_file_id", Integer, ForeignKey("uploaded_files.id"), primary_key=True),
+)
+
+
 class UploadedFile(Base):
     __tablename__ = "uploaded_files"
+    __table_args__ = (Index("ix_uploaded_files_investor_type_uploaded", "investor_id", "file_type", "uploaded_at"),)
 
     id = Column(Integer, primary_key=True)
     investor_id = Column(Integer, ForeignKey("investors.id"))
     file_type = Column(Enum(FileType))
     original_filename = Column(String)
     stored_path = Column(String)
+    sha256 = Column(String(64), index=True)
+    size_bytes = Column(BigInteger)
     uploaded_by_user_id = Column(Integer, ForeignKey("users.id"))
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
@@ -136,6 +158,7 @@ class UploadedFile(Base):
 
 class JobRun(Base):
     __tablename__ = "job_runs"
+    __table_args__ = (Index("ix_job_runs_investor_started", "investor_id", "started_at"),)
 
     id = Column(Integer, primary_key=True)
     investor_id = Column(Integer, ForeignKey("investors.id"))
@@ -146,8 +169,12 @@ class JobRun(Base):
     finished_at = Column(DateTime)
     error_message = Column(String)
     payload = Column(JSON, default=dict)
+    # Lease held by a distribution run, renewed as it writes outcomes; a stale one can be taken over.
+    claimed_at = Column(DateTime)
+    claimed_from = Column(Enum(JobStatus))
 
     investor = relationship("Investor")
+    uploaded_files = relationship("UploadedFile", secondary=job_run_files)
 
 
 class RateSheet(Base):
@@ -155,7 +182,7 @@ class RateSheet(Base):
 
     id = Column(Integer, primary_key=True)
     investor_id = Column(Integer, ForeignKey("investors.id"))
-    job_run_id = Column(Integer, ForeignKey("job_runs.id"))
+    job_run_id = Column(Integer, ForeignKey("job_runs.id"), index=True)
     channel = Column(Enum(ChannelEnum))
     product_type_id = Column(Integer, ForeignKey("product_types.id"))
     tier_id = Column(Integer, ForeignKey("tiers.id"))
@@ -163,7 +190,8 @@ class RateSheet(Base):
     generated_filename = Column(String)
     generated_path = Column(String)
     adjustment_applied = Column(Float)
-    metadata = Column(JSON, default=dict)
+    # "metadata" is reserved on declarative models, so the column is mapped under metadata_.
+    metadata_ = Column("metadata", JSON, default=dict)
 
     investor = relationship("Investor")
 
@@ -179,6 +207,10 @@ class EmailDistribution(Base):
     attachments = Column(JSON, default=list)
     status = Column(Enum(EmailStatus), default=EmailStatus.PENDING)
     response_payload = Column(JSON, default=dict)
+    seller_id = Column(Integer, ForeignKey("sellers.id"), nullable=True)
+    # Set for per-seller sends so a resumed run can tell which messages already went out.
+    idempotency_key = Column(String(64), unique=True, nullable=True)
+    attempts = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -205,5 +237,7 @@ class QCReview(Base):
     reviewer_user_id = Column(Integer, ForeignKey("users.id"))
     status = Column(String)
     comments = Column(String)
+    summary = Column(JSON)
+    findings = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,12 @@
+from typing import Dict, Optional
+from pydantic import BaseModel
+
+
+class InvestorResponse(BaseModel):
+    id: int
+    code: str
+    name: str
+    is_active: bool
+    # The resolved config (built-in defaults plus stored overrides); None when the investor has none yet.
+    config: Optional[Dict] = None
+    config_error: Optional[str] = None
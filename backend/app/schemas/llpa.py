@@ -0,0 +1,45 @@
+from typing import Dict, List, Optional, Tuple
+from pydantic import BaseModel
+
+
+class LLPAGrid(BaseModel):
+    id: str
+    sheet_name: str
+    type: str
+    type_badge: str
+    row_dimension: str
+    col_dimension: str
+    name: str
+    trigger: Optional[str] = None
+    cell_ref: str
+    start_row: int
+    start_col: int
+    end_row: int
+    end_col: int
+    header_row: int
+    data_start_row: int
+    label_col: int
+    cltv_headers: List[Tuple[int, str]]
+    row_labels: List[Tuple[int, str]]
+    is_single_value_max: bool
+    is_decimal_cltv: bool
+    is_single_value_fico: bool
+    value_type: str
+    # Output tab the grid is written to; a later grid with the same name replaces it, as in the browser tool.
+    tab_name: str
+
+
+class LLPASheet(BaseModel):
+    sheet_name: str
+    rows: int
+    cols: int
+    grids: List[LLPAGrid]
+    errors: List[Dict] = []
+
+
+class LLPAGridsResponse(BaseModel):
+    filename: str
+    output_filename: str
+    grid_count: int
+    tab_count: int
+    sheets: List[LLPASheet]
@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 from typing import List, Optional
 from pydantic import BaseModel
 from app.models import ChannelEnum, JobStatus
@@ -9,10 +9,12 @@ class UploadedFileInfo(BaseModel):
     file_type: str
     original_filename: str
     stored_path: str
-    uploaded_at: str
+    sha256: Optional[str] = None
+    size_bytes: Optional[int] = None
+    uploaded_at: Optional[datetime] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
 
 
 class RateSheetResponse(BaseModel):
@@ -22,10 +24,16 @@ class RateSheetResponse(BaseModel):
     tier: str | None
     adjustment_applied: float
     generated_filename: str
-    generated_path: str
+    # None for sheets from lazy jobs, which are built on download instead.
+    generated_path: str | None = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+
+class RateSheetPage(BaseModel):
+    items: List[RateSheetResponse]
+    next_cursor: Optional[str] = None
 
 
 class JobRunSummary(BaseModel):
@@ -33,9 +41,16 @@ class JobRunSummary(BaseModel):
     status: JobStatus
     effective_date: date
     job_type: str
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+
+class JobRunPage(BaseModel):
+    items: List[JobRunSummary]
+    next_cursor: Optional[str] = None
 
 
 class JobRunDetail(JobRunSummary):
@@ -44,5 +59,81 @@ class JobRunDetail(JobRunSummary):
     payload: Optional[dict]
 
 
+class JobProgress(BaseModel):
+    id: int
+    status: JobStatus
+    stage: Optional[str] = None
+    done: int = 0
+    total: int = 0
+    error_message: Optional[str] = None
+
+
 class EmailSendRequest(BaseModel):
     recipients: Optional[List[str]] = None
+    group_by: Optional[str] = None
+
+
+class QCApprovalRequest(BaseModel):
+    reviewer_user_id: Optional[int] = None
+    comments: Optional[str] = None
+
+
+class QCApprovalResponse(BaseModel):
+    job_id: int
+    status: JobStatus
+    review_id: int
+
+
+class PriceQuoteResponse(BaseModel):
+    org_id: str
+    channel: ChannelEnum
+    product: str
+    tier: str
+    column: str
+    note_rate: float
+    base_price: float
+    adjustment: float
+    price: float
+    interpolated: bool
+    effective_date: date
+    job_id: int
+
+    class Config:
+        from_attributes = True
+
+
+class PriceRequest(BaseModel):
+    org_id: str
+    channel: ChannelEnum
+    product: str
+    note_rate: float
+    column: str
+
+
+class PriceBatchRequest(BaseModel):
+    loans: List[PriceRequest]
+    effective_date: Optional[date] = None
+    interpolate: bool = True
+
+
+class PriceBatchResult(BaseModel):
+    quote: Optional[PriceQuoteResponse] = None
+    error: Optional[str] = None
+
+
+class PriceBatchResponse(BaseModel):
+    effective_date: date
+    job_id: int
+    results: List[PriceBatchResult]
+
+
+class GridSliceResponse(BaseModel):
+    rate_sheet_id: int
+    job_id: int
+    effective_date: date
+    channel: str
+    product: str
+    tier: Optional[str] = None
+    columns: List[str]
+    note_rates: List[float]
+    prices: List[List[Optional[float]]]
@@ -0,0 +1,61 @@
+import argparse
+import json
+from typing import Dict, List
+from sqlalchemy.orm import Session
+from app.core.investor_config import BUILTIN_CONFIGS, InvestorConfig, resolve_config
+from app.database import SessionLocal
+from app.models import EmailDistributionRecipientList, Investor, ProductType
+
+
+def seed_investor(db: Session, code: str, name: str, config: Dict | None = None, recipients: List[str] | None = None) -> InvestorConfig:
+    """Creates or updates one investor with its stored config, product types and default recipient list."""
+    resolved = resolve_config(code, name, config)
+    investor = db.query(Investor).filter(Investor.code == code).first()
+    if not investor:
+        investor = Investor(name=name, code=code)
+        db.add(investor)
+    investor.name = name
+    if config is not None:
+        investor.config = config
+    db.commit()
+    for product_code, sheet in resolved.products.items():
+        pt = db.query(ProductType).filter(ProductType.investor_id == investor.id, ProductType.code == product_code).first()
+        if not pt:
+            db.add(ProductType(investor_id=investor.id, code=product_code, display_name=product_code.title(), sheet_name=sheet))
+    existing = (
+        db.query(EmailDistributionRecipientList)
+        .filter(EmailDistributionRecipientList.investor_id == investor.id, EmailDistributionRecipientList.is_default_for_phh_nonagency == True)
+        .first()
+    )
+    if not existing:
+        db.add(
+            EmailDistributionRecipientList(
+                investor_id=investor.id,
+                name=f"{resolved.name} Non-Agency Rate Sheets – Admin",
+                emails=recipients or ["ops@example.com"],
+                is_default_for_phh_nonagency=True,
+            )
+        )
+    db.commit()
+    return resolved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed investors from a JSON list of {code, name, recipients, config}")
+    parser.add_argument("config", nargs="?", help="JSON file; without it only the built-in investors are seeded")
+    args = parser.parse_args()
+    entries = [{"code": config.code, "name": config.name} for config in BUILTIN_CONFIGS.values()]
+    if args.config:
+        with open(args.config, encoding="utf-8") as handle:
+            entries = json.load(handle)
+    db = SessionLocal()
+    try:
+        for entry in entries:
+            config = seed_investor(db, entry["code"], entry.get("name", entry["code"]), entry.get("config"), entry.get("recipients"))
+            print(f"{config.code}: {len(config.products)} products, deadline {config.deadline or 'none'}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
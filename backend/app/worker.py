@@ -0,0 +1,28 @@
+import argparse
+import logging
+import signal
+from app.config import settings
+from app.core.job_queue import JobWorker, get_job_queue
+from app.database import WorkerSessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued pricing jobs")
+    parser.add_argument("--concurrency", type=int, default=settings.job_worker_concurrency)
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics for this worker on the given port")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.metrics_port:
+        from prometheus_client import start_http_server
+
+        start_http_server(args.metrics_port)
+    worker = JobWorker(get_job_queue(), WorkerSessionLocal, concurrency=args.concurrency)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.serve()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
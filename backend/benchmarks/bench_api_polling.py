@@ -0,0 +1,245 @@
+"""Dashboard polling load test: sync routes on one shared pool vs async routes with a separate pricing pool.
+
+Run from backend/: python -m benchmarks.bench_api_polling [--clients 50] [--requests 20] [--held 3]
+
+Both setups serve GET /api/phh/jobs and GET /api/phh/jobs/{id} from the same SQLite file, while a simulated
+pricing job keeps `--held` connections checked out and writes to the job table. Requests that fail (pool checkout
+timeouts) are counted as errors and their latency is still included in the percentiles.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JOB_QUEUE_BACKEND", "memory")
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from sqlalchemy import create_engine, event, insert, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, selectinload, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.api import phh
+from app.api.phh import _ratesheet_response, _ratesheet_rows
+from app.database import Base, get_async_db
+from app.models import ChannelEnum, Investor, JobRun, JobStatus, JobType, ProductType, RateSheet, Tier
+from app.schemas.phh import JobRunDetail, JobRunPage, JobRunSummary, UploadedFileInfo
+
+POOL_SIZE = 5
+
+
+def seed(url: str, jobs: int) -> int:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        investor = Investor(name="PHH", code="PHH")
+        db.add(investor)
+        db.flush()
+        products = [ProductType(investor_id=investor.id, code=code, sheet_name=code) for code in ("FULLDOC", "ALTDOC", "DSCR")]
+        tiers = [Tier(investor_id=investor.id, code=f"NA{i}") for i in range(1, 13)]
+        db.add_all(products + tiers)
+        db.flush()
+        start = datetime(2024, 1, 1, 8)
+        db.execute(
+            insert(JobRun),
+            [
+                {
+                    "investor_id": investor.id,
+                    "status": JobStatus.COMPLETED,
+                    "job_type": JobType.DAILY_PHH_NONAGENCY,
+                    "effective_date": date(2024, 1, 1) + timedelta(days=i),
+                    "started_at": start + timedelta(days=i),
+                    "payload": {"generated": 72},
+                }
+                for i in range(jobs)
+            ],
+        )
+        job_id = db.scalar(select(JobRun.id).order_by(JobRun.id.desc()))
+        db.execute(
+            insert(RateSheet),
+            [
+                {
+                    "job_run_id": job_id,
+                    "channel": ChannelEnum.DEL if n < 36 else ChannelEnum.NONDEL,
+                    "product_type_id": products[n % 3].id,
+                    "tier_id": tiers[n % 12].id,
+                    "adjustment_applied": 0.1 * (n % 12),
+                    "generated_filename": f"sheet_{n}.xlsx",
+                    "generated_path": f"/data/sheet_{n}.xlsx",
+                }
+                for n in range(72)
+            ],
+        )
+        db.commit()
+    engine.dispose()
+    return job_id
+
+
+def _wal(engine):
+    # WAL lets the readers run while the simulated pricing job writes, as they would on PostgreSQL.
+    @event.listens_for(engine, "connect")
+    def _on_connect(connection, _):
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA busy_timeout=30000")
+
+    return engine
+
+
+def sync_app(sessions: sessionmaker) -> FastAPI:
+    """The routes as they were before: blocking handlers on the threadpool, sharing the pricing job's pool."""
+    app = FastAPI()
+
+    def get_db():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/api/phh/jobs", response_model=JobRunPage)
+    def list_jobs(db: Session = Depends(get_db)):
+        jobs = db.scalars(select(JobRun).order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(51)).all()
+        return JobRunPage(items=[JobRunSummary.from_orm(j) for j in jobs[:50]], next_cursor=None)
+
+    @app.get("/api/phh/jobs/{job_id}", response_model=JobRunDetail)
+    def get_job(job_id: int, db: Session = Depends(get_db)):
+        job = db.scalar(select(JobRun).options(selectinload(JobRun.uploaded_files)).where(JobRun.id == job_id))
+        if not job:
+            raise HTTPException(status_code=404)
+        return JobRunDetail(
+            id=job.id,
+            status=job.status,
+            effective_date=job.effective_date,
+            job_type=job.job_type,
+            uploaded_files=[UploadedFileInfo.from_orm(u) for u in job.uploaded_files],
+            ratesheets=[_ratesheet_response(*row) for row in db.execute(_ratesheet_rows(job.id))],
+            payload=job.payload,
+        )
+
+    return app
+
+
+def async_app(url: str, pool_timeout: float) -> FastAPI:
+    app = FastAPI()
+    app.include_router(phh.router)
+    engine = create_async_engine(
+        url.replace("sqlite://", "sqlite+aiosqlite://"),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=0,
+        pool_timeout=pool_timeout,
+    )
+    _wal(engine.sync_engine)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session():
+        async with sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = get_session
+    return app
+
+
+class PricingLoad:
+    """Holds `held` connections from `engine`'s pool and keeps writing progress, like a running job."""
+
+    def __init__(self, engine, held: int, job_id: int):
+        self.engine = engine
+        self.held = held
+        self.job_id = job_id
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _run(self):
+        with self.engine.connect() as connection:
+            while not self._stop.is_set():
+                connection.execute(text("UPDATE job_runs SET error_message = :now WHERE id = :id"), {"now": str(time.time()), "id": self.job_id})
+                connection.commit()
+                time.sleep(0.02)
+
+    def __enter__(self):
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(self.held)]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+async def poll(app: FastAPI, job_id: int, clients: int, requests: int):
+    latencies = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def poller(index: int):
+            nonlocal errors
+            for n in range(requests):
+                url = "/api/phh/jobs" if (index + n) % 2 else f"/api/phh/jobs/{job_id}"
+                started = time.perf_counter()
+                response = await client.get(url)
+                errors += response.status_code != 200
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(poller(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+    return elapsed, sorted(latencies), errors
+
+
+def report(label: str, elapsed: float, latencies, errors: int):
+    def pct(p):
+        return latencies[min(int(p * len(latencies)), len(latencies) - 1)] * 1000
+
+    print(
+        f"{label:<36}{len(latencies) / elapsed:>10.1f} req/s   p50 {pct(0.5):7.1f} ms   p95 {pct(0.95):7.1f} ms   "
+        f"p99 {pct(0.99):7.1f} ms   mean {statistics.mean(latencies) * 1000:7.1f} ms   errors {errors}"
+    )
+    return len(latencies) / elapsed, pct(0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--held", type=int, default=3, help="Connections the simulated pricing job keeps checked out")
+    parser.add_argument("--pool-timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        job_id = seed(url, args.jobs)
+
+        # Before: one pool for everything, so the pricing job's connections come out of the API's budget.
+        shared = _wal(create_engine(url, pool_size=POOL_SIZE, max_overflow=0, pool_timeout=args.pool_timeout, connect_args={"check_same_thread": False}))
+        with PricingLoad(shared, args.held, job_id):
+            before = report("sync routes, shared pool", *asyncio.run(poll(sync_app(sessionmaker(bind=shared)), job_id, args.clients, args.requests)))
+        shared.dispose()
+
+        # Pool isolation alone: the same sync routes, with pricing moved to its own pool.
+        worker = _wal(create_engine(url, pool_size=args.held, max_overflow=0, connect_args={"check_same_thread": False}))
+        api = _wal(create_engine(url, pool_size=POOL_SIZE, max_overflow=0, pool_timeout=args.pool_timeout, connect_args={"check_same_thread": False}))
+        with PricingLoad(worker, args.held, job_id):
+            report("sync routes, separate pricing pool", *asyncio.run(poll(sync_app(sessionmaker(bind=api)), job_id, args.clients, args.requests)))
+        api.dispose()
+
+        # After: pricing has its own pool and the polled routes use the async engine.
+        with PricingLoad(worker, args.held, job_id):
+            after = report("async routes, separate pricing pool", *asyncio.run(poll(async_app(url, args.pool_timeout), job_id, args.clients, args.requests)))
+        worker.dispose()
+
+    print(f"throughput x{after[0] / before[0]:.2f}, p99 latency x{after[1] / before[1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Time `import app.main` (and the queue worker) with `python -X importtime` and fail when startup regresses.
+
+Run from backend/: python -m benchmarks.bench_import_time [--budget-ms 2000] [--repeats 3]
+
+Each repeat is a fresh interpreter. The best cumulative time is compared with the budget, and the run also fails
+if any of the heavy modules that the API is meant to load on first use were imported at startup.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+TARGETS = ("app.main", "app.worker")
+DEFAULT_BUDGET_MS = 2000.0
+# Loaded on first use by the routes and the pricing engine, never at startup.
+LAZY_MODULES = ("pandas", "numpy", "openpyxl", "xlsxwriter", "httpx")
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    cumulative_ms: float
+    # Cumulative milliseconds per top-level package, as reported by -X importtime.
+    packages: Dict[str, float]
+
+    def lazy_violations(self, lazy: Sequence[str] = LAZY_MODULES) -> List[str]:
+        return [name for name in lazy if name in self.packages]
+
+    def heaviest(self, count: int = 8) -> List[tuple]:
+        return sorted(self.packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def parse_importtime(stderr: str, module: str) -> ImportProfile:
+    cumulative = None
+    packages: Dict[str, float] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if not total.isdigit():
+            continue
+        if name == module:
+            cumulative = int(total) / 1000
+        top = name.split(".")[0]
+        if top == module.split(".")[0]:
+            continue
+        # The outermost import of a package is the one with the largest cumulative time.
+        packages[top] = max(packages.get(top, 0.0), int(total) / 1000)
+    if cumulative is None:
+        raise RuntimeError(f"{module} did not appear in the -X importtime output")
+    return ImportProfile(module=module, cumulative_ms=cumulative, packages=packages)
+
+
+def profile_import(module: str = "app.main") -> ImportProfile:
+    env = {**os.environ, "DATABASE_URL": os.environ.get("DATABASE_URL", "sqlite://"), "JOB_QUEUE_BACKEND": "memory", "PYTHONDONTWRITEBYTECODE": "1"}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr, module)
+
+
+def best_profile(module: str, repeats: int) -> ImportProfile:
+    return min((profile_import(module) for _ in range(max(repeats, 1))), key=lambda profile: profile.cumulative_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    for module in TARGETS:
+        profile = best_profile(module, args.repeats)
+        violations = profile.lazy_violations()
+        over = profile.cumulative_ms > args.budget_ms
+        failed |= over or bool(violations)
+        print(f"{module}: {profile.cumulative_ms:.0f} ms (budget {args.budget_ms:.0f} ms){'  OVER BUDGET' if over else ''}")
+        for name, ms in profile.heaviest():
+            print(f"  {name:<24}{ms:>8.0f} ms")
+        if violations:
+            print(f"  imported at startup but should load lazily: {', '.join(violations)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
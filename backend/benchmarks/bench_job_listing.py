@@ -0,0 +1,117 @@
+"""Time the job listing endpoints against a SQLite database seeded with 100k rate sheets.
+
+Run from backend/: python -m benchmarks.bench_job_listing [--ratesheets N]
+"""
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JOB_QUEUE_BACKEND", "memory")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+from app.database import get_async_db, get_db
+from app.main import app
+from app.models import Base, ChannelEnum, FileType, Investor, JobRun, JobStatus, JobType, ProductType, RateSheet, Tier, UploadedFile
+
+SHEETS_PER_JOB = 72
+
+
+def seed(db, ratesheets: int) -> int:
+    investor = Investor(name="PHH", code="PHH")
+    db.add(investor)
+    db.flush()
+    products = [ProductType(investor_id=investor.id, code=code, display_name=code.title()) for code in ("FULLDOC", "ALTDOC", "DSCR")]
+    tiers = [Tier(investor_id=investor.id, code=f"NA{i}", numeric_index=i) for i in range(1, 13)]
+    db.add_all(products + tiers)
+    db.flush()
+    jobs = ratesheets // SHEETS_PER_JOB
+    start = datetime(2020, 1, 1)
+    db.execute(
+        insert(JobRun),
+        [
+            {
+                "investor_id": investor.id,
+                "status": JobStatus.COMPLETED if i % 10 else JobStatus.FAILED,
+                "job_type": JobType.DAILY_PHH_NONAGENCY,
+                "effective_date": date(2020, 1, 1) + timedelta(days=i),
+                "started_at": start + timedelta(days=i),
+            }
+            for i in range(jobs)
+        ],
+    )
+    db.execute(
+        insert(UploadedFile),
+        [
+            {"investor_id": investor.id, "file_type": kind, "original_filename": f"{kind.value}_{i}", "stored_path": f"/data/{kind.value}_{i}"}
+            for i in range(jobs)
+            for kind in FileType
+        ],
+    )
+    job_ids = [row.id for row in db.query(JobRun.id).order_by(JobRun.id)]
+    rows = []
+    for job_id in job_ids:
+        for n in range(SHEETS_PER_JOB):
+            rows.append(
+                {
+                    "job_run_id": job_id,
+                    "channel": ChannelEnum.DEL if n < 36 else ChannelEnum.NONDEL,
+                    "product_type_id": products[n % 3].id,
+                    "tier_id": tiers[n % 12].id,
+                    "adjustment_applied": 0.1 * (n % 12),
+                    "generated_filename": f"sheet_{job_id}_{n}.xlsx",
+                    "generated_path": f"/data/sheet_{job_id}_{n}.xlsx",
+                }
+            )
+    db.execute(insert(RateSheet), rows)
+    db.commit()
+    return job_ids[len(job_ids) // 2]
+
+
+def timed(client, label, url, params=None, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get(url, params=params)
+        response.raise_for_status()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<40} {elapsed * 1000:8.2f} ms")
+    return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ratesheets", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Shared-cache in-memory database, so the async routes' aiosqlite connections see the seeded rows.
+    url = "sqlite:///file:bench_job_listing?mode=memory&cache=shared&uri=true"
+    engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    job_id = seed(db, args.ratesheets)
+    print(f"seeded {db.query(RateSheet).count()} rate sheets in {time.perf_counter() - start:.1f}s")
+
+    async_sessions = async_sessionmaker(create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool))
+
+    async def async_db():
+        async with async_sessions() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_async_db] = async_db
+    client = TestClient(app)
+    page = timed(client, "GET /jobs (first page)", "/api/phh/jobs")
+    timed(client, "GET /jobs (second page)", "/api/phh/jobs", {"cursor": page["next_cursor"]})
+    timed(client, "GET /jobs?status=FAILED", "/api/phh/jobs", {"status": "FAILED"})
+    timed(client, "GET /jobs/{id}", f"/api/phh/jobs/{job_id}")
+    timed(client, "GET /jobs/{id}/ratesheets", f"/api/phh/jobs/{job_id}/ratesheets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Time LLPA grid detection and transposition on a synthetic investor guide.
+
+Run from backend/: python -m benchmarks.bench_llpa_grids [--sheets 50] [--grids 12] [--workers 4]
+
+Each sheet stacks `--grids` FICO x CLTV and state x CLTV grids with trigger text and notes between them. Detection
+alone is timed on `--baseline-sheets` sheets (scaled up to the guide): try_detect_grid at every cell, as
+detectGridsInSheet does in the page, against detect_grids_in_sheet. Then the whole guide is read, scanned and
+transposed with one process and with `--workers`.
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import openpyxl
+from app.core.llpa_grids import SheetScan, detect_all_grids, detect_grids_in_sheet, output_workbook, read_sheet_matrix, try_detect_grid
+
+FICO_LABELS = ["780+", "760-779", "740-759", "720-739", "700-719", "680-699", "660-679", "640-659"]
+CLTV_HEADERS = ["<=50", "50.01-55", "55.01-60", "60.01-65", "65.01-70", "70.01-75", "75.01-80", "80.01-85", "85.01-90"]
+STATES = ["CA", "NY", "TX", "FL", "NJ", "IL", "WA", "GA"]
+TRIGGERS = ["Primary Residence Purchase", "Second Home NCO Refi", "NOO Cash Out", "Full Doc 30 Year Fixed", "Bank Statement 12 Month ARM"]
+
+
+def build_guide(path: Path, sheets: int, grids: int, seed: int = 7) -> Path:
+    rng = random.Random(seed)
+    # A regular (not write-only) save records each sheet's <dimension>, as Excel does; without it openpyxl parses
+    # every sheet just to size it.
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for index in range(sheets):
+        worksheet = workbook.create_sheet(f"Program {index + 1}")
+        for _ in range(grids):
+            worksheet.append([rng.choice(TRIGGERS)])
+            worksheet.append([])
+            labels = FICO_LABELS if rng.random() < 0.7 else STATES
+            worksheet.append(["FICO" if labels is FICO_LABELS else "State", *CLTV_HEADERS, None, "Max Price", 102.5])
+            for label in labels:
+                values = [rng.choice(["NA", "-"]) if rng.random() < 0.1 else round(rng.uniform(-3, 1), 3) for _ in CLTV_HEADERS]
+                worksheet.append([label, *values])
+            worksheet.append(["Notes: adjustments are cumulative."])
+            worksheet.append([])
+    workbook.save(path)
+    return path
+
+
+def cell_by_cell(sheet_name: str, data: np.ndarray):
+    scan = SheetScan(data)
+    rows, cols = scan.shape
+    used, grids = set(), []
+    for i in range(rows - 2):
+        for j in range(cols - 2):
+            if (i, j) in used:
+                continue
+            grid = try_detect_grid(scan, i, j, sheet_name)
+            if grid:
+                grids.append(grid)
+                used.update((r, c) for r in range(grid.start_row, grid.end_row + 1) for c in range(grid.start_col, grid.end_col + 1))
+    return grids
+
+
+def timed(label, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"{label:<40} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sheets", type=int, default=50)
+    parser.add_argument("--grids", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--baseline-sheets", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        guide = build_guide(Path(tmp) / "guide.xlsx", args.sheets, args.grids)
+        workbook = openpyxl.load_workbook(guide, read_only=True, data_only=True)
+        names = workbook.sheetnames[: args.baseline_sheets]
+        matrices = {name: read_sheet_matrix(workbook[name]) for name in names}
+        workbook.close()
+        start = time.perf_counter()
+        baseline = {name: cell_by_cell(name, data) for name, data in matrices.items()}
+        every_cell = (time.perf_counter() - start) * args.sheets / len(names)
+        start = time.perf_counter()
+        masked = {name: detect_grids_in_sheet(name, data) for name, data in matrices.items()}
+        candidates = (time.perf_counter() - start) * args.sheets / len(names)
+        assert masked == baseline
+        print(f"{'detection, every start cell (scaled)':<40} {every_cell:8.2f} s")
+        print(f"{'detection, candidate rows (scaled)':<40} {candidates:8.2f} s")
+
+        serial = timed("read + detect + transpose, 1 process", detect_all_grids, guide, workers=1)
+        parallel = timed(f"read + detect + transpose, {args.workers} procs", detect_all_grids, guide, workers=args.workers)
+        assert [result.outputs for result in serial] == [result.outputs for result in parallel]
+        timed("output workbook", output_workbook, parallel)
+        print(f"{sum(len(result.grids) for result in serial)} grids on {len(serial)} sheets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Time the roster and adjustor parsers against the row-at-a-time implementations they replaced.
+
+Run from backend/: python -m benchmarks.bench_parsers [--rows N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from app.core.excel_utils import NA_TIER_COLUMNS, parse_adjustors, parse_customer_tiers
+
+
+def iterrows_customer_tiers(csv_path):
+    df = pd.read_csv(csv_path)
+    results = []
+    for _, row in df.iterrows():
+        results.append(
+            (
+                str(row.get("Org Name", "")),
+                str(row.get("Org ID", "")),
+                row.get("NMLSID") if not pd.isna(row.get("NMLSID")) else None,
+                row.get("Primary Email") if not pd.isna(row.get("Primary Email")) else None,
+                row.get("DEL NonAgency") if not pd.isna(row.get("DEL NonAgency")) else None,
+                row.get("ND NonAgency") if not pd.isna(row.get("ND NonAgency")) else None,
+            )
+        )
+    return results
+
+
+def iterrows_adjustors(sheets):
+    mapping = {}
+    for sheet, df in sheets.items():
+        filled_rows = [i for i, row in df.iterrows() if row[NA_TIER_COLUMNS].notna().all()]
+        num_to_code = {int(n): c for n, c in zip(df.loc[filled_rows[-2], NA_TIER_COLUMNS], df.loc[filled_rows[-1], NA_TIER_COLUMNS])}
+        channel_data, current_group = {}, None
+        for _, row in df.iterrows():
+            label = row.get("Unnamed:0")
+            if label == "GRID":
+                current_group = None
+                continue
+            if isinstance(label, str) and label.strip():
+                current_group = label.strip().upper()
+                continue
+            if current_group and pd.notna(row.get("Unnamed:1")) and pd.notna(row.get("Unnamed:2")):
+                channel_data[current_group] = {num_to_code.get(i): float(row.get(c) or 0) for i, c in zip(range(1, 13), NA_TIER_COLUMNS)}
+        mapping[sheet] = channel_data
+    return mapping
+
+
+def build_roster(path: Path, rows: int) -> Path:
+    rng = np.random.default_rng(7)
+    tiers = np.array([f"NA{i}" for i in range(1, 13)] + [None], dtype=object)
+    pd.DataFrame(
+        {
+            "Org Name": [f"Org {i}" for i in range(rows)],
+            "Org ID": np.arange(rows).astype(str),
+            "NMLSID": rng.integers(1, 2_000_000, rows),
+            "Primary Email": [f"seller{i}@example.com" for i in range(rows)],
+            "DEL NonAgency": tiers[rng.integers(0, len(tiers), rows)],
+            "ND NonAgency": tiers[rng.integers(0, len(tiers), rows)],
+            "Region": rng.choice(["East", "West"], rows),
+        }
+    ).to_csv(path, index=False)
+    return path
+
+
+def build_adjustor_sheets(products: int):
+    rows = []
+    for p in range(products):
+        rows.append(["GRID", None, None, "BASE"] + [f"TIER {i}" for i in range(1, 12)])
+        rows.append([f"PRODUCT{p}", None, None, None] + [None] * 11)
+        rows.extend([None, f"P{p}-{k}", f"Product {p}-{k}", 0.0] + [0.05 * i for i in range(1, 12)] for k in range(4))
+    rows.append([None] * 3 + list(range(1, 13)))
+    rows.append([None] * 3 + [f"NA{i}" for i in range(1, 13)])
+    df = pd.DataFrame(rows, columns=[f"Unnamed:{i}" for i in range(15)])
+    return {"NQM DEL INPUT": df, "NQM NONDEL INPUT": df.copy()}
+
+
+class PreloadedSheets:
+    """Stands in for WorkbookCache so the timing excludes reading the xlsx."""
+
+    def __init__(self, sheets):
+        self.sheets = sheets
+
+    def load(self, path):
+        return self
+
+
+def timed(label, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"{label:<36} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roster = build_roster(Path(tmp) / "roster.csv", args.rows)
+        legacy = timed("roster (iterrows)", iterrows_customer_tiers, roster)
+        parsed = timed("roster (columnar)", parse_customer_tiers, roster)
+        assert len(parsed) == len(legacy)
+
+    sheets = build_adjustor_sheets(args.products)
+    timed("adjustors (iterrows)", iterrows_adjustors, sheets)
+    timed("adjustors (columnar)", parse_adjustors, "preloaded.xlsx", PreloadedSheets(sheets))
+
+
+if __name__ == "__main__":
+    main()
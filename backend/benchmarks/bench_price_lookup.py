@@ -0,0 +1,103 @@
+"""Measure single and batch price lookup latency from a compiled index.
+
+Run from backend/: python -m benchmarks.bench_price_lookup [--requests N]
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JOB_QUEUE_BACKEND", "memory")
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.price_index import PriceIndex, compile_grid, price_indexes, quote_many
+from app.database import get_db
+from app.main import app
+from app.models import Base, Investor, JobRun, JobStatus, JobType
+
+PRODUCTS = ["FULLDOC", "ALTDOC", "DSCR"]
+TERMS = ["15 Yr", "20 Yr", "25 Yr", "30 Yr", "40 Yr IO"]
+
+
+def build_index(sellers: int, job_id: int = 1, investor_id: int = 1) -> PriceIndex:
+    rng = np.random.default_rng(3)
+    rates = np.round(np.arange(5.5, 10.0, 0.125), 3)
+    tiers = {f"NA{i}": 0.1 * i for i in range(1, 13)}
+    grids = {
+        (channel, product): compile_grid(
+            rates, 95 + rng.random((len(rates), len(TERMS))) * 10, [f"Unnamed:{i}" for i in range(1, 6)], TERMS, tiers
+        )
+        for channel in ("DEL", "NONDEL")
+        for product in PRODUCTS
+    }
+    seller_tiers = {(str(i), channel): f"NA{1 + i % 12}" for i in range(sellers) for channel in ("DEL", "NONDEL")}
+    return PriceIndex(job_id=job_id, investor_id=investor_id, effective_date=date(2024, 1, 2), grids=grids, seller_tiers=seller_tiers)
+
+
+def loans(count: int, sellers: int):
+    rng = np.random.default_rng(5)
+    for _ in range(count):
+        yield {
+            "org_id": str(int(rng.integers(0, sellers))),
+            "channel": "DEL" if rng.random() < 0.5 else "NONDEL",
+            "product": PRODUCTS[int(rng.integers(0, 3))],
+            "note_rate": float(np.round(rng.uniform(5.5, 9.8) * 16) / 16),
+            "column": TERMS[int(rng.integers(0, len(TERMS)))],
+        }
+
+
+def report(label, samples):
+    samples = np.asarray(samples) * 1000
+    print(f"{label:<24} p50 {np.percentile(samples, 50):8.3f} ms   p99 {np.percentile(samples, 99):8.3f} ms   n={len(samples)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--sellers", type=int, default=50_000)
+    args = parser.parse_args()
+
+    index = build_index(args.sellers)
+    sample = list(loans(args.requests, args.sellers))
+    timings = []
+    for loan in sample:
+        start = time.perf_counter()
+        quote_many(index, [loan])
+        timings.append(time.perf_counter() - start)
+    report("in-process quote", timings)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    investor = Investor(name="PHH", code="PHH")
+    db.add(investor)
+    db.commit()
+    job = JobRun(investor_id=investor.id, status=JobStatus.COMPLETED, job_type=JobType.DAILY_PHH_NONAGENCY, effective_date=date(2024, 1, 2))
+    db.add(job)
+    db.commit()
+    price_indexes.loader = lambda session, job_run: build_index(args.sellers, job_run.id, job_run.investor_id)
+    price_indexes.refresh_seconds = 3600
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    timings = []
+    for loan in sample[:2000]:
+        start = time.perf_counter()
+        client.get("/api/phh/price", params=loan)
+        timings.append(time.perf_counter() - start)
+    report("GET /price (TestClient)", timings)
+
+    start = time.perf_counter()
+    response = client.post("/api/phh/price/batch", json={"loans": sample})
+    elapsed = time.perf_counter() - start
+    priced = sum(1 for result in response.json()["results"] if result["quote"])
+    print(f"POST /price/batch        {elapsed * 1000:8.1f} ms for {len(sample)} loans ({priced} priced)")
+
+
+if __name__ == "__main__":
+    main()
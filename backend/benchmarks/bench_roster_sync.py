@@ -0,0 +1,62 @@
+"""Time a full and an incremental roster sync against SQLite.
+
+Run from backend/: python -m benchmarks.bench_roster_sync [--sellers N]
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.excel_utils import CUSTOMER_COLUMNS, CustomerRoster
+from app.core.roster_sync import sync_roster
+from app.models import Base, Investor
+
+
+def build_roster(sellers: int, seed: int = 7) -> CustomerRoster:
+    rng = np.random.default_rng(seed)
+    tiers = np.array([f"NA{i}" for i in range(1, 13)] + [None], dtype=object)
+    frame = pd.DataFrame(
+        {
+            "org_name": [f"Org {i}" for i in range(sellers)],
+            "org_id": np.arange(sellers).astype(str).astype(object),
+            "nmlsid": np.arange(1_000_000, 1_000_000 + sellers).astype(str).astype(object),
+            "primary_email": [f"seller{i}@example.com" for i in range(sellers)],
+            "del_tier": tiers[rng.integers(0, len(tiers), sellers)],
+            "nondel_tier": tiers[rng.integers(0, len(tiers), sellers)],
+        }
+    )
+    return CustomerRoster(frame=frame[list(CUSTOMER_COLUMNS.values())])
+
+
+def timed(label, db, investor_id, roster):
+    start = time.perf_counter()
+    result = sync_roster(db, investor_id, roster)
+    db.commit()
+    print(f"{label:<28} {time.perf_counter() - start:7.2f}s  {result.as_dict()}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sellers", type=int, default=50_000)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    investor = Investor(name="Benchmark", code=f"BENCH{time.time_ns()}")
+    db.add(investor)
+    db.commit()
+
+    roster = build_roster(args.sellers)
+    timed("initial load", db, investor.id, roster)
+    timed("unchanged", db, investor.id, roster)
+    # Drop 5% of sellers and reshuffle tiers for the rest.
+    changed = build_roster(args.sellers, seed=11)
+    changed.frame = changed.frame.iloc[: int(args.sellers * 0.95)]
+    timed("tier changes + removals", db, investor.id, changed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Stage-by-stage pipeline benchmark with stored baselines.
+
+Each stage runs in a fresh process against synthetic inputs, so peak RSS belongs to that stage alone.
+Run from backend/:
+
+    python -m benchmarks.harness --scale medium                     # compare with benchmarks/baselines/medium.json
+    python -m benchmarks.harness --scale medium --update-baseline   # record a new baseline
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JOB_QUEUE_BACKEND", "memory")
+
+from benchmarks.synthetic import Scale, add_scale_arguments, build_dataset, scale_from_args
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+# Shared CI runners swing by a third on the full generate; tighten with --threshold on quiet hardware.
+DEFAULT_THRESHOLD = 0.5
+# Stages faster than this, or growing by less than this much memory, are too noisy to gate on.
+MIN_GATED_SECONDS = 0.05
+MIN_GATED_BYTES = 8 * 1024 * 1024
+METRICS = ("wall_seconds", "peak_rss_bytes", "peak_alloc_bytes")
+
+
+@dataclass
+class StageResult:
+    stage: str
+    wall_seconds: float
+    peak_rss_bytes: int
+    peak_alloc_bytes: int
+    repeats: int
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _parse_base_grid(paths: Dict[str, str], workdir: str) -> Callable[[], None]:
+    from app.core.excel_utils import parse_base_grid
+
+    return lambda: parse_base_grid(paths["del_base"], "PHH - FullDoc")
+
+
+def _parse_adjustors(paths: Dict[str, str], workdir: str) -> Callable[[], None]:
+    from app.core.excel_utils import parse_adjustors
+
+    return lambda: parse_adjustors(paths["adjustors"])
+
+
+def _parse_customer_tiers(paths: Dict[str, str], workdir: str) -> Callable[[], None]:
+    from app.core.excel_utils import parse_customer_tiers
+
+    return lambda: parse_customer_tiers(paths["customer_tiers"])
+
+
+def _write_tier_grid(paths: Dict[str, str], workdir: str) -> Callable[[], None]:
+    from app.core.excel_utils import parse_base_grid, write_tier_grid_to_workbook
+
+    grid_df, meta = parse_base_grid(paths["del_base"], "PHH - FullDoc")
+    adjusted = grid_df.copy()
+    adjusted[meta.price_columns] = adjusted[meta.price_columns] - 0.25
+    output = os.path.join(workdir, "tier_grid.xlsx")
+    return lambda: write_tier_grid_to_workbook(paths["del_base"], "PHH - FullDoc", meta, adjusted, output, annotation="Channel: DEL Tier: NA2")
+
+
+def _generate(paths: Dict[str, str], workdir: str) -> Callable[[], None]:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.config import settings
+    from app.core.pricing_engine import PricingEngine
+    from app.database import Base
+    from app.models import FileType, Investor, JobRun, JobStatus, JobType, UploadedFile
+
+    settings.storage_root = os.path.join(workdir, "storage")
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    investor = Investor(name="PHH", code="PHH")
+    session.add(investor)
+    session.commit()
+    file_types = {
+        "customer_tiers": FileType.CUSTOMER_TIERS,
+        "del_base": FileType.DEL_BASE,
+        "nondel_base": FileType.NONDEL_BASE,
+        "adjustors": FileType.ADJUSTORS,
+    }
+    uploads = [
+        UploadedFile(investor_id=investor.id, file_type=file_types[name], original_filename=Path(path).name, stored_path=path)
+        for name, path in paths.items()
+    ]
+    session.add_all(uploads)
+    session.commit()
+
+    def run() -> None:
+        # A new job each repeat, so every run is a cold full build rather than an incremental no-op.
+        job = JobRun(investor_id=investor.id, status=JobStatus.PENDING, job_type=JobType.DAILY_PHH_NONAGENCY, effective_date=date(2024, 1, 2), payload={"mode": "full"})
+        job.uploaded_files = uploads
+        session.add(job)
+        session.commit()
+        PricingEngine(session).generate(job.id, workers=0)
+
+    return run
+
+
+STAGES: Dict[str, Callable[[Dict[str, str], str], Callable[[], None]]] = {
+    "parse_base_grid": _parse_base_grid,
+    "parse_adjustors": _parse_adjustors,
+    "parse_customer_tiers": _parse_customer_tiers,
+    "write_tier_grid_to_workbook": _write_tier_grid,
+    "generate": _generate,
+}
+
+
+def _run_stage(stage: str, paths: Dict[str, str], workdir: str, repeats: int, queue) -> None:
+    run = STAGES[stage](paths, workdir)
+    # An untimed first call absorbs import and cache warm-up; the best of the repeats is the least noisy figure.
+    run()
+    timings: List[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    run()
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put(asdict(StageResult(stage, min(timings), _peak_rss_bytes(), peak_alloc, repeats)))
+
+
+def measure_stage(stage: str, paths: Dict[str, str], repeats: int = 3) -> StageResult:
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    with tempfile.TemporaryDirectory() as workdir:
+        process = context.Process(target=_run_stage, args=(stage, paths, workdir, repeats, queue))
+        process.start()
+        process.join()
+        if process.exitcode != 0:
+            raise RuntimeError(f"Stage {stage} exited with code {process.exitcode}")
+        return StageResult(**queue.get(timeout=5))
+
+
+def run_suite(scale: Scale, stages: List[str], repeats: int = 3, data_dir: Optional[str] = None) -> Dict:
+    with tempfile.TemporaryDirectory() as scratch:
+        paths = {name: str(path) for name, path in build_dataset(data_dir or scratch, scale).items()}
+        results = {stage: asdict(measure_stage(stage, paths, repeats)) for stage in stages}
+    return {
+        "scale": asdict(scale),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    regressions: List[str] = []
+    for stage, result in current["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            old, new = previous[metric], result[metric]
+            floor = MIN_GATED_SECONDS if metric == "wall_seconds" else MIN_GATED_BYTES
+            if new - old > max(old * threshold, floor):
+                regressions.append(f"{stage}.{metric}: {old:,.3f} -> {new:,.3f} (+{(new - old) / old:.0%})" if old else f"{stage}.{metric}: 0 -> {new:,.3f}")
+    return regressions
+
+
+def _format(results: Dict) -> str:
+    lines = [f"{'stage':<30}{'wall (s)':>10}{'peak RSS (MB)':>16}{'peak alloc (MB)':>18}"]
+    for stage, result in results["stages"].items():
+        lines.append(f"{stage:<30}{result['wall_seconds']:>10.3f}{result['peak_rss_bytes'] / 2**20:>16.1f}{result['peak_alloc_bytes'] / 2**20:>18.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    add_scale_arguments(parser)
+    parser.add_argument("--stage", action="append", choices=sorted(STAGES), help="Run only these stages (repeatable)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, help="Baseline JSON (default: benchmarks/baselines/<scale>.json)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative regression per metric")
+    parser.add_argument("--data-dir", help="Keep the generated inputs here instead of a temporary directory")
+    args = parser.parse_args(argv)
+
+    results = run_suite(scale_from_args(args), args.stage or list(STAGES), args.repeats, args.data_dir)
+    print(_format(results))
+    baseline_path = args.baseline or BASELINE_DIR / f"{args.scale}.json"
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --update-baseline to record one")
+        return 0
+    regressions = compare(results, json.loads(baseline_path.read_text()), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Synthetic PHH inputs at configurable scale, laid out like the investor's real files.
+
+Run from backend/: python -m benchmarks.synthetic OUTPUT_DIR [--scale medium] [--rates N] ...
+"""
+from __future__ import annotations
+import argparse
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+PHH_PRODUCTS = {"FULLDOC": "PHH - FullDoc", "ALTDOC": "PHH - AltDoc", "DSCR": "PHH - DSCR"}
+TERM_LABELS = ["30 Yr Fixed", "25 Yr Fixed", "20 Yr Fixed", "15 Yr Fixed", "10 Yr Fixed", "40 Yr IO", "30 Yr IO", "7/6 ARM", "5/6 ARM", "10/6 ARM"]
+MAX_TIERS = 12
+# Base sheets carry a short title block above the grid, as the investor's files do.
+TITLE_ROWS = ["PHH Mortgage Non-Agency Rate Sheet", "Prices are subject to change without notice"]
+
+
+@dataclass
+class Scale:
+    rates: int = 40
+    columns: int = 6
+    extra_sheets: int = 2
+    tiers: int = MAX_TIERS
+    sellers: int = 2_000
+    products: int = len(PHH_PRODUCTS)
+    seed: int = 42
+
+    def product_sheets(self) -> Dict[str, str]:
+        # Products past the PHH three only add parser work; the engine prices PHH sheets alone.
+        sheets = dict(list(PHH_PRODUCTS.items())[: self.products])
+        sheets.update({f"PRODUCT{i}": f"PHH - Product {i}" for i in range(len(sheets) + 1, self.products + 1)})
+        return sheets
+
+
+SCALES = {
+    "small": Scale(rates=12, columns=3, extra_sheets=1, sellers=200),
+    "medium": Scale(),
+    "large": Scale(rates=120, columns=10, extra_sheets=6, sellers=50_000, products=8),
+}
+
+
+def _term_label(index: int) -> str:
+    return TERM_LABELS[index] if index < len(TERM_LABELS) else f"Term {index + 1}"
+
+
+def base_grid_frame(scale: Scale, price_offset: float = 0.0, seed: int | None = None) -> pd.DataFrame:
+    rng = np.random.default_rng(scale.seed if seed is None else seed)
+    rates = np.round(5.0 + 0.125 * np.arange(scale.rates), 3)
+    # Price rises with note rate and falls with term, with a little noise so columns differ.
+    term_step = np.linspace(0, 2.5, scale.columns)
+    prices = 96.0 + (rates[:, None] - rates[0]) * 1.6 - term_step[None, :] + rng.normal(0, 0.02, (scale.rates, scale.columns)) + price_offset
+    prices = np.round(prices, 3)
+    width = 2 + scale.columns
+    rows: List[List] = [[title] + [None] * (width - 1) for title in TITLE_ROWS]
+    rows.append([None] * width)
+    rows.append([None, "Note Rate", *[_term_label(i) for i in range(scale.columns)]])
+    rows.extend([None, rate, *prices[i]] for i, rate in enumerate(rates))
+    rows.append([None] * width)
+    rows.append([None, "Footnote: pricing excludes LLPAs"] + [None] * (width - 2))
+    return pd.DataFrame(rows, columns=[f"Unnamed:{i}" for i in range(width)])
+
+
+def build_base_workbook(path: str | Path, scale: Scale, price_offset: float = 0.0) -> Path:
+    path = Path(path)
+    rng = np.random.default_rng(scale.seed + 1)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for index, sheet in enumerate(scale.product_sheets().values()):
+            base_grid_frame(scale, price_offset + 0.05 * index, seed=scale.seed + index).to_excel(writer, sheet_name=sheet, index=False)
+        for extra in range(scale.extra_sheets):
+            filler = pd.DataFrame(rng.normal(100, 1, (scale.rates, scale.columns + 2)).round(3))
+            filler.to_excel(writer, sheet_name=f"Other Program {extra + 1}", index=False)
+    return path
+
+
+def adjustor_frame(scale: Scale, step: float = 0.125, rows_per_product: int = 4) -> pd.DataFrame:
+    # The sheet always has twelve tier columns; a smaller tier count repeats the last code,
+    # which the parser collapses into a single tier.
+    tiers = [min(i, scale.tiers) for i in range(1, MAX_TIERS + 1)]
+    data: List[List] = []
+    for product_index, product in enumerate(scale.product_sheets()):
+        data.append(["GRID", None, None, *[f"TIER {i} TOTAL" for i in range(1, MAX_TIERS + 1)]])
+        data.append([product, None, None] + [None] * MAX_TIERS)
+        for row in range(rows_per_product):
+            adjustments = [round(-step * (tier - 1) - 0.01 * product_index, 4) for tier in tiers]
+            data.append([None, f"{product[:2]}{row}", f"{product.title()} Option {row}", *adjustments])
+    data.append([None] * (3 + MAX_TIERS))
+    data.append([None, None, None, *range(1, MAX_TIERS + 1)])
+    data.append([None, None, None, *[f"NA{tier}" for tier in tiers]])
+    return pd.DataFrame(data, columns=[f"Unnamed:{i}" for i in range(3 + MAX_TIERS)])
+
+
+def build_adjustor_workbook(path: str | Path, scale: Scale, step: float = 0.125) -> Path:
+    path = Path(path)
+    frame = adjustor_frame(scale, step)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        frame.to_excel(writer, sheet_name="NQM DEL INPUT", index=False)
+        frame.to_excel(writer, sheet_name="NQM NONDEL INPUT", index=False)
+    return path
+
+
+def build_customer_csv(path: str | Path, scale: Scale) -> Path:
+    path = Path(path)
+    rng = np.random.default_rng(scale.seed + 2)
+    tiers = np.array([f"NA{i}" for i in range(1, min(scale.tiers, MAX_TIERS) + 1)] + [None], dtype=object)
+    count = scale.sellers
+    pd.DataFrame(
+        {
+            "Org Name": [f"Synthetic Lender {i}" for i in range(count)],
+            "Org ID": np.arange(100_000, 100_000 + count).astype(str),
+            "NMLSID": rng.integers(1_000, 2_500_000, count).astype(str),
+            "Primary Email": [f"lock-desk{i}@lender{i}.example.com" for i in range(count)],
+            "DEL NonAgency": tiers[rng.integers(0, len(tiers), count)],
+            "ND NonAgency": tiers[rng.integers(0, len(tiers), count)],
+            "Account Manager": rng.choice(["East", "West", "Central"], count),
+        }
+    ).to_csv(path, index=False)
+    return path
+
+
+def build_dataset(root: str | Path, scale: Scale) -> Dict[str, Path]:
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    return {
+        "customer_tiers": build_customer_csv(root / "customer_tiers.csv", scale),
+        "del_base": build_base_workbook(root / "del_base.xlsx", scale),
+        "nondel_base": build_base_workbook(root / "nondel_base.xlsx", scale, price_offset=0.5),
+        "adjustors": build_adjustor_workbook(root / "adjustors.xlsx", scale),
+    }
+
+
+def scale_from_args(args: argparse.Namespace) -> Scale:
+    overrides = {name: getattr(args, name) for name in ("rates", "columns", "extra_sheets", "tiers", "sellers", "products", "seed") if getattr(args, name) is not None}
+    return replace(SCALES[args.scale], **overrides)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scale", choices=sorted(SCALES), default="medium")
+    parser.add_argument("--rates", type=int)
+    parser.add_argument("--columns", type=int)
+    parser.add_argument("--extra-sheets", type=int)
+    parser.add_argument("--tiers", type=int)
+    parser.add_argument("--sellers", type=int)
+    parser.add_argument("--products", type=int)
+    parser.add_argument("--seed", type=int)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+    for name, path in build_dataset(args.output, scale_from_args(args)).items():
+        print(f"{name:<16} {path}")
+
+
+if __name__ == "__main__":
+    main()
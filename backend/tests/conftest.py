@@ -0,0 +1,130 @@
+import os
+import uuid
+from datetime import date
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JOB_QUEUE_BACKEND", "memory")
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+from app.config import settings
+from app.database import Base
+from app.models import FileType, Investor, JobRun, JobStatus, JobType, UploadedFile
+
+PHH_SHEETS = ["PHH - FullDoc", "PHH - AltDoc", "PHH - DSCR"]
+
+
+@pytest.fixture
+def db_session():
+    # A named shared-cache in-memory database, so the async routes' aiosqlite sessions see the same data.
+    name = f"file:phh_{uuid.uuid4().hex}?mode=memory&cache=shared&uri=true"
+    engine = create_engine(f"sqlite:///{name}", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    session = Session()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def async_db(db_session):
+    """A replacement for `get_async_db` on db_session's database; install it in app.dependency_overrides."""
+    engine = create_async_engine(db_session.get_bind().url.set(drivername="sqlite+aiosqlite"), poolclass=NullPool)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override():
+        async with sessions() as session:
+            yield session
+
+    return override
+
+
+@pytest.fixture
+def storage_root(tmp_path, monkeypatch):
+    root = tmp_path / "storage"
+    root.mkdir()
+    monkeypatch.setattr(settings, "storage_root", str(root))
+    return root
+
+
+def build_base_workbook(path, price_offset=0.0):
+    grid = pd.DataFrame(
+        {
+            "Unnamed:0": [None, "Note Rate", 6.5, 6.625, 6.75],
+            "Unnamed:1": [None, "15 Yr", 99.0 + price_offset, 99.5 + price_offset, 100.0 + price_offset],
+            "Unnamed:2": [None, "30 Yr", 98.0 + price_offset, 98.5 + price_offset, 99.0 + price_offset],
+        }
+    )
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet in PHH_SHEETS:
+            grid.to_excel(writer, sheet_name=sheet, index=False)
+        pd.DataFrame({"Notes": ["untouched"]}).to_excel(writer, sheet_name="Notes", index=False)
+    return path
+
+
+def build_adjustor_workbook(path, step=0.1):
+    data = {
+        "Unnamed:0": ["GRID", "FULLDOC", None, "GRID", "ALTDOC", None, "GRID", "DSCR", None],
+        "Unnamed:1": [None, None, "P1", None, None, "P2", None, None, "P3"],
+        "Unnamed:2": [None, None, "Prod1", None, None, "Prod2", None, None, "Prod3"],
+    }
+    for idx, col in enumerate(range(3, 15), start=1):
+        data[f"Unnamed:{col}"] = [f"TIER {idx}", None, step * idx] * 3
+    df = pd.DataFrame(data)
+    numeric_row = [None] * 3 + list(range(1, 13))
+    code_row = [None] * 3 + [f"NA{i}" for i in range(1, 13)]
+    df = pd.concat([df, pd.DataFrame([numeric_row, code_row], columns=df.columns)], ignore_index=True)
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        df.to_excel(writer, sheet_name="NQM DEL INPUT", index=False)
+        df.to_excel(writer, sheet_name="NQM NONDEL INPUT", index=False)
+    return path
+
+
+def build_customer_csv(path, rows=None):
+    rows = rows or [
+        {"Org Name": "Org A", "Org ID": "100", "NMLSID": "1", "DEL NonAgency": "NA1", "ND NonAgency": "NA2", "Primary Email": "a@example.com"},
+        {"Org Name": "Org B", "Org ID": "200", "NMLSID": "2", "DEL NonAgency": "NA3", "ND NonAgency": None, "Primary Email": "b@example.com"},
+    ]
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def phh_job(db_session, storage_root, tmp_path):
+    def create(effective_date=date(2024, 1, 2), price_offset=0.0, step=0.1, upload=True, mode="full", customers=None):
+        investor = db_session.query(Investor).filter(Investor.code == "PHH").first()
+        if not investor:
+            investor = Investor(name="PHH", code="PHH")
+            db_session.add(investor)
+            db_session.commit()
+        if not upload:
+            job = JobRun(investor_id=investor.id, status=JobStatus.PENDING, job_type=JobType.DAILY_PHH_NONAGENCY, effective_date=effective_date, payload={"mode": mode})
+            db_session.add(job)
+            db_session.commit()
+            return job
+        inputs = tmp_path / f"inputs_{effective_date:%Y%m%d}_{price_offset}_{step}"
+        inputs.mkdir(exist_ok=True)
+        files = {
+            FileType.CUSTOMER_TIERS: build_customer_csv(inputs / "tiers.csv", customers),
+            FileType.DEL_BASE: build_base_workbook(inputs / "del.xlsx", price_offset),
+            FileType.NONDEL_BASE: build_base_workbook(inputs / "nondel.xlsx", price_offset + 0.5),
+            FileType.ADJUSTORS: build_adjustor_workbook(inputs / "adjustors.xlsx", step),
+        }
+        uploads = [
+            UploadedFile(investor_id=investor.id, file_type=file_type, original_filename=path.name, stored_path=str(path))
+            for file_type, path in files.items()
+        ]
+        job = JobRun(investor_id=investor.id, status=JobStatus.PENDING, job_type=JobType.DAILY_PHH_NONAGENCY, effective_date=effective_date, payload={"mode": mode})
+        job.uploaded_files = uploads
+        db_session.add(job)
+        db_session.commit()
+        return job
+
+    return create
@@ -0,0 +1,33 @@
+from dataclasses import replace
+from benchmarks.harness import compare
+from benchmarks.synthetic import SCALES, build_dataset
+from app.core.excel_utils import parse_adjustors, parse_base_grid, parse_customer_tiers
+
+
+def test_synthetic_dataset_parses_at_requested_scale(tmp_path):
+    scale = replace(SCALES["small"], rates=9, columns=4, tiers=5, products=4, sellers=30)
+    paths = build_dataset(tmp_path, scale)
+
+    grid_df, meta = parse_base_grid(str(paths["del_base"]), "PHH - AltDoc")
+    assert len(grid_df) == 9
+    assert len(meta.price_columns) == 4
+
+    adjustors = parse_adjustors(str(paths["adjustors"]))
+    assert set(adjustors.mapping["DEL"]) == {"FULLDOC", "ALTDOC", "DSCR", "PRODUCT4"}
+    assert list(adjustors.mapping["NONDEL"]["DSCR"]["tiers"]) == ["NA1", "NA2", "NA3", "NA4", "NA5"]
+    assert len(parse_customer_tiers(str(paths["customer_tiers"]))) == 30
+
+
+def test_compare_flags_regressions_past_threshold_and_noise_floor():
+    baseline = {"stages": {"generate": {"wall_seconds": 1.0, "peak_rss_bytes": 100 * 2**20, "peak_alloc_bytes": 2**20}}}
+    current = {
+        "stages": {
+            "generate": {"wall_seconds": 1.6, "peak_rss_bytes": 110 * 2**20, "peak_alloc_bytes": 3 * 2**20},
+            "new_stage": {"wall_seconds": 9.0, "peak_rss_bytes": 0, "peak_alloc_bytes": 0},
+        }
+    }
+    regressions = compare(current, baseline, threshold=0.5)
+    # RSS is within the threshold and the allocation growth is under the noise floor.
+    assert len(regressions) == 1
+    assert regressions[0].startswith("generate.wall_seconds")
+    assert compare(current, baseline, threshold=1.0) == []
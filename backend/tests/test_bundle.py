@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import zipfile
+from io import BytesIO
+import pytest
+from fastapi.testclient import TestClient
+from app.core.bundle import BundleFile, iter_bundle
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.database import get_db
+from app.main import app
+from app.models import RateSheet
+
+
+@pytest.fixture
+def client(db_session):
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_bundle_streams_every_sheet_with_a_manifest(client, db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    sheets = {sheet.generated_filename: sheet for sheet in db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id)}
+
+    response = client.get(f"/api/phh/jobs/{job.id}/bundle.zip")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(BytesIO(response.content))
+    assert archive.testzip() is None
+    manifest = json.loads(archive.read("manifest.json"))
+    assert manifest["job_id"] == job.id and manifest["compression"] == "stored"
+    assert {entry["name"] for entry in manifest["files"]} == set(sheets) == set(archive.namelist()) - {"manifest.json"}
+    entry = next(entry for entry in manifest["files"] if entry["name"] == "PHH_NONDEL_DSCR_NA4_20240102.xlsx")
+    sheet = sheets[entry["name"]]
+    with open(sheet.generated_path, "rb") as handle:
+        assert entry["sha256"] == hashlib.sha256(handle.read()).hexdigest()
+    assert entry["adjustment"] == sheet.adjustment_applied
+    assert (entry["channel"], entry["product"], entry["tier"]) == ("NONDEL", "DSCR", "NA4")
+    assert archive.getinfo(entry["name"]).compress_type == zipfile.ZIP_STORED
+
+
+def test_bundle_filters_compresses_and_honours_etags(client, db_session, phh_job):
+    job = phh_job(mode="lazy")
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    url = f"/api/phh/jobs/{job.id}/bundle.zip"
+    params = {"channel": "DEL", "tier": ["na1", "NA2"], "product": "FULLDOC", "compression": "deflate"}
+
+    response = client.get(url, params=params)
+    archive = zipfile.ZipFile(BytesIO(response.content))
+    assert sorted(archive.namelist()) == ["PHH_DEL_FULLDOC_NA1_20240102.xlsx", "PHH_DEL_FULLDOC_NA2_20240102.xlsx", "manifest.json"]
+    assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in archive.infolist())
+    assert json.loads(archive.read("manifest.json"))["filters"] == {"channel": ["DEL"], "product": ["FULLDOC"], "tier": ["NA1", "NA2"]}
+
+    etag = response.headers["etag"]
+    assert client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, params={**params, "compression": "stored"}, headers={"If-None-Match": etag}).status_code == 200
+    assert client.get(url, params={"tier": "NA99"}).status_code == 404
+    assert client.get(url, params={"compression": "bzip2"}).status_code == 422
+    assert client.get("/api/phh/jobs/999999/bundle.zip").status_code == 404
+
+
+def test_iter_bundle_yields_bounded_chunks(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"sheet_{index}.xlsx"
+        path.write_bytes(os.urandom(512 * 1024))
+        paths.append(path)
+    files = [BundleFile(path=str(path), arcname=path.name, details={"index": i}) for i, path in enumerate(paths)]
+
+    chunks = list(iter_bundle(files, {"job_id": 1}, "stored", chunk_size=32 * 1024))
+    assert max(len(chunk) for chunk in chunks) < 40 * 1024
+    archive = zipfile.ZipFile(BytesIO(b"".join(chunks)))
+    assert archive.read("sheet_2.xlsx") == paths[2].read_bytes()
+    assert [entry["index"] for entry in json.loads(archive.read("manifest.json"))["files"]] == [0, 1, 2]
@@ -0,0 +1,22 @@
+import pytest
+from app.config import settings
+from app.database import async_database_url, engine_options
+
+
+def test_engine_options_size_server_pools_only(monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_timeout", 3.0)
+    options = engine_options("postgresql://phh:secret@db/phh", pool_size=7, max_overflow=2)
+    assert options["pool_size"] == 7 and options["max_overflow"] == 2 and options["pool_timeout"] == 3.0
+    assert options["pool_pre_ping"] is settings.db_pool_pre_ping
+
+    sqlite = engine_options("sqlite:///phh.db", pool_size=7, max_overflow=2)
+    assert "pool_size" not in sqlite and "pool_timeout" not in sqlite
+    assert sqlite["pool_recycle"] == settings.db_pool_recycle
+
+
+def test_async_database_url_swaps_in_async_drivers():
+    assert async_database_url("postgresql://phh:s3cret@db:5432/phh") == "postgresql+asyncpg://phh:s3cret@db:5432/phh"
+    assert async_database_url("postgresql+psycopg2://phh@db/phh") == "postgresql+asyncpg://phh@db/phh"
+    assert async_database_url("sqlite:///./phh.db") == "sqlite+aiosqlite:///./phh.db"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://phh@db/phh")
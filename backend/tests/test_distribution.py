@@ -0,0 +1,252 @@
+import json
+import threading
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.core.distribution import DistributionClaimError, DistributionEngine, TokenBucket, get_distribution_transport
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.database import get_db
+from app.email import SendGridSink, default_sink
+from app.main import app
+from app.models import EmailDistribution, EmailStatus, FileType, Investor, JobRun, JobStatus, JobType, Seller, UploadedFile
+
+
+class ProviderStub:
+    """Stands in for the mail API: scripted failures, and every delivery recorded under its idempotency key.
+
+    Like SendGrid it does not deduplicate, so a message sent twice shows up twice.
+    """
+
+    def __init__(self, script=None, crash_after=None):
+        self.script = dict(script or {})
+        self.delivered = {}
+        self.calls = []
+        self.crash_after = crash_after
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if self.crash_after is not None and sum(map(len, self.delivered.values())) >= self.crash_after:
+            # Sends already in flight when the worker died never reach the provider.
+            raise SystemError("worker killed")
+        payload = json.loads(request.content)
+        recipient = payload["personalizations"][0]["to"][0]["email"]
+        self.calls.append(recipient)
+        queued = self.script.get(recipient)
+        if queued:
+            status = queued.pop(0)
+            if status == "drop":
+                raise httpx.ConnectError("connection reset")
+            return httpx.Response(status, headers={"Retry-After": "0"} if status == 429 else {})
+        self.delivered.setdefault(payload["custom_args"]["idempotency_key"], []).append(payload)
+        if self.crash_after is not None and sum(map(len, self.delivered.values())) >= self.crash_after:
+            # The worker dies after the provider accepted the message but before its status was written.
+            raise SystemError("worker killed")
+        return httpx.Response(202)
+
+
+SINK = SendGridSink("test-key", "rates@example.com")
+
+
+async def _no_sleep(seconds):
+    return None
+
+
+@pytest.fixture
+def distributed_job(db_session, phh_job):
+    rows = [
+        {"Org Name": f"Org {i}", "Org ID": str(i), "NMLSID": str(i), "DEL NonAgency": f"NA{1 + i % 12}", "ND NonAgency": "NA2" if i % 3 else None, "Primary Email": f"seller{i}@example.com"}
+        for i in range(30)
+    ]
+    rows.append({"Org Name": "No Email", "Org ID": "999", "NMLSID": "9", "DEL NonAgency": "NA1", "ND NonAgency": None, "Primary Email": None})
+    job = phh_job(customers=rows)
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    seller = db_session.query(Seller).filter(Seller.org_id == "0").one()
+    seller.secondary_emails = ["backup0@example.com", "seller0@example.com"]
+    db_session.commit()
+    return job
+
+
+def _engine(db_session, stub, **kwargs):
+    return DistributionEngine(db_session, transport=httpx.MockTransport(stub), concurrency=4, rate_per_second=1000, burst=10, backoff_seconds=0, status_batch=7, sleep=_no_sleep, sink=SINK, **kwargs)
+
+
+def test_each_seller_gets_only_their_tier_sheets_with_retries(db_session, distributed_job):
+    stub = ProviderStub({"seller1@example.com": [429, 503], "seller2@example.com": ["drop"], "seller3@example.com": [400]})
+    summary = _engine(db_session, stub).run(distributed_job.id)
+    assert summary == {"planned": 30, "already_sent": 0, "skipped_sellers": 1, "unconfirmed": 0, "sent": 29, "failed": 1}
+
+    records = {r.seller_id: r for r in db_session.query(EmailDistribution).filter(EmailDistribution.job_run_id == distributed_job.id)}
+    sellers = {s.org_id: s for s in db_session.query(Seller)}
+    retried = records[sellers["1"].id]
+    assert retried.status == EmailStatus.SENT and retried.attempts == 3
+    assert records[sellers["3"].id].status == EmailStatus.FAILED
+    assert records[sellers["3"].id].response_payload["status"] == 400
+
+    first = stub.delivered[records[sellers["0"].id].idempotency_key][0]
+    assert [to["email"] for to in first["personalizations"][0]["to"]] == ["seller0@example.com", "backup0@example.com"]
+    assert {a["filename"] for a in first["attachments"]} == {f"PHH_DEL_{p}_NA1_20240102.xlsx" for p in ("FULLDOC", "ALTDOC", "DSCR")}
+    both_channels = stub.delivered[records[sellers["4"].id].idempotency_key][0]
+    assert sorted(a["filename"].split("_")[1] for a in both_channels["attachments"]) == ["DEL"] * 3 + ["NONDEL"] * 3
+    db_session.refresh(distributed_job)
+    assert distributed_job.payload["distribution"]["failed"] == 1
+    assert distributed_job.status == JobStatus.COMPLETED
+
+
+def test_resumed_run_only_sends_what_is_missing(db_session, distributed_job):
+    stub = ProviderStub({"seller3@example.com": [400]}, crash_after=12)
+    with pytest.raises(SystemError):
+        _engine(db_session, stub).run(distributed_job.id)
+    db_session.expire_all()
+    statuses = dict(db_session.query(EmailDistribution.idempotency_key, EmailDistribution.status).filter(EmailDistribution.job_run_id == distributed_job.id))
+    # Nothing delivered is left PENDING: it is SENT, or SENDING when the crash came before its outcome was written.
+    assert len(stub.delivered) == 12
+    assert all(statuses[key] in {EmailStatus.SENT, EmailStatus.SENDING} for key in stub.delivered)
+    unconfirmed = list(statuses.values()).count(EmailStatus.SENDING)
+    assert unconfirmed >= 1
+
+    stub.crash_after = None
+    stub.script = {}
+    summary = _engine(db_session, stub).run(distributed_job.id)
+    assert summary["unconfirmed"] == unconfirmed
+    assert summary["already_sent"] + summary["unconfirmed"] + summary["sent"] + summary["failed"] == 30
+    assert summary["failed"] == 0
+    # Every seller's message reached the provider exactly once across both runs.
+    assert all(len(deliveries) == 1 for deliveries in stub.delivered.values())
+    assert db_session.query(EmailDistribution).filter(EmailDistribution.job_run_id == distributed_job.id).count() == 30
+    db_session.refresh(distributed_job)
+    assert distributed_job.status == JobStatus.DISTRIBUTED
+
+
+def test_other_investors_sellers_get_their_own_branding(db_session, phh_job):
+    phh = phh_job()
+    acme = Investor(code="ACME", name="Acme Mortgage", config={"products": {"FULLDOC": "PHH - FullDoc"}, "base_files": {"DEL": "DEL_BASE"}, "filename_template": "ACME-{product}-{tier}-{date}.xlsx"})
+    db_session.add(acme)
+    db_session.flush()
+    job = JobRun(investor_id=acme.id, status=JobStatus.PENDING, job_type=JobType.DAILY_NONAGENCY, effective_date=phh.effective_date, payload={"mode": "full"})
+    job.uploaded_files = [
+        UploadedFile(investor_id=acme.id, file_type=f.file_type, original_filename=f.original_filename, stored_path=f.stored_path)
+        for f in phh.uploaded_files
+        if f.file_type != FileType.NONDEL_BASE
+    ]
+    db_session.add(job)
+    db_session.commit()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+
+    stub = ProviderStub()
+    summary = _engine(db_session, stub).run(job.id)
+    assert summary["sent"] > 0 and summary["failed"] == 0
+    messages = [payload for deliveries in stub.delivered.values() for payload in deliveries]
+    assert {message["subject"] for message in messages} == {"Acme Mortgage Non-Agency Tiered Rate Sheets – 2024-01-02"}
+    assert all(a["filename"].startswith("ACME-FULLDOC-") for message in messages for a in message["attachments"])
+    records = db_session.query(EmailDistribution).filter(EmailDistribution.job_run_id == job.id).all()
+    assert {record.investor_id for record in records} == {acme.id}
+
+
+def test_token_bucket_limits_rate():
+    import asyncio
+
+    now = [0.0]
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    async def drain():
+        bucket = TokenBucket(rate=10, burst=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(6):
+            await bucket.acquire()
+
+    asyncio.run(drain())
+    assert now[0] == pytest.approx(0.4)
+
+
+def test_distribute_endpoint_runs_in_background(db_session, distributed_job):
+    stub = ProviderStub()
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_distribution_transport] = lambda: httpx.MockTransport(stub)
+    app.dependency_overrides[default_sink] = lambda: SINK
+    try:
+        response = TestClient(app).post(f"/api/phh/jobs/{distributed_job.id}/distribute")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 202
+    assert len(stub.delivered) == 30
+
+
+def test_a_job_is_distributed_by_one_run_at_a_time(db_session, distributed_job):
+    stub = ProviderStub()
+    stale = DistributionEngine(db_session)
+    status = distributed_job.status
+    assert stale.claim(distributed_job)
+    db_session.refresh(distributed_job)
+    assert distributed_job.status == JobStatus.DISTRIBUTING
+    # A second request that read the job before the first claim landed still loses.
+    assert not stale.claim(JobRun(id=distributed_job.id, status=status))
+    with pytest.raises(DistributionClaimError):
+        _engine(db_session, stub).run(distributed_job.id)
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_distribution_transport] = lambda: httpx.MockTransport(stub)
+    app.dependency_overrides[default_sink] = lambda: SINK
+    try:
+        response = TestClient(app).post(f"/api/phh/jobs/{distributed_job.id}/distribute")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 409
+    assert stub.calls == []
+
+    # The process that held the claim died: once the lease lapses, the next request takes the job over.
+    distributed_job.claimed_at = datetime.utcnow() - timedelta(seconds=settings.distribution_claim_timeout_seconds + 1)
+    db_session.commit()
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_distribution_transport] = lambda: httpx.MockTransport(stub)
+    app.dependency_overrides[default_sink] = lambda: SINK
+    try:
+        response = TestClient(app).post(f"/api/phh/jobs/{distributed_job.id}/distribute")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 202
+    assert len(stub.delivered) == 30
+    db_session.refresh(distributed_job)
+    assert (distributed_job.status, distributed_job.claimed_at, distributed_job.claimed_from) == (JobStatus.DISTRIBUTED, None, status)
+
+
+def test_status_writes_run_off_the_event_loop(db_session, distributed_job):
+    threads = set()
+
+    class RecordingEngine(DistributionEngine):
+        def _flush(self, outcomes):
+            threads.add(threading.get_ident())
+            super()._flush(outcomes)
+
+    engine = RecordingEngine(db_session, transport=httpx.MockTransport(ProviderStub()), concurrency=4, rate_per_second=1000, burst=10, status_batch=7, sleep=_no_sleep, sink=SINK)
+    assert engine.run(distributed_job.id)["sent"] == 30
+    assert threads and threading.get_ident() not in threads
+    assert db_session.query(EmailDistribution).filter(EmailDistribution.status == EmailStatus.SENT).count() == 30
+
+
+def test_nothing_is_claimed_or_recorded_without_an_api_key(db_session, distributed_job, monkeypatch):
+    monkeypatch.setattr(settings, "sendgrid_api_key", "")
+    stub = ProviderStub()
+    status = distributed_job.status
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_distribution_transport] = lambda: httpx.MockTransport(stub)
+    try:
+        response = TestClient(app).post(f"/api/phh/jobs/{distributed_job.id}/distribute")
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 400
+    assert response.json()["detail"] == "SENDGRID_API_KEY is not configured"
+
+    engine = DistributionEngine(db_session, transport=httpx.MockTransport(stub))
+    assert engine.run(distributed_job.id) == {"status": "skipped", "reason": "SENDGRID_API_KEY not configured"}
+    # A run started under a claim hands the job back.
+    assert engine.claim(distributed_job)
+    engine.run(distributed_job.id, claimed=True)
+    db_session.refresh(distributed_job)
+    assert (distributed_job.status, distributed_job.claimed_at) == (status, None)
+    assert stub.calls == []
+    assert db_session.query(EmailDistribution).count() == 0
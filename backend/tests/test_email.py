@@ -0,0 +1,181 @@
+import base64
+import io
+import json
+import os
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from fastapi.testclient import TestClient
+from app.core.email_packaging import (
+    ENCODE_CHUNK_SIZE,
+    ZIP_END_RECORD,
+    MessageTooLargeError,
+    RateSheetAttachment,
+    iter_base64,
+    package_attachments,
+    plan_messages,
+    zipped_entry_bound,
+)
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.database import get_db
+from app.email import SendGridSink, default_sink, send_rate_sheet_email
+from app.main import app
+from app.models import EmailDistribution, EmailStatus
+
+
+class FakeSink:
+    def __init__(self):
+        self.messages = []
+        self.largest_chunk = 0
+
+    def send(self, subject, recipients, body, packages):
+        attachments = {}
+        for package in packages:
+            chunks = []
+            for chunk in iter_base64(package.path):
+                self.largest_chunk = max(self.largest_chunk, len(chunk))
+                chunks.append(chunk)
+            attachments[package.name] = base64.b64decode(b"".join(chunks))
+        self.messages.append({"subject": subject, "recipients": recipients, "attachments": attachments})
+        return {"status": 202, "body": ""}
+
+
+def _sheets(tmp_path, count=12, size=40_000):
+    attachments = []
+    for i in range(count):
+        channel = "DEL" if i % 2 else "NONDEL"
+        product = ["FULLDOC", "ALTDOC", "DSCR"][i % 3]
+        path = tmp_path / f"PHH_{channel}_{product}_NA{i}.xlsx"
+        # Random bytes stand in for xlsx files, which are already compressed.
+        path.write_bytes(os.urandom(size))
+        attachments.append(RateSheetAttachment(path=str(path), channel=channel, product=product))
+    return attachments
+
+
+def test_packages_group_and_respect_the_byte_budget(tmp_path):
+    attachments = _sheets(tmp_path)
+    by_product = package_attachments(attachments, tmp_path / "out", group_by="product")
+    assert {p.group for p in by_product} == {"FULLDOC", "ALTDOC", "DSCR"}
+    assert sorted(sum((p.files for p in by_product), [])) == sorted(a.path.rsplit("/", 1)[-1] for a in attachments)
+
+    split = package_attachments(attachments, tmp_path / "split", group_by="channel", max_package_bytes=100_000)
+    assert len(split) > 2
+    assert all(p.size_bytes <= 100_000 for p in split)
+    assert {p.name for p in split if p.group == "DEL"} >= {"rate_sheets_DEL_part1.zip", "rate_sheets_DEL_part2.zip"}
+    messages = plan_messages(split, 200_000)
+    assert all(m.encoded_size <= 200_000 for m in messages)
+    assert [p.name for m in messages for p in m.packages] == [p.name for p in split]
+
+
+
+def test_parts_sized_at_the_boundary_stay_within_the_budget(tmp_path):
+    attachments = []
+    for product in ("FULLDOC", "ALTDOC"):
+        path = tmp_path / f"PHH_NONDEL_{product}_Platinum_Tier_Seller_Rate_Sheet_2024-01-02.xlsx"
+        path.write_bytes(os.urandom(50_000))
+        attachments.append(RateSheetAttachment(path=str(path), channel="NONDEL", product=product))
+    exact = ZIP_END_RECORD + sum(zipped_entry_bound(a.path) for a in attachments)
+    # Headers repeat each long name twice; a flat 128-byte allowance per entry packed both into one oversized part.
+    for budget in (exact, exact - 1, 2 * (50_000 + 128), 2 * (50_000 + 128) + 100):
+        packages = package_attachments(attachments, tmp_path / str(budget), max_package_bytes=budget)
+        assert all(p.size_bytes <= budget for p in packages)
+        assert len(packages) == (1 if budget >= exact else 2)
+
+
+def test_send_splits_messages_and_streams_one_chunk_at_a_time(tmp_path):
+    sink = FakeSink()
+    response = send_rate_sheet_email(
+        "Rates", ["a@example.com"], "body", _sheets(tmp_path), str(tmp_path / "email"), max_message_bytes=150_000, sink=sink
+    )
+    assert response["status"] == 202
+    assert len(sink.messages) == len(response["messages"]) > 1
+    assert sink.messages[0]["subject"] == f"Rates (1/{len(sink.messages)})"
+    assert sink.largest_chunk <= 4 * ENCODE_CHUNK_SIZE // 3
+    names = set()
+    for message in sink.messages:
+        for payload in message["attachments"].values():
+            names.update(zipfile.ZipFile(io.BytesIO(payload)).namelist())
+    assert len(names) == 12
+
+
+def test_sendgrid_sink_streams_valid_json_to_the_provider(tmp_path):
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.headers.get("Transfer-Encoding") == "chunked":
+                body = b""
+                while True:
+                    size = int(self.rfile.readline().strip(), 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        break
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+            else:
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((self.headers["Authorization"], json.loads(body), len(body)))
+            self.send_response(202)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        sink = SendGridSink("test-key", "rates@example.com", url=f"http://127.0.0.1:{server.server_port}/v3/mail/send")
+        response = send_rate_sheet_email("Rates", ["a@example.com", "b@example.com"], "body", _sheets(tmp_path, count=4), str(tmp_path / "email"), sink=sink)
+        # Each channel's zip encodes to about 53,400 bytes, so the two cannot share a 60,000-byte message.
+        split = send_rate_sheet_email(
+            "Rates", ["a@example.com"], "body", _sheets(tmp_path, count=4, size=20_000), str(tmp_path / "split"), max_message_bytes=60_000, sink=sink
+        )
+    finally:
+        server.shutdown()
+    assert response["status"] == 202
+    authorization, payload, _ = received[0]
+    assert authorization == "Bearer test-key"
+    assert [to["email"] for to in payload["personalizations"][0]["to"]] == ["a@example.com", "b@example.com"]
+    assert {a["filename"] for a in payload["attachments"]} == {"rate_sheets_DEL.zip", "rate_sheets_NONDEL.zip"}
+    archive = zipfile.ZipFile(io.BytesIO(base64.b64decode(payload["attachments"][0]["content"])))
+    assert len(archive.namelist()) == 2
+    assert split["status"] == 202 and len(split["messages"]) > 1
+    assert all(size <= 60_000 for _, _, size in received[1:])
+
+
+def test_a_part_too_large_for_any_message_fails_before_sending(tmp_path):
+    sink = FakeSink()
+    attachments = _sheets(tmp_path, count=2, size=100_000)
+    packages = package_attachments(attachments, tmp_path / "out", group_by="none")
+    with pytest.raises(MessageTooLargeError, match="rate_sheets_all.zip"):
+        plan_messages(packages, 150_000)
+    # One file alone is over the budget, so no split can fit it.
+    with pytest.raises(MessageTooLargeError):
+        send_rate_sheet_email("Rates", ["a@example.com"], "body", attachments, str(tmp_path / "email"), max_message_bytes=100_000, sink=sink)
+    assert sink.messages == []
+
+
+def test_send_emails_records_each_message(db_session, phh_job, monkeypatch):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    sink = FakeSink()
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[default_sink] = lambda: sink
+    monkeypatch.setattr("app.email.settings.email_max_message_bytes", 60_000)
+    try:
+        response = TestClient(app).post(f"/api/phh/jobs/{job.id}/send_emails", json={"recipients": ["ops@example.com"], "group_by": "product"})
+        invalid = TestClient(app).post(f"/api/phh/jobs/{job.id}/send_emails", json={"group_by": "tier"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert invalid.status_code == 400
+    records = db_session.query(EmailDistribution).filter(EmailDistribution.job_run_id == job.id).order_by(EmailDistribution.id).all()
+    assert len(records) == len(sink.messages) > 1
+    assert all(r.status == EmailStatus.SENT for r in records)
+    assert records[0].response_payload["count"] == len(records)
+    files = [name for r in records for package in r.attachments for name in package["files"]]
+    assert len(files) == 72
+    assert {package["group"] for r in records for package in r.attachments} == {"FULLDOC", "ALTDOC", "DSCR"}
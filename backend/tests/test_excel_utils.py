@@ -1,5 +1,6 @@
 import pandas as pd
-from app.core.excel_utils import parse_customer_tiers, parse_adjustors, parse_base_grid, write_tier_grid_to_workbook
+import pytest
+from app.core.excel_utils import WorkbookCache, parse_customer_tiers, parse_adjustors, parse_base_grid, write_tier_grid_to_workbook
 
 
 def test_parse_customer_tiers(tmp_path):
@@ -21,14 +22,28 @@ def test_parse_customer_tiers(tmp_path):
     assert result[0].nondel_tier == "NA2"
 
 
+def test_parse_customer_tiers_is_columnar_and_tolerates_gaps(tmp_path):
+    csv_path = tmp_path / "tiers.csv"
+    pd.DataFrame(
+        [
+            {"Org Name": "Org A", "Org ID": "007", "DEL NonAgency": "NA1", "ND NonAgency": None, "Notes": "ignored"},
+            {"Org Name": "Org B", "Org ID": "008", "DEL NonAgency": None, "ND NonAgency": "NA4", "Notes": "ignored"},
+        ]
+    ).to_csv(csv_path, index=False)
+    roster = parse_customer_tiers(csv_path)
+    assert len(roster) == 2
+    assert list(roster.column("org_id")) == ["007", "008"]
+    assert [(c.del_tier, c.nondel_tier, c.nmlsid, c.primary_email) for c in roster] == [("NA1", None, None, None), (None, "NA4", None, None)]
+
+
 def _build_adjustor_sheet(tmp_path):
     data = {
         "Unnamed:0": ["GRID", "FULLDOC", None, None, None, "GRID", "ALTDOC", None],
         "Unnamed:1": [None, "P1", "P2", "P3", "P4", None, "P5", "P6"],
         "Unnamed:2": [None, "Prod1", "Prod2", "Prod3", "Prod4", None, "Prod5", "Prod6"],
-        "Unnamed:3": ["BASE", 0, 0, 0, 0, "BASE", 0, 0],
     }
-    for idx, col in enumerate(range(4, 15), start=1):
+    # The twelve tier columns start at Unnamed:3, the columns the numeric and code rows below label NA1-NA12.
+    for idx, col in enumerate(range(3, 15), start=1):
         data[f"Unnamed:{col}"] = [f"TIER {idx} - DEL TOTAL"] + [0.1 * idx] * 7
     numeric_row = [None] * 3 + list(range(1, 13))
     code_row = [None] * 3 + [f"NA{i}" for i in range(1, 13)]
@@ -47,9 +62,10 @@ def test_parse_adjustors(tmp_path):
     assert "DEL" in result.mapping
     full_doc = result.mapping["DEL"].get("FULLDOC")
     assert full_doc["tiers"]["NA1"] == 0.1
+    assert full_doc["tiers"]["NA12"] == pytest.approx(1.2)
 
 
-def test_parse_base_grid_and_write(tmp_path):
+def _build_base_workbook(tmp_path, name="base.xlsx"):
     df = pd.DataFrame(
         {
             "Unnamed:0": [None, None, None],
@@ -59,8 +75,13 @@ def test_parse_base_grid_and_write(tmp_path):
             "Unnamed:4": [None, "15 Yr", 99.0],
         }
     )
-    xlsx_path = tmp_path / "base.xlsx"
+    xlsx_path = tmp_path / name
     df.to_excel(xlsx_path, sheet_name="PHH - FullDoc", index=False)
+    return xlsx_path
+
+
+def test_parse_base_grid_and_write(tmp_path):
+    xlsx_path = _build_base_workbook(tmp_path)
     grid_df, meta = parse_base_grid(xlsx_path, "PHH - FullDoc")
     assert list(grid_df.columns) == ["note_rate", "Unnamed:4"]
     adjusted = grid_df.copy()
@@ -68,3 +89,25 @@ def test_parse_base_grid_and_write(tmp_path):
     output = tmp_path / "out.xlsx"
     write_tier_grid_to_workbook(xlsx_path, "PHH - FullDoc", meta, adjusted.rename(columns={"note_rate": meta.note_rate_col}), output)
     assert output.exists()
+
+
+def test_workbook_cache_shares_parse_and_write(tmp_path):
+    xlsx_path = _build_base_workbook(tmp_path)
+    cache = WorkbookCache()
+    grid_df, meta = parse_base_grid(xlsx_path, "PHH - FullDoc", cache=cache)
+    for i in range(3):
+        write_tier_grid_to_workbook(xlsx_path, "PHH - FullDoc", meta, grid_df.rename(columns={"note_rate": meta.note_rate_col}), tmp_path / f"out{i}.xlsx", cache=cache)
+    assert cache.misses == 1
+    assert cache.hits == 3
+    assert cache.load(xlsx_path).sheet("PHH - FullDoc").loc[1, "Unnamed:3"] == "Note Rate"
+
+
+def test_workbook_cache_evicts_least_recently_used(tmp_path):
+    first = _build_base_workbook(tmp_path, "first.xlsx")
+    second = tmp_path / "second.xlsx"
+    pd.DataFrame({"a": [1.0, 2.0]}).to_excel(second, index=False)
+    cache = WorkbookCache(max_bytes=1)
+    first_entry = cache.load(first)
+    cache.load(second)
+    assert len(cache) == 1
+    assert first_entry.digest not in cache
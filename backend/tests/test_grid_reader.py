@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from app.core.excel_utils import WorkbookCache, parse_base_grid
+from app.core.grid_reader import read_base_grid
+from app.core.price_tensor import grid_to_matrix
+
+SHEETS = ["PHH - FullDoc", "PHH - DSCR"]
+
+
+def _build_base_workbook(path):
+    grid = pd.DataFrame(
+        {
+            "Unnamed:0": [None, "Note Rate", 6.5, 6.625, 6.75],
+            "Unnamed:1": [None, "15 Yr", 99.0, 99.5, 100.0],
+            "Unnamed:2": [None, "30 Yr", 98.0, 98.5, 99.0],
+        }
+    )
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet in SHEETS:
+            grid.to_excel(writer, sheet_name=sheet, index=False)
+    return path
+
+
+def _assert_matches_pandas(path, sheet):
+    grid_df, meta = parse_base_grid(str(path), sheet)
+    expected = grid_to_matrix(grid_df, meta)
+    grid = read_base_grid(str(path), sheet)
+    assert grid.meta == meta
+    assert grid.columns == list(pd.read_excel(path, sheet_name=sheet).columns)
+    assert grid.matrix.prices.flags["C_CONTIGUOUS"]
+    np.testing.assert_array_equal(grid.matrix.prices, expected.prices)
+    np.testing.assert_array_equal(grid.matrix.ineligible, expected.ineligible)
+    assert grid.matrix.labels.tolist() == expected.labels.tolist()
+    assert [float(rate) for rate in grid.matrix.note_rates] == [float(rate) for rate in expected.note_rates]
+    return grid
+
+
+def test_streamed_grid_matches_pandas_reader(tmp_path):
+    path = _build_base_workbook(tmp_path / "base.xlsx")
+    for sheet in SHEETS:
+        grid = _assert_matches_pandas(path, sheet)
+        assert grid.column_labels == ["15 Yr", "30 Yr"]
+
+
+def test_streamed_grid_handles_labels_duplicate_headers_and_tables_below(tmp_path):
+    rows = [
+        [None, "title", None, None, None],
+        ["Note Rate", "30 Yr", "15 Yr", "10 Yr", "Notes"],
+        [6.0, 99.0, "N/A", "Call", None],
+        [6.5, 100.25, 98.0, None, "x"],
+        [7, 101, 99, "n/a", None],
+        [None, None, None, None, None],
+        ["LLPA", 0.25, 0.5, 0.75, 1.0],
+    ]
+    path = tmp_path / "wide.xlsx"
+    pd.DataFrame(rows, columns=["a", "a", None, "b", "b"]).to_excel(path, sheet_name="PHH - FullDoc", index=False)
+    grid = _assert_matches_pandas(path, "PHH - FullDoc")
+    assert grid.meta.price_columns == ["a.1"]
+    assert grid.meta.end_row == 4
+
+
+def test_streamed_grid_is_memoised_in_workbook_cache(tmp_path):
+    path = _build_base_workbook(tmp_path / "base.xlsx")
+    cache = WorkbookCache()
+    first = read_base_grid(path, "PHH - DSCR", cache=cache)
+    assert read_base_grid(path, "PHH - DSCR", cache=cache) is first
+    entry = cache.load(path, sheets=False)
+    assert not entry.parsed
+    assert cache.current_bytes > len(entry.raw)
@@ -0,0 +1,74 @@
+from datetime import date
+from io import BytesIO
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.core.excel_utils import WorkbookCache
+from app.core.grid_store import grid_store_root, iter_partitions, open_grid_partition
+from app.core.pricing_engine import PricingEngine
+from app.database import get_db
+from app.main import app
+from app.models import ChannelEnum, RateSheet
+
+
+@pytest.fixture
+def client(db_session):
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _sheet(db_session, job, channel, tier_code, product="FULLDOC"):
+    return next(
+        sheet
+        for sheet in db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id, RateSheet.channel == channel)
+        if sheet.metadata_["tier_code"] == tier_code and sheet.metadata_["product_code"] == product
+    )
+
+
+def test_job_persists_memory_mapped_grids_per_partition(db_session, phh_job, storage_root):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    sheet = _sheet(db_session, job, ChannelEnum.NONDEL, "NA3")
+
+    stored = open_grid_partition(sheet.metadata_["grid_path"])
+    assert stored.path == grid_store_root(storage_root, "PHH") / "date=2024-01-02" / "channel=NONDEL" / "product=FULLDOC" / f"job={job.id}"
+    assert isinstance(stored.tiers, np.memmap)
+    assert stored.columns == ["15 Yr", "30 Yr"]
+    np.testing.assert_allclose(stored.note_rates, [6.5, 6.625, 6.75])
+    # The NONDEL base workbook is priced 0.5 above DEL.
+    np.testing.assert_allclose(stored.base[:, 0], [99.5, 100.0, 100.5])
+    tier = stored.select("NA3")
+    np.testing.assert_allclose(tier.prices, stored.base + sheet.adjustment_applied)
+
+
+def test_partitions_scan_by_date_range(db_session, phh_job, storage_root):
+    engine = PricingEngine(db_session, cache=WorkbookCache())
+    jobs = [phh_job(effective_date=date(2024, 1, day), price_offset=day / 10) for day in (2, 3, 4)]
+    for job in jobs:
+        engine.generate(job.id, workers=0)
+    paths = list(iter_partitions(grid_store_root(storage_root, "PHH"), "DEL", "DSCR", date_from=date(2024, 1, 3)))
+    assert [open_grid_partition(path).meta["job_id"] for path in paths] == [jobs[1].id, jobs[2].id]
+
+
+def test_grid_route_returns_json_and_npz_slices(client, db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    sheet = _sheet(db_session, job, ChannelEnum.DEL, "NA2", product="ALTDOC")
+
+    body = client.get(f"/api/phh/ratesheets/{sheet.id}/grid", params={"rate_min": 6.6, "columns": ["30 Yr"]}).json()
+    assert body["tier"] == "NA2" and body["product"] == "ALTDOC"
+    assert body["columns"] == ["30 Yr"]
+    assert body["note_rates"] == [6.625, 6.75]
+    np.testing.assert_allclose(body["prices"], [[98.5 + sheet.adjustment_applied], [99.0 + sheet.adjustment_applied]])
+
+    base = client.get(f"/api/phh/ratesheets/{sheet.id}/grid", params={"base": True}).json()
+    assert base["tier"] is None and base["prices"][0] == [99.0, 98.0]
+
+    response = client.get(f"/api/phh/ratesheets/{sheet.id}/grid", params={"format": "npz"})
+    archive = np.load(BytesIO(response.content))
+    assert archive["prices"].shape == (3, 2)
+    assert archive["columns"].tolist() == ["15 Yr", "30 Yr"]
+    assert client.get("/api/phh/ratesheets/999999/grid").status_code == 404
@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core.excel_utils import WorkbookCache
+from app.core.investor_config import PHH_CONFIG, InvestorConfig, investor_config
+from app.core.job_queue import JobQueue, MemoryQueueBackend, get_job_queue
+from app.core.pricing_engine import PricingEngine
+from app.database import get_db
+from app.main import app
+from app.models import FileType, Investor, JobRun, JobStatus, JobType, RateSheet, UploadedFile
+
+ACME = {
+    "name": "Acme Mortgage",
+    "products": {"DSCR": "PHH - DSCR", "FULLDOC": "PHH - FullDoc"},
+    "base_files": {"DEL": "DEL_BASE"},
+    "filename_template": "ACME-{product}-{tier}-{channel}-{date}.xlsx",
+    "output_dir": "acme",
+    "max_concurrent_jobs": 2,
+    "deadline": "08:30",
+}
+
+
+def test_config_resolves_builtin_defaults_and_stored_overrides():
+    phh = Investor(code="PHH", name="PHH", config={"max_concurrent_jobs": 3})
+    resolved = investor_config(phh)
+    assert resolved.products == PHH_CONFIG.products and resolved.max_concurrent_jobs == 3
+    assert resolved.job_type == JobType.DAILY_PHH_NONAGENCY.value
+
+    with pytest.raises(ValueError, match="no pricing config"):
+        investor_config(Investor(code="NEW", name="New"))
+    with pytest.raises(ValueError, match="Unknown investor config keys: colour"):
+        InvestorConfig.from_dict({"code": "X", "name": "X", "products": {"A": "a"}, "colour": "red"})
+    with pytest.raises(ValueError):
+        InvestorConfig.from_dict({"code": "X", "name": "X", "products": {"A": "a"}, "base_files": {"AGENCY": "DEL_BASE"}})
+
+
+def test_generic_engine_prices_another_investor_from_its_config(db_session, phh_job, storage_root):
+    phh = phh_job()
+    acme = Investor(code="ACME", name="Acme Mortgage", config=ACME)
+    db_session.add(acme)
+    db_session.flush()
+    uploads = [
+        UploadedFile(investor_id=acme.id, file_type=f.file_type, original_filename=f.original_filename, stored_path=f.stored_path)
+        for f in phh.uploaded_files
+        if f.file_type != FileType.NONDEL_BASE
+    ]
+    job = JobRun(investor_id=acme.id, status=JobStatus.PENDING, job_type=JobType.DAILY_NONAGENCY, effective_date=phh.effective_date, payload={"mode": "full"})
+    job.uploaded_files = uploads
+    db_session.add(job)
+    db_session.commit()
+
+    assert PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0) == {"count": 24, "failed": 0}
+    sheets = db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id).all()
+    assert {sheet.channel.value for sheet in sheets} == {"DEL"}
+    assert {sheet.metadata_["product_code"] for sheet in sheets} == {"DSCR", "FULLDOC"}
+    sheet = next(s for s in sheets if s.generated_filename == "ACME-DSCR-NA2-DEL-20240102.xlsx")
+    assert sheet.generated_path.startswith(str(storage_root / "acme" / "20240102" / f"job_{job.id}"))
+    assert sheet.metadata_["grid_path"].startswith(str(storage_root / "acme" / "grids"))
+    assert sheet.investor_id == acme.id
+
+
+def test_investor_api_validates_config_and_queues_jobs(db_session, phh_job, tmp_path):
+    phh_job(upload=False)
+    db_session.add(Investor(code="ACME", name="Acme Mortgage"))
+    db_session.commit()
+    job_queue = JobQueue(MemoryQueueBackend())
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_job_queue] = lambda: job_queue
+    try:
+        client = TestClient(app)
+        listed = {entry["code"]: entry for entry in client.get("/api/investors").json()}
+        assert listed["PHH"]["config"]["deadline"] == "09:00"
+        assert listed["ACME"]["config"] is None and "no pricing config" in listed["ACME"]["config_error"]
+
+        assert client.put("/api/investors/acme/config", json={**ACME, "deadline": "late"}).status_code == 422
+        response = client.put("/api/investors/acme/config", json=ACME)
+        assert response.status_code == 200
+        assert response.json()["config"]["base_files"] == {"DEL": "DEL_BASE"}
+
+        files = {name: (f"{name}.bin", b"data") for name in ("customer_tiers_csv", "adjustors_xlsx")}
+        missing = client.post("/api/investors/ACME/ingest", params={"effective_date": "2024-01-03"}, files=files)
+        assert missing.status_code == 400 and "DEL_BASE" in missing.json()["detail"]
+        response = client.post(
+            "/api/investors/ACME/ingest",
+            params={"effective_date": "2024-01-03", "deadline": "2024-01-03T07:00:00"},
+            files={**files, "del_base_xlsx": ("del.xlsx", b"data")},
+        )
+        assert response.status_code == 202
+        job = db_session.get(JobRun, response.json()["job_id"])
+        assert job.job_type == JobType.DAILY_NONAGENCY and job.payload["deadline"] == "2024-01-03T07:00:00"
+        assert sorted(f.file_type.value for f in job.uploaded_files) == ["ADJUSTORS", "CUSTOMER_TIERS", "DEL_BASE"]
+        assert job_queue.dequeue() == job.id
+    finally:
+        app.dependency_overrides.clear()
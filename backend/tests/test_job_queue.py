@@ -0,0 +1,122 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from app.core.excel_utils import WorkbookCache
+from app.core.job_queue import JobQueue, JobWorker, MemoryQueueBackend, get_job_queue, run_pricing_job
+from app.core.pricing_engine import PricingEngine
+from app.core.scheduler import ScheduledJob
+from app.database import get_db
+from app.main import app
+from app.models import FileType, JobStatus, RateSheet, UploadedFile
+
+
+def _runner(session_factory, job_id):
+    db = session_factory()
+    try:
+        PricingEngine(db, cache=WorkbookCache()).generate(job_id, workers=0)
+    except Exception:
+        pass
+    finally:
+        db.close()
+
+
+def _worker(db_session, job_queue):
+    factory = sessionmaker(bind=db_session.get_bind(), autoflush=False)
+    return JobWorker(job_queue, factory, concurrency=2, runner=_runner)
+
+
+def test_worker_runs_queued_job_and_records_progress(db_session, phh_job):
+    job = phh_job()
+    job_queue = JobQueue(MemoryQueueBackend())
+    job_queue.enqueue(job.id)
+    assert _worker(db_session, job_queue).run_pending() == 1
+    db_session.refresh(job)
+    assert job.status == JobStatus.COMPLETED
+    assert job.payload["progress"] == {"stage": "completed", "done": 72, "total": 72}
+
+
+def test_failed_job_is_marked_with_error(db_session, phh_job):
+    job = phh_job()
+    db_session.query(UploadedFile).filter(UploadedFile.file_type == FileType.ADJUSTORS).delete()
+    db_session.commit()
+    job_queue = JobQueue(MemoryQueueBackend())
+    job_queue.enqueue(job.id)
+    _worker(db_session, job_queue).run_pending()
+    db_session.refresh(job)
+    assert job.status == JobStatus.FAILED
+    assert "Missing uploaded file" in job.error_message
+    assert job.payload["progress"]["stage"] == "failed"
+
+
+def test_ingest_returns_accepted_and_progress_is_pollable(db_session, phh_job, tmp_path):
+    phh_job()
+    job_queue = JobQueue(MemoryQueueBackend())
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_job_queue] = lambda: job_queue
+    try:
+        client = TestClient(app)
+        inputs = sorted(tmp_path.glob("inputs_*"))[0]
+        files = {
+            "customer_tiers_csv": ("tiers.csv", (inputs / "tiers.csv").read_bytes()),
+            "del_base_xlsx": ("del.xlsx", (inputs / "del.xlsx").read_bytes()),
+            "nondel_base_xlsx": ("nondel.xlsx", (inputs / "nondel.xlsx").read_bytes()),
+            "adjustors_xlsx": ("adjustors.xlsx", (inputs / "adjustors.xlsx").read_bytes()),
+        }
+        response = client.post("/api/phh/ingest", params={"effective_date": "2024-01-03"}, files=files)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert len(job_queue) == 1
+        assert client.get(f"/api/phh/jobs/{job_id}/progress").json()["status"] == "PENDING"
+
+        _worker(db_session, job_queue).run_pending()
+        progress = client.get(f"/api/phh/jobs/{job_id}/progress").json()
+        assert progress["status"] == "COMPLETED"
+        assert progress["done"] == progress["total"] == 72
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_jobs_taken_by_a_dead_worker_are_requeued_once_its_heartbeat_lapses(db_session):
+    now = [0.0]
+    backend = MemoryQueueBackend(clock=lambda: now[0])
+    dead = JobQueue(backend, consumer="dead")
+    for job_id in (1, 2, 3):
+        dead.enqueue(job_id)
+    dead.heartbeat(ttl=60)
+    # The worker buffered two jobs, then its process was killed before either was acked.
+    assert [dead.dequeue(), dead.dequeue()] == [1, 2]
+
+    ran = []
+    worker = JobWorker(
+        JobQueue(backend, consumer="live"),
+        sessionmaker(bind=db_session.get_bind()),
+        concurrency=1,
+        runner=lambda session_factory, job_id: ran.append(job_id),
+        describe=lambda job_id: ScheduledJob(job_id, "PHH"),
+    )
+    assert worker.run_pending() == 1
+    assert ran == [3]
+    now[0] = 61
+    assert worker.run_pending() == 2
+    assert ran == [3, 1, 2]
+    assert backend.size(dead.processing) == backend.size(worker.queue.processing) == len(worker.queue) == 0
+
+
+def test_a_stopped_worker_puts_its_buffered_jobs_back():
+    backend = MemoryQueueBackend()
+    job_queue = JobQueue(backend)
+    for job_id in (1, 2, 3):
+        job_queue.enqueue(job_id)
+    assert [job_queue.dequeue(), job_queue.dequeue()] == [1, 2]
+    job_queue.ack(1)
+    assert job_queue.release() == [2]
+    assert [job_queue.dequeue(), job_queue.dequeue()] == [2, 3]
+
+
+def test_a_redelivered_job_that_already_finished_is_not_priced_again(db_session, phh_job):
+    job = phh_job()
+    job.status = JobStatus.COMPLETED
+    db_session.commit()
+    run_pricing_job(sessionmaker(bind=db_session.get_bind()), job.id)
+    db_session.refresh(job)
+    assert job.status == JobStatus.COMPLETED
+    assert db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id).count() == 0
@@ -0,0 +1,152 @@
+import os
+from io import BytesIO
+import httpx
+import openpyxl
+import pytest
+from fastapi.testclient import TestClient
+from app.core.distribution import DistributionEngine
+from app.core.excel_utils import WorkbookCache
+from app.core.output_cache import OutputCache, output_cache
+from app.core.pricing_engine import PricingEngine
+from app.database import get_db
+from app.email import SendGridSink
+from app.main import app
+from app.models import ChannelEnum, EmailDistribution, RateSheet
+
+
+@pytest.fixture
+def client(db_session):
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _sheet(db_session, job, channel, product, tier_code):
+    return next(
+        sheet
+        for sheet in db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id, RateSheet.channel == channel)
+        if sheet.metadata_["product_code"] == product and sheet.metadata_["tier_code"] == tier_code
+    )
+
+
+def _workbook_rows(content):
+    workbook = openpyxl.load_workbook(BytesIO(content), read_only=True)
+    return [row for row in workbook["PHH - FullDoc"].iter_rows(values_only=True)]
+
+
+def test_lazy_job_records_sheets_and_download_builds_them_once(client, db_session, phh_job, storage_root):
+    eager_job = phh_job()
+    lazy_job = phh_job(mode="lazy")
+    engine = PricingEngine(db_session, cache=WorkbookCache())
+    engine.generate(eager_job.id, workers=0)
+    engine.generate(lazy_job.id, workers=0)
+    db_session.refresh(lazy_job)
+
+    assert lazy_job.payload["deferred"] == lazy_job.payload["generated"] == 72
+    assert lazy_job.payload["regenerated"] == 0
+    assert not list((storage_root / "PHH" / "20240102" / f"job_{lazy_job.id}").rglob("*.xlsx"))
+
+    lazy = _sheet(db_session, lazy_job, ChannelEnum.NONDEL, "FULLDOC", "NA3")
+    assert lazy.generated_path is None and lazy.metadata_["lazy"] is True
+    response = client.get(f"/api/phh/ratesheets/{lazy.id}/download")
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{lazy.metadata_["fingerprint"]}"'
+    assert response.headers["content-disposition"] == f'attachment; filename="{lazy.generated_filename}"'
+
+    eager = _sheet(db_session, eager_job, ChannelEnum.NONDEL, "FULLDOC", "NA3")
+    with open(eager.generated_path, "rb") as handle:
+        assert _workbook_rows(response.content) == _workbook_rows(handle.read())
+    cached = output_cache.path_for(lazy.metadata_["fingerprint"], lazy.generated_filename)
+    built_at = cached.stat().st_mtime_ns
+
+    again = client.get(f"/api/phh/ratesheets/{lazy.id}/download")
+    assert again.content == response.content
+    assert cached.stat().st_mtime_ns >= built_at
+    assert len(list(output_cache.root.rglob("*.xlsx"))) == 1
+
+    unchanged = client.get(f"/api/phh/ratesheets/{lazy.id}/download", headers={"If-None-Match": response.headers["etag"]})
+    assert unchanged.status_code == 304 and not unchanged.content
+
+
+def test_download_streams_eager_files_and_rebuilds_missing_ones(client, db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    sheet = _sheet(db_session, job, ChannelEnum.DEL, "ALTDOC", "NA2")
+    with open(sheet.generated_path, "rb") as handle:
+        written = handle.read()
+
+    response = client.get(f"/api/phh/ratesheets/{sheet.id}/download")
+    assert response.content == written
+    assert not output_cache.root.exists()
+
+    os.unlink(sheet.generated_path)
+    rebuilt = client.get(f"/api/phh/ratesheets/{sheet.id}/download")
+    assert rebuilt.status_code == 200 and rebuilt.headers["etag"] == response.headers["etag"]
+    assert _workbook_rows(rebuilt.content) == _workbook_rows(written)
+    assert client.get("/api/phh/ratesheets/999999/download").status_code == 404
+
+
+def test_output_cache_evicts_least_recently_used(tmp_path):
+    cache = OutputCache(tmp_path, max_bytes=250)
+
+    def build(path):
+        path.write_bytes(b"x" * 100)
+
+    first = cache.get_or_build("aa11", "first.xlsx", build)
+    second = cache.get_or_build("bb22", "second.xlsx", build)
+    os.utime(first, (1, 1))
+    os.utime(second, (2, 2))
+    assert cache.get("aa11", "first.xlsx") == first
+    third = cache.get_or_build("cc33", "third.xlsx", build)
+
+    assert first.exists() and third.exists() and not second.exists()
+    assert cache.size() == 200
+    assert cache.get("bb22", "second.xlsx") is None
+
+
+def test_pinned_entries_survive_eviction_until_released(tmp_path):
+    cache = OutputCache(tmp_path, max_bytes=150)
+
+    def build(path):
+        path.write_bytes(b"x" * 100)
+
+    pins = cache.pins()
+    pins.hold("aa11")
+    first = cache.get_or_build("aa11", "first.xlsx", build)
+    os.utime(first, (1, 1))
+    # The oldest entry would go first, but a reader still holds it.
+    second = cache.get_or_build("bb22", "second.xlsx", build)
+    assert first.exists() and second.exists()
+    # Another cache object stands in for another process sharing the storage root.
+    assert OutputCache(tmp_path, max_bytes=0).evict() == 100 and first.exists() and not second.exists()
+
+    pins.release()
+    third = cache.get_or_build("cc33", "third.xlsx", build)
+    assert not first.exists() and third.exists()
+    assert not first.parent.exists()
+    with cache.pins() as again:
+        again.hold("aa11")
+        assert cache.get_or_build("aa11", "first.xlsx", build) == first and first.exists()
+
+
+def test_distribution_builds_only_the_sheets_sellers_need(db_session, phh_job):
+    job = phh_job(mode="lazy")
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+
+    def send(request):
+        # Another process filling the cache mid-send must not take the sheets still to be attached.
+        OutputCache(output_cache.root, max_bytes=0).evict()
+        return httpx.Response(202)
+
+    summary = DistributionEngine(db_session, transport=httpx.MockTransport(send), sink=SendGridSink("test-key", "rates@example.com"), backoff_seconds=0).run(job.id)
+    assert summary["sent"] == 2 and summary["failed"] == 0
+    # Org A is on DEL NA1 and ND NA2, Org B on DEL NA3: three tiers across three products.
+    built = sorted(path.name for path in output_cache.root.rglob("*.xlsx"))
+    assert len(built) == 9
+    assert {name.split("_")[1] + "/" + name.split("_")[3] for name in built} == {"DEL/NA1", "NONDEL/NA2", "DEL/NA3"}
+    attachments = [a for record in db_session.query(EmailDistribution) for a in record.attachments]
+    assert sorted(a["filename"] for a in attachments) == built
+    sheets = {sheet.id: sheet.generated_filename for sheet in db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id)}
+    assert all(sheets[a["rate_sheet_id"]] == a["filename"] and "path" not in a for a in attachments)
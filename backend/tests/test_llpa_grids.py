@@ -0,0 +1,122 @@
+from io import BytesIO
+import openpyxl
+import pytest
+from fastapi.testclient import TestClient
+from app.core.llpa_grids import (
+    Bound,
+    detect_all_grids,
+    is_cltv_header,
+    is_fico_range,
+    js_str,
+    normalize_value,
+    output_workbook,
+    parse_range,
+    process_cltv_headers_with_inferred_min,
+)
+from app.main import app
+
+
+@pytest.fixture
+def llpa_guide(tmp_path):
+    workbook = openpyxl.Workbook()
+    full = workbook.active
+    full.title = "Full Doc"
+    full["A1"] = "Primary Residence Purchase"
+    for col, header in enumerate(["FICO", "<=50", "50.01-55", "55.01-60", "60.01-65"], start=1):
+        full.cell(row=3, column=col, value=header)
+    rows = [("780+", 0.125, 0.25, "NA", 0.5), ("760-779", 25, 0.375, 0.5, "-"), ("740-759", 0.25, 0.5, 0.75, 1.0), ("Notes", None, None, None, None)]
+    for offset, row in enumerate(rows):
+        for col, value in enumerate(row, start=1):
+            full.cell(row=4 + offset, column=col, value=value)
+
+    states = workbook.create_sheet("States")
+    for col, header in enumerate(["55%", "60%", "65%", "70%"], start=3):
+        states.cell(row=2, column=col, value=header)
+    for offset, (state, values) in enumerate([("CA", (0.1, 0.2, 0.3, 9)), ("NY", (-0.1, -0.2, "n/a", -0.4)), ("TX", (0, 0, 0.05, 0.1))]):
+        states.cell(row=3 + offset, column=2, value=state)
+        for col, value in enumerate(values, start=3):
+            states.cell(row=3 + offset, column=col, value=value)
+
+    workbook.create_sheet("Cover")["A1"] = "Rate sheet guide"
+    path = tmp_path / "guide.xlsx"
+    workbook.save(path)
+    return path
+
+
+def test_cell_rules_follow_the_browser_tool():
+    assert js_str(55.0) == "55" and js_str(0.5) == "0.5" and js_str(None) == "null" and js_str(0.00001) == "0.00001"
+    assert all(is_cltv_header(text) for text in ("<=50", "50.01-55", "65%", "80", "0.6", "85%*"))
+    assert not any(is_cltv_header(text) for text in ("FICO", "Credit Score", "100", "0.3", ""))
+    assert is_fico_range("FICO 720-739") and is_fico_range("780+") and not is_fico_range("72")
+    assert parse_range("760-779") == Bound(760, 779)
+    assert parse_range("<=50") == Bound(None, 50)
+    # A bare number is an open-ended minimum in the tool, and that rule runs before decimal CLTVs are scaled.
+    assert parse_range("55") == Bound(55, None)
+    assert parse_range("0.55", is_decimal_cltv=True) == Bound(0.55, None)
+    assert parse_range("0.50-0.60", is_decimal_cltv=True) == Bound(50, 60)
+    assert normalize_value(25) == 0.25 and normalize_value("0.125") == 0.125
+    assert normalize_value("N/A") == normalize_value(9) == normalize_value(None) == "N/A"
+    headers = process_cltv_headers_with_inferred_min([(1, "55%"), (2, "60%"), (3, "65%")], True)
+    assert [bound for _, _, bound in headers] == [Bound(None, 55), Bound(55.01, 60), Bound(60.01, 65)]
+
+
+def test_detects_and_transposes_grids(llpa_guide):
+    results = detect_all_grids(llpa_guide, workers=1)
+    assert [result.sheet_name for result in results] == ["Full Doc", "States", "Cover"]
+    fico, state = results[0].grids[0], results[1].grids[0]
+
+    assert (fico.type, fico.row_dimension, fico.trigger, fico.cell_ref) == ("fico-cltv", "fico", "Primary_Purchase", "A3")
+    assert [label for _, label in fico.row_labels] == ["780+", "760-779", "740-759"]
+    # Like SheetJS, rows and columns count from the sheet's used range, which starts at B2 here.
+    assert (state.id, state.type, state.name, state.is_single_value_max) == ("States-0-0", "state", "States-State@A1", True)
+    assert results[2].grids == []
+
+    rows = results[0].outputs["Full Doc-Primary_Purchase-FICO_"]
+    assert rows[1][:2] == ["Min", "Max"] and rows[1][-3:] == ["Rate", "Price", "Price"]
+    # Ineligible cells are dropped; 25 reads as 0.25.
+    assert len(rows) == 2 + 10
+    assert rows[2][18:20] == [780, None] and rows[2][22:24] == [None, 50] and rows[2][45] == 0.125
+    assert rows[6][18:20] == [760, 779] and rows[6][22:24] == [50.01, 55] and rows[6][45] == 0.375
+
+    state_rows = results[1].outputs["States-State@A1"]
+    # A 0 adjustment is kept; 9 and "n/a" mark ineligible cells.
+    assert len(state_rows) == 2 + 10
+    # State grids carry no row dimension; single-value CLTV headers take their min from the previous header.
+    assert state_rows[2][18:20] == [None, None] and state_rows[2][22:24] == [None, 55] and state_rows[2][45] == 0.1
+    assert state_rows[3][22:24] == [55.01, 60] and state_rows[3][45] == 0.2
+
+
+def test_parallel_scan_matches_serial(llpa_guide):
+    serial = detect_all_grids(llpa_guide, workers=1)
+    parallel = detect_all_grids(llpa_guide, workers=2)
+    assert [(result.sheet_name, result.grids, result.outputs) for result in parallel] == [
+        (result.sheet_name, result.grids, result.outputs) for result in serial
+    ]
+    assert detect_all_grids(llpa_guide, sheets=["States"], workers=1)[0].sheet_name == "States"
+    only = detect_all_grids(llpa_guide, grid_ids=["States-0-0"], workers=1)
+    assert [list(result.outputs) for result in only] == [[], ["States-State@A1"], []]
+    workbook = openpyxl.load_workbook(BytesIO(output_workbook(serial)))
+    assert workbook.sheetnames == ["Full Doc-Primary_Purchase-FICO_", "States-State@A1"]
+
+
+def test_llpa_api_returns_grids_and_output_workbook(llpa_guide, storage_root):
+    client = TestClient(app)
+    upload = {"workbook": ("guide.xlsx", llpa_guide.read_bytes())}
+
+    response = client.post("/api/llpa/grids", files=upload)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["grid_count"], body["tab_count"], body["output_filename"]) == (2, 2, "guide_LoanNEX_LLPAs.xlsx")
+    assert body["sheets"][0]["grids"][0]["tab_name"] == "Full Doc-Primary_Purchase-FICO_"
+    assert body["sheets"][0]["grids"][0]["cltv_headers"][0] == [1, "<=50"]
+
+    response = client.post("/api/llpa/transpose", params={"sheets": ["States"]}, files=upload)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="guide_LoanNEX_LLPAs.xlsx"'
+    workbook = openpyxl.load_workbook(BytesIO(response.content))
+    assert workbook.sheetnames == ["States-State@A1"]
+    assert workbook["States-State@A1"].max_row == 12
+
+    assert client.post("/api/llpa/grids", params={"sheets": ["Missing"]}, files=upload).status_code == 400
+    assert client.post("/api/llpa/grids", files={"workbook": ("notes.xlsx", b"not a workbook")}).status_code == 400
+    assert client.post("/api/llpa/transpose", params={"sheets": ["Cover"]}, files=upload).status_code == 404
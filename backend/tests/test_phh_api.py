@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.database import get_async_db, get_db
+from app.main import app
+from app.models import FileType, Investor, JobRun, JobStatus, JobType, UploadedFile
+
+
+@pytest.fixture
+def client(db_session, async_db):
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_async_db] = async_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _seed_jobs(db_session, count):
+    investor = Investor(name="PHH", code="PHH")
+    db_session.add(investor)
+    db_session.commit()
+    start = datetime(2024, 1, 1, 8)
+    jobs = []
+    for i in range(count):
+        jobs.append(
+            JobRun(
+                investor_id=investor.id,
+                status=JobStatus.COMPLETED if i % 3 else JobStatus.FAILED,
+                job_type=JobType.DAILY_PHH_NONAGENCY,
+                effective_date=date(2024, 1, 1) + timedelta(days=i // 2),
+                # Pairs share a timestamp so the id tie-breaker is exercised.
+                started_at=start + timedelta(minutes=i // 2),
+            )
+        )
+    db_session.add_all(jobs)
+    db_session.commit()
+    return jobs
+
+
+def test_jobs_are_paginated_newest_first_without_gaps(client, db_session):
+    jobs = _seed_jobs(db_session, 11)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/phh/jobs", params=params).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    expected = [j.id for j in sorted(jobs, key=lambda j: (j.started_at, j.id), reverse=True)]
+    assert seen == expected
+
+
+def test_jobs_filter_by_status_and_effective_range(client, db_session):
+    _seed_jobs(db_session, 11)
+    page = client.get("/api/phh/jobs", params={"status": "FAILED", "effective_from": "2024-01-02", "effective_to": "2024-01-05"}).json()
+    assert page["items"]
+    assert all(item["status"] == "FAILED" for item in page["items"])
+    assert all("2024-01-02" <= item["effective_date"] <= "2024-01-05" for item in page["items"])
+    assert client.get("/api/phh/jobs", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_job_detail_lists_only_its_own_uploads_and_names(client, db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    db_session.add(UploadedFile(investor_id=job.investor_id, file_type=FileType.DEL_BASE, original_filename="later.xlsx", stored_path="/tmp/later.xlsx"))
+    db_session.commit()
+
+    detail = client.get(f"/api/phh/jobs/{job.id}").json()
+    assert len(detail["uploaded_files"]) == 4
+    assert "later.xlsx" not in {u["original_filename"] for u in detail["uploaded_files"]}
+    assert {r["product_type"] for r in detail["ratesheets"]} == {"FULLDOC", "ALTDOC", "DSCR"}
+    assert "NA12" in {r["tier"] for r in detail["ratesheets"]}
+
+    first = client.get(f"/api/phh/jobs/{job.id}/ratesheets", params={"limit": 50}).json()
+    rest = client.get(f"/api/phh/jobs/{job.id}/ratesheets", params={"cursor": first["next_cursor"]}).json()
+    assert len(first["items"]) == 50 and len(rest["items"]) == 22
+    assert rest["next_cursor"] is None
@@ -0,0 +1,183 @@
+from datetime import date
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.core.excel_utils import WorkbookCache
+from app.core.price_index import PriceIndex, PriceIndexRegistry, PriceLookupError, compile_grid, price_indexes
+from app.core.pricing_engine import PricingEngine
+from app.database import get_db
+from app.main import app
+from app.models import FileType, Investor, JobRun, JobStatus, JobType, UploadedFile
+
+
+@pytest.fixture
+def client(db_session):
+    price_indexes.clear()
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+        price_indexes.clear()
+
+
+def test_compiled_grid_sorts_rates_and_interpolates():
+    grid = compile_grid(
+        [6.75, "6.5", 6.625, None],
+        np.array([[100.0, 99.0], [99.0, np.nan], [99.5, 98.5], [1.0, 1.0]]),
+        ["Unnamed:1", "Unnamed:2"],
+        ["15 Yr", "30 Yr"],
+        {"NA1": 0.1},
+    )
+    assert grid.note_rates == [6.5, 6.625, 6.75]
+    assert grid.base_price(6.625, "15 yr") == (99.5, False)
+    assert grid.base_price(6.6875, "Unnamed:1") == (99.75, True)
+    with pytest.raises(PriceLookupError):
+        grid.base_price(6.6875, "15 Yr", interpolate=False)
+    with pytest.raises(PriceLookupError):
+        grid.base_price(7.0, "15 Yr")
+    with pytest.raises(PriceLookupError):
+        grid.base_price(6.5, "30 Yr")
+
+
+def test_registry_swaps_in_newer_jobs_and_evicts_old_dates(db_session):
+    investor = Investor(name="PHH", code="PHH")
+    db_session.add(investor)
+    db_session.commit()
+    built = []
+
+    def loader(db, job_run):
+        built.append(job_run.id)
+        return PriceIndex(job_id=job_run.id, investor_id=job_run.investor_id, effective_date=job_run.effective_date, grids={}, seller_tiers={})
+
+    def completed(day):
+        job = JobRun(investor_id=investor.id, status=JobStatus.COMPLETED, job_type=JobType.DAILY_PHH_NONAGENCY, effective_date=date(2024, 1, day))
+        db_session.add(job)
+        db_session.commit()
+        return job
+
+    registry = PriceIndexRegistry(loader=loader, refresh_seconds=0, max_dates=2)
+    with pytest.raises(PriceLookupError):
+        registry.get(db_session, investor.id)
+    first = completed(2)
+    assert registry.get(db_session, investor.id).job_id == first.id
+    assert registry.get(db_session, investor.id).job_id == first.id
+    registry.wait()
+    rerun = completed(2)
+    # The loaded index keeps serving while the refresh builds its replacement in the background.
+    assert registry.get(db_session, investor.id, date(2024, 1, 2)).job_id == first.id
+    registry.wait()
+    assert registry.get(db_session, investor.id, date(2024, 1, 2)).job_id == rerun.id
+    registry.wait()
+    assert built == [first.id, rerun.id]
+
+    later = completed(3)
+    latest = completed(4)
+    assert registry.get(db_session, investor.id).job_id == rerun.id
+    registry.wait()
+    assert registry.get(db_session, investor.id).job_id == latest.id
+    registry.wait()
+    assert registry.get(db_session, investor.id, date(2024, 1, 3)).job_id == later.id
+    registry.wait()
+    assert sorted(registry._indexes) == [(investor.id, date(2024, 1, 3)), (investor.id, date(2024, 1, 4))]
+
+
+def test_price_endpoint_prices_seller_from_completed_job(client, db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+
+    response = client.get(
+        "/api/phh/price", params={"org_id": "100", "channel": "DEL", "product": "FULLDOC", "note_rate": 6.625, "column": "30 Yr"}
+    )
+    assert response.status_code == 200
+    quote = response.json()
+    assert quote["tier"] == "NA1"
+    assert quote["price"] == pytest.approx(98.6)
+    assert quote["interpolated"] is False
+    assert quote["job_id"] == job.id
+
+    interpolated = client.get(
+        "/api/phh/price", params={"org_id": "100", "channel": "DEL", "product": "fulldoc", "note_rate": 6.5625, "column": "30 yr"}
+    ).json()
+    assert interpolated["price"] == pytest.approx(98.35)
+    assert interpolated["interpolated"] is True
+
+    missing = client.get("/api/phh/price", params={"org_id": "200", "channel": "NONDEL", "product": "FULLDOC", "note_rate": 6.5, "column": "15 Yr"})
+    assert missing.status_code == 404
+
+    batch = client.post(
+        "/api/phh/price/batch",
+        json={
+            "loans": [
+                {"org_id": "100", "channel": "NONDEL", "product": "DSCR", "note_rate": 6.75, "column": "15 Yr"},
+                {"org_id": "200", "channel": "DEL", "product": "ALTDOC", "note_rate": 6.5, "column": "30 Yr"},
+                {"org_id": "999", "channel": "DEL", "product": "ALTDOC", "note_rate": 6.5, "column": "30 Yr"},
+            ]
+        },
+    ).json()
+    assert batch["job_id"] == job.id
+    assert batch["results"][0]["quote"]["price"] == pytest.approx(100.5 + 0.2)
+    assert batch["results"][1]["quote"]["price"] == pytest.approx(98.0 + 0.3)
+    assert batch["results"][2]["quote"] is None and "999" in batch["results"][2]["error"]
+
+
+def test_price_index_is_rebuilt_lazily_when_a_newer_job_completes(client, db_session, phh_job):
+    first = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(first.id, workers=0)
+    params = {"org_id": "100", "channel": "DEL", "product": "FULLDOC", "note_rate": 6.5, "column": "15 Yr"}
+    assert client.get("/api/phh/price", params=params).json()["price"] == pytest.approx(99.1)
+
+    second = phh_job(price_offset=1.0)
+    PricingEngine(db_session, cache=WorkbookCache()).generate(second.id, workers=0)
+    # Simulate a job finished by another process: only the lazy refresh can pick it up.
+    price_indexes.clear()
+    quote = client.get("/api/phh/price", params=params).json()
+    assert quote["job_id"] == second.id
+    assert quote["price"] == pytest.approx(100.1)
+
+
+def test_another_investors_job_does_not_replace_phh_prices(client, db_session, phh_job):
+    phh = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(phh.id, workers=0)
+    acme = Investor(code="ACME", name="Acme Mortgage", config={"products": {"FULLDOC": "PHH - FullDoc"}, "base_files": {"DEL": "DEL_BASE"}})
+    db_session.add(acme)
+    db_session.flush()
+    other = JobRun(investor_id=acme.id, status=JobStatus.PENDING, job_type=JobType.DAILY_NONAGENCY, effective_date=phh.effective_date, payload={"mode": "full"})
+    other.uploaded_files = [
+        UploadedFile(investor_id=acme.id, file_type=f.file_type, original_filename=f.original_filename, stored_path=f.stored_path)
+        for f in phh.uploaded_files
+        if f.file_type != FileType.NONDEL_BASE
+    ]
+    db_session.add(other)
+    db_session.commit()
+    # ACME finishes last for the same date, both in this process and as seen by a fresh refresh.
+    PricingEngine(db_session, cache=WorkbookCache()).generate(other.id, workers=0)
+
+    params = {"org_id": "100", "channel": "DEL", "product": "FULLDOC", "note_rate": 6.625, "column": "30 Yr"}
+    for _ in range(2):
+        quote = client.get("/api/phh/price", params=params).json()
+        assert quote["job_id"] == phh.id and quote["price"] == pytest.approx(98.6)
+        price_indexes.clear()
+    assert price_indexes.get(db_session, acme.id).job_id == other.id
+
+    acme_quote = client.get("/api/investors/acme/price", params=params)
+    assert acme_quote.status_code == 200 and acme_quote.json()["job_id"] == other.id
+    batch = client.post("/api/investors/ACME/price/batch", json={"loans": [{k: params[k] for k in ("org_id", "channel", "product", "note_rate", "column")}]})
+    assert batch.json()["job_id"] == other.id
+    assert client.get("/api/investors/NOPE/price", params=params).status_code == 404
+
+
+def test_warm_quotes_do_not_touch_the_database(client, db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    params = {"org_id": "100", "channel": "DEL", "product": "FULLDOC", "note_rate": 6.625, "column": "30 Yr"}
+    assert client.get("/api/phh/price", params=params).status_code == 200
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        assert client.get("/api/phh/price", params=params).json()["job_id"] == job.id
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from app.core.excel_utils import GridMeta
+from app.core.price_tensor import apply_tier_adjustments, grid_to_matrix
+
+
+def _grid():
+    grid_df = pd.DataFrame(
+        {
+            "note_rate": [6.5, 6.625, 6.75],
+            "15 Yr": [99.0, None, 101.25],
+            "30 Yr": [98.5, "N/A", 100.0],
+        },
+        dtype=object,
+    )
+    meta = GridMeta(start_row=1, end_row=3, note_rate_col="Unnamed: 0", price_columns=["15 Yr", "30 Yr"])
+    return grid_df, meta
+
+
+def test_tensor_matches_per_tier_addition():
+    grid_df, meta = _grid()
+    matrix = grid_to_matrix(grid_df, meta)
+    adjustments = [0.125, -0.25, 0.0]
+    tensor = apply_tier_adjustments(matrix, adjustments)
+    assert tensor.shape == (3, 3, 2)
+    for i, adjustment in enumerate(adjustments):
+        expected = pd.to_numeric(grid_df["15 Yr"]).astype(float) + adjustment
+        np.testing.assert_array_equal(tensor[i, :, 0], expected.to_numpy())
+
+
+def test_tier_prices_keep_blank_and_ineligible_cells():
+    grid_df, meta = _grid()
+    matrix = grid_to_matrix(grid_df, meta)
+    tensor = apply_tier_adjustments(matrix, [0.5])
+    prices = matrix.tier_prices(tensor, 0)
+    assert np.isnan(prices[1, 0])
+    assert prices[1, 1] == "N/A"
+    assert prices[2, 0] == 101.75
@@ -0,0 +1,85 @@
+import os
+import zipfile
+import pandas as pd
+from app.core import pricing_engine
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.models import FileType, JobStatus, RateSheet, UploadedFile
+from tests.conftest import build_base_workbook
+
+
+def test_generate_serial_writes_every_tier(db_session, phh_job):
+    job = phh_job()
+    result = PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    assert result == {"count": 72, "failed": 0}
+    db_session.refresh(job)
+    assert job.status == JobStatus.COMPLETED
+    sheets = db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id).all()
+    assert len(sheets) == 72
+    na3 = next(s for s in sheets if s.generated_filename == "PHH_DEL_FULLDOC_NA3_20240102.xlsx")
+    df = pd.read_excel(na3.generated_path, sheet_name="PHH - FullDoc")
+    assert df.loc[2, "Unnamed:1"] == 99.0 + 0.3
+    assert df.loc[0, "Generated Info"] == "Channel: DEL Tier: NA3"
+
+
+def _workbook_parts(path):
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist() if not name.startswith("docProps/")}
+
+
+def test_generate_process_pool_matches_serial(db_session, phh_job, storage_root):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    serial = {s.generated_filename: _workbook_parts(s.generated_path) for s in db_session.query(RateSheet).filter(RateSheet.job_run_id == job.id)}
+    for path in storage_root.rglob("*.xlsx"):
+        path.unlink()
+
+    pooled_job = phh_job()
+    result = PricingEngine(db_session, cache=WorkbookCache()).generate(pooled_job.id, workers=2)
+    assert result["count"] == 72
+    pooled = {s.generated_filename: _workbook_parts(s.generated_path) for s in db_session.query(RateSheet).filter(RateSheet.job_run_id == pooled_job.id)}
+    assert pooled == serial
+
+
+def test_failed_work_item_is_reported_without_losing_others(db_session, phh_job, monkeypatch):
+    job = phh_job()
+    original = pricing_engine.write_tier_matrix_to_workbook
+
+    def flaky(*args, **kwargs):
+        if kwargs["annotation"] == "Channel: NONDEL Tier: NA7":
+            raise OSError("disk full")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(pricing_engine, "write_tier_matrix_to_workbook", flaky)
+    result = PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    assert result == {"count": 69, "failed": 3}
+    db_session.refresh(job)
+    assert job.status == JobStatus.FAILED
+    assert {f["product_code"] for f in job.payload["failed"]} == {"FULLDOC", "ALTDOC", "DSCR"}
+    assert all("disk full" in f["error"] for f in job.payload["failed"])
+
+
+def test_incremental_job_rebuilds_only_changed_inputs(db_session, phh_job, tmp_path):
+    cache = WorkbookCache()
+    first = phh_job()
+    PricingEngine(db_session, cache=cache).generate(first.id, workers=0)
+
+    unchanged = phh_job(upload=False, mode="incremental")
+    PricingEngine(db_session, cache=cache).generate(unchanged.id, workers=0)
+    db_session.refresh(unchanged)
+    assert unchanged.payload["skipped"] == 72
+    assert unchanged.payload["regenerated"] == 0
+    assert unchanged.payload["base_job_id"] == first.id
+
+    nondel = build_base_workbook(tmp_path / "nondel_reprice.xlsx", price_offset=1.0)
+    db_session.add(UploadedFile(investor_id=first.investor_id, file_type=FileType.NONDEL_BASE, original_filename=nondel.name, stored_path=str(nondel)))
+    reprice = phh_job(upload=False, mode="incremental")
+    PricingEngine(db_session, cache=cache).generate(reprice.id, workers=0)
+    db_session.refresh(reprice)
+    assert reprice.payload["skipped"] == 36
+    assert reprice.payload["regenerated"] == 36
+    sheets = db_session.query(RateSheet).filter(RateSheet.job_run_id == reprice.id).all()
+    assert len(sheets) == 72
+    assert all(os.path.exists(s.generated_path) for s in sheets)
+    regenerated = [s for s in sheets if "reused_from" not in s.metadata_]
+    assert {s.channel.value for s in regenerated} == {"NONDEL"}
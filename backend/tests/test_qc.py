@@ -0,0 +1,79 @@
+from datetime import date
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.core.distribution import DistributionClaimError, DistributionEngine
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.core.qc import QC_APPROVED, QC_FLAGGED, QCThresholds, run_qc
+from app.database import get_db
+from app.email import SendGridSink
+from app.main import app
+from app.models import JobRun, JobStatus, QCReview
+
+
+def test_first_job_records_tier_order_findings_without_a_prior_day(db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    db_session.refresh(job)
+
+    qc = job.payload["qc"]
+    assert qc["previous_job_id"] is None
+    assert qc["counts"]["price_change"] == 0 and qc["counts"]["ladder"] == 0
+    # The fixture adjustors step up from NA1 to NA12, so every adjacent pair prices the wrong way round.
+    assert qc["counts"]["tier_order"] > 0
+    review = db_session.get(QCReview, qc["review_id"])
+    assert review.status == QC_FLAGGED
+    assert {finding["check"] for finding in review.findings} == {"tier_order"}
+    # Gating is opt-in, so the flagged job still completes.
+    assert job.status == JobStatus.COMPLETED
+
+
+def test_day_over_day_moves_are_flagged_against_the_previous_job(db_session, phh_job):
+    engine = PricingEngine(db_session, cache=WorkbookCache())
+    first = phh_job(effective_date=date(2024, 1, 2))
+    engine.generate(first.id, workers=0)
+    second = phh_job(effective_date=date(2024, 1, 3), price_offset=1.5)
+    engine.generate(second.id, workers=0)
+
+    result = run_qc(db_session, db_session.get(JobRun, second.id), QCThresholds(max_price_change=1.0))
+    assert result["previous_job_id"] == first.id
+    assert result["counts"]["price_change"] == result["checked_cells"]
+    assert result["counts"]["missing_cell"] == 0 and result["counts"]["missing_rate"] == 0
+    assert result["seconds"] < 1
+    findings = [f for f in db_session.get(QCReview, result["review_id"]).findings if f["check"] == "price_change"]
+    assert findings[0]["delta"] == 1.5
+
+    calm = run_qc(db_session, db_session.get(JobRun, second.id), QCThresholds(max_price_change=2.0))
+    assert calm["counts"]["price_change"] == 0
+
+
+def test_qc_gate_holds_flagged_jobs_for_review(db_session, phh_job, monkeypatch):
+    monkeypatch.setattr(settings, "qc_gate", True)
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    db_session.refresh(job)
+    assert job.payload["qc"]["status"] == QC_FLAGGED
+    assert job.status == JobStatus.WAITING_FOR_QC
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        client = TestClient(app)
+        # Held jobs cannot reach sellers or the admin list until someone signs them off.
+        for route in ("distribute", "send_emails"):
+            response = client.post(f"/api/phh/jobs/{job.id}/{route}", json={})
+            assert response.status_code == 400 and response.json()["detail"] == "Job is waiting for QC approval"
+        with pytest.raises(DistributionClaimError):
+            DistributionEngine(db_session, transport=httpx.MockTransport(lambda request: httpx.Response(202)), sink=SendGridSink("test-key", "rates@example.com")).run(job.id)
+
+        response = client.post(f"/api/phh/jobs/{job.id}/qc/approve", json={"comments": "Tier inversions expected after the reprice"})
+        assert response.status_code == 200
+        assert response.json() == {"job_id": job.id, "status": "APPROVED_FOR_DISTRIBUTION", "review_id": job.payload["qc"]["review_id"]}
+        assert client.post(f"/api/phh/jobs/{job.id}/qc/approve", json={}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+    review = db_session.get(QCReview, job.payload["qc"]["review_id"])
+    assert (review.status, review.comments, review.summary["status"]) == (QC_APPROVED, "Tier inversions expected after the reprice", QC_FLAGGED)
+    db_session.refresh(job)
+    assert job.status == JobStatus.APPROVED_FOR_DISTRIBUTION
@@ -0,0 +1,41 @@
+from sqlalchemy import event
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.core.reference_data import ReferenceData
+from app.models import Investor, ProductType, Tier
+
+
+def test_ensure_tiers_is_idempotent_and_tolerates_existing_rows(db_session):
+    investor = Investor(name="PHH", code="PHH")
+    db_session.add(investor)
+    db_session.commit()
+    db_session.add(Tier(investor_id=investor.id, code="NA2", numeric_index=2))
+    db_session.commit()
+
+    reference = ReferenceData(db_session, investor.id)
+    reference.tiers.pop("NA2")  # simulate a row inserted concurrently after the preload
+    tiers = reference.ensure_tiers(["NA1", "NA2", "NA12"])
+    assert {code: tier.numeric_index for code, tier in tiers.items()} == {"NA1": 1, "NA2": 2, "NA12": 12}
+    reference.ensure_tiers(["NA1"])
+    assert db_session.query(Tier).count() == 3
+
+    products = reference.ensure_product_types({"FULLDOC": "PHH - FullDoc"})
+    assert products["FULLDOC"].sheet_name == "PHH - FullDoc"
+    assert ReferenceData(db_session, investor.id).product_type_id("FULLDOC") == products["FULLDOC"].id
+    assert db_session.query(ProductType).count() == 1
+
+
+def test_generate_statement_count_does_not_scale_with_outputs(db_session, phh_job):
+    job = phh_job()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    rate_sheet_inserts = [s for s in statements if s.startswith("INSERT INTO rate_sheets")]
+    assert len(rate_sheet_inserts) <= 1
+    assert not any(s.startswith("SELECT") and "FROM tiers" in s and "tiers.code =" in s for s in statements)
+    # Roster sync adds a fixed handful of snapshot and bulk statements.
+    assert len(statements) < 50
@@ -0,0 +1,90 @@
+from app.core.excel_utils import WorkbookCache, parse_customer_tiers
+from app.core.pricing_engine import PricingEngine
+from app.core.roster_sync import _staging_csv, sync_roster
+from app.models import ChannelEnum, Investor, Seller, SellerTierAssignment
+from tests.conftest import build_customer_csv
+
+
+def _roster(tmp_path, name, rows):
+    return parse_customer_tiers(build_customer_csv(tmp_path / name, rows))
+
+
+def _assignments(db_session):
+    return {
+        (a.seller.org_id, a.channel): a.non_agency_tier_code
+        for a in db_session.query(SellerTierAssignment).all()
+    }
+
+
+def test_roster_sync_applies_inserts_changes_and_deactivations(db_session, tmp_path):
+    investor = Investor(name="PHH", code="PHH")
+    db_session.add(investor)
+    db_session.commit()
+    first = _roster(
+        tmp_path,
+        "first.csv",
+        [
+            {"Org Name": "Org A", "Org ID": "100", "NMLSID": "1", "DEL NonAgency": "NA1", "ND NonAgency": "NA2", "Primary Email": "a@example.com"},
+            {"Org Name": "Org B", "Org ID": "200", "NMLSID": "2", "DEL NonAgency": "NA3", "ND NonAgency": "NA3", "Primary Email": "b@example.com"},
+            {"Org Name": "Org C", "Org ID": "300", "NMLSID": "3", "DEL NonAgency": "NA5", "ND NonAgency": None, "Primary Email": "c@example.com"},
+        ],
+    )
+    result = sync_roster(db_session, investor.id, first)
+    assert result.as_dict() == {
+        "sellers_inserted": 3,
+        "sellers_updated": 0,
+        "sellers_deactivated": 0,
+        "tiers_assigned": 5,
+        "tiers_changed": 0,
+        "tiers_removed": 0,
+    }
+    assert sync_roster(db_session, investor.id, first).as_dict() == dict.fromkeys(result.as_dict(), 0)
+
+    second = _roster(
+        tmp_path,
+        "second.csv",
+        [
+            {"Org Name": "Org A", "Org ID": "100", "NMLSID": "1", "DEL NonAgency": "NA4", "ND NonAgency": "NA2", "Primary Email": "a@example.com"},
+            {"Org Name": "Org B", "Org ID": "200", "NMLSID": "2", "DEL NonAgency": "NA3", "ND NonAgency": None, "Primary Email": "new-b@example.com"},
+            {"Org Name": "Org D", "Org ID": "400", "NMLSID": "4", "DEL NonAgency": None, "ND NonAgency": "NA7", "Primary Email": "d@example.com"},
+        ],
+    )
+    result = sync_roster(db_session, investor.id, second)
+    db_session.commit()
+    assert result.as_dict() == {
+        "sellers_inserted": 1,
+        "sellers_updated": 1,
+        "sellers_deactivated": 1,
+        "tiers_assigned": 1,
+        "tiers_changed": 1,
+        "tiers_removed": 2,
+    }
+    sellers = {s.org_id: s for s in db_session.query(Seller).all()}
+    assert not sellers["300"].is_active
+    assert sellers["200"].primary_email == "new-b@example.com"
+    assert _assignments(db_session) == {
+        ("100", ChannelEnum.DEL): "NA4",
+        ("100", ChannelEnum.NONDEL): "NA2",
+        ("200", ChannelEnum.DEL): "NA3",
+        ("400", ChannelEnum.NONDEL): "NA7",
+    }
+
+    result = sync_roster(db_session, investor.id, first)
+    assert result.sellers_updated == 2
+    assert result.sellers_deactivated == 1
+    assert db_session.query(Seller).filter(Seller.org_id == "300").one().is_active
+
+
+def test_generate_records_roster_changes(db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    db_session.refresh(job)
+    assert job.payload["roster"]["sellers_inserted"] == 2
+    assert job.payload["roster"]["tiers_assigned"] == 3
+    assert db_session.query(SellerTierAssignment).count() == 3
+
+
+def test_copy_input_keeps_null_apart_from_empty_strings():
+    columns = {"id": "integer", "org_id": "text", "org_name": "text", "nmlsid": "text", "primary_email": "text"}
+    rows = [{"id": None, "org_id": "7", "org_name": 'Org "A", Inc', "nmlsid": "", "primary_email": "\\N"}]
+    assert _staging_csv(columns, rows) == '\\N,"7","Org ""A"", Inc","","\\N"\n'
@@ -0,0 +1,96 @@
+import threading
+import time
+from datetime import date, datetime
+from sqlalchemy.orm import sessionmaker
+from app.core.job_queue import JobQueue, JobWorker, MemoryQueueBackend
+from app.core.scheduler import FairScheduler, ScheduledJob, describe_job
+from app.models import Investor, JobRun, JobStatus, JobType
+
+
+def test_scheduler_runs_earliest_deadline_first_within_caps():
+    scheduler = FairScheduler()
+    nine, ten = datetime(2024, 1, 2, 14), datetime(2024, 1, 2, 15)
+    scheduler.add(ScheduledJob(1, "A", ten, max_concurrent=1))
+    scheduler.add(ScheduledJob(2, "A", nine, max_concurrent=1))
+    scheduler.add(ScheduledJob(3, "B", None))
+    scheduler.add(ScheduledJob(4, "C", ten))
+
+    first = scheduler.pop()
+    assert first.job_id == 2
+    # A is at its cap, so its 10am job waits behind C's even though it arrived first.
+    assert scheduler.pop().job_id == 4
+    assert scheduler.pop().job_id == 3
+    assert scheduler.pop() is None and len(scheduler) == 1
+    scheduler.done(first)
+    assert scheduler.pop().job_id == 1
+    assert scheduler.snapshot()["A"] == {"queued": 0, "running": 1, "max_concurrent": 1}
+
+
+def test_equal_deadlines_go_to_the_investor_with_fewer_running():
+    scheduler = FairScheduler()
+    deadline = datetime(2024, 1, 2, 14)
+    for job_id in (1, 2, 3):
+        scheduler.add(ScheduledJob(job_id, "A", deadline))
+    scheduler.add(ScheduledJob(4, "B", deadline))
+    assert [scheduler.pop().job_id for _ in range(4)] == [1, 4, 2, 3]
+
+
+def test_describe_job_uses_the_investor_deadline_and_payload_override(db_session):
+    investor = Investor(name="Acme", code="ACME", config={"products": {"FULLDOC": "Full"}, "deadline": "09:00", "max_concurrent_jobs": 2})
+    db_session.add(investor)
+    db_session.flush()
+    configured = JobRun(investor_id=investor.id, status=JobStatus.PENDING, job_type=JobType.DAILY_NONAGENCY, effective_date=date(2024, 7, 1), payload={})
+    override = JobRun(
+        investor_id=investor.id,
+        status=JobStatus.PENDING,
+        job_type=JobType.DAILY_NONAGENCY,
+        effective_date=date(2024, 7, 1),
+        payload={"deadline": "2024-07-01T08:30:00-04:00"},
+    )
+    db_session.add_all([configured, override])
+    db_session.commit()
+
+    # 9am New York is 13:00 UTC in July.
+    assert describe_job(db_session, configured.id) == ScheduledJob(configured.id, "ACME", datetime(2024, 7, 1, 13), 2)
+    assert describe_job(db_session, override.id).deadline == datetime(2024, 7, 1, 12, 30)
+    assert describe_job(db_session, 999999) == ScheduledJob(999999)
+
+
+def test_worker_shares_slots_across_investors_and_respects_caps(db_session):
+    lanes = {1: "A", 2: "A", 3: "A", 4: "B", 5: "C"}
+    caps = {"A": 1}
+    running, peak, order = {}, {}, []
+    lock = threading.Lock()
+
+    def runner(session_factory, job_id):
+        investor = lanes[job_id]
+        with lock:
+            order.append(job_id)
+            running[investor] = running.get(investor, 0) + 1
+            peak[investor] = max(peak.get(investor, 0), running[investor])
+            peak["total"] = max(peak.get("total", 0), sum(running.values()))
+        time.sleep(0.05)
+        with lock:
+            running[investor] -= 1
+
+    job_queue = JobQueue(MemoryQueueBackend())
+    for job_id in lanes:
+        job_queue.enqueue(job_id)
+    worker = JobWorker(
+        job_queue,
+        sessionmaker(bind=db_session.get_bind()),
+        concurrency=3,
+        runner=runner,
+        describe=lambda job_id: ScheduledJob(job_id, lanes[job_id], max_concurrent=caps.get(lanes[job_id])),
+    )
+    worker.start()
+    deadline = time.monotonic() + 5
+    while len(order) < len(lanes) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.stop(timeout=5)
+
+    assert sorted(order) == sorted(lanes)
+    assert peak["A"] == 1
+    assert peak["total"] == 3
+    # B and C start alongside A's first job instead of queueing behind A's backlog.
+    assert set(order[:3]) == {1, 4, 5}
@@ -0,0 +1,73 @@
+from pathlib import Path
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+from app.database import Base
+from benchmarks.bench_import_time import BACKEND_ROOT, DEFAULT_BUDGET_MS, parse_importtime, profile_import
+
+
+def test_parse_importtime_keeps_outermost_package_times():
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       500 |       800 |     numpy.core",
+            "import time:       300 |      1500 |   numpy",
+            "import time:       100 |      4000 | app.main",
+        ]
+    )
+    profile = parse_importtime(stderr, "app.main")
+    assert profile.cumulative_ms == 4.0
+    assert profile.packages == {"numpy": 1.5}
+    assert profile.lazy_violations() == ["numpy"]
+
+
+def test_api_starts_without_heavy_imports_within_budget():
+    profile = profile_import("app.main")
+    assert profile.lazy_violations() == []
+    assert profile.cumulative_ms < DEFAULT_BUDGET_MS, profile.heaviest()
+
+
+def _alembic_config(url):
+    config = Config(str(BACKEND_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_ROOT / "alembic"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    url = f"sqlite:///{tmp_path / 'schema.db'}"
+    config = _alembic_config(url)
+    command.upgrade(config, "head")
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+        command.downgrade(config, "base")
+        assert inspect(engine).get_table_names() == ["alembic_version"]
+    finally:
+        engine.dispose()
+
+
+def test_database_from_before_migrations_upgrades_to_head(tmp_path):
+    url = f"sqlite:///{tmp_path / 'legacy.db'}"
+    config = _alembic_config(url)
+    # 0001 is the schema create_all used to build; without its version row the database looks pre-Alembic.
+    command.upgrade(config, "0001")
+    engine = create_engine(url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
+            connection.execute(text("INSERT INTO investors (id, name, code, is_active) VALUES (1, 'PHH', 'PHH', 1)"))
+            connection.execute(text("INSERT INTO job_runs (id, investor_id, status, job_type) VALUES (7, 1, 'DISTRIBUTED', 'DAILY_PHH_NONAGENCY')"))
+            connection.execute(text("INSERT INTO email_distributions (id, investor_id, job_run_id, subject, status) VALUES (3, 1, 7, 'Rates', 'SENT')"))
+        assert "sha256" not in {column["name"] for column in inspect(engine).get_columns("uploaded_files")}
+
+        command.upgrade(config, "head")
+        with engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), Base.metadata) == []
+            assert connection.execute(text("SELECT job_run_id, seller_id, idempotency_key FROM email_distributions")).all() == [(7, None, None)]
+            assert connection.execute(text("SELECT status FROM job_runs")).scalar() == "DISTRIBUTED"
+    finally:
+        engine.dispose()
@@ -0,0 +1,25 @@
+import hashlib
+from io import BytesIO
+from app.core.storage import store_stream
+
+
+def test_store_stream_hashes_and_dedups(tmp_path):
+    payload = b"rate sheet bytes" * 1000
+    first = store_stream(BytesIO(payload), tmp_path, suffix=".XLSX", chunk_size=64)
+    assert first.sha256 == hashlib.sha256(payload).hexdigest()
+    assert first.size_bytes == len(payload)
+    assert first.path == tmp_path / first.sha256[:2] / first.sha256[2:4] / f"{first.sha256}.xlsx"
+    assert first.path.read_bytes() == payload
+    assert not first.reused
+
+    second = store_stream(BytesIO(payload), tmp_path, suffix=".xlsx")
+    assert second.reused
+    assert second.path == first.path
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_store_stream_keeps_distinct_content_apart(tmp_path):
+    first = store_stream(BytesIO(b"monday"), tmp_path, suffix=".csv")
+    second = store_stream(BytesIO(b"tuesday"), tmp_path, suffix=".csv")
+    assert first.path != second.path
+    assert first.path.read_bytes() == b"monday"
@@ -0,0 +1,68 @@
+import pstats
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.core.excel_utils import WorkbookCache
+from app.core.pricing_engine import PricingEngine
+from app.core.telemetry import JobTrace
+from app.database import get_async_db, get_db
+from app.main import app
+
+
+def test_job_payload_records_stage_timings_and_counts(db_session, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    db_session.refresh(job)
+
+    timings = job.payload["timings"]
+    assert list(timings["stages"]) == ["parsing", "roster", "pricing", "writing", "saving", "qc"]
+    assert timings["stages"]["parsing"]["customers"] == 2
+    assert timings["stages"]["pricing"]["items"] == 72
+    assert timings["stages"]["writing"]["files"] == 72
+    assert timings["stages"]["writing"]["bytes"] > 0
+    assert timings["stages"]["saving"]["rows"] == 72
+    assert timings["total_seconds"] >= sum(stage["seconds"] for stage in timings["stages"].values())
+    assert "profile_path" not in job.payload
+
+
+def test_disabled_trace_records_nothing(db_session, phh_job, monkeypatch):
+    monkeypatch.setattr(settings, "telemetry_enabled", False)
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    db_session.refresh(job)
+    assert "timings" not in job.payload
+
+    trace = JobTrace()
+    with trace.span("parsing") as span:
+        span.add("rows", 10)
+    assert trace.stages == {}
+    assert trace.finish("COMPLETED") is None
+
+
+def test_profile_is_saved_alongside_outputs(db_session, phh_job, storage_root):
+    job = phh_job()
+    job.payload = {**job.payload, "profile": True}
+    db_session.commit()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    db_session.refresh(job)
+
+    profile_path = job.payload["profile_path"]
+    assert profile_path.startswith(str(storage_root / "PHH" / "20240102" / f"job_{job.id}"))
+    assert pstats.Stats(profile_path).total_calls > 0
+
+
+def test_metrics_endpoint_exposes_job_and_request_histograms(db_session, async_db, phh_job):
+    job = phh_job()
+    PricingEngine(db_session, cache=WorkbookCache()).generate(job.id, workers=0)
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_async_db] = async_db
+    try:
+        client = TestClient(app)
+        assert client.get(f"/api/phh/jobs/{job.id}").status_code == 200
+        body = client.get("/metrics").text
+    finally:
+        app.dependency_overrides.clear()
+
+    assert 'phh_job_duration_seconds_count{status="COMPLETED"}' in body
+    assert "phh_rate_sheet_write_seconds_count" in body
+    assert "phh_job_queue_wait_seconds_count" in body
+    assert 'phh_http_request_seconds_count{method="GET",route="/api/phh/jobs/{job_id}",status="200"}' in body
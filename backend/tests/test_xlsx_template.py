@@ -0,0 +1,65 @@
+import zipfile
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Font
+from app.core.excel_utils import parse_base_grid, write_tier_grid_to_workbook
+
+
+def _build_styled_workbook(path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "PHH - FullDoc"
+    ws["D2"] = "Note Rate"
+    ws["E2"] = "15 Yr"
+    ws["F2"] = "30 Yr"
+    for i, rate in enumerate([6.5, 6.625, 6.75]):
+        ws.cell(row=3 + i, column=4, value=rate)
+        ws.cell(row=3 + i, column=5, value=99.0 + i)
+        ws.cell(row=3 + i, column=6, value=100.0 + i).font = Font(bold=True)
+    ws["B10"] = "=E4+1"
+    ws.column_dimensions["E"].width = 31
+    notes = wb.create_sheet("Notes")
+    notes["A1"] = "Totals"
+    notes["B1"] = "=SUM(1,2)"
+    wb.save(path)
+
+
+def test_template_writer_patches_grid_and_keeps_other_parts(tmp_path):
+    base = tmp_path / "base.xlsx"
+    _build_styled_workbook(base)
+    grid_df, meta = parse_base_grid(base, "PHH - FullDoc")
+    adjusted = grid_df.copy()
+    for col in meta.price_columns:
+        adjusted[col] = adjusted[col].astype(float) + 0.5
+    adjusted.loc[adjusted.index[1], meta.price_columns[0]] = float("nan")
+    output = tmp_path / "out.xlsx"
+    write_tier_grid_to_workbook(base, "PHH - FullDoc", meta, adjusted.rename(columns={"note_rate": meta.note_rate_col}), output, annotation="Channel: DEL Tier: NA1")
+
+    with zipfile.ZipFile(base) as original, zipfile.ZipFile(output) as patched:
+        assert original.namelist() == patched.namelist()
+        assert original.read("xl/worksheets/sheet2.xml") == patched.read("xl/worksheets/sheet2.xml")
+        assert original.read("xl/styles.xml") == patched.read("xl/styles.xml")
+
+    wb = openpyxl.load_workbook(output)
+    ws = wb["PHH - FullDoc"]
+    assert ws["E3"].value == 99.5
+    assert ws["E4"].value is None
+    assert ws["F4"].value == 101.5
+    assert ws["F3"].font.bold
+    assert ws["B10"].value == "=E4+1"
+    assert ws.column_dimensions["E"].width == 31
+    assert ws["G1"].value == "Generated Info"
+    assert ws["G2"].value == "Channel: DEL Tier: NA1"
+    assert wb["Notes"]["B1"].value == "=SUM(1,2)"
+
+
+def test_template_and_pandas_engines_agree_on_values(tmp_path):
+    base = tmp_path / "base.xlsx"
+    _build_styled_workbook(base)
+    grid_df, meta = parse_base_grid(base, "PHH - FullDoc")
+    adjusted = grid_df.rename(columns={"note_rate": meta.note_rate_col})
+    for engine in ("template", "pandas"):
+        write_tier_grid_to_workbook(base, "PHH - FullDoc", meta, adjusted, tmp_path / f"{engine}.xlsx", annotation="note", engine=engine)
+    template_df = pd.read_excel(tmp_path / "template.xlsx", sheet_name="PHH - FullDoc")
+    pandas_df = pd.read_excel(tmp_path / "pandas.xlsx", sheet_name="PHH - FullDoc")
+    pd.testing.assert_frame_equal(template_df, pandas_df)
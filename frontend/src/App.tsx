@@ -9,10 +9,20 @@ interface Job {
   job_type: string
 }
 
+interface JobProgress {
+  id: number
+  status: string
+  stage: string | null
+  done: number
+  total: number
+  error_message: string | null
+}
+
 const API_BASE = import.meta.env.VITE_API_BASE || 'http://localhost:8000'
 
 const App: React.FC = () => {
   const [jobs, setJobs] = useState<Job[]>([])
+  const [progress, setProgress] = useState<JobProgress | null>(null)
   const [effectiveDate, setEffectiveDate] = useState('')
   const [files, setFiles] = useState<Record<string, File | null>>({
     customer_tiers_csv: null,
@@ -23,7 +33,7 @@ const App: React.FC = () => {
 
   const loadJobs = async () => {
     const res = await axios.get(`${API_BASE}/api/phh/jobs`)
-    setJobs(res.data)
+    setJobs(res.data.items)
   }
 
   useEffect(() => {
@@ -40,10 +50,22 @@ const App: React.FC = () => {
     Object.entries(files).forEach(([key, file]) => {
       if (file) form.append(key, file)
     })
-    await axios.post(`${API_BASE}/api/phh/ingest`, form, {
+    const res = await axios.post(`${API_BASE}/api/phh/ingest`, form, {
       headers: { 'Content-Type': 'multipart/form-data' },
     })
     await loadJobs()
+    watchProgress(res.data.job_id)
+  }
+
+  const watchProgress = (jobId: number) => {
+    const timer = window.setInterval(async () => {
+      const res = await axios.get<JobProgress>(`${API_BASE}/api/phh/jobs/${jobId}/progress`)
+      setProgress(res.data)
+      if (!['PENDING', 'RUNNING'].includes(res.data.status)) {
+        window.clearInterval(timer)
+        await loadJobs()
+      }
+    }, 2000)
   }
 
   return (
@@ -66,6 +88,14 @@ const App: React.FC = () => {
             <Grid item xs={12}>
               <Button variant="contained" onClick={handleUpload} disabled={!effectiveDate}>Upload Inputs & Start Run</Button>
             </Grid>
+            {progress && (
+              <Grid item xs={12}>
+                <Typography>
+                  Job {progress.id}: {progress.status}{progress.stage ? ` – ${progress.stage}` : ''} ({progress.done}/{progress.total})
+                  {progress.error_message ? ` – ${progress.error_message}` : ''}
+                </Typography>
+              </Grid>
+            )}
           </Grid>
         </CardContent>
       </Card>